@@ -9,6 +9,7 @@ from .emails import (
     email_user_approved,
     email_user_rejected,
 )
+from .principal_cache import invalidate_principal
 
 
 APPROVE_ROLE_CHOICES = (
@@ -120,6 +121,7 @@ class AccessRequestAdmin(admin.ModelAdmin):
                 u.role = role
                 u.status = "active"
                 u.save(update_fields=["role", "status"])
+                invalidate_principal(u)
                 try:
                     email_user_approved(u)
                 except Exception:
@@ -146,6 +148,7 @@ class AccessRequestAdmin(admin.ModelAdmin):
                 if (u.status or "").lower() != "active":
                     u.status = "pending"
                     u.save(update_fields=["status"])
+                    invalidate_principal(u)
                 try:
                     email_user_rejected(u, note)
                 except Exception:
@@ -1,18 +1,18 @@
-import jwt
-from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from rest_framework import exceptions
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 
 from .models import AppUser
+from .views_common import _request_auth
 
 
 class JWTAuthentication(BaseAuthentication):
     """
     Minimal JWT auth backend for DRF built on the same signing settings used by the auth views.
 
-    It expects `Authorization: Bearer <token>` headers, decodes the payload with the configured
-    `JWT_SECRET`/`JWT_ALGORITHM`, and loads the matching `AppUser`. Any failure results in
+    It expects `Authorization: Bearer <token>` headers and reuses the request's shared auth state
+    (`views_common._request_auth`), so the token is decoded and the `AppUser` loaded once per request
+    even when the middleware has already looked at it. Any failure results in
     `AuthenticationFailed`, giving DRF enough context to return a 401.
     """
 
@@ -36,24 +36,22 @@ class JWTAuthentication(BaseAuthentication):
         if len(parts) > 2:
             raise exceptions.AuthenticationFailed(_("Invalid Authorization header. Token string should not contain spaces."))
 
-        token = parts[1]
-        try:
-            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except jwt.ExpiredSignatureError as exc:
-            raise exceptions.AuthenticationFailed(_("Token has expired.")) from exc
-        except jwt.InvalidTokenError as exc:
-            raise exceptions.AuthenticationFailed(_("Invalid token.")) from exc
+        # The decode and user lookup are shared with the middleware and view helpers
+        state = _request_auth(request)
+        if state.error == "expired":
+            raise exceptions.AuthenticationFailed(_("Token has expired."))
+        if state.payload is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
 
-        user_id = payload.get("sub")
+        user_id = str(state.payload.get("sub") or "")
         if not user_id:
             raise exceptions.AuthenticationFailed(_("Token payload missing subject."))
 
-        try:
-            user = AppUser.objects.get(id=user_id)
-        except AppUser.DoesNotExist as exc:
-            raise exceptions.AuthenticationFailed(_("User not found.")) from exc
+        user = state.actor
+        if not isinstance(user, AppUser) or str(user.id) != user_id:
+            raise exceptions.AuthenticationFailed(_("User not found."))
 
         if getattr(user, "status", "").lower() == "deactivated":
             raise exceptions.AuthenticationFailed(_("User account is deactivated."))
 
-        return (user, payload)
+        return (user, state.payload)
@@ -7,7 +7,8 @@ from urllib.parse import parse_qs
 from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
-from .views_common import _actor_from_token, _safe_user_from_db
+from .jwt_tokens import verify_token
+from .views_common import _actor_from_payload, _safe_user_from_db
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,12 @@ logger = logging.getLogger(__name__)
 async def _resolve_actor(token: str):
     if not token:
         return None
-    return await sync_to_async(_actor_from_token, thread_sensitive=True)(token)
+    # Signature and expiry are checked on the event loop; only the user lookup needs a thread
+    try:
+        payload = verify_token(token)
+    except Exception:
+        return None
+    return await sync_to_async(_actor_from_payload, thread_sensitive=True)(payload)
 
 
 def _role_group(role: str) -> str:
@@ -0,0 +1,132 @@
+"""Binary storage format for face embeddings.
+
+``FaceTemplate.embedding_vector`` holds an 8-byte header followed by the
+vector as contiguous little-endian float32:
+
+    b"FE" | version (u8) | dtype (u8, 1 = float32) | dimension (u32 LE) | values
+
+A 512-dimension Facenet512 embedding is 2,056 bytes, against about 10 KB of
+JSON text. ``unpack_embedding`` returns a read-only NumPy view over the
+stored bytes (``np.frombuffer``), so nothing is parsed or copied on login.
+
+The JSON ``embedding`` column is kept during the transition and is still
+written alongside the binary column, so older workers during a rolling
+deploy, or a code rollback that leaves migration 0054 applied, keep reading
+valid embeddings. Migration 0054 fills the binary column for existing rows
+in batches without touching their text; rows still written as JSON only
+(by older workers, say) are read through the JSON fallback and converted by
+``manage.py convert_face_embeddings``. Clearing the text is left to a later
+migration, once no reader depends on it.
+
+Encoding uses only the standard library, so the migration and model code
+do not import NumPy; decoding imports it on first use.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from typing import Iterable, Optional
+
+
+MAGIC = b"FE"
+VERSION = 1
+DTYPE_FLOAT32 = 1
+_HEADER = struct.Struct("<2sBBI")
+HEADER_SIZE = _HEADER.size
+
+
+def pack_embedding(values: Iterable[float]) -> bytes:
+    """Header plus float32 bytes for ``values`` (a list, array or 1-D NumPy vector)."""
+    floats = array("f", (float(v) for v in values))
+    if sys.byteorder != "little":
+        floats.byteswap()
+    return _HEADER.pack(MAGIC, VERSION, DTYPE_FLOAT32, len(floats)) + floats.tobytes()
+
+
+def unpack_embedding(data):
+    """Read-only float32 NumPy view of packed ``data``; ``ValueError`` if malformed."""
+    import numpy as np
+
+    buf = memoryview(data)
+    if buf.nbytes < HEADER_SIZE:
+        raise ValueError("Embedding is shorter than its header")
+    magic, version, dtype, dim = _HEADER.unpack_from(buf)
+    if magic != MAGIC or version != VERSION or dtype != DTYPE_FLOAT32:
+        raise ValueError(f"Unsupported embedding encoding {magic!r} v{version} dtype {dtype}")
+    if buf.nbytes != HEADER_SIZE + 4 * dim:
+        raise ValueError(f"Embedding header says {dim} values but {buf.nbytes - HEADER_SIZE} bytes follow")
+    return np.frombuffer(buf, dtype="<f4", count=dim, offset=HEADER_SIZE)
+
+
+def read_embedding(packed, text=""):
+    """Vector from the binary column, falling back to JSON ``text``; ``None`` if neither reads."""
+    if packed is not None:
+        try:
+            return unpack_embedding(packed)
+        except ValueError:
+            return None
+    data = json_to_packed(text)
+    return unpack_embedding(data) if data is not None else None
+
+
+def embedding_to_json(values) -> str:
+    """Legacy JSON text for ``values``, written alongside the binary column during the transition."""
+    return json.dumps([float(v) for v in values])
+
+
+def json_to_packed(text) -> Optional[bytes]:
+    """Packed form of a JSON embedding, or ``None`` if it is not a flat list of numbers."""
+    try:
+        values = json.loads(text)
+        if not isinstance(values, list) or not values:
+            return None
+        return pack_embedding(values)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def convert_json_rows(model, batch_size: int = 500) -> dict:
+    """Copy JSON embeddings of ``model`` (FaceTemplate or its migration state) to the binary column.
+
+    Rows are walked by primary key, ``batch_size`` at a time, and each batch
+    is saved with one ``bulk_update``. The JSON text is left in place for
+    readers that predate the binary column; rows that do not parse are
+    skipped.
+    """
+    from django.db import transaction
+
+    stats = {"converted": 0, "invalid": 0}
+    last_pk = None
+    while True:
+        qs = model.objects.filter(embedding_vector__isnull=True).exclude(embedding="").order_by("pk")
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        rows = list(qs.only("pk", "embedding")[:batch_size])
+        if not rows:
+            return stats
+        last_pk = rows[-1].pk
+        changed = []
+        for row in rows:
+            packed = json_to_packed(row.embedding)
+            if packed is None:
+                stats["invalid"] += 1
+                continue
+            row.embedding_vector = packed
+            changed.append(row)
+        with transaction.atomic():
+            model.objects.bulk_update(changed, ["embedding_vector"])
+        stats["converted"] += len(changed)
+
+
+__all__ = [
+    "HEADER_SIZE",
+    "pack_embedding",
+    "unpack_embedding",
+    "read_embedding",
+    "embedding_to_json",
+    "json_to_packed",
+    "convert_json_rows",
+]
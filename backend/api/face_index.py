@@ -0,0 +1,255 @@
+"""In-memory matrix of enrolled face embeddings, one per DeepFace model.
+
+Face login used to load every ``FaceTemplate`` and compare the probe
+against each embedding in a Python loop. This index keeps, per model, an
+``(n, dim)`` float32 matrix of L2-normalised embeddings plus the template
+and user ids of each row. A match is one matrix-vector product (cosine
+similarity) followed by a partial sort for the top ``k`` rows.
+
+Rows are read from the binary ``embedding_vector`` column (zero-copy, see
+``api.face_embeddings``), or from the legacy JSON text for rows not yet
+converted. The matrix is built from the database on first use.
+``face_register`` and ``face_unregister`` update it in place. Other workers notice changes through
+a cheap ``COUNT``/``MAX(updated_at)`` check per match, so they only rebuild
+after an enrolment has changed. Rows are replaced rather than written in
+place, so concurrent matches always see a complete matrix.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .face_embeddings import read_embedding
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FaceMatch:
+    template_id: object
+    user_id: object
+    distance: float
+
+
+@dataclass
+class _ModelMatrix:
+    matrix: np.ndarray
+    template_ids: List[object] = field(default_factory=list)
+    user_ids: List[object] = field(default_factory=list)
+    # (count, max updated_at) of the model's templates when the matrix was built
+    signature: Tuple[int, object] = (0, None)
+    # Templates left out because their embedding was unreadable or the wrong size
+    skipped: int = 0
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1])
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """``vectors`` as float32 rows of unit length (zero rows stay zero)."""
+    arr = np.asarray(vectors, dtype=np.float32)
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1)
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+def _usable(vec) -> bool:
+    return vec is not None and vec.ndim == 1 and vec.size > 0 and bool(np.all(np.isfinite(vec)))
+
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Row indices and cosine distances of the ``k`` rows of ``matrix`` closest to ``query``.
+
+    Both sides must already be L2-normalised. Results are sorted by distance.
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+    distances = 1.0 - matrix @ query
+    k = max(1, min(int(k), n))
+    if k == 1:
+        idx = np.array([int(np.argmin(distances))])
+    else:
+        idx = np.argpartition(distances, k - 1)[:k]
+        idx = idx[np.argsort(distances[idx], kind="stable")]
+    return idx, distances[idx]
+
+
+class FaceIndex:
+    def __init__(self):
+        self._models: Dict[str, _ModelMatrix] = {}
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "matches": 0}
+
+    # -- building ------------------------------------------------------
+
+    @staticmethod
+    def _signature(model_name: str) -> Tuple[int, object]:
+        from django.db.models import Count, Max
+
+        from .models import FaceTemplate
+
+        agg = FaceTemplate.objects.filter(model_name=model_name).aggregate(n=Count("id"), last=Max("updated_at"))
+        return int(agg["n"] or 0), agg["last"]
+
+    def _build(self, model_name: str) -> _ModelMatrix:
+        from django.db.models import Case, F, TextField, Value, When
+
+        from .models import FaceTemplate
+
+        signature = self._signature(model_name)
+        # The legacy JSON text is still written next to the binary column; only fetch it when needed
+        rows = (
+            FaceTemplate.objects.filter(model_name=model_name)
+            .annotate(
+                legacy=Case(
+                    When(embedding_vector__isnull=True, then=F("embedding")),
+                    default=Value(""),
+                    output_field=TextField(),
+                )
+            )
+            .values_list("id", "user_id", "embedding_vector", "legacy")
+        )
+        vectors, template_ids, user_ids = [], [], []
+        dim = None
+        skipped = 0
+        for template_id, user_id, packed, text in rows.iterator(chunk_size=2000):
+            vec = read_embedding(packed, text)
+            if not _usable(vec) or (dim is not None and vec.size != dim):
+                skipped += 1
+                continue
+            dim = vec.size
+            vectors.append(vec)
+            template_ids.append(template_id)
+            user_ids.append(user_id)
+        matrix = normalize_rows(np.stack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32)
+        if skipped:
+            logger.warning("Face index for %s skipped %d unreadable embedding(s)", model_name, skipped)
+        self.stats["builds"] += 1
+        return _ModelMatrix(matrix, template_ids, user_ids, signature, skipped)
+
+    def _current(self, model_name: str) -> _ModelMatrix:
+        entry = self._models.get(model_name)
+        if entry is not None and entry.signature == self._signature(model_name):
+            return entry
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is None or entry.signature != self._signature(model_name):
+                entry = self._build(model_name)
+                self._models[model_name] = entry
+            return entry
+
+    # -- queries -------------------------------------------------------
+
+    def match(self, model_name: str, embedding, k: int = 1) -> List[FaceMatch]:
+        """The ``k`` enrolled faces closest to ``embedding`` (cosine distance, ascending)."""
+        entry = self._current(model_name)
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        if entry.matrix.shape[0] == 0 or query.size != entry.dim:
+            return []
+        idx, distances = top_k(entry.matrix, normalize_rows(query)[0], k)
+        self.stats["matches"] += 1
+        return [FaceMatch(entry.template_ids[i], entry.user_ids[i], float(d)) for i, d in zip(idx, distances)]
+
+    def size(self, model_name: str) -> Tuple[int, int]:
+        """(indexed, skipped) template counts for ``model_name``."""
+        entry = self._current(model_name)
+        return entry.matrix.shape[0], entry.skipped
+
+    # -- updates -------------------------------------------------------
+
+    def _refresh_signature(self, model_name: str, entry: _ModelMatrix) -> _ModelMatrix:
+        signature = self._signature(model_name)
+        if signature[0] != entry.matrix.shape[0] + entry.skipped:
+            # Another worker changed this model too; rebuild on next use
+            signature = (-1, None)
+        entry.signature = signature
+        return entry
+
+    def upsert(self, template) -> None:
+        """Add or replace ``template``'s row, removing it from any other model first."""
+        self.discard(template.pk, except_model=template.model_name)
+        vec = template.get_embedding()
+        with self._lock:
+            entry = self._models.get(template.model_name)
+            if entry is None:
+                return  # Built on first match
+            keep = [i for i, tid in enumerate(entry.template_ids) if tid != template.pk]
+            template_ids = [entry.template_ids[i] for i in keep]
+            user_ids = [entry.user_ids[i] for i in keep]
+            matrix = entry.matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+            skipped = entry.skipped
+            if _usable(vec) and (matrix.shape[0] == 0 or vec.size == matrix.shape[1]):
+                matrix = np.vstack([matrix, normalize_rows(vec)]) if matrix.shape[0] else normalize_rows(vec)
+                template_ids.append(template.pk)
+                user_ids.append(template.user_id)
+            else:
+                skipped += 1
+            self._models[template.model_name] = self._refresh_signature(
+                template.model_name, _ModelMatrix(matrix, template_ids, user_ids, skipped=skipped)
+            )
+
+    def discard(self, template_id, except_model: Optional[str] = None) -> None:
+        """Drop ``template_id``'s row from every model's matrix."""
+        with self._lock:
+            for model_name, entry in list(self._models.items()):
+                if model_name == except_model or template_id not in entry.template_ids:
+                    continue
+                keep = [i for i, tid in enumerate(entry.template_ids) if tid != template_id]
+                matrix = entry.matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+                self._models[model_name] = self._refresh_signature(
+                    model_name,
+                    _ModelMatrix(
+                        matrix,
+                        [entry.template_ids[i] for i in keep],
+                        [entry.user_ids[i] for i in keep],
+                        skipped=entry.skipped,
+                    ),
+                )
+
+    def invalidate(self, model_name: Optional[str] = None) -> None:
+        with self._lock:
+            if model_name is None:
+                self._models.clear()
+            else:
+                self._models.pop(model_name, None)
+
+
+_index: Optional[FaceIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_face_index() -> FaceIndex:
+    """Process-wide face index, created on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FaceIndex()
+    return _index
+
+
+def set_face_index(index: Optional[FaceIndex]) -> None:
+    """Install a specific index (tests, benchmarks); ``None`` starts a fresh one on next use."""
+    global _index
+    with _index_lock:
+        _index = index
+
+
+__all__ = [
+    "FaceMatch",
+    "FaceIndex",
+    "normalize_rows",
+    "top_k",
+    "get_face_index",
+    "set_face_index",
+]
@@ -0,0 +1,107 @@
+"""Measure what a fresh worker imports at startup, using ``python -X importtime``.
+
+``measure_startup`` runs ``django.setup()`` plus the given modules (the
+URLconf by default) in a fresh interpreter. It parses the importtime log on
+stderr and returns the total self time, the time per top-level package, and
+the set of loaded modules. The ``import_budget`` command compares the total
+against ``STARTUP_IMPORT_BUDGET_MS``. It also checks that modules deferred to
+first use (lazy views, NumPy, Celery, PDF rendering) stay out of startup.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from django.conf import settings
+
+
+# Loaded on first use only; a startup import of any of these is a regression
+DEFERRED_MODULES = ("numpy", "celery", "reportlab", "api.tasks")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportRecord:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class StartupProfile:
+    records: List[ImportRecord] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(r.self_us for r in self.records) / 1000.0
+
+    @property
+    def modules(self) -> Set[str]:
+        return {r.name for r in self.records}
+
+    def by_package(self) -> Dict[str, float]:
+        totals: Dict[str, float] = defaultdict(float)
+        for r in self.records:
+            totals[r.name.split(".", 1)[0]] += r.self_us / 1000.0
+        return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+    def loaded(self, names: Iterable[str]) -> List[str]:
+        """Which of ``names`` (modules or packages) were imported."""
+        mods = self.modules
+        return sorted(n for n in names if any(m == n or m.startswith(n + ".") for m in mods))
+
+
+def parse_importtime(text: str) -> StartupProfile:
+    profile = StartupProfile()
+    for line in text.splitlines():
+        m = _LINE.match(line)
+        if m:
+            # One space after the bar, then two per nesting level
+            depth = max(0, (len(m.group(3)) - 1) // 2)
+            profile.records.append(ImportRecord(m.group(4), int(m.group(1)), int(m.group(2)), depth))
+    return profile
+
+
+def measure_startup(modules: Sequence[str] = ("api.urls",), python: Optional[str] = None) -> StartupProfile:
+    """Import ``modules`` after ``django.setup()`` in a fresh interpreter and profile it."""
+    code = "import django; django.setup()" + "".join(f"; import {m}" for m in modules)
+    env = dict(os.environ)
+    env["DJANGO_SETTINGS_MODULE"] = settings.SETTINGS_MODULE
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [str(settings.BASE_DIR), env.get("PYTHONPATH", "")] if p)
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(settings.BASE_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+        raise RuntimeError(f"Startup import failed:\n{tail}")
+    return parse_importtime(proc.stderr)
+
+
+def deferred_modules() -> List[str]:
+    from . import urls  # noqa: F401  (registers the lazy view modules)
+    from .lazy_views import LAZY_VIEW_MODULES
+
+    return sorted(set(DEFERRED_MODULES) | LAZY_VIEW_MODULES)
+
+
+__all__ = [
+    "DEFERRED_MODULES",
+    "ImportRecord",
+    "StartupProfile",
+    "parse_importtime",
+    "measure_startup",
+    "deferred_modules",
+]
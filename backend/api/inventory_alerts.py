@@ -0,0 +1,199 @@
+"""Debounced fan-out of low-stock and expiry alerts to managers.
+
+Alerts are collected into an ``AlertAggregator``, de-duplicated per breach key
+against ``InventoryAlertState`` (one seed insert, one locked read, one update), and
+written as ``Notification`` rows with ``bulk_create``. Scans send a single
+digest per manager instead of one row per item per manager.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone as dj_tz
+
+from .models import AppUser, InventoryAlertState, Notification
+
+
+DIGEST_MAX_LINES = 20
+DIGEST_MAX_META = 100
+
+
+def _cooldown() -> timedelta:
+    try:
+        seconds = int(getattr(settings, "INVENTORY_ALERT_COOLDOWN_SECONDS", 6 * 60 * 60))
+    except Exception:
+        seconds = 6 * 60 * 60
+    return timedelta(seconds=max(0, seconds))
+
+
+def _managers() -> List[AppUser]:
+    return list(AppUser.objects.filter(role__in=["manager", "admin"]))
+
+
+@dataclass
+class InventoryAlert:
+    key: str
+    kind: str
+    title: str
+    message: str
+    item_id: Optional[str] = None
+    location_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    meta: Dict = field(default_factory=dict)
+
+
+def low_stock_alert(breach) -> InventoryAlert:
+    """Build an alert from an ``inventory_services.LowStockBreach``."""
+    level = "out" if breach.on_hand <= 0 else "low"
+    item, loc = breach.item, breach.location
+    return InventoryAlert(
+        key=f"{InventoryAlertState.KIND_LOW_STOCK}:{item.id}:{loc.id}:{level}",
+        kind=InventoryAlertState.KIND_LOW_STOCK,
+        title=f"Low stock: {item.name}",
+        message=f"Item '{item.name}' at {loc.code} is at or below threshold. Current: {float(breach.on_hand or 0)}",
+        item_id=str(item.id),
+        location_id=str(loc.id),
+        meta={
+            "itemId": str(item.id),
+            "locationId": str(loc.id),
+            "qty": float(breach.on_hand or 0),
+            "threshold": float(breach.threshold or 0),
+            "level": level,
+        },
+    )
+
+
+def expiry_alert(batch, today=None) -> InventoryAlert:
+    today = today or dj_tz.localdate()
+    level = "expired" if batch.expiry_date and batch.expiry_date < today else "expiring"
+    item_name = getattr(batch.item, "name", "")
+    return InventoryAlert(
+        key=f"{InventoryAlertState.KIND_EXPIRY}:{batch.id}:{level}",
+        kind=InventoryAlertState.KIND_EXPIRY,
+        title=f"Expiring soon: {item_name}",
+        message=f"Batch {batch.lot_code or batch.id} expires on {batch.expiry_date}",
+        item_id=str(batch.item_id),
+        batch_id=str(batch.id),
+        meta={
+            "itemId": str(batch.item_id),
+            "batchId": str(batch.id),
+            "expiryDate": batch.expiry_date.isoformat() if batch.expiry_date else None,
+            "level": level,
+        },
+    )
+
+
+class AlertAggregator:
+    """Collects alerts and flushes them with a bounded number of queries."""
+
+    def __init__(self, cooldown: Optional[timedelta] = None):
+        self.cooldown = _cooldown() if cooldown is None else cooldown
+        self._alerts: Dict[str, InventoryAlert] = {}
+
+    def add(self, alert: InventoryAlert):
+        self._alerts.setdefault(alert.key, alert)
+
+    def extend(self, alerts: Iterable[InventoryAlert]):
+        for a in alerts:
+            self.add(a)
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def _claim_due(self, now) -> List[InventoryAlert]:
+        """Return alerts outside their cool-down and stamp them as notified.
+
+        Must run inside a transaction: due state rows are locked with
+        ``SKIP LOCKED`` so overlapping flushes never claim the same alert.
+        """
+        if not self._alerts:
+            return []
+        keys = list(self._alerts.keys())
+        cutoff = now - self.cooldown
+        # Seed missing states as already-due so every claim goes through the
+        # same locked read; concurrent seeders collide on the unique key.
+        InventoryAlertState.objects.bulk_create(
+            [
+                InventoryAlertState(
+                    key=a.key,
+                    kind=a.kind,
+                    item_id=a.item_id,
+                    location_id=a.location_id,
+                    batch_id=a.batch_id,
+                    last_notified_at=cutoff,
+                )
+                for a in self._alerts.values()
+            ],
+            ignore_conflicts=True,
+        )
+        due = list(
+            InventoryAlertState.objects.select_for_update(skip_locked=True)
+            .filter(key__in=keys, last_notified_at__lte=cutoff)
+            .values_list("key", flat=True)
+        )
+        if not due:
+            return []
+        InventoryAlertState.objects.filter(key__in=due).update(last_notified_at=now)
+        due_set = set(due)
+        return [self._alerts[k] for k in keys if k in due_set]
+
+    def flush(self, *, digest: bool = False, managers: Optional[List[AppUser]] = None) -> int:
+        """Write notifications for due alerts; returns the number of rows created.
+
+        With ``digest=True`` each manager receives one summary notification;
+        otherwise each due alert is sent to each manager, in one bulk insert.
+        """
+        now = dj_tz.now()
+        with transaction.atomic():
+            due = self._claim_due(now)
+            self._alerts = {}
+            if not due:
+                return 0
+            recipients = managers if managers is not None else _managers()
+            if not recipients:
+                return 0
+            rows: List[Notification] = []
+            if digest:
+                title, message, meta = _digest(due)
+                rows = [Notification(user=u, title=title, message=message, type=Notification.TYPE_WARNING, meta=meta) for u in recipients]
+            else:
+                for a in due:
+                    for u in recipients:
+                        rows.append(Notification(user=u, title=a.title, message=a.message, type=Notification.TYPE_WARNING, meta=a.meta))
+            Notification.objects.bulk_create(rows, batch_size=500)
+            return len(rows)
+
+
+def _digest(alerts: List[InventoryAlert]):
+    low = [a for a in alerts if a.kind == InventoryAlertState.KIND_LOW_STOCK]
+    exp = [a for a in alerts if a.kind == InventoryAlertState.KIND_EXPIRY]
+    parts = []
+    if low:
+        parts.append(f"{len(low)} low stock")
+    if exp:
+        parts.append(f"{len(exp)} expiring")
+    title = "Inventory alerts: " + ", ".join(parts)
+    lines = [a.message for a in alerts[:DIGEST_MAX_LINES]]
+    if len(alerts) > DIGEST_MAX_LINES:
+        lines.append(f"... and {len(alerts) - DIGEST_MAX_LINES} more")
+    meta = {
+        "event_type": "inventory_digest",
+        "lowStockCount": len(low),
+        "expiringCount": len(exp),
+        "alerts": [dict(a.meta, kind=a.kind) for a in alerts[:DIGEST_MAX_META]],
+        "truncated": len(alerts) > DIGEST_MAX_META,
+    }
+    return title, "\n".join(lines), meta
+
+
+__all__ = [
+    "InventoryAlert",
+    "AlertAggregator",
+    "low_stock_alert",
+    "expiry_alert",
+]
@@ -0,0 +1,111 @@
+"""Per-location index of in-stock batches, ordered for FEFO and expiry scans.
+
+``BatchStock`` holds one row per (batch, location) with a positive balance.
+``apply_movements`` folds freshly written movements into it with a bounded
+number of statements (one read, a conflict-tolerant insert of missing rows
+and a re-read, one CASE update, one delete of emptied rows), in the caller's
+transaction. Readers order by
+``FEFO_ORDER``, which every composite index on the table ends with.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+from .models import Batch, BatchStock, StockMovement
+
+
+FEFO_ORDER = ("expires_on", "received_at", "id")
+
+DEC0 = Decimal("0")
+
+
+def _row_for(batch: Batch, location_id: str, qty: Decimal) -> BatchStock:
+    return BatchStock(
+        batch=batch,
+        item_id=batch.item_id,
+        location_id=location_id,
+        qty=qty,
+        expires_on=batch.expiry_date or BatchStock.NO_EXPIRY,
+        received_at=batch.received_at or batch.created_at,
+    )
+
+
+def apply_movements(movements: Iterable[StockMovement]) -> int:
+    """Apply the batch-level deltas of ``movements``; returns rows touched."""
+    deltas: Dict[Tuple[str, str], Decimal] = {}
+    loaded: Dict[str, Batch] = {}
+    for mv in movements:
+        if not mv.batch_id:
+            continue
+        key = (str(mv.batch_id), str(mv.location_id))
+        deltas[key] = deltas.get(key, DEC0) + Decimal(str(mv.qty))
+        if StockMovement.batch.is_cached(mv) and mv.batch is not None:
+            loaded[str(mv.batch_id)] = mv.batch
+    deltas = {k: v for k, v in deltas.items() if v != DEC0}
+    if not deltas:
+        return 0
+    batch_ids = {b for b, _ in deltas}
+    location_ids = {l for _, l in deltas}
+
+    def _existing() -> Dict[Tuple[str, str], str]:
+        return {
+            (str(b), str(l)): rid
+            for rid, b, l in BatchStock.objects.filter(
+                batch_id__in=batch_ids, location_id__in=location_ids
+            ).values_list("id", "batch_id", "location_id")
+        }
+
+    existing = _existing()
+    fresh = [k for k in deltas if k not in existing]
+    if fresh:
+        missing = {b for b, _ in fresh} - set(loaded)
+        if missing:
+            loaded.update({str(b.id): b for b in Batch.objects.filter(id__in=missing)})
+        # Insert empty rows and let the increment below fill them, so a
+        # concurrent writer creating the same (batch, location) is not an error.
+        rows = [_row_for(loaded[b], l, DEC0) for b, l in fresh if b in loaded]
+        BatchStock.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        existing = _existing()
+    touched = [existing[k] for k in deltas if k in existing]
+    if touched:
+        BatchStock.objects.filter(id__in=touched).update(
+            qty=F("qty") + Case(
+                *[When(id=existing[k], then=Value(d)) for k, d in deltas.items() if k in existing],
+                default=Value(DEC0),
+                output_field=DecimalField(max_digits=14, decimal_places=4),
+            )
+        )
+    BatchStock.objects.filter(id__in=touched, qty__lte=0).delete()
+    return len(touched)
+
+
+def rebuild(item_ids: Optional[Sequence[str]] = None) -> int:
+    """Recompute the index from the ledger (all items, or just ``item_ids``)."""
+    stale = BatchStock.objects.all()
+    movements = StockMovement.objects.filter(batch__isnull=False)
+    if item_ids:
+        stale = stale.filter(item_id__in=list(item_ids))
+        movements = movements.filter(item_id__in=list(item_ids))
+    stale.delete()
+    totals = (
+        movements.order_by()
+        .values("batch_id", "location_id")
+        .annotate(total=Sum("qty"))
+        .filter(total__gt=0)
+    )
+    rows: List[BatchStock] = []
+    pending = list(totals)
+    batches = {str(b.id): b for b in Batch.objects.filter(id__in={r["batch_id"] for r in pending})}
+    for r in pending:
+        b = batches.get(str(r["batch_id"]))
+        if b is not None:
+            rows.append(_row_for(b, r["location_id"], r["total"]))
+    BatchStock.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+__all__ = ["FEFO_ORDER", "apply_movements", "rebuild"]
@@ -0,0 +1,131 @@
+"""Writers and reader for the append-only inventory activity feed.
+
+Every StockMovement and every item-update InventoryActivity gets one
+``InventoryFeedEntry`` row, written in the same transaction as its source.
+``get_feed_page`` pages that single table by ``(recorded_at, id)`` with keyset
+cursors, so pages never overlap and no merge/re-sort happens in Python.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+from .models import InventoryActivity, InventoryFeedEntry, StockMovement
+
+
+FEED_ORDER = ("recorded_at", "id")
+
+
+def _actor_name(actor) -> str:
+    if actor is None:
+        return ""
+    return (getattr(actor, "name", None) or getattr(actor, "email", None) or "")[:255]
+
+
+def feed_entry_for_movement(mv: StockMovement) -> InventoryFeedEntry:
+    return InventoryFeedEntry(
+        kind=InventoryFeedEntry.KIND_MOVEMENT,
+        source_id=mv.id,
+        item_id=mv.item_id,
+        location_id=mv.location_id,
+        batch_id=mv.batch_id,
+        type=mv.movement_type,
+        qty=mv.qty,
+        effective_at=mv.effective_at,
+        recorded_at=mv.recorded_at,
+        actor_id=mv.actor_id,
+        actor_name=_actor_name(mv.actor) if mv.actor_id else "",
+        reference_type=mv.reference_type or "",
+        reference_id=mv.reference_id or "",
+        reason=mv.reason or "",
+    )
+
+
+def feed_entry_for_activity(a: InventoryActivity) -> InventoryFeedEntry:
+    return InventoryFeedEntry(
+        kind=InventoryFeedEntry.KIND_ITEM_UPDATE,
+        source_id=a.id,
+        item_id=a.item_id,
+        type=InventoryFeedEntry.TYPE_ITEM_UPDATE,
+        recorded_at=a.created_at,
+        actor_id=a.actor_id,
+        actor_name=(_actor_name(a.actor) if a.actor_id else "") or (a.performed_by or "")[:255],
+        reason=a.reason or "",
+        meta=a.meta or {},
+    )
+
+
+def record_movements(movements: Iterable[StockMovement]) -> int:
+    """Append feed rows for freshly written movements in one bulk insert."""
+    rows = [feed_entry_for_movement(mv) for mv in movements]
+    if rows:
+        InventoryFeedEntry.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def record_item_update(activity: InventoryActivity) -> None:
+    if activity.action != InventoryActivity.ACTION_UPDATE:
+        return
+    InventoryFeedEntry.objects.bulk_create([feed_entry_for_activity(activity)])
+
+
+@dataclass
+class FeedPage:
+    rows: List[InventoryFeedEntry]
+    next_cursor: Optional[str]
+    total: int
+
+
+def get_feed_page(
+    *,
+    item_id: Optional[str] = None,
+    location_id: Optional[str] = None,
+    types: Optional[Sequence[str]] = None,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    limit: int = 50,
+) -> FeedPage:
+    """Newest-first page of the feed.
+
+    ``cursor`` (from a previous ``next_cursor``) takes precedence over
+    ``page``; offset paging is kept for older clients and reads the same
+    single ordered table, so pages are still disjoint.
+    """
+    from .utils_cursor import decode_cursor, encode_cursor, keyset_after
+
+    qs = InventoryFeedEntry.objects.all()
+    if item_id:
+        qs = qs.filter(item_id=item_id)
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    if types:
+        qs = qs.filter(type__in=[t.upper() for t in types])
+    if since:
+        qs = qs.filter(recorded_at__gte=since)
+    total = qs.count()
+    limit = max(1, min(200, int(limit or 50)))
+    ordered = qs.select_related("item", "location", "batch", "actor").order_by("-recorded_at", "-id")
+    after = decode_cursor(cursor, len(FEED_ORDER))
+    if after:
+        window = ordered.filter(keyset_after(FEED_ORDER, after, descending=True))[: limit + 1]
+    else:
+        start = (max(1, int(page or 1)) - 1) * limit
+        window = ordered[start:start + limit + 1]
+    rows = list(window)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor((last.recorded_at, str(last.id)))
+    return FeedPage(rows=rows, next_cursor=next_cursor, total=total)
+
+
+__all__ = [
+    "record_movements",
+    "record_item_update",
+    "get_feed_page",
+    "FeedPage",
+]
@@ -0,0 +1,265 @@
+"""Demand forecasting and reorder-point suggestions.
+
+Daily SALE and WASTE movements are aggregated in the database per
+(item, location, day) and scattered into one ``(pairs x days)`` NumPy matrix.
+Mean demand (simple moving average or simple exponential smoothing), demand
+variability, safety stock and reorder point/qty are then computed for every
+pair at once with array operations; there is no per-SKU Python loop.
+
+    reorder_point = mean_daily_demand * lead_time + z * std_daily_demand * sqrt(lead_time)
+    reorder_qty   = mean_daily_demand * review_days
+
+Results are upserted into ``ReorderSuggestion`` for review; nothing touches
+``ReorderSetting`` until a suggestion is applied.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone as dj_tz
+
+from .models import AppUser, ReorderSetting, ReorderSuggestion, StockMovement
+
+
+DEMAND_TYPES = (StockMovement.TYPE_SALE, StockMovement.TYPE_WASTE)
+
+
+@dataclass
+class ForecastParams:
+    history_days: int = 365
+    window_days: int = 28
+    method: str = "ses"  # "ses" (exponential smoothing) or "sma" (moving average)
+    alpha: float = 0.3
+    service_z: float = 1.65  # ~95% cycle service level
+    default_lead_time_days: int = 2
+    review_days: int = 7
+
+
+@dataclass
+class DemandMatrix:
+    keys: List[Tuple[str, str]]  # (item_id, location_id) per row
+    start: date
+    values: np.ndarray  # float64, shape (len(keys), days)
+
+
+@dataclass
+class Forecast:
+    mean: np.ndarray
+    std: np.ndarray
+    lead_time: np.ndarray
+    safety_stock: np.ndarray
+    reorder_point: np.ndarray
+    reorder_qty: np.ndarray
+
+
+def load_demand_matrix(
+    history_days: int = 365,
+    as_of: Optional[date] = None,
+    item_ids: Optional[Sequence[str]] = None,
+) -> DemandMatrix:
+    """One grouped query -> dense (pairs x days) demand matrix (units consumed per day)."""
+    days = max(1, int(history_days))
+    end = as_of or dj_tz.localdate()
+    start = end - timedelta(days=days - 1)
+    tz = dj_tz.get_current_timezone()
+    start_dt = datetime.combine(start, datetime.min.time(), tzinfo=tz)
+    end_dt = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    qs = StockMovement.objects.filter(
+        movement_type__in=DEMAND_TYPES,
+        effective_at__gte=start_dt,
+        effective_at__lt=end_dt,
+    )
+    if item_ids:
+        qs = qs.filter(item_id__in=list(item_ids))
+    rows = (
+        qs.annotate(day=TruncDate("effective_at"))
+        .order_by()
+        .values_list("item_id", "location_id", "day")
+        .annotate(total=Sum("qty"))
+    )
+    index: Dict[Tuple[str, str], int] = {}
+    r_idx: List[int] = []
+    c_idx: List[int] = []
+    vals: List[float] = []
+    for item_id, location_id, day, total in rows:
+        if day is None:
+            continue
+        key = (str(item_id), str(location_id))
+        r = index.setdefault(key, len(index))
+        r_idx.append(r)
+        c_idx.append((day - start).days)
+        # Consumption is stored as negative qty
+        vals.append(-float(total or 0))
+    matrix = np.zeros((len(index), days), dtype=np.float64)
+    if vals:
+        np.add.at(matrix, (np.asarray(r_idx), np.asarray(c_idx)), np.asarray(vals))
+    np.maximum(matrix, 0.0, out=matrix)
+    return DemandMatrix(keys=list(index.keys()), start=start, values=matrix)
+
+
+def forecast_demand(values: np.ndarray, lead_time: np.ndarray, params: ForecastParams) -> Forecast:
+    """Vectorised forecast for every row of ``values`` (shape (n, days))."""
+    n, days = values.shape if values.ndim == 2 else (0, 0)
+    if n == 0:
+        empty = np.zeros(0)
+        return Forecast(empty, empty, empty, empty, empty, empty)
+    window = max(1, min(int(params.window_days), days))
+    recent = values[:, -window:]
+    if params.method == "sma":
+        mean = recent.mean(axis=1)
+    else:
+        # Simple exponential smoothing with level_0 = y_0, in closed form:
+        # level_T = sum_t alpha*(1-alpha)^(T-1-t) * y_t  (t >= 1)  +  (1-alpha)^(T-1) * y_0
+        alpha = float(min(max(params.alpha, 1e-6), 1.0))
+        decay = (1.0 - alpha) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+        weights = alpha * decay
+        weights[0] = decay[0]
+        mean = values @ weights
+    std = recent.std(axis=1, ddof=1) if window > 1 else np.zeros(n)
+    lt = np.asarray(lead_time, dtype=np.float64)
+    safety = params.service_z * std * np.sqrt(lt)
+    rop = mean * lt + safety
+    qty = mean * float(params.review_days)
+    return Forecast(mean=mean, std=std, lead_time=lt, safety_stock=safety, reorder_point=rop, reorder_qty=qty)
+
+
+def _dec(val: float) -> Decimal:
+    return Decimal(str(round(float(val), 4)))
+
+
+SUGGESTION_UPDATE_FIELDS = [
+    "method",
+    "history_days",
+    "avg_daily_demand",
+    "demand_std",
+    "lead_time_days",
+    "safety_stock",
+    "suggested_reorder_point",
+    "suggested_reorder_qty",
+    "status",
+    "computed_at",
+]
+
+
+def _upsert_suggestions(rows: List[ReorderSuggestion]) -> None:
+    """Insert or refresh one suggestion per (item, location) with a single upsert.
+
+    MySQL's ``ON DUPLICATE KEY UPDATE`` takes no conflict target (it fires on
+    the ``(item, location)`` unique constraint), so ``unique_fields`` is only
+    passed to backends that require one.
+    """
+    extra = {}
+    if connection.features.supports_update_conflicts_with_target:
+        extra["unique_fields"] = ["item", "location"]
+    ReorderSuggestion.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        update_fields=SUGGESTION_UPDATE_FIELDS,
+        **extra,
+    )
+
+
+def compute_reorder_suggestions(
+    params: Optional[ForecastParams] = None,
+    as_of: Optional[date] = None,
+    item_ids: Optional[Sequence[str]] = None,
+    save: bool = True,
+) -> List[ReorderSuggestion]:
+    """Forecast every (item, location) with demand history and upsert suggestions."""
+    params = params or ForecastParams()
+    dm = load_demand_matrix(params.history_days, as_of=as_of, item_ids=item_ids)
+    if not dm.keys:
+        return []
+    configured = {
+        (str(i), str(l)): int(lt or 0)
+        for i, l, lt in ReorderSetting.objects.filter(item_id__in={k[0] for k in dm.keys}).values_list(
+            "item_id", "location_id", "lead_time_days"
+        )
+    }
+    lead = np.array(
+        [configured.get(k) or params.default_lead_time_days for k in dm.keys],
+        dtype=np.float64,
+    )
+    fc = forecast_demand(dm.values, lead, params)
+    now = dj_tz.now()
+    out = [
+        ReorderSuggestion(
+            item_id=k[0],
+            location_id=k[1],
+            method=params.method,
+            history_days=params.history_days,
+            avg_daily_demand=_dec(fc.mean[i]),
+            demand_std=_dec(fc.std[i]),
+            lead_time_days=int(fc.lead_time[i]),
+            safety_stock=_dec(fc.safety_stock[i]),
+            suggested_reorder_point=_dec(np.ceil(fc.reorder_point[i] * 100) / 100),
+            suggested_reorder_qty=_dec(np.ceil(fc.reorder_qty[i] * 100) / 100),
+            status=ReorderSuggestion.STATUS_PENDING,
+            computed_at=now,
+        )
+        for i, k in enumerate(dm.keys)
+    ]
+    if save:
+        _upsert_suggestions(out)
+    return out
+
+
+@transaction.atomic
+def apply_reorder_suggestions(suggestion_ids: Sequence[str], actor: Optional[AppUser] = None) -> int:
+    """Copy pending suggestions into ReorderSetting (creating rows as needed)."""
+    pending = list(
+        ReorderSuggestion.objects.filter(id__in=list(suggestion_ids), status=ReorderSuggestion.STATUS_PENDING)
+    )
+    if not pending:
+        return 0
+    existing = {
+        (str(rs.item_id), str(rs.location_id)): rs
+        for rs in ReorderSetting.objects.filter(item_id__in={s.item_id for s in pending})
+    }
+    now = dj_tz.now()
+    to_update, to_create = [], []
+    for s in pending:
+        rs = existing.get((str(s.item_id), str(s.location_id)))
+        if rs is None:
+            to_create.append(
+                ReorderSetting(
+                    item_id=s.item_id,
+                    location_id=s.location_id,
+                    reorder_point=s.suggested_reorder_point,
+                    reorder_qty=s.suggested_reorder_qty,
+                    lead_time_days=s.lead_time_days,
+                )
+            )
+        else:
+            rs.reorder_point = s.suggested_reorder_point
+            rs.reorder_qty = s.suggested_reorder_qty
+            rs.updated_at = now
+            to_update.append(rs)
+    if to_create:
+        ReorderSetting.objects.bulk_create(to_create)
+    if to_update:
+        ReorderSetting.objects.bulk_update(to_update, ["reorder_point", "reorder_qty", "updated_at"])
+    ReorderSuggestion.objects.filter(id__in=[s.id for s in pending]).update(
+        status=ReorderSuggestion.STATUS_APPLIED,
+        applied_at=now,
+        applied_by=actor if isinstance(actor, AppUser) else None,
+    )
+    return len(pending)
+
+
+__all__ = [
+    "ForecastParams",
+    "load_demand_matrix",
+    "forecast_demand",
+    "compute_reorder_suggestions",
+    "apply_reorder_suggestions",
+]
@@ -0,0 +1,162 @@
+"""Reconcile cached ``InventoryItem.quantity`` against the stock ledger.
+
+Mutators keep the cache current with incremental ``F("quantity") + delta``
+updates. This job is the safety net: items are split into primary-key ranges,
+each range is checked with one annotated query (cached vs. SUM of movements),
+and any disagreement is recorded as an ``InventoryQuantityDrift`` row. Chunks
+are independent so they can run on separate Celery workers; each folds its
+counts into the shared ``InventoryReconciliationRun`` with F() increments.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Abs
+from django.utils import timezone as dj_tz
+
+from .inventory_services import _q2, ledger_total_subquery, rebuild_cached_quantities
+from .models import InventoryItem, InventoryQuantityDrift, InventoryReconciliationRun
+
+
+DRIFT_TOLERANCE = Decimal("0.01")
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def plan_chunks(chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[str, str]]:
+    """Split all item ids into inclusive ``(first_id, last_id)`` ranges."""
+    size = max(1, int(chunk_size or DEFAULT_CHUNK_SIZE))
+    chunks: List[Tuple[str, str]] = []
+    first = last = None
+    n = 0
+    for iid in InventoryItem.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=5000):
+        if first is None:
+            first = iid
+        last = iid
+        n += 1
+        if n == size:
+            chunks.append((str(first), str(last)))
+            first, n = None, 0
+    if first is not None:
+        chunks.append((str(first), str(last)))
+    return chunks
+
+
+def reconcile_chunk(run_id: str, first_id: str, last_id: str, repair: bool = False) -> int:
+    """Check one id range; returns the number of drifting items found."""
+    rows = list(
+        InventoryItem.objects.filter(id__gte=first_id, id__lte=last_id)
+        .annotate(ledger=ledger_total_subquery())
+        .values_list("id", "quantity", "ledger")
+    )
+    drifts = []
+    total_abs = Decimal("0")
+    for iid, cached, ledger in rows:
+        cached = _q2(cached)
+        ledger = _q2(ledger)
+        diff = cached - ledger
+        if abs(diff) >= DRIFT_TOLERANCE:
+            total_abs += abs(diff)
+            drifts.append(
+                InventoryQuantityDrift(
+                    run_id=run_id,
+                    item_id=iid,
+                    cached_qty=cached,
+                    ledger_qty=ledger,
+                    drift=diff,
+                    repaired=repair,
+                )
+            )
+    with transaction.atomic():
+        if drifts:
+            # ignore_conflicts keeps a retried chunk from failing on rows it already wrote
+            InventoryQuantityDrift.objects.bulk_create(drifts, batch_size=500, ignore_conflicts=True)
+            if repair:
+                rebuild_cached_quantities([d.item_id for d in drifts])
+        InventoryReconciliationRun.objects.filter(id=run_id).update(
+            chunks_done=F("chunks_done") + 1,
+            items_checked=F("items_checked") + len(rows),
+            drift_count=F("drift_count") + len(drifts),
+            total_abs_drift=F("total_abs_drift") + total_abs,
+        )
+        InventoryReconciliationRun.objects.filter(
+            id=run_id,
+            status=InventoryReconciliationRun.STATUS_RUNNING,
+            chunks_done__gte=F("chunks_total"),
+        ).update(status=InventoryReconciliationRun.STATUS_DONE, finished_at=dj_tz.now())
+    return len(drifts)
+
+
+def start_run(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    repair: bool = False,
+    dispatch: Optional[Callable[[str, str, str, bool], object]] = None,
+) -> InventoryReconciliationRun:
+    """Create a run and hand each chunk to ``dispatch`` (inline when omitted)."""
+    chunks = plan_chunks(chunk_size)
+    run = InventoryReconciliationRun.objects.create(
+        repair=bool(repair),
+        chunk_size=max(1, int(chunk_size or DEFAULT_CHUNK_SIZE)),
+        chunks_total=len(chunks),
+    )
+    if not chunks:
+        InventoryReconciliationRun.objects.filter(id=run.id).update(
+            status=InventoryReconciliationRun.STATUS_DONE, finished_at=dj_tz.now()
+        )
+    send = dispatch or reconcile_chunk
+    for first_id, last_id in chunks:
+        send(str(run.id), first_id, last_id, bool(repair))
+    run.refresh_from_db()
+    return run
+
+
+def _run_row(run: InventoryReconciliationRun) -> Dict:
+    return {
+        "id": str(run.id),
+        "status": run.status,
+        "repair": run.repair,
+        "chunkSize": run.chunk_size,
+        "chunksTotal": run.chunks_total,
+        "chunksDone": run.chunks_done,
+        "itemsChecked": run.items_checked,
+        "driftCount": run.drift_count,
+        "totalAbsDrift": float(run.total_abs_drift or 0),
+        "startedAt": run.started_at.isoformat() if run.started_at else None,
+        "finishedAt": run.finished_at.isoformat() if run.finished_at else None,
+    }
+
+
+def reconciliation_report(limit: int = 50, history: int = 10) -> Dict:
+    """Latest run with its largest drifts, plus a short run history."""
+    runs = list(InventoryReconciliationRun.objects.order_by("-started_at")[: max(1, history)])
+    if not runs:
+        return {"latest": None, "drifts": [], "history": []}
+    latest = runs[0]
+    drifts = []
+    largest = latest.drifts.select_related("item").annotate(size=Abs("drift")).order_by("-size", "item_id")
+    for d in largest[: max(1, limit)]:
+        drifts.append({
+            "itemId": str(d.item_id),
+            "itemName": getattr(d.item, "name", ""),
+            "cachedQty": float(d.cached_qty),
+            "ledgerQty": float(d.ledger_qty),
+            "drift": float(d.drift),
+            "repaired": d.repaired,
+        })
+    return {
+        "latest": _run_row(latest),
+        "drifts": drifts,
+        "history": [_run_row(r) for r in runs],
+    }
+
+
+__all__ = [
+    "DRIFT_TOLERANCE",
+    "plan_chunks",
+    "reconcile_chunk",
+    "start_run",
+    "reconciliation_report",
+]
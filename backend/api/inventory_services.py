@@ -1,22 +1,28 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Iterable, List, Optional, Sequence, Tuple, Dict
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Dict
 
 from django.db import transaction
-from django.db.models import Sum, Q, F
+from django.db.models import Sum, Q, F, OuterRef, Subquery, DecimalField, Value, Case, When
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone as dj_tz
 
 from .models import (
     InventoryItem,
     StockMovement,
     Batch,
+    BatchStock,
     Location,
     ReorderSetting,
     AppUser,
 )
+from .inventory_batch_stock import FEFO_ORDER as BATCH_FEFO_ORDER, apply_movements as index_batch_movements
+from .inventory_feed import FeedPage, get_feed_page, record_movements
+from .report_cache import TAG_INVENTORY, invalidate_reports
 from .utils_dbtime import db_now
 
 
@@ -47,39 +53,102 @@ def _q2(val) -> Decimal:
 def _maybe_notify_low_stock(item_ids: Sequence[str]):
     """If any items are below configured low_stock_threshold, notify managers/admins.
 
-    Best-effort: failures are ignored. Uses Notification records; push is handled by utils_notify.
+    Best-effort: failures are ignored. Repeats of the same breach are debounced
+    by ``inventory_alerts.AlertAggregator``; push is handled by utils_notify.
     """
     try:
         ids = list(item_ids or [])
         if not ids:
             return
-        # Load thresholds
-        settings = {str(r.item_id): r.low_stock_threshold for r in ReorderSetting.objects.filter(item_id__in=ids)}
-        if not settings:
-            return
-        totals = get_current_stock(list(settings.keys()))
-        low = [iid for iid, thr in settings.items() if _as_decimal(totals.get(iid, DEC0)) <= _as_decimal(thr)]
+        low = evaluate_low_stock(item_ids=ids, threshold_field="low_stock_threshold")
         if not low:
             return
-        from .models import InventoryItem, AppUser, Notification
-        items = {str(x.id): x for x in InventoryItem.objects.filter(id__in=low)}
-        managers = list(AppUser.objects.filter(role__in=["manager", "admin"]))
-        for iid in low:
-            it = items.get(iid)
-            if not it:
-                continue
-            title = f"Low stock: {it.name}"
-            msg = f"Item '{it.name}' is at or below threshold. Current: {float(totals.get(iid, DEC0) or 0)}"
-            for u in managers:
-                try:
-                    n = Notification.objects.create(user=u, title=title, message=msg, type="warning")
-                except Exception:
-                    continue
+        from .inventory_alerts import AlertAggregator, low_stock_alert
+        agg = AlertAggregator()
+        agg.extend(low_stock_alert(b) for b in low)
+        agg.flush()
     except Exception:
         # best-effort
         return
 
 
+def _apply_quantity_deltas(deltas: Dict[str, Decimal], restocked_at: Optional[datetime] = None) -> int:
+    """Shift cached InventoryItem.quantity by each item's net movement.
+
+    Issues a single ``quantity = quantity + CASE id WHEN ... END`` UPDATE in
+    the caller's transaction instead of re-summing the ledger; drift from
+    writes that bypass the services is caught by ``inventory_reconcile``.
+    The cache holds 2 dp while the ledger holds 4, so items whose delta is
+    not 2-dp exact are re-summed from the ledger in the same UPDATE rather
+    than accumulating a rounding error on every write.
+    """
+    net = {str(k): _as_decimal(v) for k, v in deltas.items()}
+    net = {k: v for k, v in net.items() if v != DEC0}
+    exact = {k: v for k, v in net.items() if v == v.quantize(Q2)}
+    inexact = [k for k in net if k not in exact]
+    touched = set(net)
+    if restocked_at is not None:
+        touched |= {str(k) for k in deltas}
+    if not touched:
+        return 0
+    fields: Dict[str, object] = {}
+    if len(exact) == 1 and not inexact:
+        fields["quantity"] = F("quantity") + Value(next(iter(exact.values())))
+    elif net:
+        whens = [When(id=iid, then=F("quantity") + Value(delta)) for iid, delta in exact.items()]
+        if inexact:
+            whens.append(
+                When(
+                    id__in=inexact,
+                    then=Cast(ledger_total_subquery(), output_field=DecimalField(max_digits=12, decimal_places=2)),
+                )
+            )
+        fields["quantity"] = Case(
+            *whens,
+            default=F("quantity"),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    if restocked_at is not None:
+        fields["last_restocked"] = restocked_at
+    invalidate_reports(TAG_INVENTORY)
+    return InventoryItem.objects.filter(id__in=list(touched)).update(**fields)
+
+
+def _net_by_item(movements: Iterable[StockMovement]) -> Dict[str, Decimal]:
+    out: Dict[str, Decimal] = {}
+    for mv in movements:
+        key = str(mv.item_id)
+        out[key] = out.get(key, DEC0) + _as_decimal(mv.qty)
+    return out
+
+
+def ledger_total_subquery():
+    """Correlated SUM(qty) of all movements for the outer InventoryItem."""
+    totals = (
+        StockMovement.objects.filter(item_id=OuterRef("pk"))
+        .order_by()
+        .values("item_id")
+        .annotate(total=Sum("qty"))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(totals, output_field=DecimalField(max_digits=14, decimal_places=4)),
+        Value(DEC0),
+        output_field=DecimalField(max_digits=14, decimal_places=4),
+    )
+
+
+def rebuild_cached_quantities(item_ids: Iterable[str]) -> int:
+    """Reset InventoryItem.quantity to the ledger sum for many items in one UPDATE."""
+    ids = list({str(i) for i in item_ids})
+    if not ids:
+        return 0
+    invalidate_reports(TAG_INVENTORY)
+    return InventoryItem.objects.filter(id__in=ids).update(
+        quantity=Cast(ledger_total_subquery(), output_field=DecimalField(max_digits=12, decimal_places=2))
+    )
+
+
 def get_current_stock(
     item_ids: Optional[Sequence[str]] = None,
     location_id: Optional[str] = None,
@@ -129,64 +198,251 @@ def get_batch_stock_by_location(
     return res
 
 
-def get_expiring_batches(
+def _expiring_stock_queryset(
     days: int,
     item_ids: Optional[Sequence[str]] = None,
     location_id: Optional[str] = None,
-) -> List[Batch]:
-    now = get_db_now().date()
-    limit = now + timedelta(days=int(days or 0))
-    qs = Batch.objects.filter(expiry_date__isnull=False, expiry_date__lte=limit)
+):
+    limit = get_db_now().date() + timedelta(days=int(days or 0))
+    qs = BatchStock.objects.filter(expires_on__lte=limit, qty__gt=0)
     if item_ids:
         qs = qs.filter(item_id__in=list(item_ids))
-    # If location provided, keep batches that still have stock at location
     if location_id:
-        batch_ids_with_stock = (
-            StockMovement.objects.filter(location_id=location_id)
-            .values("batch_id")
-            .annotate(total=Sum("qty"))
-            .filter(total__gt=0)
-            .values_list("batch_id", flat=True)
-        )
-        qs = qs.filter(id__in=batch_ids_with_stock)
-    return list(qs.order_by("expiry_date", "created_at")[:500])
+        qs = qs.filter(location_id=location_id)
+    return qs.order_by(*BATCH_FEFO_ORDER)
 
 
-def get_stock_ledger(
-    item_id: str,
+@dataclass
+class ExpiringPage:
+    rows: List[BatchStock]
+    next_cursor: Optional[str]
+
+
+def get_expiring_stock_page(
+    days: int,
+    item_ids: Optional[Sequence[str]] = None,
+    location_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> ExpiringPage:
+    """One page of in-stock (batch, location) rows expiring within ``days``, soonest first."""
+    from .utils_cursor import decode_cursor, encode_cursor, keyset_after
+
+    limit = max(1, min(500, int(limit or 100)))
+    qs = _expiring_stock_queryset(days, item_ids, location_id).select_related("batch", "item", "location")
+    after = decode_cursor(cursor, len(BATCH_FEFO_ORDER))
+    if after:
+        qs = qs.filter(keyset_after(BATCH_FEFO_ORDER, after))
+    rows = list(qs[: limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor((last.expires_on.isoformat(), last.received_at, str(last.id)))
+    return ExpiringPage(rows=rows, next_cursor=next_cursor)
+
+
+def get_expiring_batches(
+    days: int,
+    item_ids: Optional[Sequence[str]] = None,
+    location_id: Optional[str] = None,
+) -> List[Batch]:
+    """Distinct in-stock batches expiring within ``days``, soonest first (not truncated)."""
+    seen: Dict[str, Batch] = {}
+    rows = _expiring_stock_queryset(days, item_ids, location_id).select_related("batch__item")
+    for r in rows.iterator(chunk_size=2000):
+        seen.setdefault(str(r.batch_id), r.batch)
+    return list(seen.values())
+
+
+LEDGER_ORDER = ("effective_at", "recorded_at", "id")
+
+
+def _ledger_queryset(
+    item_id: Optional[str] = None,
+    location_id: Optional[str] = None,
+):
+    qs = StockMovement.objects.all()
+    if item_id:
+        qs = qs.filter(item_id=item_id)
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    return qs
+
+
+def _ledger_key(mv: StockMovement) -> Tuple:
+    return (mv.effective_at, mv.recorded_at, str(mv.id))
+
+
+def _ledger_opening_balances(qs, start: Q) -> Dict[str, Decimal]:
+    """Per-item SUM(qty) of every ledger row before the first row in range."""
+    out: Dict[str, Decimal] = {}
+    for row in qs.filter(start).order_by().values("item_id").annotate(total=Sum("qty")):
+        out[str(row["item_id"])] = _as_decimal(row["total"]) or DEC0
+    return out
+
+
+def iter_stock_ledger(
+    item_id: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     location_id: Optional[str] = None,
-    include_batches: bool = True,
-) -> List[StockMovement]:
-    qs = StockMovement.objects.filter(item_id=item_id)
+    after: Optional[Sequence] = None,
+    chunk_size: int = 2000,
+) -> Iterator[Tuple[StockMovement, Decimal]]:
+    """Yield ``(movement, running_balance)`` in ledger order with constant memory.
+
+    Walks ``(effective_at, recorded_at, id)`` with keyset predicates, one
+    bounded query per chunk, so the number of rows is unbounded. Running
+    balances are per item (across locations unless ``location_id`` is given)
+    and start from the SUM of everything before the first yielded row.
+    ``after`` is a decoded ledger cursor (see ``utils_cursor``).
+    """
+    from .utils_cursor import keyset_after
+
+    base = _ledger_queryset(item_id, location_id)
+    if after:
+        start_before = ~keyset_after(LEDGER_ORDER, after)
+    elif date_from:
+        start_before = Q(effective_at__lt=date_from)
+    else:
+        start_before = None
+    balances = _ledger_opening_balances(base, start_before) if start_before is not None else {}
+
+    qs = base
     if date_from:
         qs = qs.filter(effective_at__gte=date_from)
     if date_to:
         qs = qs.filter(effective_at__lte=date_to)
-    if location_id:
-        qs = qs.filter(location_id=location_id)
-    # For performance limit; callers should paginate
-    qs = qs.order_by("effective_at", "recorded_at", "id")
-    return list(qs[:1000])
+    qs = qs.order_by(*LEDGER_ORDER)
+    chunk_size = max(1, int(chunk_size or 2000))
+    key = list(after) if after else None
+    while True:
+        page = qs.filter(keyset_after(LEDGER_ORDER, key)) if key else qs
+        n = 0
+        last = None
+        for mv in page[:chunk_size].iterator(chunk_size=chunk_size):
+            iid = str(mv.item_id)
+            bal = balances.get(iid, DEC0) + _as_decimal(mv.qty)
+            balances[iid] = bal
+            n += 1
+            last = mv
+            yield mv, bal
+        if n < chunk_size or last is None:
+            return
+        key = list(_ledger_key(last))
 
 
-def get_low_stock(item_ids: Optional[Sequence[str]] = None) -> List[Tuple[InventoryItem, Decimal]]:
-    settings_qs = ReorderSetting.objects.select_related("item", "location").all()
+@dataclass
+class LedgerPage:
+    rows: List[Tuple[StockMovement, Decimal]]
+    next_cursor: Optional[str]
+
+
+def get_stock_ledger_page(
+    item_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    location_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 500,
+) -> LedgerPage:
+    """Return one keyset page of the ledger plus the cursor for the next one."""
+    from .utils_cursor import decode_cursor, encode_cursor
+
+    limit = max(1, min(5000, int(limit or 500)))
+    after = decode_cursor(cursor, len(LEDGER_ORDER))
+    rows: List[Tuple[StockMovement, Decimal]] = []
+    has_more = False
+    for row in iter_stock_ledger(item_id, date_from, date_to, location_id, after=after, chunk_size=limit + 1):
+        if len(rows) == limit:
+            has_more = True
+            break
+        rows.append(row)
+    next_cursor = encode_cursor(_ledger_key(rows[-1][0])) if has_more and rows else None
+    return LedgerPage(rows=rows, next_cursor=next_cursor)
+
+
+def get_stock_ledger(
+    item_id: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    location_id: Optional[str] = None,
+    include_batches: bool = True,
+    limit: Optional[int] = 1000,
+) -> List[StockMovement]:
+    """Return ledger rows as a list; prefer ``get_stock_ledger_page``/``iter_stock_ledger``."""
+    out: List[StockMovement] = []
+    for mv, _ in iter_stock_ledger(item_id, date_from, date_to, location_id):
+        if limit is not None and len(out) >= limit:
+            break
+        out.append(mv)
+    return out
+
+
+@dataclass(frozen=True)
+class LowStockBreach:
+    """A (item, location) pair whose on-hand balance is at or below its threshold."""
+
+    item: InventoryItem
+    location: Location
+    on_hand: Decimal
+    threshold: Decimal
+    reorder_point: Decimal
+    reorder_qty: Decimal
+
+
+def _location_balance_subquery():
+    """Correlated SUM(qty) for the outer row's (item_id, location_id)."""
+    return Subquery(
+        StockMovement.objects.filter(item_id=OuterRef("item_id"), location_id=OuterRef("location_id"))
+        .order_by()
+        .values("item_id", "location_id")
+        .annotate(total=Sum("qty"))
+        .values("total")[:1],
+        output_field=DecimalField(max_digits=14, decimal_places=4),
+    )
+
+
+def evaluate_low_stock(
+    item_ids: Optional[Sequence[str]] = None,
+    location_ids: Optional[Sequence[str]] = None,
+    threshold_field: str = "reorder_point",
+) -> List[LowStockBreach]:
+    """Return every (item, location) breach in a single query.
+
+    Each ReorderSetting row is annotated with the aggregated balance of its
+    (item, location) and filtered in the database against ``threshold_field``
+    (``reorder_point`` or ``low_stock_threshold``), so the cost is one round
+    trip regardless of how many settings exist.
+    """
+    if threshold_field not in {"reorder_point", "low_stock_threshold"}:
+        raise ValueError("threshold_field must be reorder_point or low_stock_threshold")
+    qs = ReorderSetting.objects.select_related("item", "location")
     if item_ids:
-        settings_qs = settings_qs.filter(item_id__in=list(item_ids))
-    # Aggregate current stock per (item, location)
-    pairs = list(settings_qs.values_list("item_id", "location_id", "reorder_point"))
-    by_item_loc: Dict[Tuple[str, str], Decimal] = {}
-    for item_id, location_id, _ in pairs:
-        stock_map = get_current_stock([item_id], location_id)
-        by_item_loc[(str(item_id), str(location_id))] = stock_map.get(str(item_id), DEC0)
-    low = []
-    for rs in settings_qs:
-        qty = by_item_loc.get((str(rs.item_id), str(rs.location_id)), DEC0)
-        if qty <= _as_decimal(rs.reorder_point):
-            low.append((rs.item, qty))
-    return low
+        qs = qs.filter(item_id__in=list(item_ids))
+    if location_ids:
+        qs = qs.filter(location_id__in=list(location_ids))
+    qs = qs.annotate(
+        on_hand=Coalesce(_location_balance_subquery(), Value(DEC0), output_field=DecimalField(max_digits=14, decimal_places=4)),
+    ).filter(on_hand__lte=F(threshold_field)).order_by("item__name", "location__code")
+    out: List[LowStockBreach] = []
+    for rs in qs:
+        out.append(
+            LowStockBreach(
+                item=rs.item,
+                location=rs.location,
+                on_hand=_as_decimal(rs.on_hand),
+                threshold=_as_decimal(getattr(rs, threshold_field)),
+                reorder_point=_as_decimal(rs.reorder_point),
+                reorder_qty=_as_decimal(rs.reorder_qty),
+            )
+        )
+    return out
+
+
+def get_low_stock(item_ids: Optional[Sequence[str]] = None) -> List[Tuple[InventoryItem, Decimal]]:
+    return [(b.item, b.on_hand) for b in evaluate_low_stock(item_ids=item_ids)]
 
 
 def get_last_stock_update(item_id: str, location_id: Optional[str] = None) -> Optional[Tuple[datetime, datetime]]:
@@ -243,32 +499,20 @@ def record_receipt(
         reason="",
         idempotency_key=idempotency_key,
     )
-    # Update cached item quantity and last_restocked
-    try:
-        total_map = get_current_stock([str(item.id)], location_id=None, as_of=None)
-        total = _q2(total_map.get(str(item.id), DEC0))
-        InventoryItem.objects.filter(id=item.id).update(quantity=total, last_restocked=now)
-    except Exception:
-        pass
+    record_movements([mv])
+    index_batch_movements([mv])
+    _apply_quantity_deltas({str(item.id): qty}, restocked_at=now)
     return mv
 
 
 def _fefo_batches_with_available(item_id: str, location_id: str) -> List[Tuple[Batch, Decimal]]:
-    # Compute available per batch at location
-    per_batch = get_batch_stock_by_location(item_id=item_id, location_id=location_id)
-    if not per_batch:
-        return []
-    batches = Batch.objects.filter(id__in=list(per_batch.keys())).all()
-    # Sort FEFO: expiry asc, then received_at asc, then id asc
-    annotated = []
-    for b in batches:
-        annotated.append((b, per_batch.get(str(b.id), DEC0)))
-    annotated.sort(key=lambda t: (
-        t[0].expiry_date or datetime.max.date(),
-        t[0].received_at or datetime.max.replace(tzinfo=dj_tz.utc),
-        str(t[0].id),
-    ))
-    return annotated
+    """In-stock batches of an item at a location, FEFO-ordered, from the batch index."""
+    rows = (
+        BatchStock.objects.filter(item_id=item_id, location_id=location_id, qty__gt=0)
+        .select_related("batch")
+        .order_by(*BATCH_FEFO_ORDER)
+    )
+    return [(r.batch, r.qty) for r in rows]
 
 
 @transaction.atomic
@@ -287,6 +531,7 @@ def consume_for_order(
     movements: List[StockMovement] = []
     affected_ids = set()
     for item, req_qty in components:
+        item_start = len(movements)
         # Prevent over-consumption: ensure sufficient stock at location
         avail_total = get_current_stock([str(item.id)], location_id=str(location.id)).get(str(item.id), DEC0)
         remaining = _as_decimal(req_qty)
@@ -333,18 +578,14 @@ def consume_for_order(
                 reason="Consumption for order (unbatched)",
             )
             movements.append(mv)
+        # Keep the batch index current before the next component reads it
+        index_batch_movements(movements[item_start:])
         affected_ids.add(str(item.id))
-    # Update cached quantities for affected items
-    try:
-        if affected_ids:
-            smap = get_current_stock(list(affected_ids), location_id=None, as_of=None)
-            for iid in affected_ids:
-                total = _q2(smap.get(iid, DEC0))
-                InventoryItem.objects.filter(id=iid).update(quantity=total)
-            # Notify managers if any cross the low stock threshold
-            _maybe_notify_low_stock(list(affected_ids))
-    except Exception:
-        pass
+    record_movements(movements)
+    _apply_quantity_deltas(_net_by_item(movements))
+    if affected_ids:
+        # Notify managers if any cross the low stock threshold
+        _maybe_notify_low_stock(list(affected_ids))
     return movements
 
 
@@ -381,14 +622,10 @@ def adjust_stock(
         reason=reason or "Manual adjustment",
         idempotency_key=idempotency_key,
     )
-    # Update cached item quantity (do not touch last_restocked for adjustments)
-    try:
-        total_map = get_current_stock([str(item.id)], location_id=None, as_of=None)
-        total = _q2(total_map.get(str(item.id), DEC0))
-        InventoryItem.objects.filter(id=item.id).update(quantity=total)
-        _maybe_notify_low_stock([str(item.id)])
-    except Exception:
-        pass
+    record_movements([mv])
+    # Do not touch last_restocked for adjustments
+    _apply_quantity_deltas({str(item.id): delta})
+    _maybe_notify_low_stock([str(item.id)])
     return mv
 
 
@@ -481,14 +718,211 @@ def transfer_stock(
             reason="Transfer in (unbatched)",
         )
         movements.extend([mv_out, mv_in])
-    # Update cached item quantity (net stays the same globally, but ensure sync)
-    try:
-        total_map = get_current_stock([str(item.id)], location_id=None, as_of=None)
-        total = _q2(total_map.get(str(item.id), DEC0))
-        InventoryItem.objects.filter(id=item.id).update(quantity=total)
-        _maybe_notify_low_stock([str(item.id)])
-    except Exception:
-        pass
+    record_movements(movements)
+    index_batch_movements(movements)
+    # Transfers net to zero across locations, so the cached total is unchanged
+    _maybe_notify_low_stock([str(item.id)])
+    return movements
+
+
+@dataclass
+class ReceiptLine:
+    item: InventoryItem
+    qty: Decimal
+    batch: Optional[Batch] = None
+    batch_payload: Optional[dict] = None
+
+
+@dataclass
+class TransferLine:
+    item: InventoryItem
+    qty: Decimal
+
+
+def _document_id(idempotency_key: Optional[str]) -> Optional[str]:
+    """Fixed-length id for a batch document, so ``"<id>:<n>"`` always fits the column."""
+    if not idempotency_key:
+        return None
+    return hashlib.sha1(idempotency_key.encode("utf-8")).hexdigest()
+
+
+def _document_key(idempotency_key: Optional[str], n: int) -> Optional[str]:
+    doc = _document_id(idempotency_key)
+    return f"{doc}:{n}" if doc else None
+
+
+def _existing_document(idempotency_key: Optional[str]) -> Optional[List[StockMovement]]:
+    """Movements already written for a batch document with this key, if any."""
+    doc = _document_id(idempotency_key)
+    if not doc or not StockMovement.objects.filter(idempotency_key=f"{doc}:0").exists():
+        return None
+    rows = list(StockMovement.objects.filter(idempotency_key__startswith=f"{doc}:"))
+    # Preserve the original line order encoded in the ":n" suffix
+    rows.sort(key=lambda mv: int(mv.idempotency_key.rsplit(":", 1)[1]))
+    return rows
+
+
+@transaction.atomic
+def record_receipts(
+    lines: Sequence[ReceiptLine],
+    *,
+    location: Location,
+    actor: Optional[AppUser] = None,
+    reference_type: str = "goods_receipt",
+    reference_id: str = "",
+    effective_at: Optional[datetime] = None,
+    idempotency_key: Optional[str] = None,
+) -> List[StockMovement]:
+    """Post a multi-line goods receipt in one transaction.
+
+    New batches and movements are bulk-inserted and cached item quantities are
+    refreshed with a single UPDATE, so the query count does not grow with the
+    number of lines.
+    """
+    if not lines:
+        raise ValueError("at least one line is required")
+    existing = _existing_document(idempotency_key)
+    if existing is not None:
+        return existing
+    now = get_db_now()
+    new_batches: List[Batch] = []
+    prepared: List[Tuple[ReceiptLine, Decimal, Optional[Batch]]] = []
+    for line in lines:
+        qty = _as_decimal(line.qty)
+        if qty <= DEC0:
+            raise ValueError(f"qty must be positive for receipt of {line.item.name}")
+        batch = line.batch
+        if not batch and line.batch_payload:
+            bp = line.batch_payload
+            batch = Batch(
+                item=line.item,
+                lot_code=(bp.get("lot_code") or ""),
+                expiry_date=bp.get("expiry_date"),
+                received_at=bp.get("received_at") or now,
+                supplier=(bp.get("supplier") or ""),
+                unit_cost=bp.get("unit_cost"),
+            )
+            new_batches.append(batch)
+        prepared.append((line, qty, batch))
+    if new_batches:
+        Batch.objects.bulk_create(new_batches, batch_size=500)
+    movements = [
+        StockMovement(
+            item=line.item,
+            location=location,
+            batch=batch,
+            movement_type=StockMovement.TYPE_RECEIPT,
+            qty=qty,
+            effective_at=effective_at or now,
+            recorded_at=now,
+            actor=actor,
+            reference_type=reference_type,
+            reference_id=reference_id,
+            reason="",
+            idempotency_key=_document_key(idempotency_key, n),
+        )
+        for n, (line, qty, batch) in enumerate(prepared)
+    ]
+    StockMovement.objects.bulk_create(movements, batch_size=500)
+    record_movements(movements)
+    index_batch_movements(movements)
+    _apply_quantity_deltas(_net_by_item(movements), restocked_at=now)
+    return movements
+
+
+def _fefo_plan(item_ids: Sequence[str], location_id: str) -> Dict[str, List[Tuple[Batch, Decimal]]]:
+    """In-stock batches at a location for many items, FEFO-ordered per item."""
+    rows = (
+        BatchStock.objects.filter(item_id__in=list(item_ids), location_id=location_id, qty__gt=0)
+        .select_related("batch")
+        .order_by("item_id", *BATCH_FEFO_ORDER)
+    )
+    plan: Dict[str, List[Tuple[Batch, Decimal]]] = {}
+    for r in rows:
+        plan.setdefault(str(r.item_id), []).append((r.batch, r.qty))
+    return plan
+
+
+@transaction.atomic
+def transfer_stock_batch(
+    lines: Sequence[TransferLine],
+    *,
+    from_location: Location,
+    to_location: Location,
+    actor: Optional[AppUser] = None,
+    reference_id: str = "",
+    effective_at: Optional[datetime] = None,
+    idempotency_key: Optional[str] = None,
+) -> List[StockMovement]:
+    """Move many items between two locations in one transaction (FEFO per item).
+
+    Availability for every line is read with two grouped queries up front; if
+    any line is short the whole manifest is rejected before anything is written.
+    """
+    if not lines:
+        raise ValueError("at least one line is required")
+    if from_location.id == to_location.id:
+        raise ValueError("source and destination must differ")
+    existing = _existing_document(idempotency_key)
+    if existing is not None:
+        return existing
+    wanted: Dict[str, Decimal] = {}
+    items: Dict[str, InventoryItem] = {}
+    for line in lines:
+        qty = _as_decimal(line.qty)
+        if qty <= DEC0:
+            raise ValueError(f"qty must be positive to transfer {line.item.name}")
+        iid = str(line.item.id)
+        wanted[iid] = wanted.get(iid, DEC0) + qty
+        items[iid] = line.item
+    on_hand = get_current_stock(list(wanted.keys()), location_id=str(from_location.id))
+    for iid, qty in wanted.items():
+        have = on_hand.get(iid, DEC0)
+        if qty > have:
+            raise ValueError(f"Insufficient stock to transfer {items[iid].name}: need {qty}, have {have}")
+    plan = _fefo_plan(list(wanted.keys()), str(from_location.id))
+    now = get_db_now()
+    effective = effective_at or now
+    ref = reference_id or f"{from_location.id}->{to_location.id}"
+    movements: List[StockMovement] = []
+
+    def _pair(item, batch, take, suffix=""):
+        for loc, mtype, sign, label in (
+            (from_location, StockMovement.TYPE_TRANSFER_OUT, -1, "Transfer out"),
+            (to_location, StockMovement.TYPE_TRANSFER_IN, 1, "Transfer in"),
+        ):
+            movements.append(
+                StockMovement(
+                    item=item,
+                    location=loc,
+                    batch=batch,
+                    movement_type=mtype,
+                    qty=take * sign,
+                    effective_at=effective,
+                    recorded_at=now,
+                    actor=actor,
+                    reference_type="transfer",
+                    reference_id=ref,
+                    reason=label + suffix,
+                    idempotency_key=_document_key(idempotency_key, len(movements)),
+                )
+            )
+
+    for iid, remaining in wanted.items():
+        item = items[iid]
+        for batch, avail in plan.get(iid, []):
+            if remaining <= DEC0:
+                break
+            take = min(remaining, avail)
+            _pair(item, batch, take)
+            remaining -= take
+        if remaining > DEC0:
+            _pair(item, None, remaining, " (unbatched)")
+    StockMovement.objects.bulk_create(movements, batch_size=500)
+    record_movements(movements)
+    index_batch_movements(movements)
+    # Transfers net to zero across locations, so the cached totals are unchanged
+    _maybe_notify_low_stock(list(wanted.keys()))
     return movements
 
 
@@ -497,13 +931,25 @@ __all__ = [
     "get_current_stock",
     "get_batch_stock_by_location",
     "get_expiring_batches",
+    "get_expiring_stock_page",
+    "ExpiringPage",
     "get_stock_ledger",
+    "get_stock_ledger_page",
+    "iter_stock_ledger",
     "get_low_stock",
+    "evaluate_low_stock",
+    "LowStockBreach",
     "get_last_stock_update",
     "record_receipt",
     "consume_for_order",
     "adjust_stock",
     "transfer_stock",
+    "ReceiptLine",
+    "TransferLine",
+    "record_receipts",
+    "transfer_stock_batch",
+    "ledger_total_subquery",
+    "rebuild_cached_quantities",
 ]
 
 
@@ -515,25 +961,19 @@ def get_recent_activity(
     since: Optional[datetime] = None,
     limit: int = 50,
     page: int = 1,
-) -> List[StockMovement]:
-    """Return recent stock movements ordered by recorded_at DESC then id DESC.
+    cursor: Optional[str] = None,
+) -> FeedPage:
+    """Return a newest-first page of the inventory activity feed.
 
-    - Filters by item, location, movement types, and since recorded_at.
-    - Simple pagination with page/limit.
+    - Filters by item, location, entry types, and since recorded_at.
+    - Keyset pagination via ``cursor``; ``page`` is honoured when no cursor is given.
     """
-    qs = StockMovement.objects.select_related("item", "location", "batch", "actor").all()
-    if item_id:
-        qs = qs.filter(item_id=item_id)
-    if location_id:
-        qs = qs.filter(location_id=location_id)
-    if types:
-        up = [t.upper() for t in types]
-        qs = qs.filter(movement_type__in=up)
-    if since:
-        qs = qs.filter(recorded_at__gte=since)
-    qs = qs.order_by("-recorded_at", "-id")
-    page = max(1, int(page or 1))
-    limit = max(1, min(200, int(limit or 50)))
-    start = (page - 1) * limit
-    end = start + limit
-    return list(qs[start:end])
+    return get_feed_page(
+        item_id=item_id,
+        location_id=location_id,
+        types=types,
+        since=since,
+        cursor=cursor,
+        page=page,
+        limit=limit,
+    )
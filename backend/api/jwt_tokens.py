@@ -0,0 +1,266 @@
+"""Signing and verification of the API's JWTs, with keys parsed once.
+
+With an ``HS*`` ``JWT_ALGORITHM`` (the default) tokens use the shared
+``JWT_SECRET``, as before. With ``RS*``, ``PS*``, ``ES*`` or ``EdDSA``:
+
+- the node holding ``JWT_PRIVATE_KEY_FILE`` signs. Its ``kid`` header is
+  ``JWT_SIGNING_KID`` or a thumbprint of the public key;
+- every node verifies with the public keys in ``JWT_PUBLIC_KEY_FILES``
+  (``path`` or ``kid=path``, comma separated). Edge nodes and the ASGI
+  process need only these files, not a secret. To rotate, publish the new
+  public key everywhere, then switch the private key; tokens signed with
+  the old key verify until they expire or its public key is removed;
+- ``JWT_ACCEPT_SHARED_SECRET`` keeps ``HS*`` tokens signed with
+  ``JWT_SECRET`` valid while clients move over. Turn it off afterwards.
+
+Every key is pinned to one algorithm taken from its type, so a token cannot
+choose how it is checked.
+
+Verified claims are kept in a small LRU keyed by the token
+(``JWT_CLAIMS_CACHE_SIZE``). Repeated requests with the same bearer token
+skip the signature check; expiry is still checked on every call.
+Verification does no I/O, so async code (the websocket consumer) calls
+``verify_token`` directly instead of hopping to a thread.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _is_symmetric(algorithm: str) -> bool:
+    return (algorithm or "").upper().startswith("HS")
+
+
+def _public_der(public_key) -> bytes:
+    from cryptography.hazmat.primitives import serialization
+
+    return public_key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+
+
+def key_id(public_key) -> str:
+    """Stable ``kid`` for a public key: truncated SHA-256 of its DER encoding."""
+    digest = hashlib.sha256(_public_der(public_key)).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")[:16]
+
+
+def algorithm_for(key, preferred: str = "") -> str:
+    """The one algorithm ``key`` may verify: ``preferred`` if it fits the key type."""
+    from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, rsa
+
+    preferred = (preferred or "").upper()
+    if isinstance(key, (rsa.RSAPublicKey, rsa.RSAPrivateKey)):
+        return preferred if preferred[:2] in {"RS", "PS"} else "RS256"
+    if isinstance(key, (ec.EllipticCurvePublicKey, ec.EllipticCurvePrivateKey)):
+        by_curve = {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512", "secp256k1": "ES256K"}
+        return by_curve.get(key.curve.name, preferred or "ES256")
+    if isinstance(key, (ed25519.Ed25519PublicKey, ed25519.Ed25519PrivateKey, ed448.Ed448PublicKey, ed448.Ed448PrivateKey)):
+        return "EdDSA"
+    raise ImproperlyConfigured(f"Unsupported JWT key type: {type(key).__name__}")
+
+
+def _read_pem(value: str) -> bytes:
+    if "-----BEGIN" in value:
+        return value.encode("utf-8")
+    path = value if os.path.isabs(value) else os.path.join(str(settings.BASE_DIR), value)
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def load_private_key(value: str):
+    from cryptography.hazmat.primitives import serialization
+
+    return serialization.load_pem_private_key(_read_pem(value), password=None)
+
+
+def load_public_key(value: str):
+    from cryptography.hazmat.primitives import serialization
+
+    pem = _read_pem(value)
+    if b"PRIVATE KEY" in pem:
+        return serialization.load_pem_private_key(pem, password=None).public_key()
+    return serialization.load_pem_public_key(pem)
+
+
+class TokenService:
+    def __init__(
+        self,
+        *,
+        algorithm: str = "HS256",
+        secret: Optional[str] = None,
+        private_key=None,
+        signing_kid: Optional[str] = None,
+        public_keys: Optional[Dict[Optional[str], Any]] = None,
+        accept_shared_secret: bool = False,
+        cache_size: int = 2048,
+    ):
+        self.algorithm = algorithm or "HS256"
+        self.symmetric = _is_symmetric(self.algorithm)
+        self.secret = secret
+        self.private_key = private_key
+        self.signing_kid = None
+        self.signing_algorithm = self.algorithm
+        # kid -> (algorithm, key)
+        self.keys: Dict[str, Tuple[str, Any]] = {}
+        if self.symmetric:
+            if not secret:
+                raise ImproperlyConfigured(f"{self.algorithm} needs JWT_SECRET")
+        else:
+            for kid, public_key in (public_keys or {}).items():
+                self.keys[kid or key_id(public_key)] = (algorithm_for(public_key, self.algorithm), public_key)
+            if private_key is not None:
+                public_key = private_key.public_key()
+                self.signing_kid = signing_kid or key_id(public_key)
+                self.signing_algorithm = algorithm_for(private_key, self.algorithm)
+                self.keys.setdefault(self.signing_kid, (self.signing_algorithm, public_key))
+            if not self.keys:
+                raise ImproperlyConfigured(f"{self.algorithm} needs JWT_PUBLIC_KEY_FILES or JWT_PRIVATE_KEY_FILE")
+        self.accept_shared_secret = bool(accept_shared_secret and secret and not self.symmetric)
+        self.cache_size = max(0, int(cache_size))
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    # -- signing -------------------------------------------------------
+
+    def sign(self, payload: Dict[str, Any]) -> str:
+        if self.symmetric:
+            return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+        if self.private_key is None:
+            raise ImproperlyConfigured("This node has no JWT_PRIVATE_KEY_FILE and can only verify tokens")
+        return jwt.encode(payload, self.private_key, algorithm=self.signing_algorithm, headers={"kid": self.signing_kid})
+
+    # -- verification --------------------------------------------------
+
+    def _key_for(self, header: Dict[str, Any]) -> Tuple[str, Any]:
+        if self.symmetric:
+            return self.algorithm, self.secret
+        alg = str(header.get("alg") or "")
+        if self.accept_shared_secret and _is_symmetric(alg) and "kid" not in header:
+            return alg, self.secret
+        kid = header.get("kid")
+        if kid is None and len(self.keys) == 1:
+            return next(iter(self.keys.values()))
+        try:
+            return self.keys[kid]
+        except (KeyError, TypeError):
+            raise jwt.InvalidTokenError("Unknown signing key") from None
+
+    def _cached(self, token: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_size:
+            return None
+        with self._lock:
+            claims = self._cache.get(token)
+            if claims is not None:
+                self._cache.move_to_end(token)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+            return claims
+
+    def _remember(self, token: str, claims: Dict[str, Any]):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[token] = claims
+            self._cache.move_to_end(token)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def verify(self, token: str, *, verify_exp: bool = True) -> Dict[str, Any]:
+        """Claims of a validly signed ``token``; raises ``jwt.InvalidTokenError`` subclasses."""
+        if not token:
+            raise jwt.InvalidTokenError("Missing token")
+        claims = self._cached(token)
+        if claims is None:
+            algorithm, key = self._key_for(jwt.get_unverified_header(token))
+            # Expiry is checked below so cached claims get the same check
+            claims = jwt.decode(token, key, algorithms=[algorithm], options={"verify_exp": False})
+            self._remember(token, claims)
+        if verify_exp and "exp" in claims:
+            try:
+                expired = int(claims["exp"]) <= time.time()
+            except (TypeError, ValueError):
+                raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.") from None
+            if expired:
+                raise jwt.ExpiredSignatureError("Signature has expired")
+        return dict(claims)
+
+
+def _split_key_files(raw: str) -> Iterable[Tuple[Optional[str], str]]:
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kid, sep, path = part.partition("=")
+        yield (kid.strip(), path.strip()) if sep else (None, part)
+
+
+def _build_from_settings() -> TokenService:
+    algorithm = getattr(settings, "JWT_ALGORITHM", "HS256") or "HS256"
+    secret = getattr(settings, "JWT_SECRET", None)
+    cache_size = getattr(settings, "JWT_CLAIMS_CACHE_SIZE", 2048)
+    if _is_symmetric(algorithm):
+        return TokenService(algorithm=algorithm, secret=secret, cache_size=cache_size)
+    private_file = getattr(settings, "JWT_PRIVATE_KEY_FILE", "") or ""
+    return TokenService(
+        algorithm=algorithm,
+        secret=secret,
+        private_key=load_private_key(private_file) if private_file else None,
+        signing_kid=getattr(settings, "JWT_SIGNING_KID", "") or None,
+        public_keys={kid: load_public_key(path) for kid, path in _split_key_files(getattr(settings, "JWT_PUBLIC_KEY_FILES", ""))},
+        accept_shared_secret=getattr(settings, "JWT_ACCEPT_SHARED_SECRET", False),
+        cache_size=cache_size,
+    )
+
+
+_service: Optional[TokenService] = None
+_service_lock = threading.Lock()
+
+
+def get_token_service() -> TokenService:
+    """Process-wide service built from the ``JWT_*`` settings on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = _build_from_settings()
+    return _service
+
+
+def set_token_service(service: Optional[TokenService]) -> None:
+    """Install a specific service (tests, key reloads); ``None`` rebuilds from settings on next use."""
+    global _service
+    with _service_lock:
+        _service = service
+
+
+def sign_token(payload: Dict[str, Any]) -> str:
+    return get_token_service().sign(payload)
+
+
+def verify_token(token: str, *, verify_exp: bool = True) -> Dict[str, Any]:
+    return get_token_service().verify(token, verify_exp=verify_exp)
+
+
+__all__ = [
+    "TokenService",
+    "key_id",
+    "algorithm_for",
+    "load_private_key",
+    "load_public_key",
+    "get_token_service",
+    "set_token_service",
+    "sign_token",
+    "verify_token",
+]
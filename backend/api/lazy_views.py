@@ -0,0 +1,58 @@
+"""URL callbacks that import their view module on first request.
+
+``api.urls`` is loaded when a worker starts. Heavy view modules (face
+recognition pulls in NumPy, diagnostics render PDFs) are routed through
+``lazy_view("views_face", "face_login")``. The module is imported when the
+route is first hit, not when the URLconf is built. Routing by name and
+``reverse()`` are unaffected.
+
+Async targets are run with ``async_to_sync``, because Django can only tell
+a view is async by inspecting the callback before the module is loaded.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Callable, Optional
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+
+# Modules routed lazily; the import budget command checks they stay out of startup
+LAZY_VIEW_MODULES = set()
+
+
+class LazyView:
+    def __init__(self, module: str, name: str):
+        self.module_name = f"{__package__}.{module}"
+        self.view_name = name
+        # Keep URL listings and error reports pointing at the real view
+        self.__module__ = self.module_name
+        self.__name__ = self.__qualname__ = name
+        self._view: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Callable:
+        if self._view is None:
+            with self._lock:
+                if self._view is None:
+                    view = getattr(importlib.import_module(self.module_name), self.view_name)
+                    if iscoroutinefunction(view):
+                        view = async_to_sync(view)
+                    self._view = view
+        return self._view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.resolve()(request, *args, **kwargs)
+
+    def __repr__(self):
+        return f"<LazyView {self.module_name}.{self.view_name}>"
+
+
+def lazy_view(module: str, name: str) -> LazyView:
+    LAZY_VIEW_MODULES.add(f"{__package__}.{module}")
+    return LazyView(module, name)
+
+
+__all__ = ["LAZY_VIEW_MODULES", "LazyView", "lazy_view"]
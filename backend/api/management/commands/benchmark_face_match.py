@@ -0,0 +1,76 @@
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from api.face_embeddings import pack_embedding, unpack_embedding
+from api.face_index import normalize_rows, top_k
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark face matching on synthetic embeddings (default 10,000 faces x 512 dims): the per-template "
+        "JSON decode and Python loop face login used before, against one matrix-vector product on the index matrix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--faces", type=int, default=10000, help="Enrolled faces (default: 10000)")
+        parser.add_argument("--dim", type=int, default=512, help="Embedding size (default: 512, Facenet512)")
+        parser.add_argument("--queries", type=int, default=20, help="Probes to time (default: 20)")
+        parser.add_argument("--top", type=int, default=5, help="Matches returned per probe (default: 5)")
+        parser.add_argument("--skip-legacy", action="store_true", help="Skip the per-template baseline")
+
+    def handle(self, *args, **options):
+        n = max(1, int(options["faces"]))
+        dim = max(1, int(options["dim"]))
+        queries = max(1, int(options["queries"]))
+        k = max(1, int(options["top"]))
+        rng = np.random.default_rng(11)
+        enrolled = rng.standard_normal((n, dim)).astype(np.float32)
+        stored = [json.dumps(row.tolist()) for row in enrolled]
+        packed = [pack_embedding(row) for row in enrolled]
+        # Probes are noisy copies of enrolled faces so each has a known answer
+        targets = rng.integers(0, n, size=queries)
+        probes = enrolled[targets] + 0.1 * rng.standard_normal((queries, dim)).astype(np.float32)
+
+        t0 = time.perf_counter()
+        normalize_rows(np.stack([np.asarray(json.loads(s), dtype=np.float32) for s in stored]))
+        json_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        matrix = normalize_rows(np.stack([unpack_embedding(b) for b in packed]))
+        build_ms = (time.perf_counter() - t0) * 1000
+        self.stdout.write(
+            f"Index build ({n} x {dim}, {matrix.nbytes / 2**20:.1f} MiB), once per worker: "
+            f"{build_ms:.1f} ms from float32 bytes, {json_ms:.1f} ms from JSON"
+        )
+        self.stdout.write(
+            f"Stored size per face: {len(packed[0])} bytes binary, {sum(map(len, stored)) // n} bytes JSON"
+        )
+
+        if not options.get("skip_legacy"):
+            t0 = time.perf_counter()
+            legacy_hits = sum(self._legacy_best(stored, probe) == target for probe, target in zip(probes, targets))
+            legacy_ms = (time.perf_counter() - t0) * 1000 / queries
+            self.stdout.write(f"per-template baseline: {legacy_ms:.1f} ms/probe, {legacy_hits}/{queries} correct")
+
+        t0 = time.perf_counter()
+        hits = 0
+        for probe, target in zip(probes, targets):
+            idx, _ = top_k(matrix, normalize_rows(probe)[0], k)
+            hits += int(idx[0] == target)
+        index_ms = (time.perf_counter() - t0) * 1000 / queries
+        self.stdout.write(self.style.SUCCESS(f"index top-{k}: {index_ms:.2f} ms/probe, {hits}/{queries} correct"))
+
+    @staticmethod
+    def _legacy_best(stored, probe):
+        """The previous face login matching: decode each template, then compare one at a time."""
+        best, best_distance = None, float("inf")
+        probe_norm = np.linalg.norm(probe)
+        for i, raw in enumerate(stored):
+            vec = np.array(json.loads(raw))
+            denom = np.linalg.norm(vec) * probe_norm
+            distance = 1.0 - (float(np.dot(probe, vec) / denom) if denom else 0.0)
+            if distance < best_distance:
+                best, best_distance = i, distance
+        return best
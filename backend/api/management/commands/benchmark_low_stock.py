@@ -0,0 +1,104 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.inventory_services import evaluate_low_stock, get_current_stock
+from api.models import InventoryItem, Location, ReorderSetting, StockMovement
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    """Counts executed statements without relying on the capped debug query log."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark low-stock evaluation on synthetic data (default 5,000 items x 5 locations). "
+        "All rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=5000, help="Number of synthetic items (default: 5000)")
+        parser.add_argument("--locations", type=int, default=5, help="Number of synthetic locations (default: 5)")
+        parser.add_argument("--skip-legacy", action="store_true", help="Skip the per-setting baseline")
+
+    def handle(self, *args, **options):
+        n_items = max(1, int(options.get("items") or 5000))
+        n_locs = max(1, int(options.get("locations") or 5))
+        try:
+            with transaction.atomic():
+                self._run(n_items, n_locs, skip_legacy=bool(options.get("skip_legacy")))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, n_items, n_locs, skip_legacy=False):
+        rng = random.Random(42)
+        now = timezone.now()
+        self.stdout.write(f"Seeding {n_items} items x {n_locs} locations ...")
+        locations = Location.objects.bulk_create(
+            [Location(code=f"BENCH{i}", name=f"Bench {i}") for i in range(n_locs)]
+        )
+        items = InventoryItem.objects.bulk_create(
+            [InventoryItem(name=f"bench-item-{i:05d}") for i in range(n_items)], batch_size=1000
+        )
+        settings_rows = []
+        movements = []
+        for it in items:
+            for loc in locations:
+                settings_rows.append(
+                    ReorderSetting(item=it, location=loc, reorder_point=Decimal(rng.randint(5, 20)), reorder_qty=Decimal(50))
+                )
+                movements.append(
+                    StockMovement(
+                        item=it,
+                        location=loc,
+                        movement_type=StockMovement.TYPE_RECEIPT,
+                        qty=Decimal(rng.randint(1, 40)),
+                        effective_at=now,
+                        recorded_at=now,
+                    )
+                )
+        ReorderSetting.objects.bulk_create(settings_rows, batch_size=2000)
+        StockMovement.objects.bulk_create(movements, batch_size=2000)
+
+        if not skip_legacy:
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                t0 = time.perf_counter()
+                legacy = self._legacy_low_stock()
+                legacy_s = time.perf_counter() - t0
+            self.stdout.write(f"per-setting baseline: {len(legacy)} breaches, {counter.count} queries, {legacy_s:.3f}s")
+
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            t0 = time.perf_counter()
+            low = evaluate_low_stock()
+            new_s = time.perf_counter() - t0
+        self.stdout.write(
+            self.style.SUCCESS(f"evaluate_low_stock: {len(low)} breaches, {counter.count} queries, {new_s:.3f}s")
+        )
+
+    @staticmethod
+    def _legacy_low_stock():
+        """The pre-existing algorithm: one balance query per ReorderSetting row."""
+        out = []
+        for rs in ReorderSetting.objects.select_related("item"):
+            qty = get_current_stock([str(rs.item_id)], str(rs.location_id)).get(str(rs.item_id), Decimal("0"))
+            if qty <= rs.reorder_point:
+                out.append((rs.item, qty))
+        return out
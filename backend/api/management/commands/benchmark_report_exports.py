@@ -0,0 +1,94 @@
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from api.models import AppUser, PaymentTransaction
+from api.views_common import _issue_jwt
+from api.views_reports import report_export
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the sales export as CSV and XLSX over synthetic payments and report time to first byte, "
+        "throughput and peak Python memory. All rows are created inside a transaction that is rolled back. "
+        "Fails if peak memory exceeds --max-peak-mb."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000, help="Synthetic payments to export (default: 200000)")
+        parser.add_argument("--max-peak-mb", type=float, default=32.0, help="Allowed peak traced memory (default: 32)")
+        parser.add_argument("--formats", default="csv,xlsx", help="Comma-separated formats (default: csv,xlsx)")
+
+    def handle(self, *args, **options):
+        rows = max(1, int(options.get("rows") or 200_000))
+        limit = float(options.get("max_peak_mb") or 32.0)
+        formats = [f.strip() for f in (options.get("formats") or "csv,xlsx").split(",") if f.strip()]
+        peaks = {}
+        try:
+            with transaction.atomic():
+                peaks = self._run(rows, formats)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        worst = max(peaks.values(), default=0) / (1024 * 1024)
+        if worst > limit:
+            raise CommandError(f"Peak memory {worst:.1f} MiB exceeds {limit:.1f} MiB: {peaks}")
+        self.stdout.write(self.style.SUCCESS(f"Peak memory within budget: {worst:.1f} MiB <= {limit:.1f} MiB"))
+
+    def _run(self, rows, formats):
+        self.stdout.write(f"Seeding {rows} payments ...")
+        admin = AppUser.objects.create(email="bench-exports@example.com", name="Bench", role="admin", status="active")
+        batch = 10_000
+        for start in range(0, rows, batch):
+            PaymentTransaction.objects.bulk_create(
+                [
+                    PaymentTransaction(
+                        order_id=f"BENCH-{n:07d}",
+                        amount=Decimal(50 + n % 900),
+                        method=("cash", "card", "mobile")[n % 3],
+                        customer=f"Customer {n % 5000}",
+                    )
+                    for n in range(start, min(rows, start + batch))
+                ],
+                batch_size=batch,
+            )
+
+        factory = RequestFactory()
+        token = _issue_jwt(admin)
+        now = timezone.now()
+        span = f"{(now - timedelta(days=1)).isoformat()}..{(now + timedelta(minutes=1)).isoformat()}"
+        peaks = {}
+        for fmt in formats:
+            request = factory.get(
+                "/api/reports/sales/export", {"format": fmt, "range": span}, HTTP_AUTHORIZATION=f"Bearer {token}"
+            )
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            resp = report_export(request, "sales")
+            if resp.status_code != 200:
+                tracemalloc.stop()
+                raise CommandError(f"{fmt}: export returned {resp.status_code}")
+            stream = iter(resp.streaming_content)
+            size = len(next(stream))
+            first = time.perf_counter() - t0
+            for chunk in stream:
+                size += len(chunk)
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks[fmt] = peak
+            self.stdout.write(
+                f"{fmt:>5}: first byte {first * 1000:.1f} ms, {rows} rows in {elapsed:.1f} s "
+                f"({rows / elapsed:,.0f} rows/s traced), {size / (1024 * 1024):.1f} MiB, peak {peak / (1024 * 1024):.1f} MiB"
+            )
+        return peaks
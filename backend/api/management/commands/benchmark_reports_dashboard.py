@@ -0,0 +1,108 @@
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from api.models import AppUser, Order, OrderItem, PaymentTransaction
+from api.report_cache import set_report_cache
+from api.sales_rollups import rebuild_between
+from api.views_common import _issue_jwt
+from api.views_reports import reports_dashboard
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    """Counts executed statements without relying on the capped debug query log."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure reports_dashboard query counts, latency and peak memory for several range lengths on synthetic orders. "
+        "All rows are created inside a transaction that is rolled back. Fails if the query count varies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=120, help="Days of synthetic history (default: 120)")
+        parser.add_argument("--orders-per-day", type=int, default=40, help="Orders per day (default: 40)")
+
+    def handle(self, *args, **options):
+        days = max(2, int(options.get("days") or 120))
+        per_day = max(1, int(options.get("orders_per_day") or 40))
+        counts = {}
+        # Measure the computation itself, not report cache hits
+        set_report_cache(False)
+        try:
+            with transaction.atomic():
+                counts = self._run(days, per_day)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            set_report_cache(None)
+        if len(set(counts.values())) > 1:
+            raise CommandError(f"Query count depends on range length: {counts}")
+        self.stdout.write(self.style.SUCCESS(f"Constant query count across ranges: {next(iter(counts.values()), 0)}"))
+
+    def _run(self, days, per_day):
+        rng = random.Random(7)
+        now = timezone.now()
+        self.stdout.write(f"Seeding {days * per_day} orders over {days} days ...")
+        admin = AppUser.objects.create(email="bench-dashboard@example.com", name="Bench", role="admin", status="active")
+        orders, stamps, items, payments = [], [], [], []
+        for d in range(days):
+            for n in range(per_day):
+                created = now - timedelta(days=d, minutes=rng.randint(0, 24 * 60 - 1))
+                total = Decimal(rng.randint(50, 900))
+                order = Order(order_number=f"BENCH-{d:03d}-{n:04d}", status=Order.STATUS_COMPLETED, total_amount=total)
+                orders.append(order)
+                stamps.append(created)
+                items.append(OrderItem(order=order, item_name=f"Dish {n % 12}", category=f"Cat {n % 5}", price=total, quantity=1))
+                payments.append(PaymentTransaction(order_id=order.order_number, amount=total, method="cash"))
+        Order.objects.bulk_create(orders, batch_size=1000)
+        # auto_now_add stamps every row with "now" on insert; write the spread-out times back
+        for order, created in zip(orders, stamps):
+            order.created_at = created
+        Order.objects.bulk_update(orders, ["created_at"], batch_size=1000)
+        OrderItem.objects.bulk_create(items, batch_size=1000)
+        PaymentTransaction.objects.bulk_create(payments, batch_size=1000)
+        # Bulk inserts bypass the rollup writers; derive the rollups once
+        rebuild_between(now - timedelta(days=days), now)
+
+        factory = RequestFactory()
+        token = _issue_jwt(admin)
+        iso = lambda n: f"{(now - timedelta(days=n)).isoformat()}..{now.isoformat()}"  # noqa: E731
+        ranges = {"today": "today", "7d": "7d", "30d": "30d", "90d": iso(90)}
+        counts = {}
+        for label, value in ranges.items():
+            request = factory.get("/api/reports/dashboard", {"range": value}, HTTP_AUTHORIZATION=f"Bearer {token}")
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                t0 = time.perf_counter()
+                resp = reports_dashboard(request)
+                elapsed = time.perf_counter() - t0
+            if resp.status_code != 200:
+                raise CommandError(f"{label}: dashboard returned {resp.status_code}")
+            # Second, untimed pass for peak Python memory (tracemalloc slows execution)
+            tracemalloc.start()
+            reports_dashboard(request)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            counts[label] = counter.count
+            self.stdout.write(f"{label:>6}: {counter.count} queries, {elapsed * 1000:.1f} ms, peak {peak / 1024:.0f} KiB")
+        return counts
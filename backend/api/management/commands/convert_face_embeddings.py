@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.face_embeddings import convert_json_rows
+from api.models import FaceTemplate
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert face templates still stored as JSON text to the binary float32 column, in primary-key batches. "
+        "Migration 0054 does this once; run it again after a rolling deploy in which older workers wrote JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per update (default: 500)")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows still stored as JSON")
+
+    def handle(self, *args, **options):
+        if options.get("dry_run"):
+            pending = FaceTemplate.objects.filter(embedding_vector__isnull=True).exclude(embedding="").count()
+            self.stdout.write(f"{pending} face template(s) stored as JSON")
+            return
+        stats = convert_json_rows(FaceTemplate, batch_size=max(1, int(options.get("batch_size") or 500)))
+        self.stdout.write(self.style.SUCCESS(f"Converted {stats['converted']} face template(s)"))
+        if stats["invalid"]:
+            self.stdout.write(self.style.WARNING(f"{stats['invalid']} unreadable embedding(s) left as JSON"))
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.import_budget import deferred_modules, measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile worker startup imports with `python -X importtime` (django.setup() plus the URLconf) and fail "
+        "if they exceed STARTUP_IMPORT_BUDGET_MS or load a module that should only load on first use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            action="append",
+            dest="modules",
+            help="Module imported after django.setup() (repeatable; default: api.urls)",
+        )
+        parser.add_argument("--budget-ms", type=float, default=None, help="Budget (default: STARTUP_IMPORT_BUDGET_MS)")
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to measure; the fastest counts (default: 3)")
+        parser.add_argument("--top", type=int, default=12, help="Packages to list by import time (default: 12)")
+
+    def handle(self, *args, **options):
+        modules = options.get("modules") or ["api.urls"]
+        budget = options.get("budget_ms")
+        if budget is None:
+            budget = float(getattr(settings, "STARTUP_IMPORT_BUDGET_MS", 800))
+        try:
+            profiles = [measure_startup(modules) for _ in range(max(1, int(options.get("runs") or 1)))]
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        best = min(profiles, key=lambda p: p.total_ms)
+
+        self.stdout.write(
+            f"Startup imports ({', '.join(modules)}): {best.total_ms:.1f} ms, best of {len(profiles)} "
+            f"(budget {budget:.0f} ms, {len(best.records)} modules)"
+        )
+        for package, ms in list(best.by_package().items())[: max(0, int(options.get("top") or 0))]:
+            self.stdout.write(f"  {package:<28} {ms:8.1f} ms")
+
+        problems = []
+        eager = best.loaded(deferred_modules())
+        if eager:
+            problems.append(f"loaded at startup but meant for first use: {', '.join(eager)}")
+        if best.total_ms > budget:
+            problems.append(f"{best.total_ms:.1f} ms is over the {budget:.0f} ms budget")
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Startup imports within budget"))
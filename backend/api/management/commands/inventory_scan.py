@@ -1,44 +1,33 @@
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from django.utils import timezone
 
-from api.inventory_services import get_low_stock, get_expiring_batches
-from api.models import Notification, AppUser
+from api.inventory_alerts import AlertAggregator, expiry_alert, low_stock_alert
+from api.inventory_services import evaluate_low_stock, get_expiring_batches
 
 
 class Command(BaseCommand):
-    help = "Scan inventory for low stock and expiring batches; create notifications for managers."
+    help = "Scan inventory for low stock and expiring batches; send one digest notification per manager."
 
     def add_arguments(self, parser):
         parser.add_argument("--days", type=int, default=7, help="Expiry threshold in days (default: 7)")
+        parser.add_argument(
+            "--cooldown",
+            type=int,
+            default=None,
+            help="Seconds before an identical alert is re-sent (default: INVENTORY_ALERT_COOLDOWN_SECONDS)",
+        )
 
     @transaction.atomic
     def handle(self, *args, **options):
         days = int(options.get("days") or 7)
-        now = timezone.now()
-        # Managers
-        managers = list(AppUser.objects.filter(role__in=["manager", "admin"]))
+        cooldown = options.get("cooldown")
+        agg = AlertAggregator(cooldown=timedelta(seconds=cooldown) if cooldown is not None else None)
         # Low stock
-        low = get_low_stock()
-        for item, qty in low:
-            for u in managers:
-                Notification.objects.create(
-                    user=u,
-                    title=f"Low stock: {item.name}",
-                    message=f"Current stock is {qty}. Reorder point may be reached.",
-                    type=Notification.TYPE_WARNING,
-                    meta={"itemId": str(item.id), "qty": float(qty)},
-                )
+        agg.extend(low_stock_alert(b) for b in evaluate_low_stock())
         # Expiring
-        batches = get_expiring_batches(days)
-        for b in batches:
-            for u in managers:
-                Notification.objects.create(
-                    user=u,
-                    title=f"Expiring soon: {getattr(b.item, 'name', '')}",
-                    message=f"Batch {b.lot_code or b.id} expires on {b.expiry_date}",
-                    type=Notification.TYPE_WARNING,
-                    meta={"batchId": str(b.id), "expiryDate": b.expiry_date.isoformat() if b.expiry_date else None},
-                )
-        self.stdout.write(self.style.SUCCESS("Inventory scan complete"))
-
+        agg.extend(expiry_alert(b) for b in get_expiring_batches(days))
+        pending = len(agg)
+        created = agg.flush(digest=True)
+        self.stdout.write(self.style.SUCCESS(f"Inventory scan complete: {pending} alert(s), {created} notification(s) created"))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from api.token_sweeper import TABLES, count_dead, sweep_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired, revoked, used or consumed refresh tokens, reset tokens, reset codes and login OTPs "
+        "in bounded primary-key batches. Unlike the hourly task this runs until nothing is left."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table",
+            action="append",
+            choices=TABLES,
+            dest="tables",
+            help="Only sweep this table (repeatable; default: all)",
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per delete (default: TOKEN_SWEEP_BATCH_SIZE)")
+        parser.add_argument("--max-batches", type=int, default=0, help="Stop each table after N batches (default: no limit)")
+        parser.add_argument(
+            "--grace-seconds",
+            type=int,
+            default=None,
+            help="Keep rows that died within this many seconds (default: TOKEN_SWEEP_GRACE_SECONDS)",
+        )
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches")
+        parser.add_argument("--parallel", action="store_true", help="Sweep the tables concurrently, one thread each")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be deleted")
+
+    def handle(self, *args, **options):
+        tables = options.get("tables") or list(TABLES)
+        if options.get("dry_run"):
+            for table in tables:
+                self.stdout.write(f"{table}: {count_dead(table, grace_seconds=options.get('grace_seconds'))} dead row(s)")
+            return
+        counts = sweep_tables(
+            tables,
+            parallel=options.get("parallel", False),
+            batch_size=options.get("batch_size"),
+            max_batches=options.get("max_batches") or 0,
+            grace_seconds=options.get("grace_seconds"),
+            pause_seconds=options.get("sleep") or 0.0,
+        )
+        for table, removed in counts.items():
+            self.stdout.write(f"{table}: removed {removed} row(s)")
+        self.stdout.write(self.style.SUCCESS(f"Removed {sum(counts.values())} dead auth token row(s)"))
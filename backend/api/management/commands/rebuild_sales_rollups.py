@@ -0,0 +1,48 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.sales_rollups import rebuild_between, source_date_bounds
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill or rebuild the hourly/daily sales rollups from orders and payments. "
+        "Defaults to the last 2 local days; use --all after first deploying the rollup tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=2, help="Rebuild the last N local days (default: 2)")
+        parser.add_argument("--since", help="First local day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Last local day to rebuild, inclusive (YYYY-MM-DD; default: today)")
+        parser.add_argument("--all", action="store_true", help="Rebuild everything from the first order/payment")
+        parser.add_argument("--chunk-days", type=int, default=7, help="Local days per transaction (default: 7)")
+
+    def handle(self, *args, **options):
+        tz = timezone.get_default_timezone()
+        today = timezone.localdate()
+        try:
+            until = datetime.strptime(options["until"], "%Y-%m-%d").date() if options.get("until") else today
+            since = datetime.strptime(options["since"], "%Y-%m-%d").date() if options.get("since") else None
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}")
+        if options.get("all"):
+            first, _ = source_date_bounds()
+            if first is None:
+                self.stdout.write("No orders or payments; nothing to rebuild")
+                return
+            since = timezone.localtime(first, tz).date()
+        if since is None:
+            since = until - timedelta(days=max(1, int(options.get("days") or 2)) - 1)
+        if since > until:
+            raise CommandError("--since must not be after --until")
+        start = datetime.combine(since, time.min, tzinfo=tz)
+        end = datetime.combine(until + timedelta(days=1), time.min, tzinfo=tz)
+        written = rebuild_between(start, end, chunk_days=options.get("chunk_days") or 7)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt sales rollups {since} .. {until}: {written['orders']} order, "
+                f"{written['items']} item and {written['payments']} payment row(s)"
+            )
+        )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.inventory_batch_stock import rebuild as rebuild_batch_index
+
+from api.inventory_reconcile import DEFAULT_CHUNK_SIZE, reconciliation_report, start_run
+
+
+class Command(BaseCommand):
+    help = "Compare cached InventoryItem.quantity with ledger sums and record any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Items per chunk (default: 1000)")
+        parser.add_argument("--repair", action="store_true", help="Reset drifting items to their ledger sum")
+        parser.add_argument(
+            "--async",
+            dest="use_async",
+            action="store_true",
+            help="Dispatch chunks to Celery workers instead of processing them here",
+        )
+        parser.add_argument(
+            "--rebuild-batch-index",
+            action="store_true",
+            help="Also recompute the per-location batch stock index from the ledger",
+        )
+
+    def handle(self, *args, **options):
+        if options.get("rebuild_batch_index"):
+            with transaction.atomic():
+                count = rebuild_batch_index()
+            self.stdout.write(f"Batch stock index rebuilt: {count} in-stock (batch, location) row(s)")
+        dispatch = None
+        if options.get("use_async"):
+            from api.tasks import reconcile_inventory_chunk
+
+            dispatch = reconcile_inventory_chunk.delay
+        run = start_run(chunk_size=options["chunk_size"], repair=options.get("repair", False), dispatch=dispatch)
+        if options.get("use_async"):
+            self.stdout.write(self.style.SUCCESS(f"Run {run.id}: dispatched {run.chunks_total} chunk(s)"))
+            return
+        report = reconciliation_report(limit=20)
+        for d in report["drifts"]:
+            self.stdout.write(f"{d['itemName']} ({d['itemId']}): cached {d['cachedQty']} vs ledger {d['ledgerQty']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Run {run.id}: {run.items_checked} item(s) in {run.chunks_total} chunk(s), "
+                f"{run.drift_count} drifting{' (repaired)' if run.repair and run.drift_count else ''}"
+            )
+        )
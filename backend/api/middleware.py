@@ -1,5 +1,4 @@
 import re
-import jwt
 from django.http import JsonResponse
 from django.conf import settings
 import time
@@ -88,31 +87,13 @@ class PendingUserGateMiddleware:
         return False
 
     def _user_from_jwt(self, request):
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
-            return None
-        token = auth.split(" ", 1)[1].strip()
-        if not token:
-            return None
-        try:
-            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
-            return None
+        # Shares the decoded token and loaded user with the view via the request
+        from .views_common import _request_db_actor
 
-        user_id = str(payload.get("sub") or "")
-        email = (payload.get("email") or "").lower().strip()
         try:
-            from .models import AppUser
-            if user_id:
-                u = AppUser.objects.filter(id=user_id).first()
-                if u:
-                    return u
-            if email:
-                u = AppUser.objects.filter(email=email).first()
-                return u
+            return _request_db_actor(request)
         except Exception:
             return None
-        return None
 
 
 class VersionHeaderMiddleware:
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:58
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0042_appuser_credit_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryAlertState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=191, unique=True)),
+                ('kind', models.CharField(max_length=32)),
+                ('last_notified_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_states', to='api.batch')),
+                ('item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_states', to='api.inventoryitem')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_states', to='api.location')),
+            ],
+            options={
+                'db_table': 'inv_alert_state',
+                'indexes': [models.Index(fields=['kind', 'last_notified_at'], name='inv_alert_s_kind_8ef530_idx')],
+            },
+        ),
+    ]
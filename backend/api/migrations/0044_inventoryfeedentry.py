@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:01
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0043_inventoryalertstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryFeedEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=16)),
+                ('source_id', models.UUIDField()),
+                ('type', models.CharField(max_length=16)),
+                ('qty', models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True)),
+                ('effective_at', models.DateTimeField(blank=True, null=True)),
+                ('recorded_at', models.DateTimeField()),
+                ('actor_name', models.CharField(blank=True, max_length=255)),
+                ('reference_type', models.CharField(blank=True, max_length=32)),
+                ('reference_id', models.CharField(blank=True, max_length=64)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('meta', models.JSONField(blank=True, default=dict)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.appuser')),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feed_entries', to='api.batch')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='api.inventoryitem')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='api.location')),
+            ],
+            options={
+                'db_table': 'inv_activity_feed',
+                'indexes': [models.Index(fields=['recorded_at', 'id'], name='inv_feed_recorded_idx'), models.Index(fields=['item', 'recorded_at', 'id'], name='inv_feed_item_recorded_idx'), models.Index(fields=['location', 'recorded_at', 'id'], name='inv_feed_loc_recorded_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'source_id'), name='uniq_inv_feed_source')],
+            },
+        ),
+    ]
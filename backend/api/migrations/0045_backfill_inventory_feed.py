@@ -0,0 +1,73 @@
+from django.db import migrations
+import uuid
+
+
+BATCH = 2000
+
+
+def backfill_feed(apps, schema_editor):
+    StockMovement = apps.get_model('api', 'StockMovement')
+    InventoryActivity = apps.get_model('api', 'InventoryActivity')
+    InventoryFeedEntry = apps.get_model('api', 'InventoryFeedEntry')
+
+    def _flush(rows):
+        if rows:
+            InventoryFeedEntry.objects.bulk_create(rows, ignore_conflicts=True)
+        return []
+
+    rows = []
+    for mv in StockMovement.objects.select_related('actor').order_by('recorded_at', 'id').iterator(chunk_size=BATCH):
+        actor = mv.actor
+        rows.append(InventoryFeedEntry(
+            id=uuid.uuid4(),
+            kind='movement',
+            source_id=mv.id,
+            item_id=mv.item_id,
+            location_id=mv.location_id,
+            batch_id=mv.batch_id,
+            type=mv.movement_type,
+            qty=mv.qty,
+            effective_at=mv.effective_at,
+            recorded_at=mv.recorded_at,
+            actor_id=mv.actor_id,
+            actor_name=((actor.name or actor.email) if actor else '')[:255],
+            reference_type=mv.reference_type or '',
+            reference_id=mv.reference_id or '',
+            reason=mv.reason or '',
+        ))
+        if len(rows) >= BATCH:
+            rows = _flush(rows)
+    rows = _flush(rows)
+
+    updates = InventoryActivity.objects.select_related('actor').filter(action='update').order_by('created_at', 'id')
+    for a in updates.iterator(chunk_size=BATCH):
+        actor = a.actor
+        rows.append(InventoryFeedEntry(
+            id=uuid.uuid4(),
+            kind='item_update',
+            source_id=a.id,
+            item_id=a.item_id,
+            type='ITEM_UPDATE',
+            recorded_at=a.created_at,
+            actor_id=a.actor_id,
+            actor_name=(((actor.name or actor.email) if actor else '') or a.performed_by or '')[:255],
+            reason=a.reason or '',
+            meta=a.meta or {},
+        ))
+        if len(rows) >= BATCH:
+            rows = _flush(rows)
+    _flush(rows)
+
+
+def clear_feed(apps, schema_editor):
+    apps.get_model('api', 'InventoryFeedEntry').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0044_inventoryfeedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_feed, clear_feed),
+    ]
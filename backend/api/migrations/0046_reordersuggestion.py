@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:03
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0045_backfill_inventory_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('method', models.CharField(max_length=16)),
+                ('history_days', models.PositiveIntegerField(default=0)),
+                ('avg_daily_demand', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('demand_std', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('lead_time_days', models.PositiveIntegerField(default=0)),
+                ('safety_stock', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('suggested_reorder_point', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('suggested_reorder_qty', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('applied', 'Applied'), ('dismissed', 'Dismissed')], default='pending', max_length=16)),
+                ('computed_at', models.DateTimeField()),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('applied_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.appuser')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestions', to='api.inventoryitem')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_suggestions', to='api.location')),
+            ],
+            options={
+                'db_table': 'inv_reorder_suggestion',
+                'indexes': [models.Index(fields=['status', 'computed_at'], name='inv_reorder_status_9228c1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'location'), name='uniq_item_location_suggestion')],
+            },
+        ),
+    ]
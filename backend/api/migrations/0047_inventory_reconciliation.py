@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:07
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0046_reordersuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryReconciliationRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done')], default='running', max_length=16)),
+                ('repair', models.BooleanField(default=False)),
+                ('chunk_size', models.PositiveIntegerField(default=0)),
+                ('chunks_total', models.PositiveIntegerField(default=0)),
+                ('chunks_done', models.PositiveIntegerField(default=0)),
+                ('items_checked', models.PositiveIntegerField(default=0)),
+                ('drift_count', models.PositiveIntegerField(default=0)),
+                ('total_abs_drift', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'inv_reconciliation_run',
+                'indexes': [models.Index(fields=['started_at'], name='inv_reconci_started_ad372d_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryQuantityDrift',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('cached_qty', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('ledger_qty', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('drift', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('repaired', models.BooleanField(default=False)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quantity_drifts', to='api.inventoryitem')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drifts', to='api.inventoryreconciliationrun')),
+            ],
+            options={
+                'db_table': 'inv_quantity_drift',
+                'constraints': [models.UniqueConstraint(fields=('run', 'item'), name='uniq_run_item_drift')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0047_inventory_reconciliation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchStock',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('qty', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('expires_on', models.DateField()),
+                ('received_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_levels', to='api.batch')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_stock', to='api.inventoryitem')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_stock', to='api.location')),
+            ],
+            options={
+                'db_table': 'inv_batch_stock',
+                'indexes': [models.Index(fields=['expires_on', 'received_at', 'id'], name='inv_bstock_fefo_idx'), models.Index(fields=['location', 'expires_on', 'received_at', 'id'], name='inv_bstock_loc_fefo_idx'), models.Index(fields=['item', 'location', 'expires_on', 'received_at', 'id'], name='inv_bstock_item_fefo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('batch', 'location'), name='uniq_batch_location_stock')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+import datetime
+import uuid
+
+from django.db import migrations
+from django.db.models import Sum
+
+
+BATCH = 2000
+NO_EXPIRY = datetime.date(9999, 12, 31)
+
+
+def backfill_batch_stock(apps, schema_editor):
+    Batch = apps.get_model('api', 'Batch')
+    BatchStock = apps.get_model('api', 'BatchStock')
+    StockMovement = apps.get_model('api', 'StockMovement')
+
+    totals = (
+        StockMovement.objects.filter(batch__isnull=False)
+        .order_by()
+        .values('batch_id', 'location_id')
+        .annotate(total=Sum('qty'))
+        .filter(total__gt=0)
+    )
+    pending = []
+
+    def _flush(chunk):
+        batches = {b.id: b for b in Batch.objects.filter(id__in={r['batch_id'] for r in chunk})}
+        out = []
+        for r in chunk:
+            b = batches.get(r['batch_id'])
+            if b is None:
+                continue
+            out.append(BatchStock(
+                id=uuid.uuid4(),
+                batch_id=b.id,
+                item_id=b.item_id,
+                location_id=r['location_id'],
+                qty=r['total'],
+                expires_on=b.expiry_date or NO_EXPIRY,
+                received_at=b.received_at or b.created_at,
+            ))
+        BatchStock.objects.bulk_create(out, ignore_conflicts=True)
+
+    for r in totals.iterator(chunk_size=BATCH):
+        pending.append(r)
+        if len(pending) >= BATCH:
+            _flush(pending)
+            pending = []
+    if pending:
+        _flush(pending)
+
+
+def clear_batch_stock(apps, schema_editor):
+    apps.get_model('api', 'BatchStock').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0048_batchstock'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_batch_stock, clear_batch_stock),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0049_backfill_batch_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSalesRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('grain', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=8)),
+                ('bucket_start', models.DateTimeField()),
+                ('status', models.CharField(max_length=16)),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rpt_order_rollup',
+                'constraints': [models.UniqueConstraint(fields=('grain', 'bucket_start', 'status'), name='uniq_order_rollup_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentSalesRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('grain', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=8)),
+                ('bucket_start', models.DateTimeField()),
+                ('method', models.CharField(max_length=16)),
+                ('status', models.CharField(max_length=16)),
+                ('txn_count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rpt_payment_rollup',
+                'constraints': [models.UniqueConstraint(fields=('grain', 'bucket_start', 'method', 'status'), name='uniq_payment_rollup_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemSalesRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('grain', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=8)),
+                ('bucket_start', models.DateTimeField()),
+                ('order_status', models.CharField(max_length=16)),
+                ('category', models.CharField(blank=True, max_length=128)),
+                ('item_name', models.CharField(max_length=255)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('menu_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.menuitem')),
+            ],
+            options={
+                'db_table': 'rpt_item_rollup',
+                'constraints': [models.UniqueConstraint(fields=('grain', 'bucket_start', 'order_status', 'category', 'item_name'), name='uniq_item_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:38
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0050_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=32)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('spec_hash', models.CharField(db_index=True, max_length=40)),
+                ('inflight_key', models.CharField(blank=True, max_length=40, null=True, unique=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('chunks_total', models.PositiveIntegerField(default=0)),
+                ('chunks_done', models.PositiveIntegerField(default=0)),
+                ('requested_by', models.CharField(blank=True, max_length=64)),
+                ('result_file', models.CharField(blank=True, max_length=255)),
+                ('result_bytes', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'rpt_job',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='rpt_job_status_3ce152_idx'), models.Index(fields=['expires_at'], name='rpt_job_expires_45004d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0051_report_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['created_at'], name='payment_txn_created_11382e_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0052_payment_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facetemplate',
+            name='embedding_vector',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='facetemplate',
+            name='embedding',
+            field=models.TextField(blank=True, default='', help_text='Legacy JSON array of the facial embedding'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+from api.face_embeddings import convert_json_rows, unpack_embedding
+
+
+BATCH = 500
+
+
+def convert_embeddings(apps, schema_editor):
+    convert_json_rows(apps.get_model('api', 'FaceTemplate'), batch_size=BATCH)
+
+
+def restore_json(apps, schema_editor):
+    import json
+
+    FaceTemplate = apps.get_model('api', 'FaceTemplate')
+    last_pk = None
+    while True:
+        qs = FaceTemplate.objects.filter(embedding_vector__isnull=False).order_by('pk')
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        rows = list(qs.only('pk', 'embedding', 'embedding_vector')[:BATCH])
+        if not rows:
+            return
+        last_pk = rows[-1].pk
+        for row in rows:
+            if not row.embedding:
+                row.embedding = json.dumps(unpack_embedding(row.embedding_vector).tolist())
+            row.embedding_vector = None
+        FaceTemplate.objects.bulk_update(rows, ['embedding', 'embedding_vector'])
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so a large table is not converted in one transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0053_facetemplate_embedding_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert_embeddings, restore_json),
+    ]
@@ -1,4 +1,5 @@
 import os
+from datetime import date
 from decimal import Decimal
 from uuid import uuid4
 from django.core.exceptions import ValidationError
@@ -248,8 +249,11 @@ class FaceTemplate(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     user = models.OneToOneField(AppUser, on_delete=models.CASCADE, related_name="face_template")
 
-    # DeepFace embedding (stored as JSON array, typically 512 or 2622 dimensions)
-    embedding = models.TextField(help_text="JSON array of facial embedding vector")
+    # DeepFace embedding (typically 512 or 2622 dimensions) as a versioned header plus
+    # float32 bytes, see api.face_embeddings. The JSON column is only read for rows
+    # not converted yet and is cleared on conversion.
+    embedding_vector = models.BinaryField(null=True, blank=True, editable=False)
+    embedding = models.TextField(blank=True, default="", help_text="Legacy JSON array of the facial embedding")
 
     # Model configuration
     model_name = models.CharField(
@@ -292,6 +296,18 @@ class FaceTemplate(models.Model):
     def __str__(self):
         return f"FaceTemplate for {self.user.email} ({self.model_name})"
 
+    def set_embedding(self, values) -> None:
+        from .face_embeddings import embedding_to_json, pack_embedding
+
+        self.embedding_vector = pack_embedding(values)
+        self.embedding = embedding_to_json(values)
+
+    def get_embedding(self):
+        """The embedding as a float32 NumPy vector, or None if it cannot be read."""
+        from .face_embeddings import read_embedding
+
+        return read_embedding(self.embedding_vector, self.embedding)
+
 
 # -----------------------------
 # Employees & Scheduling
@@ -549,6 +565,8 @@ class PaymentTransaction(models.Model):
             models.Index(fields=["order_id", "created_at"]),
             models.Index(fields=["method", "created_at"]),
             models.Index(fields=["status", "created_at"]),
+            # Keyset walks over (created_at, id) for exports
+            models.Index(fields=["created_at"]),
         ]
 
 
@@ -804,6 +822,195 @@ class ReorderSetting(models.Model):
         ]
 
 
+class ReorderSuggestion(models.Model):
+    """Forecast-derived reorder point/qty for an (item, location), pending review."""
+
+    STATUS_PENDING = "pending"
+    STATUS_APPLIED = "applied"
+    STATUS_DISMISSED = "dismissed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_APPLIED, "Applied"),
+        (STATUS_DISMISSED, "Dismissed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="reorder_suggestions")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="reorder_suggestions")
+    method = models.CharField(max_length=16)
+    history_days = models.PositiveIntegerField(default=0)
+    avg_daily_demand = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    demand_std = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    lead_time_days = models.PositiveIntegerField(default=0)
+    safety_stock = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    suggested_reorder_point = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    suggested_reorder_qty = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    computed_at = models.DateTimeField()
+    applied_at = models.DateTimeField(blank=True, null=True)
+    applied_by = models.ForeignKey(AppUser, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        db_table = "inv_reorder_suggestion"
+        indexes = [
+            models.Index(fields=["status", "computed_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["item", "location"], name="uniq_item_location_suggestion"),
+        ]
+
+
+class InventoryReconciliationRun(models.Model):
+    """One pass comparing cached InventoryItem.quantity with ledger sums.
+
+    Chunks are processed independently (possibly by different workers) and
+    fold their counts into this row with F() increments.
+    """
+
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    repair = models.BooleanField(default=False)
+    chunk_size = models.PositiveIntegerField(default=0)
+    chunks_total = models.PositiveIntegerField(default=0)
+    chunks_done = models.PositiveIntegerField(default=0)
+    items_checked = models.PositiveIntegerField(default=0)
+    drift_count = models.PositiveIntegerField(default=0)
+    total_abs_drift = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "inv_reconciliation_run"
+        indexes = [
+            models.Index(fields=["started_at"]),
+        ]
+
+
+class InventoryQuantityDrift(models.Model):
+    """An item whose cached quantity disagreed with the ledger in a run."""
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    run = models.ForeignKey(InventoryReconciliationRun, on_delete=models.CASCADE, related_name="drifts")
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="quantity_drifts")
+    cached_qty = models.DecimalField(max_digits=14, decimal_places=4)
+    ledger_qty = models.DecimalField(max_digits=14, decimal_places=4)
+    drift = models.DecimalField(max_digits=14, decimal_places=4)
+    repaired = models.BooleanField(default=False)
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "inv_quantity_drift"
+        constraints = [
+            models.UniqueConstraint(fields=["run", "item"], name="uniq_run_item_drift"),
+        ]
+
+
+class BatchStock(models.Model):
+    """On-hand quantity of a batch at one location (the FEFO batch index).
+
+    Maintained from StockMovement writes; rows are removed once a batch is
+    empty at a location, so the table only holds in-stock batches.
+    ``expires_on`` is the batch expiry, or ``NO_EXPIRY`` when it has none, so
+    expiry-ordered scans read straight off the composite indexes.
+    """
+
+    NO_EXPIRY = date(9999, 12, 31)
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name="stock_levels")
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="batch_stock")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="batch_stock")
+    qty = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    expires_on = models.DateField()
+    received_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "inv_batch_stock"
+        indexes = [
+            models.Index(fields=["expires_on", "received_at", "id"], name="inv_bstock_fefo_idx"),
+            models.Index(fields=["location", "expires_on", "received_at", "id"], name="inv_bstock_loc_fefo_idx"),
+            models.Index(
+                fields=["item", "location", "expires_on", "received_at", "id"], name="inv_bstock_item_fefo_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["batch", "location"], name="uniq_batch_location_stock"),
+        ]
+
+
+class InventoryFeedEntry(models.Model):
+    """Append-only activity feed for inventory (stock movements + item updates).
+
+    Written alongside StockMovement / InventoryActivity rows so that the recent
+    activity endpoint can page a single table by (recorded_at, id).
+    """
+
+    KIND_MOVEMENT = "movement"
+    KIND_ITEM_UPDATE = "item_update"
+    TYPE_ITEM_UPDATE = "ITEM_UPDATE"
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    kind = models.CharField(max_length=16)
+    source_id = models.UUIDField()
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="feed_entries")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, null=True, blank=True, related_name="feed_entries")
+    batch = models.ForeignKey(Batch, on_delete=models.SET_NULL, null=True, blank=True, related_name="feed_entries")
+    type = models.CharField(max_length=16)
+    qty = models.DecimalField(max_digits=14, decimal_places=4, blank=True, null=True)
+    effective_at = models.DateTimeField(blank=True, null=True)
+    recorded_at = models.DateTimeField()
+    actor = models.ForeignKey(AppUser, on_delete=models.SET_NULL, null=True, blank=True)
+    actor_name = models.CharField(max_length=255, blank=True)
+    reference_type = models.CharField(max_length=32, blank=True)
+    reference_id = models.CharField(max_length=64, blank=True)
+    reason = models.CharField(max_length=255, blank=True)
+    meta = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = "inv_activity_feed"
+        indexes = [
+            models.Index(fields=["recorded_at", "id"], name="inv_feed_recorded_idx"),
+            models.Index(fields=["item", "recorded_at", "id"], name="inv_feed_item_recorded_idx"),
+            models.Index(fields=["location", "recorded_at", "id"], name="inv_feed_loc_recorded_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "source_id"], name="uniq_inv_feed_source"),
+        ]
+
+
+class InventoryAlertState(models.Model):
+    """Last time an inventory alert was fanned out, used to debounce repeats.
+
+    ``key`` identifies the breach, e.g. ``low_stock:<item>:<location>:low``.
+    """
+
+    KIND_LOW_STOCK = "low_stock"
+    KIND_EXPIRY = "expiry"
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    key = models.CharField(max_length=191, unique=True)
+    kind = models.CharField(max_length=32)
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, null=True, blank=True, related_name="alert_states")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, null=True, blank=True, related_name="alert_states")
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE, null=True, blank=True, related_name="alert_states")
+    last_notified_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "inv_alert_state"
+        indexes = [
+            models.Index(fields=["kind", "last_notified_at"]),
+        ]
+
+
 # -----------------------------
 # Menu Management
 # -----------------------------
@@ -1167,6 +1374,130 @@ class OrderEvent(models.Model):
         return f"{self.event_type} on {self.order_id}"
 
 
+# -----------------------------
+# Sales rollups (reporting)
+# -----------------------------
+
+ROLLUP_GRAIN_HOUR = "hour"
+ROLLUP_GRAIN_DAY = "day"
+ROLLUP_GRAIN_CHOICES = [
+    (ROLLUP_GRAIN_HOUR, "Hour"),
+    (ROLLUP_GRAIN_DAY, "Day"),
+]
+
+
+class OrderSalesRollup(models.Model):
+    """Orders placed and their revenue per local hour/day bucket and order status."""
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    grain = models.CharField(max_length=8, choices=ROLLUP_GRAIN_CHOICES)
+    bucket_start = models.DateTimeField()
+    status = models.CharField(max_length=16)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "rpt_order_rollup"
+        constraints = [
+            models.UniqueConstraint(fields=["grain", "bucket_start", "status"], name="uniq_order_rollup_bucket"),
+        ]
+
+
+class ItemSalesRollup(models.Model):
+    """Quantity and revenue of ordered items per bucket, order status, category and item."""
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    grain = models.CharField(max_length=8, choices=ROLLUP_GRAIN_CHOICES)
+    bucket_start = models.DateTimeField()
+    order_status = models.CharField(max_length=16)
+    category = models.CharField(max_length=128, blank=True)
+    item_name = models.CharField(max_length=255)
+    menu_item = models.ForeignKey('MenuItem', on_delete=models.SET_NULL, null=True, blank=True)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "rpt_item_rollup"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["grain", "bucket_start", "order_status", "category", "item_name"],
+                name="uniq_item_rollup_bucket",
+            ),
+        ]
+
+
+class PaymentSalesRollup(models.Model):
+    """Payment count and amount per bucket, payment method and payment status."""
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    grain = models.CharField(max_length=8, choices=ROLLUP_GRAIN_CHOICES)
+    bucket_start = models.DateTimeField()
+    method = models.CharField(max_length=16)
+    status = models.CharField(max_length=16)
+    txn_count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "rpt_payment_rollup"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["grain", "bucket_start", "method", "status"], name="uniq_payment_rollup_bucket"
+            ),
+        ]
+
+
+# -----------------------------
+# Report jobs (asynchronous reports)
+# -----------------------------
+
+
+class ReportJob(models.Model):
+    """A report computed in the background; the result is stored as a gzipped JSON file.
+
+    ``inflight_key`` holds the spec hash while the job is queued or running and
+    is cleared when it finishes, so the unique index admits one in-flight job
+    per spec and identical submissions attach to it.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    kind = models.CharField(max_length=32)
+    params = models.JSONField(default=dict, blank=True)
+    spec_hash = models.CharField(max_length=40, db_index=True)
+    inflight_key = models.CharField(max_length=40, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    chunks_total = models.PositiveIntegerField(default=0)
+    chunks_done = models.PositiveIntegerField(default=0)
+    requested_by = models.CharField(max_length=64, blank=True)
+    result_file = models.CharField(max_length=255, blank=True)
+    result_bytes = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "rpt_job"
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["expires_at"]),
+        ]
+
+
 # -----------------------------
 # Cash handling (sessions and movements)
 # -----------------------------
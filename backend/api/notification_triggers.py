@@ -527,23 +527,20 @@ def trigger_daily_sales_summary():
     """
     try:
         from .models import Order
-        from django.db.models import Sum, Count
-
-        today = timezone.now().date()
-        today_start = timezone.datetime.combine(today, timezone.datetime.min.time())
-        today_end = timezone.datetime.combine(today, timezone.datetime.max.time())
-
-        # Get today's stats
-        stats = Order.objects.filter(
-            created_at__range=(today_start, today_end),
-            status='completed'
-        ).aggregate(
-            total_sales=Sum('total_amount'),
-            order_count=Count('id')
-        )
-
-        total_sales = stats['total_sales'] or 0
-        order_count = stats['order_count'] or 0
+        from .reports_timeseries import local_midnight
+        from .sales_rollups import ORDERS, window_totals
+
+        # Today's stats in Manila time, read from the sales rollups
+        now = timezone.now()
+        today = timezone.localdate(now)
+        stats = window_totals(
+            ORDERS,
+            {"today": (local_midnight(now), now)},
+            where={"status": Order.STATUS_COMPLETED},
+        )["today"]
+
+        total_sales = stats['revenue'] or 0
+        order_count = stats['orders'] or 0
 
         # Notify all admins and managers
         for user_id in get_admin_users():
@@ -0,0 +1,153 @@
+"""Bounded worker pool for password hashing.
+
+PBKDF2 is deliberately slow, and a burst of logins at shift change can tie
+up every request worker. Hashes run on a fixed-size thread pool instead.
+Once ``workers + max_queue`` jobs are waiting or running, new submissions
+raise ``HashPoolBusy`` right away, and views answer 429 with Retry-After
+instead of queueing without bound.
+
+``verify_password`` also reports when the stored hash uses outdated hasher
+parameters (Django's ``must_update``) and returns a fresh hash made with
+the current settings, so a successful login can save it.
+
+Async views await ``run_async``, which leaves the event loop free. Sync
+views call ``run``, which still caps how many hashes run at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashPoolBusy(Exception):
+    """The pool's queue is full; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = max(1, int(retry_after))
+
+
+class PasswordHashPool:
+    def __init__(self, workers: int = 2, max_queue: int = 32, retry_after: int = 2):
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.stats = {"submitted": 0, "completed": 0, "rejected": 0, "peak_pending": 0}
+
+    def _run_counted(self, fn: Callable[..., Any], args) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _done(self, _future: Future):
+        with self._lock:
+            self._pending -= 1
+            self.stats["completed"] += 1
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.stats["rejected"] += 1
+                raise HashPoolBusy(self.retry_after)
+            self._pending += 1
+            self.stats["submitted"] += 1
+            self.stats["peak_pending"] = max(self.stats["peak_pending"], self._pending)
+        try:
+            future = self._executor.submit(self._run_counted, fn, args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "maxQueue": self.max_queue,
+                "pending": self._pending,
+                "running": self._running,
+                "queued": max(0, self._pending - self._running),
+                "peakPending": self.stats["peak_pending"],
+                "submitted": self.stats["submitted"],
+                "completed": self.stats["completed"],
+                "rejected": self.stats["rejected"],
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def verify_password(raw: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    """``(matches, new_hash)``; ``new_hash`` is set when ``encoded`` should be upgraded."""
+    upgraded = []
+    ok = check_password(raw, encoded, setter=lambda value: upgraded.append(make_password(value)))
+    return ok, (upgraded[0] if ok and upgraded else None)
+
+
+_pool: Optional[PasswordHashPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool() -> PasswordHashPool:
+    """Process-wide pool sized by ``PASSWORD_HASH_WORKERS`` / ``PASSWORD_HASH_MAX_QUEUE``."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = int(getattr(settings, "PASSWORD_HASH_WORKERS", 0) or 0) or min(4, os.cpu_count() or 1)
+                _pool = PasswordHashPool(workers=workers, max_queue=getattr(settings, "PASSWORD_HASH_MAX_QUEUE", 32))
+    return _pool
+
+
+def set_hash_pool(pool: Optional[PasswordHashPool]) -> None:
+    """Install a specific pool (tests); ``None`` rebuilds from settings on next use."""
+    global _pool
+    with _pool_lock:
+        _pool = pool
+
+
+def check_password_bounded(raw: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    return get_hash_pool().run(verify_password, raw, encoded)
+
+
+def make_password_bounded(raw: str) -> str:
+    return get_hash_pool().run(make_password, raw)
+
+
+async def check_password_async(raw: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    return await get_hash_pool().run_async(verify_password, raw, encoded)
+
+
+__all__ = [
+    "HashPoolBusy",
+    "PasswordHashPool",
+    "verify_password",
+    "get_hash_pool",
+    "set_hash_pool",
+    "check_password_bounded",
+    "make_password_bounded",
+    "check_password_async",
+]
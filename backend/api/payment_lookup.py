@@ -0,0 +1,66 @@
+"""Batched lookups between orders and their payment transactions.
+
+``PaymentTransaction.order_id`` is a plain string: the order's UUID for POS
+orders, the event id for catering payments and, on some older rows, the
+order number. These helpers resolve a whole page of orders or payments with
+one query each (served by the ``(order_id, created_at)`` index) instead of
+one query per row.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from .models import Order, PaymentTransaction
+
+
+def _valid_uuids(values: Iterable) -> set:
+    out = set()
+    for v in values:
+        try:
+            out.add(str(UUID(str(v))))
+        except (TypeError, ValueError):
+            continue
+    return out
+
+
+def latest_payments(orders: Iterable[Order], status: Optional[str] = None) -> Dict[str, PaymentTransaction]:
+    """``{str(order.id): latest payment}`` for the orders that have one, in one query.
+
+    Payments are matched on the order id, or on the order number for rows
+    written before payments were keyed by id.
+    """
+    keys: Dict[str, str] = {}
+    for o in orders:
+        keys[str(o.id)] = str(o.id)
+        if o.order_number:
+            keys.setdefault(o.order_number, str(o.id))
+    if not keys:
+        return {}
+    qs = PaymentTransaction.objects.filter(order_id__in=list(keys))
+    if status:
+        qs = qs.filter(status=status)
+    latest: Dict[str, PaymentTransaction] = {}
+    for p in qs.order_by("created_at", "id"):
+        # Ascending order, so the last write per order wins
+        latest[keys[p.order_id]] = p
+    return latest
+
+
+def order_numbers_for(order_ids: Iterable) -> Dict[str, str]:
+    """``{order_id: order_number}`` for every given id; ids without an order map to ``""``.
+
+    Every requested id is present in the result so callers never fall back to
+    a per-row lookup.
+    """
+    requested = {str(i) for i in order_ids if i}
+    numbers = {key: "" for key in requested}
+    valid = _valid_uuids(requested)
+    if valid:
+        for oid, number in Order.objects.filter(id__in=valid).values_list("id", "order_number"):
+            numbers[str(oid)] = number or ""
+    return numbers
+
+
+__all__ = ["latest_payments", "order_numbers_for"]
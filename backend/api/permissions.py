@@ -0,0 +1,109 @@
+"""Permission codes compiled to integer bitsets.
+
+Every permission code gets a bit the first time it is seen. Role defaults
+are compiled into masks when ``views_common`` is imported, and a user's
+effective mask (role mask | explicit grants) is computed once and kept on the
+resolved principal, so a check is a dict lookup and one bitwise AND. The
+"all" wildcard (admins, or an explicit "all" grant) is the mask ``-1``, which
+contains every bit including ones assigned later.
+
+Bit numbers are per process and never stored; only masks built here may be
+compared with each other.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Mapping
+
+ALL = -1
+WILDCARD = "all"
+
+_bits: Dict[str, int] = {}
+_bits_lock = threading.Lock()
+_role_masks: Dict[str, int] = {}
+
+_MASK_ATTR = "_permission_mask"
+
+
+def bit(code: str) -> int:
+    """The bit for ``code``, assigning the next free one on first use."""
+    value = _bits.get(code)
+    if value is None:
+        with _bits_lock:
+            value = _bits.get(code)
+            if value is None:
+                value = _bits[code] = 1 << len(_bits)
+    return value
+
+
+def mask_of(codes: Iterable[str]) -> int:
+    mask = 0
+    for code in codes:
+        if code == WILDCARD:
+            return ALL
+        mask |= bit(code)
+    return mask
+
+
+def compile_role_masks(table: Mapping[str, Iterable[str]]) -> Dict[str, int]:
+    """Replace the role masks with ones built from ``{role: codes}``; admin is always ``ALL``."""
+    compiled = {role.lower(): mask_of(codes) for role, codes in table.items()}
+    compiled["admin"] = ALL
+    _role_masks.clear()
+    _role_masks.update(compiled)
+    return dict(compiled)
+
+
+def role_mask(role: str) -> int:
+    return _role_masks.get((role or "").lower(), 0)
+
+
+def effective_mask(user_or_dict) -> int:
+    """Role defaults plus explicit grants, cached on the user object.
+
+    The cache is reused while the object's ``role`` and ``permissions`` are
+    unchanged. Dict users (in-memory fallback) are computed on each call.
+    """
+    if isinstance(user_or_dict, dict):
+        role = user_or_dict.get("role") or ""
+        return role_mask(role) | mask_of(user_or_dict.get("permissions") or [])
+    role = getattr(user_or_dict, "role", "") or ""
+    explicit = getattr(user_or_dict, "permissions", None)
+    cached = getattr(user_or_dict, _MASK_ATTR, None)
+    if cached is not None and cached[0] == role and cached[1] is explicit:
+        return cached[2]
+    mask = role_mask(role) | mask_of(explicit or [])
+    try:
+        setattr(user_or_dict, _MASK_ATTR, (role, explicit, mask))
+    except AttributeError:
+        pass
+    return mask
+
+
+def has_all(user_or_dict, codes: Iterable[str]) -> bool:
+    need = mask_of(codes)
+    return effective_mask(user_or_dict) & need == need
+
+
+def has_any(user_or_dict, codes: Iterable[str]) -> bool:
+    need, wildcard = 0, False
+    for code in codes:
+        if code == WILDCARD:
+            wildcard = True
+        else:
+            need |= bit(code)
+    mask = effective_mask(user_or_dict)
+    return bool(mask & need) or (wildcard and mask == ALL)
+
+
+__all__ = [
+    "ALL",
+    "bit",
+    "mask_of",
+    "compile_role_masks",
+    "role_mask",
+    "effective_mask",
+    "has_all",
+    "has_any",
+]
@@ -0,0 +1,172 @@
+"""Short-lived cache of the authenticated user's auth fields.
+
+Every API request resolves its bearer token to an ``AppUser``. This cache
+keeps the fields authentication and permission checks read (id, email,
+name, role, status, permissions) for a few seconds, keyed by user id and the
+token's ``iat``, so hot endpoints skip the per-request user query.
+
+Each user has a generation counter. An entry records the generation it was
+loaded under and only counts as a hit while that is still current, so
+``invalidate_principal`` (status, role, verification and token revocation
+paths) takes effect on the next request. The entry and the counter are read
+together in one backend call. The bump is repeated once the surrounding
+transaction commits, so a request that loaded the old row in between is not
+served from cache either.
+
+Hits return an ``AppUser`` built with ``from_db``; the remaining columns are
+deferred and load on first access. Backends are the ones used by the report
+cache. Invalidation must reach every worker, so by default ("auto") the cache
+only runs over the shared "redis" backend and is off when no redis URL is
+configured. "local" is per process and only suitable for a single worker:
+other processes would see a change only after the TTL. Backend errors fall
+back to the database.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import uuid
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from .report_cache import CacheBackend, LocalCacheBackend, RedisCacheBackend
+
+
+logger = logging.getLogger(__name__)
+
+# Must follow the model's field order (``Model.from_db`` maps them positionally)
+PRINCIPAL_FIELDS = ("id", "email", "name", "role", "status", "permissions")
+
+
+class PrincipalCache:
+    def __init__(self, backend: CacheBackend, *, ttl: int = 5, prefix: str = "authp:v1:"):
+        self.backend = backend
+        self.ttl = max(1, int(ttl))
+        self.prefix = prefix
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def _gen_key(self, user_id: str) -> str:
+        return f"{self.prefix}gen:{user_id}"
+
+    def _key(self, user_id: str, iat) -> str:
+        return f"{self.prefix}{user_id}:{iat}"
+
+    def get_or_load(self, user_id: uuid.UUID, iat, load: Callable[[], Optional[object]]):
+        """Cached principal for (``user_id``, ``iat``), else ``load()`` (stored when it is that user)."""
+        uid = str(user_id)
+        try:
+            raw, gen = self.backend.get_many([self._key(uid, iat), self._gen_key(uid)])
+        except Exception:
+            self.stats["errors"] += 1
+            logger.warning("Principal cache unavailable; loading user from the database", exc_info=True)
+            return load()
+        gen = int(gen or 0)
+        if raw is not None:
+            entry = json.loads(raw)
+            if entry.get("g") == gen:
+                self.stats["hits"] += 1
+                return _principal_from_fields(entry["f"])
+        self.stats["misses"] += 1
+        user = load()
+        if user is not None and getattr(user, "id", None) == user_id:
+            fields = {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+            fields["id"] = uid
+            try:
+                self.backend.set(self._key(uid, iat), json.dumps({"g": gen, "f": fields}).encode(), self.ttl)
+            except Exception:
+                self.stats["errors"] += 1
+                logger.warning("Principal cache write failed for %s", uid, exc_info=True)
+        return user
+
+    def invalidate(self, user_id) -> None:
+        try:
+            self.backend.incr(self._gen_key(str(user_id)))
+        except Exception:
+            self.stats["errors"] += 1
+            logger.warning("Principal cache invalidation failed for %s", user_id, exc_info=True)
+
+
+def _principal_from_fields(fields: dict):
+    from .models import AppUser
+
+    values = [uuid.UUID(fields["id"])] + [fields[name] for name in PRINCIPAL_FIELDS[1:]]
+    return AppUser.from_db("default", list(PRINCIPAL_FIELDS), values)
+
+
+_cache: Optional[PrincipalCache] = None
+_cache_lock = threading.Lock()
+
+
+def _build_from_settings() -> Optional[PrincipalCache]:
+    kind = (getattr(settings, "PRINCIPAL_CACHE_BACKEND", "auto") or "auto").strip().lower()
+    ttl = int(getattr(settings, "PRINCIPAL_CACHE_TTL_SECONDS", 5) or 0)
+    url = (getattr(settings, "PRINCIPAL_CACHE_REDIS_URL", "") or "").strip()
+    if kind in {"off", "none", "disabled", "0"} or ttl <= 0:
+        return None
+    if kind == "local":
+        return PrincipalCache(LocalCacheBackend(max_entries=4096), ttl=ttl)
+    if not url:
+        if kind == "redis":
+            logger.warning("PRINCIPAL_CACHE_BACKEND=redis without a redis URL; principal caching is off")
+        return None
+    try:
+        return PrincipalCache(RedisCacheBackend.from_url(url), ttl=ttl)
+    except Exception:
+        # A per-process fallback would let other workers serve revoked principals
+        logger.warning("Redis principal cache unavailable; principal caching is off", exc_info=True)
+        return None
+
+
+def get_principal_cache() -> Optional[PrincipalCache]:
+    """Process-wide cache configured by ``PRINCIPAL_CACHE_*`` settings (None when off)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _build_from_settings() or False
+    return _cache or None
+
+
+def set_principal_cache(cache) -> None:
+    """Install a specific cache (tests, benchmarks); ``False`` disables caching and
+    ``None`` rebuilds from settings on next use."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def cached_principal(payload: dict, load: Callable[[], Optional[object]]):
+    """``load()`` through the principal cache when the token carries a UUID subject and ``iat``."""
+    cache = get_principal_cache()
+    iat = payload.get("iat")
+    if cache is None or not iat:
+        return load()
+    try:
+        user_id = uuid.UUID(str(payload.get("sub") or ""))
+    except ValueError:
+        return load()
+    return cache.get_or_load(user_id, iat, load)
+
+
+def invalidate_principal(user_or_id) -> None:
+    """Drop cached principals for a user now and again when the current transaction commits."""
+    cache = get_principal_cache()
+    user_id = getattr(user_or_id, "id", user_or_id)
+    if cache is None or not user_id:
+        return
+    cache.invalidate(user_id)
+    transaction.on_commit(lambda: cache.invalidate(user_id))
+
+
+__all__ = [
+    "PRINCIPAL_FIELDS",
+    "PrincipalCache",
+    "cached_principal",
+    "get_principal_cache",
+    "set_principal_cache",
+    "invalidate_principal",
+]
@@ -0,0 +1,343 @@
+"""Request rate limits and login lockouts over a pluggable counter store.
+
+Limits use a sliding-window counter: one counter per fixed window, and a
+check weighs the previous window's count by how much of it still overlaps
+the sliding window. A check is one increment plus one read, whatever the
+limit, and counters expire after two windows, so idle keys disappear
+without a sweep.
+
+Lockouts keep a failure counter that expires ``window`` seconds after the
+first failure, plus a lock marker holding the unlock time.
+
+Stores implement four calls (``incr``, ``get_many``, ``set``, ``delete``):
+
+- ``LocalCounterStore``: per process, bounded LRU with TTLs (tests, single
+  worker).
+- ``DjangoCacheCounterStore``: any Django cache alias. It is shared when the
+  alias is (Redis, Memcached, database).
+- ``RedisCounterStore``: a redis-py compatible client. ``InMemoryRedis``
+  from the report cache stands in for it in tests.
+
+The shared stores make the configured limit hold across all workers; the
+default ("auto") uses Redis whenever a Redis URL is configured. Store errors
+never block a request: the check is skipped and logged.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Counter stores
+# -----------------------------
+
+
+class CounterStore:
+    """Integer counters and values with per-key expiry."""
+
+    def incr(self, key: str, amount: int, ttl: int) -> int:
+        """Add ``amount`` (creating the key with ``ttl`` if missing) and return the new value."""
+        raise NotImplementedError
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[int]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: int, ttl: int) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class LocalCounterStore(CounterStore):
+    """Per-process store: expired keys are dropped on access and the oldest beyond ``max_entries``."""
+
+    def __init__(self, max_entries: int = 50_000):
+        self.max_entries = max(1, int(max_entries))
+        self._data: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[int]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._data[key]
+            return None
+        return entry[1]
+
+    def _put(self, key: str, expires: float, value: int):
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def incr(self, key, amount, ttl):
+        now = time.monotonic()
+        with self._lock:
+            current = self._live(key, now)
+            if current is None:
+                self._put(key, now + max(1, int(ttl)), int(amount))
+                return int(amount)
+            self._data[key] = (self._data[key][0], current + int(amount))
+            return current + int(amount)
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return [self._live(k, now) for k in keys]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._put(key, time.monotonic() + max(1, int(ttl)), int(value))
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCacheCounterStore(CounterStore):
+    """Counters in a Django cache alias; ``add`` + ``incr`` are atomic on Redis/Memcached."""
+
+    def __init__(self, alias: str = "default"):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+
+    def incr(self, key, amount, ttl):
+        if self.cache.add(key, int(amount), timeout=max(1, int(ttl))):
+            return int(amount)
+        try:
+            return int(self.cache.incr(key, int(amount)))
+        except ValueError:
+            # Expired between add and incr
+            self.cache.set(key, int(amount), timeout=max(1, int(ttl)))
+            return int(amount)
+
+    def get_many(self, keys):
+        found = self.cache.get_many(list(keys))
+        return [found.get(k) for k in keys]
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, int(value), timeout=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class RedisCounterStore(CounterStore):
+    """Counters in Redis (or ``InMemoryRedis``); ``SET NX EX`` then ``INCRBY`` keeps the first expiry."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCounterStore":
+        import redis  # optional at import time; only needed for the shared store
+
+        return cls(redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0))
+
+    def incr(self, key, amount, ttl):
+        if self.client.set(key, int(amount), ex=max(1, int(ttl)), nx=True):
+            return int(amount)
+        value = int(self.client.incrby(key, int(amount)))
+        if value == int(amount):
+            # The key expired between SET NX and INCRBY and was recreated without a TTL
+            self.client.expire(key, max(1, int(ttl)))
+        return value
+
+    def get_many(self, keys):
+        return [int(v) if v is not None else None for v in self.client.mget(list(keys))] if keys else []
+
+    def set(self, key, value, ttl):
+        self.client.set(key, int(value), ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+# -----------------------------
+# Sliding-window limiter and lockout
+# -----------------------------
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:24]
+
+
+class SlidingWindowLimiter:
+    def __init__(self, store: CounterStore, prefix: str = "rl:v1:"):
+        self.store = store
+        self.prefix = prefix
+
+    def hit(self, key: str, limit: int, window_seconds: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        """Count one request for ``key``; ``(allowed, retry_after_seconds)``.
+
+        Rejected requests are not counted, so a client that backs off is let
+        through as soon as the window allows.
+        """
+        window = max(1, int(window_seconds))
+        limit = max(1, int(limit))
+        now = time.time() if now is None else now
+        slot = int(now // window)
+        elapsed = now - slot * window
+        base = f"{self.prefix}{_digest(key)}:{window}:"
+        current = self.store.incr(f"{base}{slot}", 1, 2 * window)
+        previous = self.store.get_many([f"{base}{slot - 1}"])[0] or 0
+        weight = 1.0 - elapsed / window
+        if previous * weight + current <= limit:
+            return True, 0
+        self.store.incr(f"{base}{slot}", -1, 2 * window)
+        return False, self._retry_after(limit, window, elapsed, previous, current - 1)
+
+    @staticmethod
+    def _retry_after(limit: int, window: int, elapsed: float, previous: int, current: int) -> int:
+        # Seconds until previous * overlap + current + 1 <= limit
+        room = limit - 1
+        if current <= room:
+            wait = window * (1.0 - (room - current) / previous) - elapsed if previous else 0.0
+        else:
+            # Wait for this window to become the previous one and decay enough
+            wait = (window - elapsed) + window * (1.0 - room / current)
+        return max(1, int(math.ceil(wait)))
+
+
+class LoginLockout:
+    """Lock an (email, ip) pair after ``threshold`` failures within ``window`` seconds."""
+
+    def __init__(
+        self,
+        store: CounterStore,
+        *,
+        threshold: int = 5,
+        window_seconds: int = 10 * 60,
+        lock_seconds: int = 10 * 60,
+        prefix: str = "lock:v1:",
+    ):
+        self.store = store
+        self.threshold = max(1, int(threshold))
+        self.window = max(1, int(window_seconds))
+        self.lock_seconds = max(1, int(lock_seconds))
+        self.prefix = prefix
+
+    def _keys(self, email: str, ip: str) -> Tuple[str, str]:
+        ident = _digest(f"{email or ''}\x00{ip or ''}")
+        return f"{self.prefix}fail:{ident}", f"{self.prefix}until:{ident}"
+
+    def locked(self, email: str, ip: str, now: Optional[float] = None) -> Tuple[bool, int]:
+        now = int(time.time() if now is None else now)
+        until = self.store.get_many([self._keys(email, ip)[1]])[0]
+        if until and until > now:
+            return True, int(until - now)
+        return False, 0
+
+    def touch(self, email: str, ip: str, success: bool, now: Optional[float] = None) -> Tuple[bool, int]:
+        """Record an attempt; ``(locked, retry_after_seconds)`` after it."""
+        now = int(time.time() if now is None else now)
+        fail_key, lock_key = self._keys(email, ip)
+        is_locked, retry_after = self.locked(email, ip, now)
+        if is_locked:
+            return True, retry_after
+        if success:
+            self.store.delete(fail_key)
+            return False, 0
+        failures = self.store.incr(fail_key, 1, self.window)
+        if failures >= self.threshold:
+            self.store.set(lock_key, now + self.lock_seconds, self.lock_seconds)
+            self.store.delete(fail_key)
+            return True, self.lock_seconds
+        return False, 0
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+
+
+_store: Optional[CounterStore] = None
+_store_lock = threading.Lock()
+
+
+def _build_from_settings() -> CounterStore:
+    kind = (getattr(settings, "RATE_LIMIT_BACKEND", "auto") or "auto").strip().lower()
+    url = (getattr(settings, "RATE_LIMIT_REDIS_URL", "") or "").strip()
+    if kind == "auto":
+        # A per-process store lets each client through N times the limit with N workers
+        kind = "redis" if url else "local"
+    if kind == "redis":
+        from .report_cache import DEFAULT_REDIS_URL
+
+        try:
+            return RedisCounterStore.from_url(url or DEFAULT_REDIS_URL)
+        except Exception:
+            logger.warning("Redis rate limit store unavailable; using the per-process store", exc_info=True)
+    elif kind == "cache":
+        try:
+            return DjangoCacheCounterStore(getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "default") or "default")
+        except Exception:
+            logger.warning("Rate limit cache alias unavailable; using the per-process store", exc_info=True)
+    return LocalCounterStore()
+
+
+def get_counter_store() -> CounterStore:
+    """Process-wide store configured by ``RATE_LIMIT_*`` settings."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _build_from_settings()
+    return _store
+
+
+def set_counter_store(store: Optional[CounterStore]) -> None:
+    """Install a specific store (tests); ``None`` rebuilds from settings on next use."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def check_rate(key: str, limit: int, window_seconds: int) -> Tuple[bool, int]:
+    """``(allowed, retry_after)`` for one request on ``key``; allows when the store is down."""
+    try:
+        return SlidingWindowLimiter(get_counter_store()).hit(key, limit, window_seconds)
+    except Exception:
+        logger.warning("Rate limit store unavailable; allowing request", exc_info=True)
+        return True, 0
+
+
+def login_lockout() -> LoginLockout:
+    return LoginLockout(
+        get_counter_store(),
+        threshold=getattr(settings, "LOGIN_LOCKOUT_THRESHOLD", 5),
+        window_seconds=getattr(settings, "LOGIN_LOCKOUT_WINDOW_SECONDS", 10 * 60),
+        lock_seconds=getattr(settings, "LOGIN_LOCKOUT_SECONDS", 10 * 60),
+    )
+
+
+__all__ = [
+    "CounterStore",
+    "LocalCounterStore",
+    "DjangoCacheCounterStore",
+    "RedisCounterStore",
+    "SlidingWindowLimiter",
+    "LoginLockout",
+    "get_counter_store",
+    "set_counter_store",
+    "check_rate",
+    "login_lockout",
+]
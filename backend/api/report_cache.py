@@ -0,0 +1,429 @@
+"""Tag-invalidated response cache for report endpoints.
+
+Entries are keyed by (endpoint, query params, report timezone, local date)
+plus the current version of every tag the entry depends on. Order, payment
+and inventory writes bump their tag's version once the transaction commits,
+which orphans every key built with the old version: nothing has to find or
+delete entries, and a computation that races an invalidation is stored under
+a key no reader will build again. Orphans simply expire after their TTL.
+
+Identical concurrent misses are coalesced. Inside a process one thread
+computes while the others wait for its result; across processes a short
+``SET NX`` lock in the backend elects one computer and the others poll for
+the value (and compute themselves if it does not show up in time).
+
+Backends implement five key/value calls (``get_many``, ``set``, ``add``,
+``incr``, ``delete``), so the per-process ``LocalCacheBackend`` and the shared
+``RedisCacheBackend`` are interchangeable. ``InMemoryRedis`` implements the
+subset of the redis-py client the Redis backend uses, for tests and local runs
+without a server.
+
+Backend errors never fail a report: the value is computed and returned
+uncached.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone as dj_tz
+
+
+logger = logging.getLogger(__name__)
+
+# Used when the redis backend is selected explicitly without a URL
+DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/0"
+
+TAG_ORDERS = "orders"
+TAG_PAYMENTS = "payments"
+TAG_INVENTORY = "inventory"
+
+_MISS = object()
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+
+
+class CacheBackend:
+    """Minimal key/value interface shared by all report cache backends."""
+
+    shared = False  # visible to other processes
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: int) -> bool:
+        """Set ``key`` only if it does not exist; True when this call set it."""
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """Increment a counter that never expires (tag versions)."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class LocalCacheBackend(CacheBackend):
+    """Per-process LRU with TTLs. Counters live outside the LRU and are never evicted."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max(1, int(max_entries))
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        if key in self._counters:
+            return str(self._counters[key]).encode()
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: str, value: bytes, ttl: int, now: float):
+        self._data[key] = (now + max(1, int(ttl)), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return [self._get(k, now) for k in keys]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._put(key, value, ttl, time.monotonic())
+
+    def add(self, key, value, ttl):
+        now = time.monotonic()
+        with self._lock:
+            if self._get(key, now) is not None:
+                return False
+            self._put(key, value, ttl, now)
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend over a redis-py compatible client (``redis.Redis`` or ``InMemoryRedis``)."""
+
+    shared = True
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        import redis  # optional at import time; only needed for the shared backend
+
+        return cls(redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0))
+
+    def get_many(self, keys):
+        return list(self.client.mget(list(keys))) if keys else []
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=max(1, int(ttl)))
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(key, value, ex=max(1, int(ttl)), nx=True))
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class InMemoryRedis:
+    """Thread-safe stand-in for the redis-py calls ``RedisCacheBackend`` and the rate limit store make."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._live(k) for k in keys]
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            ttl = ex if ex is not None else (px / 1000.0 if px is not None else None)
+            self._data[key] = (time.monotonic() + ttl if ttl is not None else None, self._encode(value))
+            return True
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def incrby(self, key, amount):
+        with self._lock:
+            current = int(self._live(key) or 0) + int(amount)
+            expires = self._data[key][0] if key in self._data else None
+            self._data[key] = (expires, self._encode(current))
+            return current
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._live(key) is None:
+                return False
+            self._data[key] = (time.monotonic() + seconds, self._data[key][1])
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for k in keys if self._data.pop(k, None) is not None)
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    failed: bool = False
+
+
+class ReportCache:
+    def __init__(
+        self,
+        backend: CacheBackend,
+        *,
+        ttl: int = 60,
+        prefix: str = "rptc:v1:",
+        lock_seconds: int = 30,
+        wait_seconds: float = 10.0,
+        poll_seconds: float = 0.05,
+    ):
+        self.backend = backend
+        self.ttl = max(1, int(ttl))
+        self.prefix = prefix
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return bool(getattr(self.backend, "shared", False))
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def key_for(self, endpoint: str, params: Dict[str, Any], tags: Iterable[str]) -> str:
+        tags = sorted(set(tags))
+        versions = self.backend.get_many([self._tag_key(t) for t in tags])
+        stamp = ".".join(f"{t}{(v or b'0').decode()}" for t, v in zip(tags, versions))
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        tz = dj_tz.get_default_timezone()
+        return f"{self.prefix}{endpoint}:{digest}:{tz}:{dj_tz.localdate(timezone=tz).isoformat()}:{stamp}"
+
+    def _load(self, key: str):
+        raw = self.backend.get_many([key])[0]
+        return _MISS if raw is None else json.loads(raw)
+
+    def _store(self, key: str, value: Any):
+        try:
+            self.backend.set(key, json.dumps(value, cls=DjangoJSONEncoder).encode(), self.ttl)
+        except Exception:
+            self.stats["errors"] += 1
+            logger.warning("Report cache write failed for %s", key, exc_info=True)
+
+    def get_or_compute(
+        self, endpoint: str, params: Dict[str, Any], tags: Iterable[str], compute: Callable[[], Any]
+    ) -> Tuple[Any, bool]:
+        """``(value, hit)``; on a miss exactly one caller per key computes ``compute()``."""
+        try:
+            key = self.key_for(endpoint, params, tags)
+            cached = self._load(key)
+        except Exception:
+            self.stats["errors"] += 1
+            logger.warning("Report cache unavailable; computing %s uncached", endpoint, exc_info=True)
+            return compute(), False
+        if cached is not _MISS:
+            self.stats["hits"] += 1
+            return cached, True
+        self.stats["misses"] += 1
+        return self._coalesced(key, compute), False
+
+    def refresh(self, endpoint: str, params: Dict[str, Any], tags: Iterable[str], compute: Callable[[], Any]) -> Any:
+        """Recompute and store unconditionally (used to keep entries warm)."""
+        key = self.key_for(endpoint, params, tags)
+        value = compute()
+        self._store(key, value)
+        return value
+
+    def _coalesced(self, key: str, compute: Callable[[], Any]):
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if flight.done.wait(self.wait_seconds) and not flight.failed:
+                self.stats["coalesced"] += 1
+                return flight.value
+            return compute()
+        try:
+            flight.value = self._compute_once(key, compute)
+            return flight.value
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            flight.done.set()
+            with self._flights_lock:
+                self._flights.pop(key, None)
+
+    def _compute_once(self, key: str, compute: Callable[[], Any]):
+        lock_key = f"{key}:lock"
+        try:
+            acquired = self.backend.add(lock_key, b"1", self.lock_seconds)
+        except Exception:
+            self.stats["errors"] += 1
+            acquired = True
+        if not acquired:
+            deadline = time.monotonic() + self.wait_seconds
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_seconds)
+                try:
+                    cached = self._load(key)
+                except Exception:
+                    break
+                if cached is not _MISS:
+                    self.stats["coalesced"] += 1
+                    return cached
+        try:
+            value = compute()
+            self._store(key, value)
+            return value
+        finally:
+            if acquired:
+                try:
+                    self.backend.delete(lock_key)
+                except Exception:
+                    pass
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in set(tags):
+            try:
+                self.backend.incr(self._tag_key(tag))
+            except Exception:
+                self.stats["errors"] += 1
+                logger.warning("Report cache invalidation failed for tag %s", tag, exc_info=True)
+
+
+_cache: Optional[ReportCache] = None
+_cache_lock = threading.Lock()
+
+
+def _build_from_settings() -> Optional[ReportCache]:
+    kind = (getattr(settings, "REPORT_CACHE_BACKEND", "auto") or "auto").strip().lower()
+    ttl = int(getattr(settings, "REPORT_CACHE_TTL_SECONDS", 60) or 60)
+    url = (getattr(settings, "REPORT_CACHE_REDIS_URL", "") or "").strip()
+    if kind in {"off", "none", "disabled", "0"}:
+        return None
+    if kind == "auto":
+        # Tag versions must be shared for invalidation to reach every worker
+        kind = "redis" if url else "local"
+    if kind == "redis":
+        try:
+            return ReportCache(RedisCacheBackend.from_url(url or DEFAULT_REDIS_URL), ttl=ttl)
+        except Exception:
+            logger.warning("Redis report cache unavailable; using the per-process cache", exc_info=True)
+    return ReportCache(LocalCacheBackend(), ttl=ttl)
+
+
+def get_report_cache() -> Optional[ReportCache]:
+    """Process-wide cache configured by ``REPORT_CACHE_*`` settings (None when off)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _build_from_settings() or False
+    return _cache or None
+
+
+def set_report_cache(cache) -> None:
+    """Install a specific cache (tests, benchmarks); ``False`` disables caching and
+    ``None`` rebuilds from settings on next use."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def invalidate_reports(*tags: str) -> None:
+    """Bump ``tags`` once the current transaction commits (immediately outside one)."""
+    cache = get_report_cache()
+    if cache is None or not tags:
+        return
+    transaction.on_commit(lambda: cache.invalidate(*tags))
+
+
+__all__ = [
+    "TAG_ORDERS",
+    "TAG_PAYMENTS",
+    "TAG_INVENTORY",
+    "CacheBackend",
+    "LocalCacheBackend",
+    "RedisCacheBackend",
+    "InMemoryRedis",
+    "ReportCache",
+    "get_report_cache",
+    "set_report_cache",
+    "invalidate_reports",
+]
@@ -0,0 +1,252 @@
+"""Streaming CSV/XLSX exports for the report endpoints.
+
+Every export walks its table with ``iter_keyset`` (one bounded query per
+chunk over an indexed ordering) and writes rows as they arrive, so memory
+stays flat for any number of rows and the header is sent before the first
+query runs. Row-level exports have no cap; ``range`` narrows them the same
+way it narrows the matching report.
+
+``sales`` lists the payments the sales report sums, ``customer-history``
+the payments of one customer (newest first) and ``dashboard`` the revenue
+series behind the dashboard chart.
+"""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone as dj_tz
+
+from .utils_cursor import iter_keyset
+from .utils_xlsx import stream_xlsx
+
+
+CHUNK_ROWS = 2000
+FLUSH_BYTES = 64 * 1024
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+@dataclass(frozen=True)
+class ReportExport:
+    permission: str
+    title: str
+    columns: Sequence[str]
+    rows: Callable[[Any], Iterator[Sequence[Any]]]
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _range(params, default_all: bool = True) -> Optional[Tuple[datetime, datetime]]:
+    from .views_reports import _parse_range
+
+    value = params.get("range")
+    if not value and default_all:
+        return None
+    return _parse_range(value)
+
+
+# -----------------------------
+# Row sources
+# -----------------------------
+
+_PAYMENT_COLUMNS = ["id", "orderId", "date", "method", "status", "amount", "customer", "reference"]
+_PAYMENT_VALUES = ("id", "order_id", "created_at", "method", "status", "amount", "customer", "reference")
+
+
+def _payment_rows(qs, descending: bool = False) -> Iterator[Sequence[Any]]:
+    for p in iter_keyset(qs.values(*_PAYMENT_VALUES), ("created_at", "id"), descending, CHUNK_ROWS):
+        yield [
+            str(p["id"]),
+            p["order_id"],
+            _iso(p["created_at"]),
+            p["method"],
+            p["status"],
+            p["amount"],
+            p["customer"],
+            p["reference"],
+        ]
+
+
+def _sales_rows(params) -> Iterator[Sequence[Any]]:
+    from .models import PaymentTransaction
+
+    # Same window as the sales report, which defaults to the last 24 hours
+    start, end = _range(params, default_all=False)
+    return _payment_rows(PaymentTransaction.objects.filter(created_at__gte=start, created_at__lte=end))
+
+
+def _customer_history_rows(params) -> Iterator[Sequence[Any]]:
+    from .models import PaymentTransaction
+
+    qs = PaymentTransaction.objects.all()
+    customer = (params.get("customer") or "").strip()
+    if customer:
+        qs = qs.filter(customer__icontains=customer)
+    bounds = _range(params)
+    if bounds:
+        qs = qs.filter(created_at__gte=bounds[0], created_at__lte=bounds[1])
+    return _payment_rows(qs, descending=True)
+
+
+def _order_rows(params) -> Iterator[Sequence[Any]]:
+    from .models import Order
+
+    qs = Order.objects.all()
+    bounds = _range(params)
+    if bounds:
+        qs = qs.filter(created_at__gte=bounds[0], created_at__lte=bounds[1])
+    if params.get("status"):
+        qs = qs.filter(status=params["status"])
+    fields = (
+        "id", "order_number", "status", "order_type", "customer_name", "subtotal", "discount",
+        "total_amount", "payment_method", "created_at", "completed_at",
+    )
+    for o in iter_keyset(qs.values(*fields), ("created_at", "id"), chunk_size=CHUNK_ROWS):
+        yield [
+            str(o["id"]),
+            o["order_number"],
+            o["status"],
+            o["order_type"],
+            o["customer_name"],
+            o["subtotal"],
+            o["discount"],
+            o["total_amount"],
+            o["payment_method"],
+            _iso(o["created_at"]),
+            _iso(o["completed_at"]),
+        ]
+
+
+def _inventory_rows(params) -> Iterator[Sequence[Any]]:
+    from .models import InventoryItem
+
+    qs = InventoryItem.objects.values("id", "name", "category", "quantity", "unit", "min_stock")
+    for i in iter_keyset(qs, ("name", "id"), chunk_size=CHUNK_ROWS):
+        yield [str(i["id"]), i["name"], i["category"], i["quantity"], i["unit"], i["min_stock"]]
+
+
+def _attendance_rows(params) -> Iterator[Sequence[Any]]:
+    from .models import AttendanceRecord
+
+    qs = AttendanceRecord.objects.all()
+    bounds = _range(params)
+    if bounds:
+        first, last = (dj_tz.localtime(d).date() if dj_tz.is_aware(d) else d.date() for d in bounds)
+        qs = qs.filter(date__gte=first, date__lte=last)
+    qs = qs.values("id", "employee_id", "employee__name", "date", "check_in", "check_out", "status", "notes")
+    for r in iter_keyset(qs, ("date", "id"), chunk_size=CHUNK_ROWS):
+        yield [
+            str(r["id"]),
+            str(r["employee_id"]),
+            r["employee__name"],
+            _iso(r["date"]),
+            _iso(r["check_in"]),
+            _iso(r["check_out"]),
+            r["status"],
+            r["notes"],
+        ]
+
+
+def _dashboard_rows(params) -> Iterator[Sequence[Any]]:
+    from .views_reports import _dashboard_data
+
+    data = _dashboard_data(params.get("range") or "today")
+    for current, previous in zip(data["salesByTime"], data["salesByTimeYesterday"]):
+        yield [current["time"], current["amount"], previous["time"], previous["amount"]]
+
+
+EXPORTS = {
+    "sales": ReportExport("reports.sales.view", "Sales", _PAYMENT_COLUMNS, _sales_rows),
+    "customer-history": ReportExport(
+        "reports.customer.view", "Customer history", _PAYMENT_COLUMNS, _customer_history_rows
+    ),
+    "orders": ReportExport(
+        "reports.orders.view",
+        "Orders",
+        [
+            "id", "orderNumber", "status", "type", "customer", "subtotal", "discount",
+            "total", "paymentMethod", "createdAt", "completedAt",
+        ],
+        _order_rows,
+    ),
+    "inventory": ReportExport(
+        "reports.inventory.view", "Inventory", ["id", "name", "category", "quantity", "unit", "minStock"], _inventory_rows
+    ),
+    "staff-attendance": ReportExport(
+        "reports.staff.view",
+        "Staff attendance",
+        ["id", "employeeId", "employee", "date", "checkIn", "checkOut", "status", "notes"],
+        _attendance_rows,
+    ),
+    "dashboard": ReportExport(
+        "reports.dashboard.view", "Dashboard", ["time", "revenue", "previousTime", "previousRevenue"], _dashboard_rows
+    ),
+}
+
+
+# -----------------------------
+# Writers
+# -----------------------------
+
+
+class _RowBuffer:
+    """File-like target for csv.writer that collects rows until they are flushed."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.size = 0
+
+    def write(self, value: str):
+        self.parts.append(value)
+        self.size += len(value)
+
+    def drain(self) -> str:
+        out = "".join(self.parts)
+        self.parts, self.size = [], 0
+        return out
+
+
+def stream_csv(
+    columns: Sequence[str], rows: Iterable[Sequence[Any]], flush_bytes: int = FLUSH_BYTES
+) -> Iterator[bytes]:
+    """Yield CSV as UTF-8 bytes: the header at once, then rows in ~``flush_bytes`` pieces."""
+    buf = _RowBuffer()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.drain().encode("utf-8")
+    for row in rows:
+        writer.writerow(row)
+        if buf.size >= flush_bytes:
+            yield buf.drain().encode("utf-8")
+    tail = buf.drain()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def export_stream(name: str, params, fmt: str) -> Iterator[bytes]:
+    spec = EXPORTS[name]
+    rows = spec.rows(params)
+    if fmt == "xlsx":
+        return stream_xlsx(spec.columns, rows, title=spec.title)
+    return stream_csv(spec.columns, rows)
+
+
+def export_response(name: str, params, fmt: str) -> StreamingHttpResponse:
+    resp = StreamingHttpResponse(export_stream(name, params, fmt), content_type=FORMATS[fmt])
+    stamp = dj_tz.now().strftime("%Y%m%d%H%M%S")
+    resp["Content-Disposition"] = f'attachment; filename="{name}-{stamp}.{fmt}"'
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
+__all__ = ["EXPORTS", "FORMATS", "ReportExport", "stream_csv", "export_stream", "export_response"]
@@ -0,0 +1,461 @@
+"""Background report jobs: submit a spec, poll or listen for progress, fetch the result.
+
+A spec is a report ``kind`` plus its params. Each kind splits its work into
+chunks (time windows or id slices); the worker runs them in order, records
+``chunks_done`` on the ``ReportJob`` row and publishes a
+``reports.job_progress`` event after each one. The merged result is written
+as a gzipped ``{"success": true, "data": ...}`` document under
+``REPORT_JOB_ROOT`` and served as-is to clients that accept gzip.
+
+Identical specs submitted while a job is queued or running share it: the
+job's ``inflight_key`` (the spec hash) is unique until the job finishes.
+
+``cleanup_jobs`` removes results past ``REPORT_JOB_RESULT_TTL_SECONDS`` and
+fails jobs stuck in flight longer than ``REPORT_JOB_STALE_SECONDS`` (a worker
+died), so their spec can be submitted again.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone as dj_tz
+
+from .events import publish_event
+from .models import ReportJob
+
+
+logger = logging.getLogger(__name__)
+
+_TICK = timedelta(microseconds=1)
+
+
+# -----------------------------
+# Kinds
+# -----------------------------
+
+
+@dataclass(frozen=True)
+class JobKind:
+    """How to validate, split, compute and combine one report kind.
+
+    ``normalize`` returns the canonical params (raising ``ValueError`` on bad
+    input), ``plan`` the ordered chunks, ``run_chunk`` a partial result per
+    chunk and ``merge`` the final report data from the partials.
+    """
+
+    permission: str
+    normalize: Callable[[dict], dict]
+    plan: Callable[[dict], List[Any]]
+    run_chunk: Callable[[dict, Any], Any]
+    merge: Callable[[dict, List[Any]], Any]
+
+
+def _chunk_days() -> int:
+    return max(1, int(getattr(settings, "REPORT_JOB_CHUNK_DAYS", 7)))
+
+
+def _windows(start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Split inclusive ``[start, end]`` into consecutive inclusive windows of ``REPORT_JOB_CHUNK_DAYS``."""
+    step = timedelta(days=_chunk_days())
+    out: List[Tuple[datetime, datetime]] = []
+    a = start
+    while a <= end:
+        b = min(a + step, end + _TICK)
+        out.append((a, b - _TICK))
+        a = b
+    return out
+
+
+def _str_param(params: dict, name: str, max_len: int = 255) -> str:
+    value = params.get(name)
+    if value is None:
+        return ""
+    if not isinstance(value, (str, int, float)):
+        raise ValueError(f"{name} must be a string")
+    return str(value).strip()[:max_len]
+
+
+def _range_params(params: dict) -> dict:
+    return {"range": _str_param(params, "range", 64) or "today"}
+
+
+def _optional_range(params: dict) -> Optional[Tuple[datetime, datetime]]:
+    from .views_reports import _parse_range
+
+    return _parse_range(params["range"]) if params.get("range") else None
+
+
+# dashboard: the dashboard is already a fixed number of grouped queries, so it is one chunk
+
+
+def _dashboard_run(params: dict, chunk) -> dict:
+    from .views_reports import _dashboard_data
+
+    return _dashboard_data(params["range"])
+
+
+# sales: one rollup read per window, summed by payment method
+
+
+def _sales_plan(params: dict) -> list:
+    from .views_reports import _parse_range
+
+    return _windows(*_parse_range(params["range"]))
+
+
+def _sales_run(params: dict, window) -> dict:
+    from .sales_rollups import PAYMENTS, window_totals
+
+    rows = window_totals(PAYMENTS, {"w": window}, group_by="method")["w"]
+    return {method: row["amount"] or 0 for method, row in rows.items()}
+
+
+def _sales_merge(params: dict, parts: list) -> dict:
+    from .views_reports import _parse_range
+
+    start, end = _parse_range(params["range"])
+    by_method: Dict[str, Any] = {}
+    for part in parts:
+        for method, amount in part.items():
+            by_method[method] = by_method.get(method, 0) + amount
+    return {
+        "total": float(sum(by_method.values(), 0)),
+        "byMethod": {m: float(v) for m, v in by_method.items()},
+        "range": {"from": start.isoformat(), "to": end.isoformat()},
+    }
+
+
+# inventory: slices of the name-ordered item ids
+
+_INVENTORY_SLICE = 1000
+
+
+def _inventory_plan(params: dict) -> list:
+    from .models import InventoryItem
+
+    ids = list(InventoryItem.objects.order_by("name", "id").values_list("id", flat=True))
+    return [ids[i:i + _INVENTORY_SLICE] for i in range(0, len(ids), _INVENTORY_SLICE)]
+
+
+def _inventory_run(params: dict, ids) -> list:
+    from .models import InventoryItem
+    from .views_reports import _inventory_row
+
+    return [_inventory_row(i) for i in InventoryItem.objects.filter(id__in=ids).order_by("name", "id")]
+
+
+# attendance: status counts per window of dates (all dates when no range is given)
+
+
+def _attendance_plan(params: dict) -> list:
+    from .models import AttendanceRecord
+
+    bounds = _optional_range(params)
+    if bounds is None:
+        agg = AttendanceRecord.objects.aggregate(first=Min("date"), last=Max("date"))
+        if agg["first"] is None:
+            return []
+        first, last = agg["first"], agg["last"]
+    else:
+        first, last = (dj_tz.localtime(d).date() if dj_tz.is_aware(d) else d.date() for d in bounds)
+    step = _chunk_days()
+    out = []
+    day = first
+    while day <= last:
+        out.append((day, min(day + timedelta(days=step - 1), last)))
+        day += timedelta(days=step)
+    return out
+
+
+def _attendance_run(params: dict, window) -> dict:
+    from .models import AttendanceRecord
+    from .views_reports import _attendance_counts
+
+    return _attendance_counts(AttendanceRecord.objects.filter(date__gte=window[0], date__lte=window[1]))
+
+
+def _count_merge(params: dict, parts: list) -> dict:
+    out: Dict[str, int] = {}
+    for part in parts:
+        for key, count in part.items():
+            out[key] = out.get(key, 0) + count
+    return out
+
+
+# customer history: every matching payment, newest window first so the rows stay newest-first
+
+
+def _customer_params(params: dict) -> dict:
+    return {"customer": _str_param(params, "customer"), "range": _str_param(params, "range", 64)}
+
+
+def _customer_qs(params: dict):
+    from .models import PaymentTransaction
+
+    qs = PaymentTransaction.objects.all()
+    if params.get("customer"):
+        qs = qs.filter(customer__icontains=params["customer"])
+    return qs
+
+
+def _customer_plan(params: dict) -> list:
+    bounds = _optional_range(params)
+    if bounds is None:
+        agg = _customer_qs(params).aggregate(first=Min("created_at"), last=Max("created_at"))
+        if agg["first"] is None:
+            return []
+        bounds = (agg["first"], agg["last"])
+    return list(reversed(_windows(*bounds)))
+
+
+def _customer_run(params: dict, window) -> list:
+    from .views_reports import _customer_history_row
+
+    qs = _customer_qs(params).filter(created_at__gte=window[0], created_at__lte=window[1])
+    return [_customer_history_row(p) for p in qs.order_by("-created_at").iterator(chunk_size=2000)]
+
+
+def _concat_merge(params: dict, parts: list) -> list:
+    return [row for part in parts for row in part]
+
+
+def _single_chunk(params: dict) -> list:
+    return [None]
+
+
+KINDS: Dict[str, JobKind] = {
+    "dashboard": JobKind("reports.dashboard.view", _range_params, _single_chunk, _dashboard_run, lambda p, parts: parts[0]),
+    "sales": JobKind("reports.sales.view", _range_params, _sales_plan, _sales_run, _sales_merge),
+    "inventory": JobKind("reports.inventory.view", lambda p: {}, _inventory_plan, _inventory_run, _concat_merge),
+    "attendance": JobKind(
+        "reports.staff.view",
+        lambda p: {"range": _str_param(p, "range", 64)},
+        _attendance_plan,
+        _attendance_run,
+        _count_merge,
+    ),
+    "customer_history": JobKind("reports.customer.view", _customer_params, _customer_plan, _customer_run, _concat_merge),
+}
+
+
+# -----------------------------
+# Submission
+# -----------------------------
+
+
+def normalize_spec(kind: str, params: Optional[dict]) -> Tuple[str, dict, str]:
+    """``(kind, canonical params, spec hash)``; raises ``ValueError`` for unknown kinds or bad params."""
+    kind = str(kind or "").strip().lower()
+    if kind not in KINDS:
+        raise ValueError(f"Unknown report kind: {kind or '(empty)'}")
+    if params is not None and not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    canonical = KINDS[kind].normalize(params or {})
+    raw = json.dumps({"kind": kind, "params": canonical}, sort_keys=True, separators=(",", ":"))
+    return kind, canonical, hashlib.sha1(raw.encode()).hexdigest()
+
+
+def submit_job(
+    kind: str,
+    params: Optional[dict],
+    requested_by: str = "",
+    dispatch: Optional[Callable[[str], object]] = None,
+) -> Tuple[ReportJob, bool]:
+    """Create a job for the spec, or return the identical one already in flight.
+
+    Returns ``(job, created)``. ``dispatch`` is called with the new job id once
+    the transaction commits (inline ``run_job`` when omitted).
+    """
+    kind, canonical, spec_hash = normalize_spec(kind, params)
+    for _ in range(3):
+        existing = ReportJob.objects.filter(inflight_key=spec_hash).first()
+        if existing is not None:
+            return existing, False
+        try:
+            with transaction.atomic():
+                job = ReportJob.objects.create(
+                    kind=kind,
+                    params=canonical,
+                    spec_hash=spec_hash,
+                    inflight_key=spec_hash,
+                    requested_by=str(requested_by or "")[:64],
+                )
+        except IntegrityError:
+            # Lost the race to an identical submission; attach to it
+            continue
+        send = dispatch or run_job
+        transaction.on_commit(lambda: send(str(job.id)))
+        return job, True
+    raise RuntimeError("Could not submit report job")
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+
+
+def _root() -> str:
+    root = getattr(settings, "REPORT_JOB_ROOT", None) or os.path.join(
+        str(getattr(settings, "PRIVATE_MEDIA_ROOT", "private_media")), "report_jobs"
+    )
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def result_path(job: ReportJob) -> str:
+    return os.path.join(_root(), job.result_file)
+
+
+def _write_result(job_id: str, data: Any) -> Tuple[str, int]:
+    body = json.dumps({"success": True, "data": data}, cls=DjangoJSONEncoder, separators=(",", ":"))
+    blob = gzip.compress(body.encode("utf-8"), compresslevel=6)
+    name = f"{job_id}.json.gz"
+    path = os.path.join(_root(), name)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(blob)
+    os.replace(tmp, path)
+    return name, len(blob)
+
+
+def _publish(job: ReportJob, event: str) -> None:
+    try:
+        publish_event(
+            event,
+            job_row(job),
+            user_ids=[job.requested_by] if job.requested_by else None,
+            roles={"admin", "manager"},
+        )
+    except Exception:
+        logger.warning("Failed to publish %s for report job %s", event, job.id, exc_info=True)
+
+
+def run_job(job_id: str) -> Optional[str]:
+    """Compute a queued job chunk by chunk; returns its final status, or None if another worker has it."""
+    now = dj_tz.now()
+    claimed = ReportJob.objects.filter(id=job_id, status=ReportJob.STATUS_QUEUED).update(
+        status=ReportJob.STATUS_RUNNING, started_at=now
+    )
+    if not claimed:
+        return None
+    job = ReportJob.objects.get(id=job_id)
+    spec = KINDS[job.kind]
+    try:
+        chunks = spec.plan(job.params)
+        ReportJob.objects.filter(id=job.id).update(chunks_total=len(chunks))
+        job.chunks_total = len(chunks)
+        _publish(job, "reports.job_progress")
+        parts = []
+        for chunk in chunks:
+            parts.append(spec.run_chunk(job.params, chunk))
+            ReportJob.objects.filter(id=job.id).update(chunks_done=F("chunks_done") + 1)
+            job.chunks_done += 1
+            _publish(job, "reports.job_progress")
+        name, size = _write_result(str(job.id), spec.merge(job.params, parts))
+    except Exception as exc:
+        logger.exception("Report job %s (%s) failed", job.id, job.kind)
+        ReportJob.objects.filter(id=job.id).update(
+            status=ReportJob.STATUS_FAILED, inflight_key=None, error=str(exc)[:2000], finished_at=dj_tz.now()
+        )
+        job.refresh_from_db()
+        _publish(job, "reports.job_finished")
+        return job.status
+    done_at = dj_tz.now()
+    ttl = int(getattr(settings, "REPORT_JOB_RESULT_TTL_SECONDS", 24 * 60 * 60))
+    ReportJob.objects.filter(id=job.id).update(
+        status=ReportJob.STATUS_DONE,
+        inflight_key=None,
+        result_file=name,
+        result_bytes=size,
+        finished_at=done_at,
+        expires_at=done_at + timedelta(seconds=ttl),
+    )
+    job.refresh_from_db()
+    _publish(job, "reports.job_finished")
+    return job.status
+
+
+def read_result(job: ReportJob) -> Optional[bytes]:
+    """The gzipped result document, or None when the job has none (not done, expired, or removed)."""
+    if job.status != ReportJob.STATUS_DONE or not job.result_file:
+        return None
+    if job.expires_at and job.expires_at <= dj_tz.now():
+        return None
+    try:
+        with open(result_path(job), "rb") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def job_row(job: ReportJob) -> dict:
+    total = job.chunks_total or 0
+    return {
+        "id": str(job.id),
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "chunksTotal": total,
+        "chunksDone": job.chunks_done,
+        "progress": 1.0 if job.status == ReportJob.STATUS_DONE else (round(job.chunks_done / total, 4) if total else 0.0),
+        "resultBytes": job.result_bytes,
+        "error": job.error or "",
+        "createdAt": job.created_at.isoformat() if job.created_at else None,
+        "startedAt": job.started_at.isoformat() if job.started_at else None,
+        "finishedAt": job.finished_at.isoformat() if job.finished_at else None,
+        "expiresAt": job.expires_at.isoformat() if job.expires_at else None,
+    }
+
+
+# -----------------------------
+# Cleanup
+# -----------------------------
+
+
+def cleanup_jobs(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Delete expired results (files and rows) and fail jobs stuck in flight."""
+    now = now or dj_tz.now()
+    stale_after = int(getattr(settings, "REPORT_JOB_STALE_SECONDS", 60 * 60))
+    ttl = int(getattr(settings, "REPORT_JOB_RESULT_TTL_SECONDS", 24 * 60 * 60))
+    stale = ReportJob.objects.filter(
+        status__in=[ReportJob.STATUS_QUEUED, ReportJob.STATUS_RUNNING],
+        created_at__lt=now - timedelta(seconds=stale_after),
+    ).update(status=ReportJob.STATUS_FAILED, inflight_key=None, error="Timed out", finished_at=now)
+
+    expired_q = Q(status=ReportJob.STATUS_DONE, expires_at__lte=now) | Q(
+        status=ReportJob.STATUS_FAILED, finished_at__lt=now - timedelta(seconds=ttl)
+    )
+    removed = 0
+    for job in ReportJob.objects.filter(expired_q).only("id", "result_file").iterator(chunk_size=500):
+        if job.result_file:
+            try:
+                os.remove(result_path(job))
+            except FileNotFoundError:
+                pass
+        ReportJob.objects.filter(id=job.id).delete()
+        removed += 1
+    return {"stale": stale, "removed": removed}
+
+
+__all__ = [
+    "KINDS",
+    "JobKind",
+    "normalize_spec",
+    "submit_job",
+    "run_job",
+    "read_result",
+    "job_row",
+    "cleanup_jobs",
+]
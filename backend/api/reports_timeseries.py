@@ -0,0 +1,115 @@
+"""Bucketed time series for report endpoints.
+
+Each series is a single ``GROUP BY`` query: rows are truncated to the hour or
+day with ``TruncHour``/``TruncDay`` in the report timezone (``TIME_ZONE``,
+Asia/Manila) and summed in the database. Buckets with no rows are filled with
+zero in Python, so the number of queries does not depend on the range length.
+
+On MySQL the named-zone conversion needs the server's time zone tables
+(``mysql_tzinfo_to_sql``), the same requirement as Django's ``__date`` lookups.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, tzinfo
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import QuerySet, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone as dj_tz
+
+
+HOUR = "hour"
+DAY = "day"
+
+_TRUNC = {HOUR: TruncHour, DAY: TruncDay}
+
+
+def report_timezone() -> tzinfo:
+    return dj_tz.get_default_timezone()
+
+
+def local_midnight(value: datetime, tz: Optional[tzinfo] = None) -> datetime:
+    """Start of ``value``'s calendar day in the report timezone (aware)."""
+    tz = tz or report_timezone()
+    local = dj_tz.localtime(value, tz) if dj_tz.is_aware(value) else dj_tz.make_aware(value, tz)
+    return datetime(local.year, local.month, local.day, tzinfo=tz)
+
+
+def bucket_starts(start: datetime, count: int, unit: str, tz: Optional[tzinfo] = None) -> List[datetime]:
+    """``count`` consecutive local bucket starts, beginning at ``start``'s local midnight."""
+    tz = tz or report_timezone()
+    first = local_midnight(start, tz)
+    if unit == HOUR:
+        # Asia/Manila has no DST, but step in UTC and convert back so any zone stays correct
+        return [dj_tz.localtime(first + timedelta(hours=i), tz) for i in range(count)]
+    return [
+        datetime(d.year, d.month, d.day, tzinfo=tz)
+        for d in (first.date() + timedelta(days=i) for i in range(count))
+    ]
+
+
+def _bucket_end(last: datetime, unit: str, tz: tzinfo) -> datetime:
+    if unit == HOUR:
+        return last + timedelta(hours=1)
+    nxt = last.date() + timedelta(days=1)
+    return datetime(nxt.year, nxt.month, nxt.day, tzinfo=tz)
+
+
+def bucket_totals(
+    qs: QuerySet,
+    *,
+    field: str,
+    value: str,
+    buckets: List[datetime],
+    unit: str,
+    tz: Optional[tzinfo] = None,
+) -> Dict[float, Decimal]:
+    """``{bucket_start.timestamp(): SUM(value)}`` for rows inside the buckets; one query."""
+    if not buckets:
+        return {}
+    tz = tz or report_timezone()
+    rows = (
+        qs.filter(**{f"{field}__gte": buckets[0], f"{field}__lt": _bucket_end(buckets[-1], unit, tz)})
+        .annotate(bucket=_TRUNC[unit](field, tzinfo=tz))
+        .order_by()
+        .values("bucket")
+        .annotate(total=Sum(value))
+    )
+    out: Dict[float, Decimal] = {}
+    for row in rows:
+        b = row["bucket"]
+        if b is None:
+            continue
+        if not dj_tz.is_aware(b):
+            b = dj_tz.make_aware(b, tz)
+        out[b.timestamp()] = out.get(b.timestamp(), Decimal("0")) + (row["total"] or Decimal("0"))
+    return out
+
+
+def sum_series(
+    qs: QuerySet,
+    *,
+    field: str,
+    value: str,
+    start: datetime,
+    count: int,
+    unit: str,
+) -> List[dict]:
+    """Gap-filled ``[{"time": iso, "amount": float}]`` for ``count`` buckets from ``start``."""
+    tz = report_timezone()
+    buckets = bucket_starts(start, count, unit, tz)
+    totals = bucket_totals(qs, field=field, value=value, buckets=buckets, unit=unit, tz=tz)
+    return [{"time": b.isoformat(), "amount": float(totals.get(b.timestamp(), 0))} for b in buckets]
+
+
+__all__ = [
+    "HOUR",
+    "DAY",
+    "report_timezone",
+    "local_midnight",
+    "bucket_starts",
+    "bucket_totals",
+    "sum_series",
+]
@@ -0,0 +1,566 @@
+"""Hourly and daily sales rollups for report endpoints.
+
+Three tables hold pre-aggregated sales per local (Asia/Manila) hour and day:
+
+* ``OrderSalesRollup``   orders placed and revenue, per order status
+* ``ItemSalesRollup``    item quantity and revenue, per order status, category and item
+* ``PaymentSalesRollup`` payment count and amount, per method and payment status
+
+Writers are called next to the code that creates orders/payments or changes
+their status, in the same transaction. Each call inserts any missing bucket
+rows (``INSERT ... IGNORE``) and then applies all deltas with one
+``UPDATE ... SET col = col + CASE ...``, so concurrent writers never lose an
+increment. A status change moves the amounts from the old status key to the
+new one; readers filter on status, so cancelled/voided/refunded orders drop
+out of "valid" totals without any special casing.
+
+Readers split an arbitrary ``[start, end]`` range into whole local days (daily
+rows), whole hours at the edges (hourly rows) and the sub-hour remainders
+(source rows), and evaluate any number of ranges with conditional
+aggregation: at most three queries per call regardless of range length.
+
+Every writer also bumps the matching report cache tags (``api.report_cache``)
+once the transaction commits.
+
+Rows written without going through the writers (imports, fixtures, manual
+SQL) are picked up by ``rebuild_rollups`` / ``manage.py rebuild_sales_rollups``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, tzinfo
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Min, Q, QuerySet, Sum, Value, When
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone as dj_tz
+
+from .models import (
+    ItemSalesRollup,
+    Order,
+    OrderItem,
+    OrderSalesRollup,
+    PaymentSalesRollup,
+    PaymentTransaction,
+)
+from .report_cache import TAG_ORDERS, TAG_PAYMENTS, invalidate_reports
+from .reports_timeseries import DAY, HOUR, bucket_starts, local_midnight, report_timezone
+
+
+GRAINS = (HOUR, DAY)
+_TRUNC = {HOUR: TruncHour, DAY: TruncDay}
+_LINE_TOTAL = F("price") * F("quantity")
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+_TICK = timedelta(microseconds=1)
+
+
+# -----------------------------
+# Buckets
+# -----------------------------
+
+
+def _aware(value: datetime, tz: tzinfo) -> datetime:
+    return dj_tz.localtime(value, tz) if dj_tz.is_aware(value) else dj_tz.make_aware(value, tz)
+
+
+def floor_hour(value: datetime, tz: Optional[tzinfo] = None) -> datetime:
+    tz = tz or report_timezone()
+    return _aware(value, tz).replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil_hour(value: datetime, tz: tzinfo) -> datetime:
+    floor = floor_hour(value, tz)
+    return floor if floor == value else dj_tz.localtime(floor + timedelta(hours=1), tz)
+
+
+def _ceil_day(value: datetime, tz: tzinfo) -> datetime:
+    midnight = local_midnight(value, tz)
+    if midnight == value:
+        return midnight
+    nxt = midnight.date() + timedelta(days=1)
+    return datetime(nxt.year, nxt.month, nxt.day, tzinfo=tz)
+
+
+def bucket_keys(value: datetime, tz: Optional[tzinfo] = None) -> List[Tuple[str, datetime]]:
+    """``[(HOUR, hour_start), (DAY, day_start)]`` for a timestamp, in the report timezone."""
+    tz = tz or report_timezone()
+    return [(HOUR, floor_hour(value, tz)), (DAY, local_midnight(value, tz))]
+
+
+# -----------------------------
+# Writers
+# -----------------------------
+
+_ORDER_KEY = ("grain", "bucket_start", "status")
+_ITEM_KEY = ("grain", "bucket_start", "order_status", "category", "item_name")
+_PAYMENT_KEY = ("grain", "bucket_start", "method", "status")
+
+Deltas = Dict[tuple, Dict[str, Any]]
+
+
+def _add(deltas: Deltas, key: tuple, **values):
+    row = deltas.setdefault(key, {})
+    for name, val in values.items():
+        row[name] = row.get(name, 0) + val
+
+
+def _apply(model, key_fields: Sequence[str], deltas: Deltas, extra: Optional[Dict[tuple, dict]] = None) -> int:
+    """Add ``deltas`` to the rollup rows keyed by ``key_fields``; two queries per model."""
+    deltas = {k: v for k, v in deltas.items() if any(v.values())}
+    if not deltas:
+        return 0
+    extra = extra or {}
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key)), **extra.get(key, {})) for key in deltas],
+        ignore_conflicts=True,
+    )
+    conds = {key: Q(**dict(zip(key_fields, key))) for key in deltas}
+    metrics = sorted({name for row in deltas.values() for name in row})
+    updates = {}
+    for name in metrics:
+        out = model._meta.get_field(name).clone()
+        whens = [When(conds[key], then=Value(row[name], output_field=out)) for key, row in deltas.items() if row.get(name)]
+        updates[name] = F(name) + Case(*whens, default=Value(0, output_field=out), output_field=out)
+    return model.objects.filter(reduce(or_, conds.values())).update(updated_at=dj_tz.now(), **updates)
+
+
+def _status(value: Optional[str]) -> str:
+    return (value or "")[:16]
+
+
+def _order_deltas(deltas: Deltas, order: Order, status: str, sign: int):
+    for grain, bucket in bucket_keys(order.created_at):
+        _add(deltas, (grain, bucket, _status(status)), order_count=sign, revenue=sign * (order.total_amount or 0))
+
+
+def _item_deltas(deltas: Deltas, extra: Dict[tuple, dict], order: Order, lines: Iterable[tuple], status: str, sign: int):
+    """``lines`` are ``(category, item_name, menu_item_id, quantity, revenue)`` tuples."""
+    buckets = bucket_keys(order.created_at)
+    for category, item_name, menu_item_id, qty, revenue in lines:
+        for grain, bucket in buckets:
+            key = (grain, bucket, _status(status), (category or "")[:128], (item_name or "")[:255])
+            _add(deltas, key, quantity=sign * int(qty or 0), revenue=sign * (revenue or 0))
+            if menu_item_id:
+                extra.setdefault(key, {"menu_item_id": menu_item_id})
+
+
+def _order_lines(order: Order) -> List[tuple]:
+    return list(
+        OrderItem.objects.filter(order=order)
+        .order_by()
+        .values_list("category", "item_name")
+        .annotate(menu_item_id=Min("menu_item_id"), qty=Sum("quantity"), revenue=Sum(_LINE_TOTAL, output_field=_MONEY))
+    )
+
+
+def record_order_placed(order: Order, items: Optional[Sequence[OrderItem]] = None) -> None:
+    """Count a newly created order (and its lines) under its current status."""
+    if order.created_at is None:
+        return
+    if items is None:
+        lines = _order_lines(order)
+    else:
+        lines = [
+            (it.category, it.item_name, it.menu_item_id, it.quantity, (it.price or 0) * int(it.quantity or 0))
+            for it in items
+        ]
+    orders: Deltas = {}
+    _order_deltas(orders, order, order.status, 1)
+    _apply(OrderSalesRollup, _ORDER_KEY, orders)
+    item_rows: Deltas = {}
+    extra: Dict[tuple, dict] = {}
+    _item_deltas(item_rows, extra, order, lines, order.status, 1)
+    _apply(ItemSalesRollup, _ITEM_KEY, item_rows, extra)
+    invalidate_reports(TAG_ORDERS)
+
+
+def record_order_status_change(order: Order, from_status: Optional[str]) -> None:
+    """Move an order (and its lines) from ``from_status`` to ``order.status``."""
+    if order.created_at is None or _status(from_status) == _status(order.status):
+        return
+    orders: Deltas = {}
+    _order_deltas(orders, order, from_status, -1)
+    _order_deltas(orders, order, order.status, 1)
+    _apply(OrderSalesRollup, _ORDER_KEY, orders)
+    lines = _order_lines(order)
+    item_rows: Deltas = {}
+    extra: Dict[tuple, dict] = {}
+    _item_deltas(item_rows, extra, order, lines, from_status, -1)
+    _item_deltas(item_rows, extra, order, lines, order.status, 1)
+    _apply(ItemSalesRollup, _ITEM_KEY, item_rows, extra)
+    invalidate_reports(TAG_ORDERS)
+
+
+def _payment_deltas(deltas: Deltas, payment: PaymentTransaction, status: str, sign: int):
+    for grain, bucket in bucket_keys(payment.created_at):
+        key = (grain, bucket, (payment.method or "")[:16], _status(status))
+        _add(deltas, key, txn_count=sign, amount=sign * (payment.amount or 0))
+
+
+def record_payment(payment: PaymentTransaction) -> None:
+    if payment.created_at is None:
+        return
+    deltas: Deltas = {}
+    _payment_deltas(deltas, payment, payment.status, 1)
+    _apply(PaymentSalesRollup, _PAYMENT_KEY, deltas)
+    invalidate_reports(TAG_PAYMENTS)
+
+
+def record_payment_status_change(payment: PaymentTransaction, from_status: Optional[str]) -> None:
+    if payment.created_at is None or _status(from_status) == _status(payment.status):
+        return
+    deltas: Deltas = {}
+    _payment_deltas(deltas, payment, from_status, -1)
+    _payment_deltas(deltas, payment, payment.status, 1)
+    _apply(PaymentSalesRollup, _PAYMENT_KEY, deltas)
+    invalidate_reports(TAG_PAYMENTS)
+
+
+# -----------------------------
+# Rebuild
+# -----------------------------
+
+
+def _rebuild_rows(start: datetime, end: datetime, grain: str, tz: tzinfo) -> Dict[str, list]:
+    trunc = _TRUNC[grain]
+
+    def bucket(value):
+        return dj_tz.make_aware(value, tz) if not dj_tz.is_aware(value) else value
+
+    orders = (
+        Order.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(bucket=trunc("created_at", tzinfo=tz))
+        .order_by()
+        .values_list("bucket", "status")
+        .annotate(n=Count("id"), revenue=Sum("total_amount"))
+    )
+    items = (
+        OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=end)
+        .annotate(bucket=trunc("order__created_at", tzinfo=tz))
+        .order_by()
+        .values_list("bucket", "order__status", "category", "item_name")
+        .annotate(
+            menu_item_id=Min("menu_item_id"),
+            qty=Sum("quantity"),
+            revenue=Sum(_LINE_TOTAL, output_field=_MONEY),
+        )
+    )
+    payments = (
+        PaymentTransaction.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(bucket=trunc("created_at", tzinfo=tz))
+        .order_by()
+        .values_list("bucket", "method", "status")
+        .annotate(n=Count("id"), amount=Sum("amount"))
+    )
+    return {
+        "orders": [
+            OrderSalesRollup(grain=grain, bucket_start=bucket(b), status=_status(s), order_count=n, revenue=rev or 0)
+            for b, s, n, rev in orders
+        ],
+        "items": [
+            ItemSalesRollup(
+                grain=grain,
+                bucket_start=bucket(b),
+                order_status=_status(s),
+                category=(cat or "")[:128],
+                item_name=(name or "")[:255],
+                menu_item_id=mid,
+                quantity=int(qty or 0),
+                revenue=rev or 0,
+            )
+            for b, s, cat, name, mid, qty, rev in items
+        ],
+        "payments": [
+            PaymentSalesRollup(grain=grain, bucket_start=bucket(b), method=(m or "")[:16], status=_status(s), txn_count=n, amount=amt or 0)
+            for b, m, s, n, amt in payments
+        ],
+    }
+
+
+@transaction.atomic
+def rebuild_rollups(start: datetime, end: datetime) -> Dict[str, int]:
+    """Recompute every rollup row for the local days touching ``[start, end)``.
+
+    The range is widened to whole local days so hourly and daily rows stay
+    consistent. Returns the number of rows written per table.
+    """
+    tz = report_timezone()
+    start = local_midnight(start, tz)
+    end = _ceil_day(_aware(end, tz), tz)
+    written = {"orders": 0, "items": 0, "payments": 0}
+    if end <= start:
+        return written
+    for model in (OrderSalesRollup, ItemSalesRollup, PaymentSalesRollup):
+        model.objects.filter(bucket_start__gte=start, bucket_start__lt=end).delete()
+    for grain in GRAINS:
+        rows = _rebuild_rows(start, end, grain, tz)
+        for name, model in (("orders", OrderSalesRollup), ("items", ItemSalesRollup), ("payments", PaymentSalesRollup)):
+            model.objects.bulk_create(rows[name], batch_size=1000)
+            written[name] += len(rows[name])
+    invalidate_reports(TAG_ORDERS, TAG_PAYMENTS)
+    return written
+
+
+def rebuild_between(start: datetime, end: datetime, chunk_days: int = 7) -> Dict[str, int]:
+    """Rebuild ``[start, end)`` in chunks of ``chunk_days`` local days, one transaction each."""
+    tz = report_timezone()
+    cursor = local_midnight(start, tz)
+    stop = _ceil_day(_aware(end, tz), tz)
+    step = max(1, int(chunk_days or 1))
+    written = {"orders": 0, "items": 0, "payments": 0}
+    while cursor < stop:
+        nxt = cursor.date() + timedelta(days=step)
+        chunk_end = min(stop, datetime(nxt.year, nxt.month, nxt.day, tzinfo=tz))
+        for name, n in rebuild_rollups(cursor, chunk_end).items():
+            written[name] += n
+        cursor = chunk_end
+    return written
+
+
+def source_date_bounds() -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Earliest and latest ``created_at`` across orders and payments (for a full rebuild)."""
+    bounds = [
+        qs.order_by().aggregate(lo=Min("created_at"), hi=Max("created_at"))
+        for qs in (Order.objects.all(), PaymentTransaction.objects.all())
+    ]
+    los = [b["lo"] for b in bounds if b["lo"] is not None]
+    his = [b["hi"] for b in bounds if b["hi"] is not None]
+    return (min(los) if los else None, max(his) if his else None)
+
+
+# -----------------------------
+# Readers
+# -----------------------------
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """How one rollup table maps back onto its source rows."""
+
+    model: Any
+    queryset: Callable[[], QuerySet]
+    time_field: str
+    # metric -> (rollup column, aggregate over source rows given a filter Q)
+    metrics: Dict[str, Tuple[str, Callable[[Q], Any]]]
+    # dimension -> (rollup column, source column)
+    dims: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+
+
+ORDERS = RollupSource(
+    model=OrderSalesRollup,
+    queryset=lambda: Order.objects.all(),
+    time_field="created_at",
+    metrics={
+        "orders": ("order_count", lambda q: Count("id", filter=q)),
+        "revenue": ("revenue", lambda q: Sum("total_amount", filter=q)),
+    },
+    dims={"status": ("status", "status")},
+)
+
+ITEMS = RollupSource(
+    model=ItemSalesRollup,
+    queryset=lambda: OrderItem.objects.all(),
+    time_field="order__created_at",
+    metrics={
+        "quantity": ("quantity", lambda q: Sum("quantity", filter=q)),
+        "revenue": ("revenue", lambda q: Sum(_LINE_TOTAL, filter=q, output_field=_MONEY)),
+    },
+    dims={
+        "status": ("order_status", "order__status"),
+        "category": ("category", "category"),
+        "item": ("item_name", "item_name"),
+    },
+)
+
+PAYMENTS = RollupSource(
+    model=PaymentSalesRollup,
+    queryset=lambda: PaymentTransaction.objects.all(),
+    time_field="created_at",
+    metrics={
+        "count": ("txn_count", lambda q: Count("id", filter=q)),
+        "amount": ("amount", lambda q: Sum("amount", filter=q)),
+    },
+    dims={"method": ("method", "method"), "status": ("status", "status")},
+)
+
+
+@dataclass
+class _Pieces:
+    days: List[Tuple[datetime, datetime]] = field(default_factory=list)
+    hours: List[Tuple[datetime, datetime]] = field(default_factory=list)
+    raw: List[Tuple[datetime, datetime]] = field(default_factory=list)
+
+
+def _split(start: datetime, end: datetime, tz: tzinfo, now: datetime) -> _Pieces:
+    """Cover the inclusive range ``[start, end]`` with half-open day/hour/raw pieces."""
+    start = _aware(start, tz)
+    stop = _aware(end, tz) + _TICK  # half-open upper bound
+    pieces = _Pieces()
+    if stop <= start:
+        return pieces
+    h0 = _ceil_hour(start, tz)
+    # The bucket holding "now" only contains rows up to now, so a range that
+    # ends at (or after) now can read it from the rollup as a whole hour.
+    h1 = _ceil_hour(stop, tz) if stop > now else floor_hour(stop, tz)
+    if h1 <= h0:
+        pieces.raw.append((start, stop))
+        return pieces
+    d0, d1 = _ceil_day(h0, tz), local_midnight(h1, tz)
+    if d0 < d1:
+        pieces.days.append((d0, d1))
+        pieces.hours.extend(p for p in ((h0, d0), (d1, h1)) if p[0] < p[1])
+    else:
+        pieces.hours.append((h0, h1))
+    pieces.raw.extend(p for p in ((start, h0), (min(h1, stop), stop)) if p[0] < p[1])
+    return pieces
+
+
+def _range_q(field_name: str, spans: Sequence[Tuple[datetime, datetime]]) -> Optional[Q]:
+    if not spans:
+        return None
+    return reduce(or_, (Q(**{f"{field_name}__gte": lo, f"{field_name}__lt": hi}) for lo, hi in spans))
+
+
+def _dim_filters(source: RollupSource, where: Optional[dict], exclude: Optional[dict], idx: int) -> Tuple[Q, Q]:
+    inc, exc = Q(), Q()
+    for spec, target in ((where, "inc"), (exclude, "exc")):
+        for dim, value in (spec or {}).items():
+            column = source.dims[dim][idx]
+            lookup = {f"{column}__in": list(value)} if isinstance(value, (list, tuple, set, frozenset)) else {column: value}
+            if target == "inc":
+                inc &= Q(**lookup)
+            else:
+                exc |= Q(**lookup)
+    return inc, exc
+
+
+def window_totals(
+    source: RollupSource,
+    windows: Dict[str, Tuple[datetime, datetime]],
+    *,
+    group_by: Optional[Any] = None,
+    where: Optional[dict] = None,
+    exclude: Optional[dict] = None,
+) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+    """Totals for several inclusive ``(start, end)`` windows in at most three queries.
+
+    Returns ``{window: {metric: value}}``, or ``{window: {group: {metric: value}}}``
+    when ``group_by`` names a dimension (a tuple of dimensions gives tuple keys).
+    ``where``/``exclude`` map dimension names to a value or a list of values.
+    """
+    tz = report_timezone()
+    now = dj_tz.now()
+    names = list(windows)
+    dims = (group_by,) if isinstance(group_by, str) else tuple(group_by or ())
+    split = {name: _split(s, e, tz, now) for name, (s, e) in windows.items()}
+    totals: Dict[str, Dict[Any, Dict[str, Any]]] = {name: {} for name in names}
+
+    plans = []
+    for grain, attr in ((DAY, "days"), (HOUR, "hours")):
+        conds = {n: _range_q("bucket_start", getattr(split[n], attr)) for n in names}
+        inc, exc = _dim_filters(source, where, exclude, 0)
+        qs = source.model.objects.filter(grain=grain).filter(inc).exclude(exc)
+        aggs = {m: (lambda col: (lambda q: Sum(col, filter=q)))(col) for m, (col, _) in source.metrics.items()}
+        plans.append((qs, conds, aggs, [source.dims[d][0] for d in dims]))
+    inc, exc = _dim_filters(source, where, exclude, 1)
+    conds = {n: _range_q(source.time_field, split[n].raw) for n in names}
+    aggs = {m: agg for m, (_, agg) in source.metrics.items()}
+    plans.append((source.queryset().filter(inc).exclude(exc), conds, aggs, [source.dims[d][1] for d in dims]))
+
+    for qs, conds, aggs, group_cols in plans:
+        active = {n: q for n, q in conds.items() if q is not None}
+        if not active:
+            continue
+        labels = {}
+        annotations = {}
+        for i, (n, q) in enumerate(active.items()):
+            for m, agg in aggs.items():
+                alias = f"w{i}_{m}"
+                labels[alias] = (n, m)
+                annotations[alias] = agg(q)
+        qs = qs.filter(reduce(or_, active.values())).order_by()
+        if group_cols:
+            rows = qs.values(**{f"g{i}": F(col) for i, col in enumerate(group_cols)}).annotate(**annotations)
+        else:
+            rows = [qs.aggregate(**annotations)]
+        for row in rows:
+            key = tuple(row[f"g{i}"] for i in range(len(group_cols))) if group_cols else None
+            if isinstance(group_by, str):
+                key = key[0]
+            for alias, (n, m) in labels.items():
+                val = row.get(alias)
+                if val is None:
+                    continue
+                bucket = totals[n].setdefault(key, {})
+                bucket[m] = bucket.get(m, 0) + val
+
+    out: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+    for n in names:
+        if group_by:
+            out[n] = {k: {m: v.get(m, 0) for m in source.metrics} for k, v in totals[n].items() if any(v.values())}
+        else:
+            v = totals[n].get(None, {})
+            out[n] = {m: v.get(m, 0) for m in source.metrics}
+    return out
+
+
+def rollup_series(
+    source: RollupSource,
+    metric: str,
+    *,
+    start: datetime,
+    count: int,
+    unit: str,
+    where: Optional[dict] = None,
+    exclude: Optional[dict] = None,
+) -> List[dict]:
+    """Gap-filled ``[{"time": iso, "amount": float}]`` read from the ``unit`` rollup; one query."""
+    tz = report_timezone()
+    buckets = bucket_starts(start, count, unit, tz)
+    if not buckets:
+        return []
+    last = buckets[-1]
+    if unit == HOUR:
+        stop = last + timedelta(hours=1)
+    else:
+        stop = _ceil_day(last + _TICK, tz)
+    column = source.metrics[metric][0]
+    inc, exc = _dim_filters(source, where, exclude, 0)
+    rows = (
+        source.model.objects.filter(grain=unit, bucket_start__gte=buckets[0], bucket_start__lt=stop)
+        .filter(inc)
+        .exclude(exc)
+        .order_by()
+        .values("bucket_start")
+        .annotate(total=Sum(column))
+    )
+    totals: Dict[float, Decimal] = {}
+    for row in rows:
+        ts = row["bucket_start"].timestamp()
+        totals[ts] = totals.get(ts, 0) + (row["total"] or 0)
+    return [{"time": b.isoformat(), "amount": float(totals.get(b.timestamp(), 0))} for b in buckets]
+
+
+__all__ = [
+    "GRAINS",
+    "bucket_keys",
+    "floor_hour",
+    "record_order_placed",
+    "record_order_status_change",
+    "record_payment",
+    "record_payment_status_change",
+    "rebuild_rollups",
+    "rebuild_between",
+    "source_date_bounds",
+    "RollupSource",
+    "ORDERS",
+    "ITEMS",
+    "PAYMENTS",
+    "window_totals",
+    "rollup_series",
+]
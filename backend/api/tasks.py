@@ -9,6 +9,9 @@ from typing import Optional, List, Dict, Any
 
 try:
     from celery import shared_task
+    # Django no longer loads the Celery app at startup; load it with the first task use
+    # so .delay() goes to the configured broker
+    import config.celery  # noqa: F401
     CELERY_AVAILABLE = True
 except ImportError:
     # Celery not installed, create a dummy decorator
@@ -182,6 +185,7 @@ def auto_advance_orders(limit: int = 50):
 
     try:
         from .models import Order
+        from .sales_rollups import record_order_status_change
         from .views_orders import (
             canonical_status,
             can_transition,
@@ -262,6 +266,7 @@ def auto_advance_orders(limit: int = 50):
                 # Deduplicate update fields while preserving order
                 update_fields = list(dict.fromkeys(update_fields))
                 order.save(update_fields=update_fields)
+                record_order_status_change(order, previous_status)
 
                 try:
                     recalc_order_counters(order)
@@ -391,6 +396,94 @@ def cleanup_old_notifications():
     return deleted_count
 
 
+@shared_task
+def refresh_reorder_suggestions():
+    """Recompute demand forecasts and pending reorder suggestions."""
+    from .inventory_forecast import compute_reorder_suggestions
+
+    suggestions = compute_reorder_suggestions()
+    logger.info(f"Refreshed {len(suggestions)} reorder suggestions")
+    return len(suggestions)
+
+
+@shared_task
+def reconcile_inventory_chunk(run_id: str, first_id: str, last_id: str, repair: bool = False):
+    """Compare cached vs ledger quantities for one item id range."""
+    from .inventory_reconcile import reconcile_chunk
+
+    return reconcile_chunk(run_id, first_id, last_id, repair)
+
+
+@shared_task
+def reconcile_inventory_quantities(chunk_size: int = 1000, repair: bool = False):
+    """Plan a reconciliation run and fan its chunks out to workers."""
+    from .inventory_reconcile import start_run
+
+    dispatch = reconcile_inventory_chunk.delay if CELERY_AVAILABLE else reconcile_inventory_chunk
+    run = start_run(chunk_size=chunk_size, repair=repair, dispatch=dispatch)
+    logger.info(f"Reconciliation run {run.id} dispatched {run.chunks_total} chunks")
+    return str(run.id)
+
+
+@shared_task
+def rebuild_recent_sales_rollups(days: int = 2):
+    """Re-derive the last ``days`` local days of sales rollups from orders and payments."""
+    from .sales_rollups import rebuild_between
+
+    now = timezone.now()
+    written = rebuild_between(now - timedelta(days=max(1, int(days or 1)) - 1), now)
+    logger.info(f"Rebuilt sales rollups for the last {days} day(s): {written}")
+    return written
+
+
+@shared_task
+def warm_report_cache():
+    """Keep the "today" dashboard and sales report entries warm in the shared report cache."""
+    from .views_reports import warm_report_cache as warm
+
+    return warm()
+
+
+@shared_task
+def run_report_job(job_id: str):
+    """Compute a submitted report job and store its result."""
+    from .report_jobs import run_job
+
+    return run_job(job_id)
+
+
+@shared_task
+def cleanup_report_jobs():
+    """Remove expired report job results and fail jobs stuck in flight."""
+    from .report_jobs import cleanup_jobs
+
+    counts = cleanup_jobs()
+    logger.info(f"Report job cleanup: {counts}")
+    return counts
+
+
+@shared_task
+def sweep_auth_token_table(table: str):
+    """Delete expired/revoked rows of one auth token table in bounded batches."""
+    from .token_sweeper import sweep_table
+
+    removed = sweep_table(table)
+    logger.info(f"Swept {removed} dead row(s) from {table}")
+    return removed
+
+
+@shared_task
+def sweep_auth_tokens():
+    """Sweep every auth token table, one worker task per table."""
+    from .token_sweeper import TABLES
+
+    if not CELERY_AVAILABLE:
+        return {table: sweep_auth_token_table(table) for table in TABLES}
+    for table in TABLES:
+        sweep_auth_token_table.delay(table)
+    return list(TABLES)
+
+
 def create_notification_sync(
     user_id: int,
     title: str,
@@ -1,13 +1,16 @@
+import json
 import time
 
 import jwt
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.test import APIRequestFactory
 
 from api.authentication import JWTAuthentication
 from api.models import AppUser
+from api.principal_cache import PrincipalCache, _build_from_settings, set_principal_cache
+from api.report_cache import InMemoryRedis, LocalCacheBackend, RedisCacheBackend
 
 
 def build_token(user, exp_offset=3600):
@@ -64,3 +67,169 @@ class JWTAuthenticationTests(TestCase):
 
         with self.assertRaises(AuthenticationFailed):
             self.auth.authenticate(request)
+
+
+class RequestActorSharingTests(TestCase):
+    """Middleware, view helpers and DRF auth decode the token and load the user once per request."""
+
+    def setUp(self):
+        self.user = AppUser.objects.create(email="shared@example.com", name="Shared", role="admin", status="active")
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {build_token(self.user)}"}
+        set_principal_cache(False)
+        self.addCleanup(set_principal_cache, None)
+
+    def _count(self, method, *args, **kwargs):
+        from unittest import mock
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from api import views_common
+
+        with mock.patch("api.views_common.verify_token", wraps=views_common.verify_token) as decode:
+            with CaptureQueriesContext(connection) as ctx:
+                resp = method(*args, **kwargs)
+        user_queries = [q["sql"] for q in ctx.captured_queries if '"app_user"' in q["sql"]]
+        return resp, decode.call_count, user_queries
+
+    def test_middleware_and_view_share_one_lookup(self):
+        for path in ("/api/auth/me", "/api/orders"):
+            resp, decodes, user_queries = self._count(self.client.get, path, **self.headers)
+            self.assertEqual(resp.status_code, 200, path)
+            self.assertEqual(decodes, 1, path)
+            self.assertEqual(len(user_queries), 1, (path, user_queries))
+
+    def test_rejected_token_costs_no_user_query(self):
+        resp, decodes, user_queries = self._count(
+            self.client.get, "/api/orders", HTTP_AUTHORIZATION="Bearer not-a-token"
+        )
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(decodes, 1)
+        self.assertEqual(user_queries, [])
+
+    def test_drf_authentication_reuses_request_state(self):
+        from api.views_common import _request_actor
+
+        request = APIRequestFactory().get("/api/orders", **self.headers)
+        self.assertEqual(_request_actor(request).id, self.user.id)
+
+        authenticated, decodes, user_queries = self._count(JWTAuthentication().authenticate, request)
+        self.assertEqual(authenticated[0].id, self.user.id)
+        self.assertEqual((decodes, user_queries), (0, []))
+
+    def test_email_claim_resolves_when_subject_is_unknown(self):
+        from api.views_common import _actor_from_token
+
+        now = int(time.time())
+        token = jwt.encode(
+            {"sub": "legacy-id", "email": self.user.email, "iat": now, "exp": now + 60},
+            settings.JWT_SECRET,
+            algorithm=settings.JWT_ALGORITHM,
+        )
+        self.assertEqual(_actor_from_token(token).id, self.user.id)
+
+
+class PrincipalCacheTests(TestCase):
+    def setUp(self):
+        self.cache = PrincipalCache(LocalCacheBackend(), ttl=60)
+        set_principal_cache(self.cache)
+        self.addCleanup(set_principal_cache, None)
+        self.admin = AppUser.objects.create(email="boss@example.com", name="Boss", role="admin", status="active")
+        self.staff = AppUser.objects.create(email="clerk@example.com", name="Clerk", role="staff", status="active")
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {build_token(self.admin)}"}
+        self.staff_headers = {"HTTP_AUTHORIZATION": f"Bearer {build_token(self.staff)}"}
+
+    def _user_queries(self, path, headers, method="get", **kwargs):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = getattr(self.client, method)(path, **headers, **kwargs)
+        return resp, [q["sql"] for q in ctx.captured_queries if '"app_user"' in q["sql"]]
+
+    def test_repeat_requests_skip_the_user_query(self):
+        resp, queries = self._user_queries("/api/orders", self.staff_headers)
+        self.assertEqual((resp.status_code, len(queries)), (200, 1))
+        resp, queries = self._user_queries("/api/orders", self.staff_headers)
+        self.assertEqual((resp.status_code, queries), (200, []))
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_cached_principal_loads_remaining_fields_on_demand(self):
+        self.client.get("/api/auth/me", **self.staff_headers)
+        resp = self.client.get("/api/auth/me", **self.staff_headers)
+        self.assertEqual(resp.status_code, 200)
+        user = resp.json()["user"]
+        self.assertEqual((user["email"], user["role"]), ("clerk@example.com", "staff"))
+        self.assertIsNotNone(user["createdAt"])
+
+    def test_deactivation_applies_to_the_next_request(self):
+        self.assertEqual(self.client.get("/api/orders", **self.staff_headers).status_code, 200)
+        resp = self.client.patch(
+            f"/api/users/{self.staff.id}/status",
+            data=json.dumps({"status": "deactivated"}),
+            content_type="application/json",
+            **self.admin_headers,
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get("/api/orders", **self.staff_headers).status_code, 403)
+
+    def test_role_change_applies_to_the_next_request(self):
+        self.assertEqual(self.client.get("/api/users", **self.admin_headers).status_code, 200)
+        other = AppUser.objects.create(email="second@example.com", name="Second", role="admin", status="active")
+        resp = self.client.patch(
+            f"/api/users/{self.admin.id}/role",
+            data=json.dumps({"role": "staff"}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {build_token(other)}",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get("/api/users", **self.admin_headers).status_code, 403)
+
+    def test_token_revocation_invalidates(self):
+        from api.views_common import _revoke_all_refresh_tokens
+
+        self.client.get("/api/orders", **self.staff_headers)
+        AppUser.objects.filter(id=self.staff.id).update(status="deactivated")
+        self.assertEqual(self.client.get("/api/orders", **self.staff_headers).status_code, 200)  # still cached
+        _revoke_all_refresh_tokens(self.staff)
+        self.assertEqual(self.client.get("/api/orders", **self.staff_headers).status_code, 403)
+
+    def test_deactivation_reaches_every_worker_sharing_the_backend(self):
+        redis = InMemoryRedis()
+        worker_a = PrincipalCache(RedisCacheBackend(redis), ttl=60)
+        worker_b = PrincipalCache(RedisCacheBackend(redis), ttl=60)
+        set_principal_cache(worker_a)  # the worker serving the admin's request
+
+        def load():
+            return AppUser.objects.get(id=self.staff.id)
+
+        worker_b.get_or_load(self.staff.id, 1, load)
+        self.assertEqual(worker_b.get_or_load(self.staff.id, 1, load).status, "active")
+        self.assertEqual(worker_b.stats["hits"], 1)
+        resp = self.client.patch(
+            f"/api/users/{self.staff.id}/status",
+            data=json.dumps({"status": "deactivated"}),
+            content_type="application/json",
+            **self.admin_headers,
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(worker_b.get_or_load(self.staff.id, 1, load).status, "deactivated")
+        self.assertEqual(worker_b.stats["hits"], 1)
+
+    def test_default_backend_is_off_without_a_shared_store(self):
+        with override_settings(PRINCIPAL_CACHE_BACKEND="auto", PRINCIPAL_CACHE_REDIS_URL=""):
+            self.assertIsNone(_build_from_settings())
+        with override_settings(PRINCIPAL_CACHE_BACKEND="auto", PRINCIPAL_CACHE_REDIS_URL="redis://cache:6379/0"):
+            self.assertIsInstance(_build_from_settings().backend, RedisCacheBackend)
+
+    def test_invalidation_during_a_load_is_not_served_later(self):
+        def load():
+            user = AppUser.objects.get(id=self.staff.id)
+            self.cache.invalidate(self.staff.id)  # e.g. a status change landing mid-request
+            return user
+
+        self.cache.get_or_load(self.staff.id, 1, load)
+        self.cache.get_or_load(self.staff.id, 1, lambda: AppUser.objects.get(id=self.staff.id))
+        self.assertEqual(self.cache.stats, {"hits": 0, "misses": 2, "errors": 0})
+        self.cache.get_or_load(self.staff.id, 1, lambda: None)
+        self.assertEqual(self.cache.stats["hits"], 1)
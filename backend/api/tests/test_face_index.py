@@ -0,0 +1,189 @@
+import json
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from api.face_embeddings import HEADER_SIZE, convert_json_rows, pack_embedding, unpack_embedding
+from api.face_index import FaceIndex, get_face_index, set_face_index, top_k, normalize_rows
+from api.models import AppUser, FaceTemplate
+from api.tests.test_authentication import build_token
+
+
+def _vec(seed, dim=8):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def _enroll(email, vec, model_name="Facenet512", as_json=False):
+    user = AppUser.objects.create(email=email, name=email, role="staff", status="active")
+    tpl = FaceTemplate(user=user, model_name=model_name)
+    if as_json:
+        tpl.embedding = json.dumps(np.asarray(vec).tolist())
+    else:
+        tpl.set_embedding(vec)
+    tpl.save()
+    return tpl
+
+
+class EmbeddingStorageTests(SimpleTestCase):
+    def test_round_trip_is_a_zero_copy_view(self):
+        vec = _vec(4, dim=512)
+        packed = pack_embedding(vec)
+        self.assertEqual(len(packed), HEADER_SIZE + 512 * 4)
+        view = unpack_embedding(memoryview(packed))
+        np.testing.assert_array_equal(view, vec)
+        self.assertEqual(view.dtype, np.dtype("<f4"))
+        self.assertFalse(view.flags.writeable)
+        self.assertIs(view.base.obj, packed)
+
+    def test_rejects_malformed_bytes(self):
+        packed = pack_embedding([1.0, 2.0, 3.0])
+        for bad in (packed[:4], packed[:-1], b"XX" + packed[2:], packed[:2] + b"\x09" + packed[3:]):
+            with self.assertRaises(ValueError):
+                unpack_embedding(bad)
+
+
+class TopKTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        raw = rng.standard_normal((500, 32))
+        query = rng.standard_normal(32)
+        idx, distances = top_k(normalize_rows(raw), normalize_rows(query)[0], k=5)
+        expected = [
+            1 - float(np.dot(row, query) / (np.linalg.norm(row) * np.linalg.norm(query))) for row in raw
+        ]
+        self.assertEqual(list(idx), list(np.argsort(expected)[:5]))
+        np.testing.assert_allclose(distances, sorted(expected)[:5], atol=1e-5)
+
+    def test_zero_rows_and_small_matrices(self):
+        matrix = normalize_rows([[0.0, 0.0], [1.0, 0.0]])
+        idx, distances = top_k(matrix, normalize_rows([2.0, 0.0])[0], k=10)
+        self.assertEqual(list(idx), [1, 0])
+        np.testing.assert_allclose(distances, [0.0, 1.0], atol=1e-6)
+
+
+class FaceIndexTests(TestCase):
+    def setUp(self):
+        self.index = FaceIndex()
+
+    def test_builds_once_and_skips_bad_rows(self):
+        a = _enroll("a@example.com", _vec(1))
+        _enroll("b@example.com", _vec(2))
+        bad = AppUser.objects.create(email="bad@example.com", name="bad", role="staff", status="active")
+        FaceTemplate.objects.create(user=bad, embedding="not json")
+        short = AppUser.objects.create(email="short@example.com", name="short", role="staff", status="active")
+        FaceTemplate.objects.create(user=short, embedding="[1, 2]")
+
+        matches = self.index.match("Facenet512", _vec(1) * 3, k=2)
+        self.assertEqual(matches[0].template_id, a.pk)
+        self.assertEqual(matches[0].user_id, a.user_id)
+        self.assertAlmostEqual(matches[0].distance, 0.0, places=5)
+        self.assertEqual(len(matches), 2)
+        self.assertEqual(self.index.size("Facenet512"), (2, 2))
+
+        # Later matches only check the signature
+        with self.assertNumQueries(1):
+            self.index.match("Facenet512", _vec(2))
+        self.assertEqual(self.index.stats["builds"], 1)
+        self.assertEqual(self.index.match("Facenet512", _vec(2, dim=5)), [])
+        self.assertEqual(self.index.match("ArcFace", _vec(2)), [])
+
+    def test_reads_json_rows_during_the_transition(self):
+        legacy = _enroll("old@example.com", _vec(1), as_json=True)
+        _enroll("new@example.com", _vec(2))
+        self.assertEqual(self.index.size("Facenet512"), (2, 0))
+        self.assertEqual(self.index.match("Facenet512", _vec(1))[0].template_id, legacy.pk)
+
+    def test_register_and_unregister_update_in_place(self):
+        _enroll("a@example.com", _vec(1))
+        self.index.match("Facenet512", _vec(1))
+        b = _enroll("b@example.com", _vec(2))
+        self.index.upsert(b)
+        self.assertEqual(self.index.match("Facenet512", _vec(2))[0].template_id, b.pk)
+
+        # Re-enrolling under another model moves the row
+        b.model_name = "ArcFace"
+        b.save()
+        self.index.match("ArcFace", _vec(2))
+        self.index.upsert(b)
+        self.assertEqual(self.index.size("Facenet512"), (1, 0))
+        self.assertEqual(self.index.size("ArcFace"), (1, 0))
+
+        b_id = b.pk
+        b.delete()
+        self.index.discard(b_id)
+        self.assertEqual(self.index.size("ArcFace"), (0, 0))
+        self.assertEqual(self.index.stats["builds"], 2)
+
+    def test_changes_from_other_workers_trigger_a_rebuild(self):
+        _enroll("a@example.com", _vec(1))
+        self.index.match("Facenet512", _vec(1))
+        # Written by another process: this index is never told
+        c = _enroll("c@example.com", _vec(5))
+        self.assertEqual(self.index.match("Facenet512", _vec(5))[0].template_id, c.pk)
+        self.assertEqual(self.index.stats["builds"], 2)
+
+
+class ConvertJsonRowsTests(TestCase):
+    def test_converts_in_batches_and_keeps_unreadable_rows(self):
+        vectors = {_enroll(f"u{i}@example.com", _vec(i), as_json=True).pk: _vec(i) for i in range(5)}
+        bad = AppUser.objects.create(email="bad@example.com", name="bad", role="staff", status="active")
+        FaceTemplate.objects.create(user=bad, embedding='{"not": "a list"}')
+
+        with mock.patch.object(FaceTemplate.objects, "bulk_update", wraps=FaceTemplate.objects.bulk_update) as update:
+            stats = convert_json_rows(FaceTemplate, batch_size=2)
+        self.assertEqual(stats, {"converted": 5, "invalid": 1})
+        self.assertEqual(update.call_count, 3)
+        for tpl in FaceTemplate.objects.exclude(user=bad):
+            # Older readers still find the JSON text
+            self.assertEqual(tpl.embedding, json.dumps(vectors[tpl.pk].tolist()))
+            np.testing.assert_array_equal(tpl.get_embedding(), vectors[tpl.pk])
+        self.assertEqual(FaceTemplate.objects.get(user=bad).embedding, '{"not": "a list"}')
+        self.assertEqual(convert_json_rows(FaceTemplate), {"converted": 0, "invalid": 1})
+
+
+class FaceViewTests(TestCase):
+    def setUp(self):
+        set_face_index(None)
+        self.addCleanup(set_face_index, None)
+        self.alice = _enroll("alice@example.com", _vec(1, dim=512))
+        _enroll("bob@example.com", _vec(2, dim=512))
+
+    def _login(self, vec):
+        with mock.patch("api.views_face._extract_face_and_embedding", return_value=(vec, {"confidence": 0.99})):
+            return self.client.post(
+                "/api/auth/face-login",
+                data=json.dumps({"image": "data:image/png;base64,aGVsbG8="}),
+                content_type="application/json",
+            )
+
+    def test_login_uses_the_index(self):
+        resp = self._login(_vec(1, dim=512) + 0.01)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.json()["user"]["email"], "alice@example.com")
+        self.assertEqual(self._login(_vec(9, dim=512)).status_code, 401)
+        self.assertEqual(get_face_index().stats["builds"], 1)
+
+    def test_register_and_unregister_keep_the_index_current(self):
+        self._login(_vec(1, dim=512))
+        token = build_token(self.alice.user)
+        with mock.patch("api.views_face._extract_face_and_embedding", return_value=(_vec(7, dim=512), {"confidence": 0.99})):
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(
+                    "/api/auth/face-register",
+                    data=json.dumps({"image": "data:image/png;base64,aGVsbG8="}),
+                    content_type="application/json",
+                    HTTP_AUTHORIZATION=f"Bearer {token}",
+                )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        stored = FaceTemplate.objects.get(user=self.alice.user)
+        self.assertEqual(json.loads(stored.embedding), _vec(7, dim=512).tolist())
+        np.testing.assert_array_equal(stored.get_embedding(), _vec(7, dim=512))
+        self.assertEqual(self._login(_vec(7, dim=512)).json()["user"]["email"], "alice@example.com")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post("/api/auth/face-unregister", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self._login(_vec(7, dim=512)).status_code, 401)
+        self.assertEqual(get_face_index().size("Facenet512"), (1, 0))
+        self.assertEqual(get_face_index().stats["builds"], 1)
@@ -0,0 +1,51 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from api.import_budget import parse_importtime
+from api.lazy_views import LazyView
+
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     numpy._core
+import time:       300 |        420 |   numpy
+import time:        80 |        500 | api.views_face
+import time:      1000 |       1000 | django.db
+"""
+
+
+class ImportBudgetTests(SimpleTestCase):
+    def test_parses_importtime_output(self):
+        profile = parse_importtime(SAMPLE)
+        self.assertEqual([r.depth for r in profile.records], [2, 1, 0, 0])
+        self.assertAlmostEqual(profile.total_ms, 1.5)
+        self.assertEqual(list(profile.by_package()), ["django", "numpy", "api"])
+        self.assertEqual(profile.loaded(["numpy", "celery", "api.views_face", "api.views"]), ["api.views_face", "numpy"])
+
+    def test_lazy_view_imports_its_module_on_first_call(self):
+        module = mock.Mock()
+        module.face_login.return_value = "response"
+        with mock.patch("api.lazy_views.importlib.import_module", return_value=module) as load:
+            view = LazyView("views_face", "face_login")
+            self.assertEqual(view.__name__, "face_login")
+            load.assert_not_called()
+            self.assertEqual(view("request", 1), "response")
+            self.assertEqual(view("request", 2), "response")
+        load.assert_called_once_with("api.views_face")
+        module.face_login.assert_called_with("request", 2)
+
+    def test_async_views_are_run_to_completion(self):
+        async def view(request):
+            return f"async {request}"
+
+        with mock.patch("api.lazy_views.importlib.import_module", return_value=mock.Mock(auth_login=view)):
+            self.assertEqual(LazyView("views_auth", "auth_login")("req"), "async req")
+
+    def test_startup_fits_the_configured_budget(self):
+        out = StringIO()
+        call_command("import_budget", stdout=out)
+        self.assertIn(f"(budget {settings.STARTUP_IMPORT_BUDGET_MS:.0f} ms,", out.getvalue())
+        self.assertIn("Startup imports within budget", out.getvalue())
@@ -0,0 +1,495 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.inventory_alerts import AlertAggregator, low_stock_alert
+from api.inventory_batch_stock import rebuild as rebuild_batch_index
+from api.inventory_forecast import ForecastParams, compute_reorder_suggestions, forecast_demand
+from api.inventory_reconcile import start_run
+from api.inventory_services import (
+    adjust_stock,
+    consume_for_order,
+    evaluate_low_stock,
+    get_expiring_batches,
+    get_low_stock,
+    get_stock_ledger_page,
+    ReceiptLine,
+    TransferLine,
+    iter_stock_ledger,
+    record_receipt,
+    record_receipts,
+    transfer_stock,
+    transfer_stock_batch,
+)
+from api.models import (
+    AppUser,
+    BatchStock,
+    InventoryAlertState,
+    InventoryItem,
+    InventoryReconciliationRun,
+    Location,
+    Notification,
+    ReorderSetting,
+    ReorderSuggestion,
+    StockMovement,
+)
+from api.tests.test_orders import auth_headers
+
+
+class LowStockEvaluationTests(TestCase):
+    def setUp(self):
+        self.main = Location.objects.create(code="MAIN-T", name="Main")
+        self.bar = Location.objects.create(code="BAR-T", name="Bar")
+        self.rice = InventoryItem.objects.create(name="Rice", unit="kg")
+        self.oil = InventoryItem.objects.create(name="Oil", unit="L")
+        record_receipt(item=self.rice, qty=Decimal("3"), location=self.main)
+        record_receipt(item=self.rice, qty=Decimal("50"), location=self.bar)
+        record_receipt(item=self.oil, qty=Decimal("20"), location=self.main)
+        ReorderSetting.objects.create(item=self.rice, location=self.main, reorder_point=Decimal("5"), low_stock_threshold=Decimal("2"))
+        ReorderSetting.objects.create(item=self.rice, location=self.bar, reorder_point=Decimal("5"))
+        ReorderSetting.objects.create(item=self.oil, location=self.main, reorder_point=Decimal("10"))
+        # A setting with no movements at all counts as zero on hand
+        self.sugar = InventoryItem.objects.create(name="Sugar", unit="kg")
+        ReorderSetting.objects.create(item=self.sugar, location=self.bar, reorder_point=Decimal("1"))
+
+    def test_breaches_are_per_item_and_location(self):
+        low = evaluate_low_stock()
+        pairs = {(b.item.name, b.location.code, b.on_hand) for b in low}
+        self.assertEqual(pairs, {("Rice", "MAIN-T", Decimal("3")), ("Sugar", "BAR-T", Decimal("0"))})
+
+    def test_single_query_regardless_of_settings(self):
+        with self.assertNumQueries(1):
+            low = get_low_stock()
+        self.assertEqual(len(low), 2)
+
+    def test_threshold_field_and_filters(self):
+        self.assertEqual(evaluate_low_stock(threshold_field="low_stock_threshold", item_ids=[str(self.rice.id)]), [])
+        low = evaluate_low_stock(location_ids=[str(self.main.id)])
+        self.assertEqual([b.item.name for b in low], ["Rice"])
+        with self.assertRaises(ValueError):
+            evaluate_low_stock(threshold_field="quantity")
+
+
+class InventoryAlertTests(TestCase):
+    def setUp(self):
+        self.loc = Location.objects.create(code="MAIN-A", name="Main")
+        self.managers = [
+            AppUser.objects.create(email=f"m{i}@example.com", name=f"M{i}", role="manager", status="active")
+            for i in range(3)
+        ]
+        self.items = [InventoryItem.objects.create(name=f"Item {i}") for i in range(4)]
+        for it in self.items:
+            record_receipt(item=it, qty=Decimal("10"), location=self.loc)
+            ReorderSetting.objects.create(item=it, location=self.loc, reorder_point=Decimal("20"), low_stock_threshold=Decimal("5"))
+
+    def test_scan_sends_one_digest_per_manager_and_debounces(self):
+        call_command("inventory_scan", stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), len(self.managers))
+        digest = Notification.objects.first()
+        self.assertEqual(digest.meta["lowStockCount"], len(self.items))
+        # Within the cool-down window the same breaches are not re-sent
+        call_command("inventory_scan", stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), len(self.managers))
+        # After the window elapses they are
+        call_command("inventory_scan", "--cooldown", "0", stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 2 * len(self.managers))
+
+    def test_stock_change_alerts_are_bulk_inserted_once(self):
+        item = self.items[0]
+        adjust_stock(item=item, delta_qty=Decimal("-6"), location=self.loc)
+        self.assertEqual(Notification.objects.filter(title__contains=item.name).count(), len(self.managers))
+        adjust_stock(item=item, delta_qty=Decimal("-1"), location=self.loc)
+        self.assertEqual(Notification.objects.filter(title__contains=item.name).count(), len(self.managers))
+        self.assertEqual(InventoryAlertState.objects.count(), 1)
+
+    def test_flush_query_count_is_independent_of_alert_count(self):
+        agg = AlertAggregator(cooldown=timedelta(hours=1))
+        agg.extend(low_stock_alert(b) for b in evaluate_low_stock())
+        # savepoint, seed states, locked read, stamp, load managers,
+        # insert notifications, release
+        with self.assertNumQueries(7):
+            created = agg.flush()
+        self.assertEqual(created, len(self.items) * len(self.managers))
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.loc = Location.objects.create(code="MAIN-L", name="Main")
+        self.item = InventoryItem.objects.create(name="Flour", unit="kg")
+        base = timezone.now() - timedelta(days=30)
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                item=self.item,
+                location=self.loc,
+                movement_type=StockMovement.TYPE_RECEIPT,
+                qty=Decimal(i + 1),
+                # Several rows share an effective_at to exercise the tie-breakers
+                effective_at=base + timedelta(hours=i // 3),
+                recorded_at=base + timedelta(hours=i // 3),
+            )
+            for i in range(25)
+        ])
+        self.user = AppUser.objects.create(email="audit@example.com", name="Audit", role="manager", status="active")
+
+    def test_keyset_pages_cover_ledger_once_with_running_balance(self):
+        seen, balances, cursor = [], [], None
+        while True:
+            page = get_stock_ledger_page(item_id=str(self.item.id), cursor=cursor, limit=7)
+            seen.extend(str(m.id) for m, _ in page.rows)
+            balances.extend(b for _, b in page.rows)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        ordered = StockMovement.objects.order_by("effective_at", "recorded_at", "id")
+        self.assertEqual(seen, [str(m.id) for m in ordered])
+        running, expected = Decimal(0), []
+        for m in ordered:
+            running += m.qty
+            expected.append(running)
+        self.assertEqual(balances, expected)
+
+    def test_opening_balance_respects_date_from(self):
+        first = StockMovement.objects.order_by("effective_at", "recorded_at", "id")[6]
+        rows = list(iter_stock_ledger(item_id=str(self.item.id), date_from=first.effective_at, chunk_size=4))
+        opening = sum(m.qty for m in StockMovement.objects.filter(effective_at__lt=first.effective_at))
+        self.assertEqual(rows[0][1], opening + rows[0][0].qty)
+        self.assertEqual(rows[-1][1], Decimal(325))
+
+    def test_json_endpoint_paginates_and_export_streams(self):
+        client = Client()
+        resp = client.get("/api/inventory/ledger", {"item_id": str(self.item.id), "limit": 10}, **auth_headers(self.user))
+        body = resp.json()
+        self.assertEqual(len(body["data"]), 10)
+        self.assertTrue(body["pagination"]["hasMore"])
+        resp2 = client.get(
+            "/api/inventory/ledger",
+            {"item_id": str(self.item.id), "limit": 10, "cursor": body["pagination"]["nextCursor"]},
+            **auth_headers(self.user),
+        )
+        first = resp2.json()["data"][0]
+        self.assertNotIn(first["id"], {r["id"] for r in body["data"]})
+        self.assertEqual(first["balance"], body["data"][-1]["balance"] + first["qty"])
+
+        export = client.get("/api/inventory/ledger/export", {"format": "csv"}, **auth_headers(self.user))
+        self.assertTrue(export.streaming)
+        lines = b"".join(export.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 26)
+        self.assertTrue(lines[-1].split(",")[6].startswith("325"))
+        nd = client.get("/api/inventory/ledger/export", {"format": "ndjson"}, **auth_headers(self.user))
+        self.assertEqual(len(b"".join(nd.streaming_content).splitlines()), 25)
+
+
+class InventoryActivityFeedTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(email="feed@example.com", name="Feed", role="manager", status="active")
+        self.loc = Location.objects.create(code="MAIN-F", name="Main")
+        self.item = InventoryItem.objects.create(name="Salt", unit="kg")
+        for _ in range(6):
+            record_receipt(item=self.item, qty=Decimal("2"), location=self.loc)
+        resp = self.client.put(
+            f"/api/inventory/items/{self.item.id}",
+            data='{"supplier": "Acme"}',
+            content_type="application/json",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_pages_are_disjoint_and_include_item_updates(self):
+        url = "/api/inventory/recent-activity"
+        first = self.client.get(url, {"limit": 4}, **auth_headers(self.user)).json()
+        self.assertEqual(first["pagination"]["total"], 7)
+        self.assertEqual(first["data"][0]["type"], "ITEM_UPDATE")
+        second = self.client.get(url, {"limit": 4, "cursor": first["pagination"]["nextCursor"]}, **auth_headers(self.user)).json()
+        self.assertFalse(second["pagination"]["hasMore"])
+        ids = [r["id"] for r in first["data"] + second["data"]]
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+        by_page = self.client.get(url, {"limit": 4, "page": 2}, **auth_headers(self.user)).json()
+        self.assertEqual([r["id"] for r in by_page["data"]], [r["id"] for r in second["data"]])
+
+    def test_location_filter_excludes_item_updates(self):
+        resp = self.client.get(
+            "/api/inventory/recent-activity", {"location_id": str(self.loc.id)}, **auth_headers(self.user)
+        ).json()
+        self.assertEqual(len(resp["data"]), 6)
+        self.assertTrue(all(r["type"] == "RECEIPT" for r in resp["data"]))
+
+
+class ReorderForecastTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="buyer@example.com", name="Buyer", role="manager", status="active")
+        self.loc = Location.objects.create(code="MAIN-R", name="Main")
+        self.item = InventoryItem.objects.create(name="Beans", unit="kg")
+        self.today = timezone.localdate()
+        now = timezone.now()
+        # 4 units consumed every day for the last 10 days
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                item=self.item,
+                location=self.loc,
+                movement_type=StockMovement.TYPE_SALE,
+                qty=Decimal("-4"),
+                effective_at=now - timedelta(days=d),
+                recorded_at=now - timedelta(days=d),
+            )
+            for d in range(10)
+        ])
+        ReorderSetting.objects.create(item=self.item, location=self.loc, reorder_point=Decimal("1"), lead_time_days=3)
+
+    def test_forecast_is_vectorised_over_rows(self):
+        values = np.array([[2.0] * 30, [0.0] * 15 + [6.0] * 15])
+        fc = forecast_demand(values, np.array([1.0, 4.0]), ForecastParams(method="sma", window_days=10, service_z=2.0))
+        self.assertEqual(fc.mean.tolist(), [2.0, 6.0])
+        self.assertEqual(fc.std.tolist(), [0.0, 0.0])
+        self.assertEqual(fc.reorder_point.tolist(), [2.0, 24.0])
+        ses = forecast_demand(values[:1], np.array([1.0]), ForecastParams(method="ses", alpha=0.5))
+        self.assertAlmostEqual(float(ses.mean[0]), 2.0)
+
+    def test_single_day_history_has_zero_std(self):
+        fc = forecast_demand(np.array([[3.0]]), np.array([2.0]), ForecastParams(method="sma", service_z=2.0))
+        self.assertEqual((fc.mean.tolist(), fc.std.tolist()), ([3.0], [0.0]))
+        params = ForecastParams(history_days=1, window_days=10, method="sma", service_z=2.0)
+        compute_reorder_suggestions(params, as_of=self.today)
+        s = ReorderSuggestion.objects.get()
+        self.assertEqual((s.avg_daily_demand, s.safety_stock), (Decimal("4"), Decimal("0")))
+        self.assertEqual(s.suggested_reorder_point, Decimal("12"))
+
+    def test_upsert_omits_the_conflict_target_on_mysql(self):
+        params = ForecastParams(history_days=10, window_days=10, method="sma")
+        features = connection.features
+        for with_target in (False, True):
+            with mock.patch.object(features, "supports_update_conflicts_with_target", with_target):
+                with mock.patch.object(ReorderSuggestion.objects, "bulk_create") as bulk_create:
+                    compute_reorder_suggestions(params, as_of=self.today)
+            kwargs = bulk_create.call_args.kwargs
+            self.assertTrue(kwargs["update_conflicts"])
+            self.assertEqual("unique_fields" in kwargs, with_target)
+
+    def test_suggestions_upsert_and_apply(self):
+        params = ForecastParams(history_days=10, window_days=10, method="sma", service_z=0)
+        compute_reorder_suggestions(params, as_of=self.today)
+        compute_reorder_suggestions(params, as_of=self.today)
+        self.assertEqual(ReorderSuggestion.objects.count(), 1)
+        s = ReorderSuggestion.objects.get()
+        self.assertEqual(s.avg_daily_demand, Decimal("4"))
+        self.assertEqual(s.lead_time_days, 3)
+        self.assertEqual(s.suggested_reorder_point, Decimal("12"))
+        self.assertEqual(s.suggested_reorder_qty, Decimal("28"))
+        # Settings are untouched until a suggestion is applied
+        self.assertEqual(ReorderSetting.objects.get().reorder_point, Decimal("1"))
+
+        client = Client()
+        listed = client.get("/api/inventory/reorder-suggestions", **auth_headers(self.user)).json()
+        self.assertEqual([r["id"] for r in listed["data"]], [str(s.id)])
+        resp = client.post(
+            "/api/inventory/reorder-suggestions/apply",
+            data=json.dumps({"ids": [str(s.id)]}),
+            content_type="application/json",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(resp.json()["data"]["applied"], 1)
+        rs = ReorderSetting.objects.get()
+        self.assertEqual((rs.reorder_point, rs.reorder_qty), (Decimal("12"), Decimal("28")))
+        s.refresh_from_db()
+        self.assertEqual(s.status, ReorderSuggestion.STATUS_APPLIED)
+
+
+class BatchDocumentTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="clerk@example.com", name="Clerk", role="manager", status="active")
+        self.main, _ = Location.objects.get_or_create(code="MAIN", defaults={"name": "Main"})
+        self.bar, _ = Location.objects.get_or_create(code="BAR", defaults={"name": "Bar"})
+        self.items = [InventoryItem.objects.create(name=f"SKU {i}", unit="pc") for i in range(30)]
+
+    def _count_queries(self, fn):
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        return len(ctx.captured_queries)
+
+    def test_receipt_query_count_does_not_grow_with_lines(self):
+        def receive(items):
+            return lambda: record_receipts(
+                [ReceiptLine(item=it, qty=Decimal("5"), batch_payload={"lot_code": f"L-{it.name}"}) for it in items],
+                location=self.main,
+            )
+        small = self._count_queries(receive(self.items[:3]))
+        large = self._count_queries(receive(self.items[3:]))
+        self.assertEqual(small, large)
+        self.assertEqual(StockMovement.objects.count(), 30)
+        self.assertEqual(set(InventoryItem.objects.values_list("quantity", flat=True)), {Decimal("5")})
+
+    def test_transfer_manifest_is_fefo_and_all_or_nothing(self):
+        a, b = self.items[:2]
+        today = timezone.localdate()
+        record_receipts(
+            [
+                ReceiptLine(item=a, qty=Decimal("4"), batch_payload={"lot_code": "LATE", "expiry_date": today + timedelta(days=9)}),
+                ReceiptLine(item=a, qty=Decimal("4"), batch_payload={"lot_code": "SOON", "expiry_date": today + timedelta(days=2)}),
+                ReceiptLine(item=b, qty=Decimal("3")),
+            ],
+            location=self.main,
+        )
+        with self.assertRaises(ValueError):
+            transfer_stock_batch(
+                [TransferLine(item=a, qty=Decimal("1")), TransferLine(item=b, qty=Decimal("9"))],
+                from_location=self.main,
+                to_location=self.bar,
+            )
+        self.assertFalse(StockMovement.objects.filter(location=self.bar).exists())
+        mvs = transfer_stock_batch(
+            [TransferLine(item=a, qty=Decimal("3")), TransferLine(item=a, qty=Decimal("2")), TransferLine(item=b, qty=Decimal("3"))],
+            from_location=self.main,
+            to_location=self.bar,
+        )
+        into_bar = [(m.item_id, m.batch.lot_code if m.batch else None, m.qty) for m in mvs if m.location_id == self.bar.id]
+        self.assertEqual(into_bar, [(a.id, "SOON", Decimal("4")), (a.id, "LATE", Decimal("1")), (b.id, None, Decimal("3"))])
+        a.refresh_from_db()
+        self.assertEqual(a.quantity, Decimal("8"))
+
+    def test_replay_returns_whole_document_for_long_and_prefixed_keys(self):
+        key = "k" * 80
+        lines = [ReceiptLine(item=it, qty=Decimal("1")) for it in self.items[:12]]
+        first = record_receipts(lines, location=self.main, idempotency_key=key)
+        replay = record_receipts(lines, location=self.main, idempotency_key=key)
+        self.assertEqual([m.id for m in replay], [m.id for m in first])
+        # A key that is a prefix of another document's key is a new document
+        record_receipts(lines[:1], location=self.main, idempotency_key="abc:def")
+        fresh = record_receipts(lines[:2], location=self.main, idempotency_key="abc")
+        self.assertEqual(len(fresh), 2)
+        self.assertEqual(StockMovement.objects.count(), 15)
+
+    def test_document_endpoints(self):
+        client = Client()
+        lines = [{"itemId": str(it.id), "qty": 2} for it in self.items[:5]]
+        resp = client.post(
+            "/api/inventory/receipts/batch",
+            data=json.dumps({"location": "MAIN", "goodsReceiptId": "GR-1", "lines": lines}),
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY="gr-1",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(resp.json()["data"]["count"], 5)
+        replay = client.post(
+            "/api/inventory/receipts/batch",
+            data=json.dumps({"location": "MAIN", "goodsReceiptId": "GR-1", "lines": lines}),
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY="gr-1",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(replay.json()["data"]["movementIds"], resp.json()["data"]["movementIds"])
+        resp = client.post(
+            "/api/inventory/transfer/batch",
+            data=json.dumps({"from": "MAIN", "to": "BAR", "lines": lines}),
+            content_type="application/json",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(resp.json()["data"]["count"], 10)
+        missing = client.post(
+            "/api/inventory/transfer/batch",
+            data=json.dumps({"from": "MAIN", "to": "BAR", "lines": [{"itemId": "00000000-0000-0000-0000-000000000000", "qty": 1}]}),
+            content_type="application/json",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(missing.status_code, 404)
+
+
+class QuantityCacheTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="recon@example.com", name="Recon", role="manager", status="active")
+        self.loc = Location.objects.create(code="MAIN-Q", name="Main")
+        self.items = [InventoryItem.objects.create(name=f"Cache {i}", unit="pc") for i in range(5)]
+        for it in self.items:
+            record_receipt(item=it, qty=Decimal("10"), location=self.loc)
+
+    def test_mutators_update_cache_incrementally(self):
+        item = self.items[0]
+        with CaptureQueriesContext(connection) as ctx:
+            record_receipt(item=item, qty=Decimal("2.5"), location=self.loc)
+        self.assertFalse(any("SUM(" in q["sql"].upper() for q in ctx.captured_queries))
+        adjust_stock(item=item, delta_qty=Decimal("-4"), location=self.loc)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, Decimal("8.50"))
+
+    def test_fractional_deltas_do_not_accumulate_rounding_drift(self):
+        item = self.items[1]
+        for _ in range(8):
+            adjust_stock(item=item, delta_qty=Decimal("-0.125"), location=self.loc)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, Decimal("9.00"))
+        self.assertEqual(start_run().drift_count, 0)
+
+    def test_reconciliation_chunks_record_and_repair_drift(self):
+        InventoryItem.objects.filter(id=self.items[3].id).update(quantity=Decimal("99"))
+        run = start_run(chunk_size=2)
+        self.assertEqual((run.chunks_total, run.chunks_done, run.items_checked), (3, 3, 5))
+        self.assertEqual(run.status, InventoryReconciliationRun.STATUS_DONE)
+        self.assertEqual(run.drift_count, 1)
+        self.assertEqual(run.total_abs_drift, Decimal("89"))
+
+        report = Client().get("/api/inventory/reconciliation", **auth_headers(self.user)).json()["data"]
+        self.assertEqual(report["latest"]["id"], str(run.id))
+        self.assertEqual(report["drifts"][0]["itemId"], str(self.items[3].id))
+
+        start_run(chunk_size=2, repair=True)
+        self.items[3].refresh_from_db()
+        self.assertEqual(self.items[3].quantity, Decimal("10"))
+        self.assertEqual(start_run().drift_count, 0)
+
+
+class BatchStockIndexTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="fefo@example.com", name="Fefo", role="manager", status="active")
+        self.main = Location.objects.create(code="MAIN-X", name="Main")
+        self.bar = Location.objects.create(code="BAR-X", name="Bar")
+        self.item = InventoryItem.objects.create(name="Milk", unit="L")
+        today = timezone.localdate()
+        self.lines = [
+            ReceiptLine(item=self.item, qty=Decimal("2"), batch_payload={"lot_code": f"D{d}", "expiry_date": today + timedelta(days=d)})
+            for d in (5, 1, 3, 9, 2, 4, 6)
+        ]
+        self.lines.append(ReceiptLine(item=self.item, qty=Decimal("2"), batch_payload={"lot_code": "NOEXP"}))
+        record_receipts(self.lines, location=self.main)
+
+    def test_index_tracks_in_stock_batches_only(self):
+        self.assertEqual(BatchStock.objects.count(), 8)
+        consume_for_order(order_id="o-1", components=[(self.item, Decimal("1")), (self.item, Decimal("2"))], location=self.main)
+        lots = {r.batch.lot_code: r.qty for r in BatchStock.objects.select_related("batch")}
+        self.assertNotIn("D1", lots)
+        self.assertEqual(lots["D2"], Decimal("1"))
+        transfer_stock(item=self.item, qty=Decimal("1"), from_location=self.main, to_location=self.bar)
+        self.assertEqual(
+            [(r.batch.lot_code, r.qty) for r in BatchStock.objects.filter(location=self.bar).select_related("batch")],
+            [("D2", Decimal("1"))],
+        )
+        self.assertFalse(BatchStock.objects.filter(location=self.main, batch__lot_code="D2").exists())
+        before = sorted((str(r.batch_id), str(r.location_id), r.qty) for r in BatchStock.objects.all())
+        rebuild_batch_index()
+        after = sorted((str(r.batch_id), str(r.location_id), r.qty) for r in BatchStock.objects.all())
+        self.assertEqual(before, after)
+
+    def test_expiring_endpoint_pages_in_expiry_order(self):
+        client = Client()
+        seen, cursor = [], None
+        while True:
+            params = {"days": 30, "limit": 3, "location_id": str(self.main.id)}
+            if cursor:
+                params["cursor"] = cursor
+            body = client.get("/api/inventory/expiring", params, **auth_headers(self.user)).json()
+            seen.extend(r["lotCode"] for r in body["data"])
+            cursor = body["pagination"]["nextCursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, ["D1", "D2", "D3", "D4", "D5", "D6", "D9"])
+        self.assertEqual([b.lot_code for b in get_expiring_batches(3)], ["D1", "D2", "D3"])
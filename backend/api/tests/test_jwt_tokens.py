@@ -0,0 +1,133 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from unittest import mock
+
+import jwt
+from asgiref.sync import async_to_sync
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from api import consumers
+from api.jwt_tokens import TokenService, key_id, set_token_service
+from api.models import AppUser
+from api.views_common import _issue_jwt, _request_auth
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _hs256(header, claims, key: bytes) -> str:
+    signing_input = f"{_b64(json.dumps(header).encode())}.{_b64(json.dumps(claims).encode())}"
+    return f"{signing_input}.{_b64(hmac.new(key, signing_input.encode(), hashlib.sha256).digest())}"
+
+
+def _claims(ttl=60, **extra):
+    now = int(time.time())
+    return {"sub": "u1", "email": "a@example.com", "iat": now, "exp": now + ttl, **extra}
+
+
+class AsymmetricTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.old_key = ec.generate_private_key(ec.SECP256R1())
+        self.new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def test_rotation_by_kid(self):
+        old_signer = TokenService(algorithm="ES256", private_key=self.old_key)
+        token = old_signer.sign(_claims())
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], key_id(self.old_key.public_key()))
+
+        # New signing key; the old public key stays published until its tokens expire
+        service = TokenService(
+            algorithm="RS256",
+            private_key=self.new_key,
+            public_keys={None: self.old_key.public_key()},
+        )
+        self.assertEqual(service.verify(token)["sub"], "u1")
+        self.assertEqual(service.verify(service.sign(_claims()))["sub"], "u1")
+
+        retired = TokenService(algorithm="RS256", private_key=self.new_key)
+        with self.assertRaises(jwt.InvalidTokenError):
+            retired.verify(token)
+
+    def test_verify_only_node_needs_no_secret(self):
+        signer = TokenService(algorithm="RS256", private_key=self.new_key, signing_kid="2026-10")
+        edge = TokenService(algorithm="RS256", public_keys={"2026-10": self.new_key.public_key()})
+        self.assertEqual(edge.verify(signer.sign(_claims()))["email"], "a@example.com")
+        with self.assertRaises(Exception):
+            edge.sign(_claims())
+
+    def test_tokens_cannot_pick_their_algorithm(self):
+        service = TokenService(algorithm="ES256", private_key=self.old_key, secret="shared-secret")
+        public_pem = self.old_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        kid = key_id(self.old_key.public_key())
+        # HMAC keyed with the public key, the classic algorithm-confusion forgery
+        forged = _hs256({"alg": "HS256", "typ": "JWT", "kid": kid}, _claims(), public_pem)
+        with self.assertRaises(jwt.InvalidTokenError):
+            service.verify(forged)
+
+        legacy = jwt.encode(_claims(), "shared-secret", algorithm="HS256")
+        with self.assertRaises(jwt.InvalidTokenError):
+            service.verify(legacy)
+        migrating = TokenService(algorithm="ES256", private_key=self.old_key, secret="shared-secret", accept_shared_secret=True)
+        self.assertEqual(migrating.verify(legacy)["sub"], "u1")
+
+
+class ClaimsCacheTests(SimpleTestCase):
+    def test_repeated_tokens_skip_the_signature_check(self):
+        service = TokenService(secret="s" * 32, cache_size=2)
+        token = service.sign(_claims())
+        with mock.patch("api.jwt_tokens.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                self.assertEqual(service.verify(token)["sub"], "u1")
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(service.stats["hits"], 2)
+
+        # Callers get their own copy
+        service.verify(token)["sub"] = "changed"
+        self.assertEqual(service.verify(token)["sub"], "u1")
+
+    def test_expiry_is_checked_on_cache_hits(self):
+        service = TokenService(secret="s" * 32)
+        token = service.sign(_claims(ttl=60))
+        service.verify(token)
+        with mock.patch("api.jwt_tokens.time.time", return_value=time.time() + 120):
+            with self.assertRaises(jwt.ExpiredSignatureError):
+                service.verify(token)
+            self.assertEqual(service.verify(token, verify_exp=False)["sub"], "u1")
+
+    def test_cache_is_bounded(self):
+        service = TokenService(secret="s" * 32, cache_size=2)
+        for i in range(5):
+            service.verify(service.sign(_claims(jti=str(i))))
+        self.assertEqual(len(service._cache), 2)
+
+
+class ServiceIntegrationTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="ws@example.com", name="WS", role="staff", status="active")
+        set_token_service(TokenService(algorithm="ES256", private_key=ec.generate_private_key(ec.SECP256R1())))
+        self.addCleanup(set_token_service, None)
+
+    def test_issued_tokens_authenticate_requests(self):
+        token = _issue_jwt(self.user)
+        self.assertEqual(jwt.get_unverified_header(token)["alg"], "ES256")
+        resp = self.client.get("/api/auth/me", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(resp.status_code, 200)
+
+        request = RequestFactory().get("/api/orders", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(_request_auth(request).payload["sub"], str(self.user.id))
+
+    def test_websocket_rejects_bad_tokens_without_a_thread_hop(self):
+        with mock.patch.object(consumers, "sync_to_async", wraps=consumers.sync_to_async) as hop:
+            self.assertIsNone(async_to_sync(consumers._resolve_actor)("not-a-token"))
+            self.assertEqual(hop.call_count, 0)
+            actor = async_to_sync(consumers._resolve_actor)(_issue_jwt(self.user))
+            self.assertEqual(actor.id, self.user.id)
+            self.assertEqual(hop.call_count, 1)
@@ -1,11 +1,15 @@
 import json
+import uuid
 from decimal import Decimal
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.conf import settings
 from django.utils import timezone as dj_tz
 import jwt
 
 from api.models import AppUser, MenuItem, Order, PaymentTransaction
+from api.principal_cache import set_principal_cache
 
 
 def auth_headers(user):
@@ -61,3 +65,43 @@ class OrderFlowTests(TestCase):
         self.user.refresh_from_db()
         self.assertEqual(self.user.credit_points, Decimal('0.01'))
 
+
+
+class PaymentListTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(email='cashier@example.com', name='Cashier', role='admin', status='active')
+        set_principal_cache(False)
+        self.addCleanup(set_principal_cache, None)
+
+    def _pay(self, order_id, **meta):
+        return PaymentTransaction.objects.create(
+            order_id=order_id, amount=Decimal('10'), method='cash', processed_by=self.user, meta=meta
+        )
+
+    def _list(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/payments', {'limit': 50}, **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()['data'], len(ctx.captured_queries)
+
+    def test_page_resolves_order_numbers_and_cashiers_in_constant_queries(self):
+        order = Order.objects.create(order_number='PL-1')
+        self._pay(str(order.id))
+        event_id = str(uuid.uuid4())
+        self._pay(event_id, source='catering')
+        self._pay('legacy-ref')
+        rows, first = self._list()
+        by_order = {r['orderId']: r for r in rows}
+        self.assertEqual(by_order[str(order.id)]['orderNumber'], 'PL-1')
+        self.assertTrue(by_order[event_id]['orderNumber'].startswith('C-'))
+        self.assertEqual(by_order['legacy-ref']['orderNumber'], '')
+        self.assertEqual({r['processedBy'] for r in rows}, {'cashier@example.com'})
+
+        for n in range(5):
+            o = Order.objects.create(order_number=f'PL-{n + 2}')
+            self._pay(str(o.id))
+            self._pay(str(uuid.uuid4()), source='catering')
+        rows, second = self._list()
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(first, second)
@@ -0,0 +1,128 @@
+import json
+import threading
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, identify_hasher, make_password
+from django.test import SimpleTestCase, TestCase
+
+from api.models import AppUser
+from api.password_hashing import HashPoolBusy, PasswordHashPool, set_hash_pool, verify_password
+from api.rate_limits import LocalCounterStore, set_counter_store
+from api.tests.test_authentication import build_token
+
+
+def _weak_hash(raw):
+    return PBKDF2PasswordHasher().encode(raw, "saltsaltsalt", iterations=1000)
+
+
+def _blocked_pool(workers=1, max_queue=0):
+    """A pool whose workers are all busy until the returned event is set."""
+    pool = PasswordHashPool(workers=workers, max_queue=max_queue, retry_after=3)
+    release, started = threading.Event(), threading.Semaphore(0)
+
+    def hold():
+        started.release()
+        release.wait(5)
+
+    futures = [pool.submit(hold) for _ in range(workers)]
+    for _ in range(workers):
+        started.acquire(timeout=5)
+    return pool, release, futures
+
+
+class PasswordHashPoolTests(SimpleTestCase):
+    def test_rejects_once_workers_and_queue_are_full(self):
+        pool, release, futures = _blocked_pool(workers=1, max_queue=1)
+        self.addCleanup(pool.shutdown)
+        queued = pool.submit(lambda: "done")
+        with self.assertRaises(HashPoolBusy) as ctx:
+            pool.submit(lambda: "rejected")
+        self.assertEqual(ctx.exception.retry_after, 3)
+        snap = pool.snapshot()
+        self.assertEqual((snap["pending"], snap["running"], snap["queued"], snap["rejected"]), (2, 1, 1, 1))
+
+        release.set()
+        self.assertEqual(queued.result(timeout=5), "done")
+        futures[0].result(timeout=5)
+        snap = pool.snapshot()
+        self.assertEqual((snap["pending"], snap["completed"], snap["peakPending"]), (0, 2, 2))
+        self.assertEqual(pool.run(lambda: 7), 7)
+
+    def test_verify_reports_outdated_hashes(self):
+        ok, new_hash = verify_password("s3cret-pass", _weak_hash("s3cret-pass"))
+        self.assertTrue(ok)
+        self.assertTrue(check_password("s3cret-pass", new_hash))
+        self.assertFalse(identify_hasher(new_hash).must_update(new_hash))
+
+        self.assertEqual(verify_password("wrong-pass", _weak_hash("s3cret-pass")), (False, None))
+        self.assertEqual(verify_password("s3cret-pass", make_password("s3cret-pass")), (True, None))
+
+
+class LoginHashingTests(TestCase):
+    def setUp(self):
+        set_counter_store(LocalCounterStore())
+        self.addCleanup(set_counter_store, None)
+        self.addCleanup(set_hash_pool, None)
+
+    def _login(self, email, password):
+        return self.client.post(
+            "/api/auth/login",
+            data=json.dumps({"email": email, "password": password}),
+            content_type="application/json",
+        )
+
+    def test_login_upgrades_outdated_hash(self):
+        user = AppUser.objects.create(
+            email="rehash@example.com", name="Rehash", role="staff", status="active",
+            password_hash=_weak_hash("s3cret-pass"),
+        )
+        resp = self._login("rehash@example.com", "s3cret-pass")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertTrue(resp.json().get("otpRequired"))
+
+        user.refresh_from_db()
+        self.assertNotEqual(user.password_hash, _weak_hash("s3cret-pass"))
+        self.assertFalse(identify_hasher(user.password_hash).must_update(user.password_hash))
+        self.assertTrue(check_password("s3cret-pass", user.password_hash))
+
+    def test_wrong_password_keeps_hash(self):
+        weak = _weak_hash("s3cret-pass")
+        user = AppUser.objects.create(
+            email="wrong@example.com", name="Wrong", role="staff", status="active", password_hash=weak,
+        )
+        self.assertEqual(self._login("wrong@example.com", "not-the-pass").status_code, 401)
+        user.refresh_from_db()
+        self.assertEqual(user.password_hash, weak)
+
+    def test_full_pool_answers_429(self):
+        AppUser.objects.create(
+            email="busy@example.com", name="Busy", role="staff", status="active",
+            password_hash=_weak_hash("s3cret-pass"),
+        )
+        pool, release, _ = _blocked_pool()
+        set_hash_pool(pool)
+        self.addCleanup(pool.shutdown)
+        self.addCleanup(release.set)
+
+        resp = self._login("busy@example.com", "s3cret-pass")
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "3")
+        self.assertFalse(resp.json()["success"])
+
+        user = AppUser.objects.get(email="busy@example.com")
+        resp = self.client.post(
+            "/api/auth/change-password",
+            data=json.dumps({"currentPassword": "s3cret-pass", "newPassword": "an0ther-pass"}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {build_token(user)}",
+        )
+        self.assertEqual(resp.status_code, 429)
+
+    def test_pool_metrics_are_admin_only(self):
+        admin = AppUser.objects.create(email="root@example.com", name="Root", role="admin", status="active")
+        staff = AppUser.objects.create(email="crew@example.com", name="Crew", role="staff", status="active")
+        url = "/api/diagnostics/password-hashing"
+        resp = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {build_token(admin)}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("queued", resp.json()["pool"])
+        resp = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {build_token(staff)}")
+        self.assertEqual(resp.status_code, 403)
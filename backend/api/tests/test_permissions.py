@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import permissions
+from api.models import AppUser
+from api.views_common import (
+    DEFAULT_ROLE_PERMISSIONS,
+    _effective_permissions,
+    _has_all_permissions,
+    _has_any_permission,
+    _has_permission,
+)
+
+
+ALL_CODES = sorted({code for codes in DEFAULT_ROLE_PERMISSIONS.values() for code in codes} - {"all"})
+
+
+class PermissionMaskTests(SimpleTestCase):
+    def test_masks_agree_with_the_permission_sets(self):
+        users = [
+            AppUser(role="admin"),
+            AppUser(role="Manager"),
+            AppUser(role="staff"),
+            AppUser(role="staff", permissions=["reports.sales.view", "custom.flag"]),
+            AppUser(role="staff", permissions=["all"]),
+            AppUser(role="pending"),
+        ]
+        for user in users:
+            expected = _effective_permissions(user)
+            for code in ALL_CODES + ["custom.flag", "never.granted"]:
+                self.assertEqual(
+                    _has_permission(user, code),
+                    "all" in expected or code in expected,
+                    (user.role, user.permissions, code),
+                )
+
+    def test_wildcard_check_requires_full_access(self):
+        self.assertTrue(_has_permission(AppUser(role="admin"), "all"))
+        self.assertTrue(_has_permission(AppUser(role="staff", permissions=["all"]), "all"))
+        self.assertFalse(_has_permission(AppUser(role="manager"), "all"))
+        self.assertTrue(_has_any_permission(AppUser(role="admin"), "all"))
+        self.assertFalse(_has_any_permission(AppUser(role="manager"), "all"))
+
+    def test_any_and_all(self):
+        staff = AppUser(role="staff")
+        self.assertTrue(_has_any_permission(staff, "reports.sales.view", "inventory.view"))
+        self.assertFalse(_has_any_permission(staff, "reports.sales.view", "catering.manage"))
+        self.assertTrue(_has_all_permissions(staff, "inventory.view", "order.place"))
+        self.assertFalse(_has_all_permissions(staff, "inventory.view", "reports.sales.view"))
+        self.assertTrue(_has_all_permissions(AppUser(role="admin"), "inventory.view", "added.later"))
+
+    def test_mask_is_cached_on_the_principal_until_role_or_grants_change(self):
+        user = AppUser(role="staff", permissions=[])
+        self.assertFalse(_has_permission(user, "reports.sales.view"))
+        with mock.patch.object(permissions, "mask_of", wraps=permissions.mask_of) as mask_of:
+            _has_permission(user, "inventory.view")
+            _has_permission(user, "order.place")
+            built = [c for c in mask_of.call_args_list if c.args[0] is user.permissions]
+            self.assertEqual(built, [])
+        user.role = "manager"
+        self.assertTrue(_has_permission(user, "reports.sales.view"))
+        user.role, user.permissions = "staff", ["reports.sales.view"]
+        self.assertTrue(_has_permission(user, "reports.sales.view"))
+
+    def test_in_memory_users_use_their_role(self):
+        self.assertTrue(_has_permission({"role": "manager", "permissions": []}, "reports.sales.view"))
+        self.assertFalse(_has_permission({"role": "staff"}, "reports.sales.view"))
+        self.assertTrue(_has_permission({"role": "staff", "permissions": ["all"]}, "reports.sales.view"))
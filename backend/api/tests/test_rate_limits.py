@@ -0,0 +1,120 @@
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from api.rate_limits import (
+    DjangoCacheCounterStore,
+    LocalCounterStore,
+    LoginLockout,
+    RedisCounterStore,
+    SlidingWindowLimiter,
+    _build_from_settings,
+    set_counter_store,
+)
+from api.report_cache import InMemoryRedis
+from api.views_common import _is_locked, _lockout_check_and_touch, rate_limit
+
+
+T0 = 1_700_000_040.0  # start of a 60s window
+
+
+class SlidingWindowLimiterTests(SimpleTestCase):
+    def test_limit_within_a_window_and_rejections_are_not_counted(self):
+        limiter = SlidingWindowLimiter(LocalCounterStore())
+        self.assertEqual([limiter.hit("ip", 3, 60, now=T0 + i)[0] for i in range(3)], [True] * 3)
+        allowed, retry_after = limiter.hit("ip", 3, 60, now=T0 + 5)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        for _ in range(10):
+            limiter.hit("ip", 3, 60, now=T0 + 6)
+        # Three requests, not thirteen, carry over into the next window
+        self.assertFalse(limiter.hit("ip", 3, 60, now=T0 + 60)[0])
+        self.assertTrue(limiter.hit("ip", 3, 60, now=T0 + 60 + 21)[0])
+
+    def test_previous_window_weight_decays(self):
+        limiter = SlidingWindowLimiter(LocalCounterStore())
+        for _ in range(10):
+            limiter.hit("k", 10, 60, now=T0 + 59)
+        # 15s into the next window 75% of the previous count still applies
+        results = [limiter.hit("k", 10, 60, now=T0 + 75)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+
+    def test_retry_after_lets_the_next_request_through(self):
+        limiter = SlidingWindowLimiter(LocalCounterStore())
+        for i in range(5):
+            limiter.hit("k", 5, 60, now=T0 + 10 + i)
+        allowed, retry_after = limiter.hit("k", 5, 60, now=T0 + 20)
+        self.assertFalse(allowed)
+        self.assertFalse(limiter.hit("k", 5, 60, now=T0 + 20 + retry_after - 2)[0])
+        self.assertTrue(limiter.hit("k", 5, 60, now=T0 + 20 + retry_after)[0])
+
+    def test_workers_sharing_a_store_share_the_limit(self):
+        for store in (RedisCounterStore(InMemoryRedis()), DjangoCacheCounterStore("default")):
+            workers = [SlidingWindowLimiter(store) for _ in range(4)]
+            results = [workers[i % 4].hit(f"shared-{id(store)}", 6, 60, now=T0 + 1)[0] for i in range(12)]
+            self.assertEqual(results.count(True), 6, store)
+
+    def test_default_store_is_shared_whenever_redis_is_configured(self):
+        with override_settings(RATE_LIMIT_BACKEND="auto", RATE_LIMIT_REDIS_URL="redis://cache:6379/0"):
+            self.assertIsInstance(_build_from_settings(), RedisCounterStore)
+        with override_settings(RATE_LIMIT_BACKEND="auto", RATE_LIMIT_REDIS_URL=""):
+            self.assertIsInstance(_build_from_settings(), LocalCounterStore)
+
+    def test_local_store_is_bounded_and_expires_keys(self):
+        store = LocalCounterStore(max_entries=100)
+        limiter = SlidingWindowLimiter(store)
+        for i in range(1000):
+            limiter.hit(f"client-{i}", 5, 60, now=T0)
+        self.assertLessEqual(len(store), 100)
+
+        store.incr("short", 1, 1)
+        store._data["short"] = (0.0, 1)  # already past its expiry
+        self.assertEqual(store.get_many(["short"]), [None])
+        self.assertNotIn("short", store._data)
+
+
+class LoginLockoutTests(SimpleTestCase):
+    def setUp(self):
+        self.lockout = LoginLockout(LocalCounterStore(), threshold=3, window_seconds=600, lock_seconds=300)
+
+    def test_locks_after_threshold_failures(self):
+        self.assertEqual(self.lockout.touch("a@x.com", "1.1.1.1", False, now=T0), (False, 0))
+        self.assertEqual(self.lockout.touch("a@x.com", "1.1.1.1", False, now=T0 + 1), (False, 0))
+        self.assertEqual(self.lockout.touch("a@x.com", "1.1.1.1", False, now=T0 + 2), (True, 300))
+        self.assertEqual(self.lockout.locked("a@x.com", "1.1.1.1", now=T0 + 102), (True, 200))
+        # A correct password does not bypass an active lock
+        self.assertEqual(self.lockout.touch("a@x.com", "1.1.1.1", True, now=T0 + 103), (True, 199))
+        self.assertEqual(self.lockout.locked("a@x.com", "2.2.2.2", now=T0 + 102), (False, 0))
+
+    def test_success_clears_failures(self):
+        self.lockout.touch("b@x.com", "1.1.1.1", False, now=T0)
+        self.lockout.touch("b@x.com", "1.1.1.1", False, now=T0)
+        self.lockout.touch("b@x.com", "1.1.1.1", True, now=T0)
+        self.assertEqual(self.lockout.touch("b@x.com", "1.1.1.1", False, now=T0), (False, 0))
+        self.assertEqual(self.lockout.touch("b@x.com", "1.1.1.1", False, now=T0), (False, 0))
+
+    def test_view_helpers_use_the_configured_store(self):
+        set_counter_store(RedisCounterStore(InMemoryRedis()))
+        self.addCleanup(set_counter_store, None)
+        for _ in range(5):
+            _lockout_check_and_touch("c@x.com", "9.9.9.9", success=False)
+        locked, retry_after = _is_locked("c@x.com", "9.9.9.9")
+        self.assertTrue(locked)
+        self.assertGreater(retry_after, 0)
+
+
+class RateLimitDecoratorTests(SimpleTestCase):
+    def test_returns_429_with_retry_after(self):
+        set_counter_store(LocalCounterStore())
+        self.addCleanup(set_counter_store, None)
+
+        @rate_limit(limit=2, window_seconds=60)
+        def view(request):
+            return JsonResponse({"success": True})
+
+        factory = RequestFactory()
+        codes = [view(factory.post("/api/limited")).status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        resp = view(factory.post("/api/limited"))
+        self.assertGreaterEqual(int(resp["Retry-After"]), 1)
+        # Other clients have their own budget
+        self.assertEqual(view(factory.post("/api/limited", REMOTE_ADDR="10.0.0.9")).status_code, 200)
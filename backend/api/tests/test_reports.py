@@ -0,0 +1,662 @@
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import (
+    AppUser,
+    AttendanceRecord,
+    Employee,
+    InventoryItem,
+    ItemSalesRollup,
+    MenuItem,
+    Order,
+    OrderItem,
+    OrderSalesRollup,
+    PaymentSalesRollup,
+    PaymentTransaction,
+    ReportJob,
+)
+from api.notification_triggers import trigger_daily_sales_summary
+from api.principal_cache import set_principal_cache
+from api.report_cache import (
+    TAG_ORDERS,
+    TAG_PAYMENTS,
+    InMemoryRedis,
+    LocalCacheBackend,
+    RedisCacheBackend,
+    ReportCache,
+    _build_from_settings,
+    set_report_cache,
+)
+from api.utils_xlsx import stream_xlsx
+from api.report_jobs import cleanup_jobs, run_job, submit_job
+from api.reports_timeseries import DAY, HOUR, local_midnight, sum_series
+from api.sales_rollups import (
+    ORDERS,
+    rebuild_between,
+    record_order_placed,
+    record_order_status_change,
+    window_totals,
+)
+from api.tests.test_orders import auth_headers
+from api.views_reports import _sales_data, warm_report_cache
+
+
+def _fresh_report_cache(test, backend=None):
+    cache = ReportCache(backend or LocalCacheBackend())
+    set_report_cache(cache)
+    test.addCleanup(set_report_cache, None)
+    return cache
+
+
+def _order(number, when, amount, status=Order.STATUS_COMPLETED):
+    order = Order.objects.create(order_number=number, status=status, total_amount=Decimal(amount))
+    Order.objects.filter(id=order.id).update(created_at=when)
+    return order
+
+
+class DashboardTimeSeriesTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="reports@example.com", name="Reports", role="admin", status="active")
+        _fresh_report_cache(self)
+        # Query counts compare requests; keep the auth lookup in every one of them
+        set_principal_cache(False)
+        self.addCleanup(set_principal_cache, None)
+        self.tz = timezone.get_default_timezone()
+        self.today = local_midnight(timezone.now())
+
+    def test_hourly_buckets_are_manila_local_and_gap_filled(self):
+        # 00:30 Manila is 16:30 UTC the previous day
+        _order("TS-1", self.today + timedelta(minutes=30), "100")
+        _order("TS-2", self.today + timedelta(hours=5, minutes=59), "40")
+        _order("TS-3", self.today + timedelta(hours=5, minutes=1), "2")
+        _order("TS-4", self.today + timedelta(hours=5), "999", status=Order.STATUS_CANCELLED)
+        series = sum_series(
+            Order.objects.exclude(status=Order.STATUS_CANCELLED),
+            field="created_at",
+            value="total_amount",
+            start=self.today,
+            count=24,
+            unit=HOUR,
+        )
+        self.assertEqual(len(series), 24)
+        self.assertEqual(series[0], {"time": self.today.isoformat(), "amount": 100.0})
+        self.assertEqual(series[5]["amount"], 42.0)
+        self.assertEqual(sum(p["amount"] for p in series), 142.0)
+        self.assertTrue(series[0]["time"].endswith("+08:00"))
+
+    def test_daily_buckets_follow_local_midnight(self):
+        day = self.today - timedelta(days=3)
+        _order("TD-1", day - timedelta(minutes=1), "7")  # 23:59 the day before, local time
+        _order("TD-2", day + timedelta(minutes=1), "5")
+        series = sum_series(Order.objects.all(), field="created_at", value="total_amount", start=day - timedelta(days=1), count=3, unit=DAY)
+        self.assertEqual([p["amount"] for p in series], [7.0, 5.0, 0.0])
+        self.assertEqual(datetime.fromisoformat(series[1]["time"]), day)
+
+    def test_dashboard_query_count_is_constant_across_ranges(self):
+        now = timezone.now()
+        # Enough orders today to fill the recent-sales list in both ranges
+        for n in range(10):
+            _order(f"TN-{n}", now - timedelta(seconds=n + 1), "10")
+        for d in range(1, 100):
+            _order(f"TQ-{d}", self.today - timedelta(days=d) + timedelta(hours=9), "10")
+        rebuild_between(self.today - timedelta(days=100), now)
+        client = Client()
+
+        def count(range_value):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = client.get("/api/reports/dashboard", {"range": range_value}, **auth_headers(self.user))
+            self.assertEqual(resp.status_code, 200)
+            return len(ctx.captured_queries), resp.json()["data"]
+
+        today_queries, today = count("today")
+        wide_queries, wide = count(f"{(now - timedelta(days=90)).isoformat()}..{now.isoformat()}")
+        self.assertEqual(today_queries, wide_queries)
+        self.assertEqual(len(today["salesByTime"]), 24)
+        self.assertEqual(len(wide["salesByTime"]), 91)
+        self.assertEqual(sum(p["amount"] for p in today["salesByTime"]), 100.0)
+        self.assertEqual(sum(p["amount"] for p in wide["salesByTime"]), 1000.0)
+
+
+def _rollup_snapshot():
+    """Non-zero rollup rows as comparable tuples (incremental moves leave zeroed rows behind)."""
+    return {
+        "orders": sorted(
+            OrderSalesRollup.objects.exclude(order_count=0, revenue=0).values_list(
+                "grain", "bucket_start", "status", "order_count", "revenue"
+            )
+        ),
+        "items": sorted(
+            ItemSalesRollup.objects.exclude(quantity=0, revenue=0).values_list(
+                "grain", "bucket_start", "order_status", "category", "item_name", "quantity", "revenue"
+            )
+        ),
+        "payments": sorted(
+            PaymentSalesRollup.objects.exclude(txn_count=0, amount=0).values_list(
+                "grain", "bucket_start", "method", "status", "txn_count", "amount"
+            )
+        ),
+    }
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(email="rollups@example.com", name="Rollups", role="admin", status="active")
+        _fresh_report_cache(self)
+        self.today = local_midnight(timezone.now())
+
+    def _place(self, items):
+        resp = self.client.post(
+            "/api/orders",
+            data=json.dumps({"items": items, "type": "walk-in"}),
+            content_type="application/json",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()["data"]
+
+    def test_incremental_rollups_match_rebuild_through_order_lifecycle(self):
+        mains = MenuItem.objects.create(name="Adobo", category="Mains", price=120, available=True)
+        drinks = MenuItem.objects.create(name="Iced Tea", category="Drinks", price=35, available=True)
+        kept = self._place([{"menuItemId": str(mains.id), "quantity": 2}, {"menuItemId": str(drinks.id), "quantity": 1}])
+        dropped = self._place([{"menuItemId": str(drinks.id), "quantity": 3}])
+        pay = self.client.post(
+            f"/api/orders/{kept['id']}/payment",
+            data=json.dumps({"amount": 275, "method": "cash"}),
+            content_type="application/json",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(pay.status_code, 200)
+        refunded = self.client.post(
+            f"/api/orders/{dropped['id']}/payment",
+            data=json.dumps({"amount": 105, "method": "cash"}),
+            content_type="application/json",
+            **auth_headers(self.user),
+        ).json()["data"]
+        self.client.post(f"/api/payments/{refunded['id']}/refund", **auth_headers(self.user))
+        resp = self.client.patch(
+            f"/api/orders/{dropped['id']}/status",
+            data=json.dumps({"status": "cancelled"}),
+            content_type="application/json",
+            **auth_headers(self.user),
+        )
+        self.assertEqual(resp.status_code, 200)
+
+        incremental = _rollup_snapshot()
+        self.assertTrue(incremental["orders"] and incremental["items"] and incremental["payments"])
+        rebuild_between(self.today, timezone.now())
+        self.assertEqual(_rollup_snapshot(), incremental)
+
+        data = self.client.get("/api/reports/dashboard", {"range": "today"}, **auth_headers(self.user)).json()["data"]
+        self.assertEqual(data["orderCount"], 1)
+        self.assertEqual(data["dailySales"], 275.0)
+        self.assertEqual(sum(p["amount"] for p in data["salesByTime"]), 275.0)
+        self.assertEqual(
+            sorted((c["category"], c["amount"]) for c in data["salesByCategory"]), [("Drinks", 35.0), ("Mains", 240.0)]
+        )
+        self.assertEqual(data["popularItems"][0], {"name": "Adobo", "count": 2})
+
+        sales = self.client.get("/api/reports/sales", {"range": "today"}, **auth_headers(self.user)).json()["data"]
+        self.assertEqual(sales["total"], 380.0)
+        self.assertEqual(sales["byMethod"], {"cash": 380.0})
+
+    def test_window_totals_match_source_rows_with_unaligned_edges(self):
+        now = timezone.now()
+        stamps = [
+            self.today - timedelta(days=4, minutes=-5),
+            self.today - timedelta(days=3) + timedelta(hours=5, minutes=39),
+            self.today - timedelta(days=3) + timedelta(hours=5, minutes=41),
+            self.today - timedelta(days=2) + timedelta(hours=23, minutes=59),
+            self.today - timedelta(days=1) + timedelta(hours=13, minutes=5),
+            self.today - timedelta(days=1) + timedelta(hours=13, minutes=6),
+            now - timedelta(minutes=1),
+        ]
+        for n, when in enumerate(stamps):
+            _order(f"RW-{n}", when, str(10 + n))
+        _order("RW-X", stamps[2], "500", status=Order.STATUS_VOIDED)
+        rebuild_between(self.today - timedelta(days=5), now)
+        windows = {
+            "multi_day": (self.today - timedelta(days=3) + timedelta(hours=5, minutes=40), self.today - timedelta(days=1, seconds=-47105)),
+            "one_hour": (stamps[4] - timedelta(minutes=1), stamps[4] + timedelta(seconds=30)),
+            "to_now": (self.today - timedelta(days=4), now),
+        }
+        excluded = [Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
+        with self.assertNumQueries(3):
+            totals = window_totals(ORDERS, windows, exclude={"status": excluded})
+        for name, (start, end) in windows.items():
+            expected = Order.objects.filter(created_at__gte=start, created_at__lte=end).exclude(status__in=excluded)
+            self.assertEqual(totals[name]["orders"], expected.count(), name)
+            self.assertEqual(
+                totals[name]["revenue"], expected.aggregate(total=Sum("total_amount"))["total"] or 0, name
+            )
+
+    def test_daily_sales_summary_reads_todays_completed_orders(self):
+        order = Order.objects.create(order_number="RS-1", status=Order.STATUS_ACCEPTED, total_amount=Decimal("150"))
+        record_order_placed(order, [])
+        order.status = Order.STATUS_COMPLETED
+        order.save(update_fields=["status"])
+        record_order_status_change(order, Order.STATUS_ACCEPTED)
+        with mock.patch("api.notification_triggers.get_admin_users", return_value=[self.user.id]), mock.patch(
+            "api.notification_triggers._create_notification"
+        ) as notify:
+            trigger_daily_sales_summary()
+        self.assertTrue(notify.called)
+        self.assertEqual(Decimal(notify.call_args.kwargs["meta"]["total_sales"]), Decimal("150"))
+        self.assertIn("from 1 completed orders", notify.call_args.kwargs["message"])
+
+    def test_dashboard_categories_aggregate_in_database_for_both_periods(self):
+        # Signed against the real clock: the JWT check in the request path does not see the patch below
+        headers = auth_headers(self.user)
+        # Pin the clock a few hours into the day so today's fixtures are never in the future
+        now = self.today + timedelta(hours=3)
+        clock = mock.patch("django.utils.timezone.now", return_value=now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        yesterday = self.today - timedelta(days=1)
+
+        def line(order, name, category, price, qty):
+            OrderItem.objects.create(order=order, item_name=name, category=category, price=Decimal(price), quantity=qty)
+
+        line(_order("RC-1", yesterday + timedelta(hours=10, minutes=20), "100"), "Adobo", "Mains", "50", 2)
+        today_order = _order("RC-2", self.today + timedelta(minutes=40), "80")
+        line(today_order, "Iced Tea", "Drinks", "30", 1)
+        line(today_order, "Adobo", "Mains", "50", 1)
+        line(_order("RC-3", self.today + timedelta(minutes=50), "999", status=Order.STATUS_CANCELLED), "Adobo", "Mains", "999", 1)
+        rebuild_between(yesterday, now)
+        # Not in the rollups: only the sub-hour edge read from order lines can see it
+        line(_order("RC-4", self.today + timedelta(minutes=45), "20"), "Rice", "", "20", 1)
+
+        start = self.today + timedelta(minutes=30)
+        with mock.patch.object(OrderItem, "from_db", side_effect=AssertionError("OrderItem rows loaded")):
+            resp = self.client.get(
+                "/api/reports/dashboard",
+                {"range": f"{start.isoformat()}..{now.isoformat()}"},
+                **headers,
+            )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()["data"]
+        self.assertEqual(sorted((c["category"], c["amount"]) for c in data["salesByCategory"]), [("Drinks", 30.0), ("Mains", 50.0)])
+        self.assertEqual(data["salesByCategoryYesterday"], [{"category": "Mains", "amount": 100.0}])
+        self.assertEqual(
+            sorted((p["name"], p["count"]) for p in data["popularItems"]), [("Adobo", 1), ("Iced Tea", 1), ("Rice", 1)]
+        )
+        self.assertEqual(data["popularItemsYesterday"], [{"name": "Adobo", "count": 2}])
+
+
+class _BrokenBackend(LocalCacheBackend):
+    def get_many(self, keys):
+        raise ConnectionError("cache down")
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(email="cache@example.com", name="Cache", role="admin", status="active")
+
+    def _get(self, path, **params):
+        resp = self.client.get(path, params, **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 200)
+        return resp["X-Report-Cache"], resp.json()["data"]
+
+    def test_dashboard_is_served_from_cache_until_an_order_is_written(self):
+        _fresh_report_cache(self)
+        menu = MenuItem.objects.create(name="Adobo", category="Mains", price=120, available=True)
+        self.assertEqual(self._get("/api/reports/dashboard", range="today")[0], "miss")
+        self.assertEqual(self._get("/api/reports/sales", range="today")[0], "miss")
+        with CaptureQueriesContext(connection) as ctx:
+            state, data = self._get("/api/reports/dashboard", range="today")
+        self.assertEqual((state, data["orderCount"]), ("hit", 0))
+        # Only authentication touches the database on a hit
+        self.assertTrue(all('"app_user"' in q["sql"] for q in ctx.captured_queries), ctx.captured_queries)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(
+                "/api/orders",
+                data=json.dumps({"items": [{"menuItemId": str(menu.id), "quantity": 1}], "type": "walk-in"}),
+                content_type="application/json",
+                **auth_headers(self.user),
+            )
+        self.assertEqual(resp.status_code, 200)
+        state, data = self._get("/api/reports/dashboard", range="today")
+        self.assertEqual((state, data["orderCount"]), ("miss", 1))
+        # Payments-only entries are untouched by an order write
+        self.assertEqual(self._get("/api/reports/sales", range="today")[0], "hit")
+
+    def test_inventory_writes_invalidate_only_inventory_reports(self):
+        _fresh_report_cache(self)
+        self._get("/api/reports/inventory")
+        self._get("/api/reports/dashboard", range="today")
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(
+                "/api/inventory/items",
+                data=json.dumps({"name": "Rice", "quantity": 5, "unit": "kg"}),
+                content_type="application/json",
+                **auth_headers(self.user),
+            )
+        self.assertEqual(resp.status_code, 200)
+        state, data = self._get("/api/reports/inventory")
+        self.assertEqual((state, [i["name"] for i in data]), ("miss", ["Rice"]))
+        self.assertEqual(self._get("/api/reports/dashboard", range="today")[0], "hit")
+
+    def test_concurrent_identical_misses_compute_once(self):
+        redis = InMemoryRedis()
+        # Two caches over one Redis stand in for two web processes
+        caches = [ReportCache(RedisCacheBackend(redis)), ReportCache(RedisCacheBackend(redis))]
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(2)
+            return {"total": 42}
+
+        results = []
+
+        def worker(cache):
+            results.append(cache.get_or_compute("sales", {"range": "today"}, [TAG_PAYMENTS], compute)[0])
+
+        threads = [threading.Thread(target=worker, args=(caches[n % 2],)) for n in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)
+        release.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"total": 42}] * 8)
+        self.assertEqual(caches[0].get_or_compute("sales", {"range": "today"}, [TAG_PAYMENTS], compute), ({"total": 42}, True))
+
+    def test_invalidation_during_compute_orphans_the_result(self):
+        cache = ReportCache(RedisCacheBackend(InMemoryRedis()))
+
+        def compute():
+            cache.invalidate(TAG_ORDERS)
+            return {"stale": True}
+
+        cache.get_or_compute("orders", {}, [TAG_ORDERS], compute)
+        value, hit = cache.get_or_compute("orders", {}, [TAG_ORDERS], lambda: {"stale": False})
+        self.assertEqual((value, hit), ({"stale": False}, False))
+
+    def test_warm_refresher_fills_shared_cache_only(self):
+        _fresh_report_cache(self)
+        self.assertEqual(warm_report_cache(), 0)
+        _fresh_report_cache(self, RedisCacheBackend(InMemoryRedis()))
+        self.assertEqual(warm_report_cache(), 2)
+        self.assertEqual(self._get("/api/reports/dashboard", range="today")[0], "hit")
+        self.assertEqual(self._get("/api/reports/sales", range="today")[0], "hit")
+
+    def test_backend_errors_fall_back_to_computing(self):
+        cache = _fresh_report_cache(self, _BrokenBackend())
+        state, data = self._get("/api/reports/orders")
+        self.assertEqual((state, data), ("miss", {}))
+        self.assertEqual(cache.stats["errors"], 1)
+
+
+    def test_default_backend_is_shared_whenever_redis_is_configured(self):
+        with override_settings(REPORT_CACHE_BACKEND="auto", REPORT_CACHE_REDIS_URL="redis://cache:6379/0"):
+            self.assertTrue(_build_from_settings().shared)
+        with override_settings(REPORT_CACHE_BACKEND="auto", REPORT_CACHE_REDIS_URL=""):
+            self.assertFalse(_build_from_settings().shared)
+
+def _payment(when, amount, method="cash", customer=""):
+    p = PaymentTransaction.objects.create(order_id="", amount=Decimal(amount), method=method, customer=customer)
+    PaymentTransaction.objects.filter(id=p.id).update(created_at=when)
+    return p
+
+
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(email="jobs@example.com", name="Jobs", role="admin", status="active")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        overrides = override_settings(REPORT_JOB_ROOT=self.root, REPORT_JOB_CHUNK_DAYS=7)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        events = mock.patch("api.report_jobs.publish_event")
+        self.events = events.start()
+        self.addCleanup(events.stop)
+        self.today = local_midnight(timezone.now())
+
+    def _submit(self, kind, params, user=None):
+        return self.client.post(
+            "/api/reports/jobs",
+            data=json.dumps({"kind": kind, "params": params}),
+            content_type="application/json",
+            **auth_headers(user or self.user),
+        )
+
+    def test_sales_job_runs_in_chunks_and_serves_gzipped_result(self):
+        start = self.today - timedelta(days=20)
+        _payment(start + timedelta(hours=3), "100")
+        _payment(start + timedelta(days=9), "40", method="card")
+        _payment(self.today - timedelta(hours=2), "60")
+        rebuild_between(start, timezone.now())
+        spec = f"{start.isoformat()}..{(self.today - timedelta(microseconds=1)).isoformat()}"
+
+        with mock.patch("api.tasks.run_report_job.delay", side_effect=run_job) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self._submit("sales", {"range": spec})
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()["data"]["id"]
+        delay.assert_called_once_with(job_id)
+
+        detail = self.client.get(f"/api/reports/jobs/{job_id}", **auth_headers(self.user)).json()["data"]
+        self.assertEqual((detail["status"], detail["chunksTotal"], detail["chunksDone"]), ("done", 3, 3))
+        progress = [c.args[1]["chunksDone"] for c in self.events.call_args_list if c.args[0] == "reports.job_progress"]
+        self.assertEqual(progress, [0, 1, 2, 3])
+        self.assertEqual(self.events.call_args_list[-1].args[0], "reports.job_finished")
+
+        resp = self.client.get(f"/api/reports/jobs/{job_id}/result", HTTP_ACCEPT_ENCODING="gzip", **auth_headers(self.user))
+        self.assertEqual((resp.status_code, resp["Content-Encoding"]), (200, "gzip"))
+        data = json.loads(gzip.decompress(resp.content))["data"]
+        self.assertEqual(data, json.loads(json.dumps(_sales_data(spec))))
+        self.assertEqual(data["byMethod"], {"cash": 160.0, "card": 40.0})
+
+        plain = self.client.get(f"/api/reports/jobs/{job_id}/result", **auth_headers(self.user))
+        self.assertEqual(plain.json()["data"], data)
+
+    def test_identical_in_flight_specs_share_one_job(self):
+        sent = []
+        first, created = submit_job("sales", {"range": "7d"}, dispatch=sent.append)
+        again, created_again = submit_job("SALES", {"range": "7d", "ignored": 1}, dispatch=sent.append)
+        other, _ = submit_job("sales", {"range": "30d"}, dispatch=sent.append)
+        self.assertEqual((created, created_again, again.id), (True, False, first.id))
+        self.assertNotEqual(other.id, first.id)
+
+        with mock.patch("api.tasks.run_report_job.delay") as delay:
+            resp = self._submit("sales", {"range": "7d"})
+        self.assertEqual((resp.json()["data"]["id"], resp.json()["data"]["deduplicated"]), (str(first.id), True))
+        delay.assert_not_called()
+
+        self.assertEqual(run_job(str(first.id)), ReportJob.STATUS_DONE)
+        self.assertIsNone(run_job(str(first.id)))  # already claimed
+        fresh, created = submit_job("sales", {"range": "7d"}, dispatch=sent.append)
+        self.assertTrue(created)
+        self.assertNotEqual(fresh.id, first.id)
+
+    def test_customer_history_job_is_unbounded_newest_first_and_permission_checked(self):
+        old = _payment(self.today - timedelta(days=40), "10", customer="Maria Santos")
+        mid = _payment(self.today - timedelta(days=12), "20", customer="maria santos")
+        new = _payment(self.today - timedelta(hours=1), "30", customer="Maria S.")
+        _payment(self.today - timedelta(days=3), "99", customer="Jose")
+        job, _ = submit_job("customer_history", {"customer": "maria"}, dispatch=lambda _id: None)
+        run_job(str(job.id))
+        job.refresh_from_db()
+        self.assertGreaterEqual(job.chunks_total, 6)
+        resp = self.client.get(f"/api/reports/jobs/{job.id}/result", **auth_headers(self.user))
+        self.assertEqual([r["id"] for r in resp.json()["data"]], [str(new.id), str(mid.id), str(old.id)])
+
+        staff = AppUser.objects.create(email="staff-jobs@example.com", name="Staff", role="staff", status="active")
+        self.assertEqual(self._submit("customer_history", {"customer": "maria"}, user=staff).status_code, 403)
+        forbidden = self.client.get(f"/api/reports/jobs/{job.id}", **auth_headers(staff))
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual(self._submit("nope", {}).status_code, 400)
+
+    def test_failed_job_is_reported_and_frees_its_spec(self):
+        job, _ = submit_job("dashboard", {"range": "today"}, dispatch=lambda _id: None)
+        with mock.patch("api.views_reports._dashboard_data", side_effect=RuntimeError("boom")):
+            self.assertEqual(run_job(str(job.id)), ReportJob.STATUS_FAILED)
+        resp = self.client.get(f"/api/reports/jobs/{job.id}/result", **auth_headers(self.user))
+        self.assertEqual((resp.status_code, resp.json()["message"]), (409, "boom"))
+        self.assertTrue(submit_job("dashboard", {"range": "today"}, dispatch=lambda _id: None)[1])
+
+    def test_cleanup_removes_expired_results_and_fails_stale_jobs(self):
+        done, _ = submit_job("inventory", {}, dispatch=lambda _id: None)
+        run_job(str(done.id))
+        done.refresh_from_db()
+        path = os.path.join(self.root, done.result_file)
+        self.assertTrue(os.path.exists(path))
+        stuck, _ = submit_job("attendance", {}, dispatch=lambda _id: None)
+
+        ReportJob.objects.filter(id=done.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+        resp = self.client.get(f"/api/reports/jobs/{done.id}/result", **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 410)
+
+        counts = cleanup_jobs(now=timezone.now() + timedelta(hours=2))
+        self.assertEqual(counts, {"stale": 1, "removed": 1})
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ReportJob.objects.filter(id=done.id).exists())
+        stuck.refresh_from_db()
+        self.assertEqual((stuck.status, stuck.inflight_key), (ReportJob.STATUS_FAILED, None))
+
+
+class ReportExportTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(email="exports@example.com", name="Exports", role="admin", status="active")
+        self.now = timezone.now()
+
+    def _export(self, report, user=None, **params):
+        return self.client.get(f"/api/reports/{report}/export", params, **auth_headers(user or self.user))
+
+    def _csv(self, resp):
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        return list(csv.reader(io.StringIO(b"".join(resp.streaming_content).decode("utf-8"))))
+
+    def test_orders_export_walks_keyset_chunks_without_skipping_ties(self):
+        same = self.now - timedelta(hours=1)
+        numbers = [f"EXP-{n}" for n in range(5)]
+        for number in numbers:
+            _order(number, same, "10")
+        _order("EXP-OLD", self.now - timedelta(days=40), "99")
+        span = f"{(self.now - timedelta(days=1)).isoformat()}..{self.now.isoformat()}"
+        with mock.patch("api.report_exports.CHUNK_ROWS", 2):
+            with CaptureQueriesContext(connection) as ctx:
+                rows = self._csv(self._export("orders", range=span))
+        self.assertEqual(rows[0][:3], ["id", "orderNumber", "status"])
+        self.assertEqual(sorted(r[1] for r in rows[1:]), numbers)
+        expected = [str(i) for i in Order.objects.filter(created_at=same).order_by("id").values_list("id", flat=True)]
+        self.assertEqual([r[0] for r in rows[1:]], expected)
+        # Three pages of two rows plus authentication; the range excludes the old order
+        self.assertEqual(sum('FROM "order"' in q["sql"] for q in ctx.captured_queries), 3)
+        self.assertEqual(len(self._csv(self._export("orders"))), 7)
+
+    def test_streams_start_with_the_header_before_any_row_is_read(self):
+        _payment(self.now - timedelta(minutes=5), "12.50", customer="Ana")
+        resp = self._export("sales")
+        self.assertEqual(resp["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="sales-', resp["Content-Disposition"])
+        stream = iter(resp.streaming_content)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(next(stream), b"id,orderId,date,method,status,amount,customer,reference\r\n")
+        self.assertEqual(ctx.captured_queries, [])
+        rest = b"".join(stream).decode("utf-8")
+        self.assertIn(",cash,completed,12.50,Ana,", rest)
+
+    def test_customer_history_export_has_no_row_cap_and_is_newest_first(self):
+        for n in range(3):
+            _payment(self.now - timedelta(days=n * 30), str(n + 1), customer="Maria")
+        _payment(self.now, "9", customer="Jose")
+        with mock.patch("api.report_exports.CHUNK_ROWS", 1):
+            rows = self._csv(self._export("customer-history", customer="maria"))
+        self.assertEqual([r[5] for r in rows[1:]], ["1.00", "2.00", "3.00"])
+
+    def test_xlsx_export_is_a_valid_workbook(self):
+        InventoryItem.objects.create(name="Rice", category="Dry", quantity=Decimal("12.5"), unit="kg", min_stock=5)
+        InventoryItem.objects.create(name="Fish <fresh> & co", category="Fresh", quantity=3, unit="kg", min_stock=1)
+        resp = self._export("inventory", format="xlsx")
+        self.assertEqual(resp.status_code, 200)
+        book = zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content)))
+        self.assertIsNone(book.testzip())
+        sheet = book.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertEqual(len(re.findall("<row ", sheet)), 3)
+        self.assertIn("Fish &lt;fresh&gt; &amp; co", sheet)
+        self.assertIn("<c><v>12.5", sheet)
+        self.assertIn('name="Inventory"', book.read("xl/workbook.xml").decode("utf-8"))
+
+    def test_xlsx_rows_past_the_sheet_limit_continue_on_new_sheets(self):
+        book = zipfile.ZipFile(io.BytesIO(b"".join(stream_xlsx(["n"], ([i] for i in range(7)), title="T", max_rows=3))))
+        sheets = sorted(n for n in book.namelist() if n.startswith("xl/worksheets/"))
+        self.assertEqual(len(sheets), 4)
+        counts = [len(re.findall("<row ", book.read(n).decode("utf-8"))) for n in sheets]
+        self.assertEqual(counts, [3, 3, 3, 2])  # header + up to two rows each
+
+    def test_attendance_export_and_access_checks(self):
+        emp = Employee.objects.create(name="Lito")
+        AttendanceRecord.objects.create(employee=emp, date=self.now.date(), status="late")
+        rows = self._csv(self._export("staff-attendance"))
+        self.assertEqual((rows[1][2], rows[1][6]), ("Lito", "late"))
+
+        staff = AppUser.objects.create(email="staff-exp@example.com", name="Staff", role="staff", status="active")
+        self.assertEqual(self._export("sales", user=staff).status_code, 403)
+        self.assertEqual(self._export("dashboard", user=staff, format="csv").status_code, 200)
+        self.assertEqual(self._export("nope").status_code, 404)
+        self.assertEqual(self._export("sales", format="pdf").status_code, 400)
+
+
+class DashboardRecentSalesTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(email="recent@example.com", name="Recent", role="admin", status="active")
+        set_report_cache(False)
+        self.addCleanup(set_report_cache, None)
+        set_principal_cache(False)
+        self.addCleanup(set_principal_cache, None)
+        self.now = timezone.now()
+
+    def _recent(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/reports/dashboard", {"range": "today"}, **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()["data"]["recentSales"], len(ctx.captured_queries)
+
+    def test_latest_payment_method_is_resolved_in_one_query(self):
+        paid = _order("RS-1", self.now - timedelta(minutes=3), "50")
+        PaymentTransaction.objects.create(order_id=str(paid.id), amount=Decimal("50"), method="cash")
+        PaymentTransaction.objects.create(order_id=str(paid.id), amount=Decimal("50"), method="card")
+        legacy = _order("RS-2", self.now - timedelta(minutes=2), "20")
+        PaymentTransaction.objects.create(order_id="RS-2", amount=Decimal("20"), method="mobile")
+        unpaid = _order("RS-3", self.now - timedelta(minutes=1), "30")
+        Order.objects.filter(id=unpaid.id).update(payment_method="card")
+        Order.objects.filter(id=legacy.id).update(payment_method="cash")
+
+        recent, first = self._recent()
+        self.assertEqual(
+            [(r["id"], r["paymentMethod"]) for r in recent], [("RS-3", "card"), ("RS-2", "mobile"), ("RS-1", "card")]
+        )
+        for n in range(7):
+            o = _order(f"RS-{n + 4}", self.now - timedelta(seconds=50 - n), "10")
+            PaymentTransaction.objects.create(order_id=str(o.id), amount=Decimal("10"), method="cash")
+        recent, second = self._recent()
+        self.assertEqual(len(recent), 10)
+        self.assertEqual(first, second)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import AppUser, LoginOTP, PasswordResetCode, RefreshToken, ResetToken
+from api.tasks import sweep_auth_tokens
+from api.token_sweeper import count_dead, sweep_table
+
+
+class TokenSweeperTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="sweep@example.com", name="Sweep", role="staff", status="active")
+        self.now = timezone.now()
+        self.old = self.now - timedelta(days=3)
+        self.future = self.now + timedelta(days=3)
+
+    def _refresh(self, n, **fields):
+        fields.setdefault("expires_at", self.future)
+        return [
+            RefreshToken.objects.create(user=self.user, token_hash=f"{fields}-{i}", **fields)
+            for i in range(n)
+        ]
+
+    def test_deletes_only_dead_rows_in_batches(self):
+        self._refresh(5, expires_at=self.old)
+        self._refresh(2, revoked_at=self.old)
+        live = self._refresh(3)
+        # Revoked within the grace period: kept for now
+        recent = self._refresh(1, revoked_at=self.now - timedelta(minutes=5))
+
+        self.assertEqual(count_dead("refresh_token", grace_seconds=3600, now=self.now), 7)
+        with mock.patch("api.token_sweeper.time.sleep") as pause:
+            removed = sweep_table(
+                "refresh_token", batch_size=3, max_batches=0, grace_seconds=3600, pause_seconds=0.5, now=self.now
+            )
+        self.assertEqual(removed, 7)
+        # Batches of 3 + 3 + 1, pausing after each full one
+        self.assertEqual(pause.call_count, 2)
+        self.assertEqual(
+            set(RefreshToken.objects.values_list("id", flat=True)),
+            {t.id for t in live + recent},
+        )
+
+    def test_max_batches_bounds_one_run(self):
+        self._refresh(5, expires_at=self.old)
+        self.assertEqual(sweep_table("refresh_token", batch_size=2, max_batches=2, grace_seconds=0), 4)
+        self.assertEqual(sweep_table("refresh_token", batch_size=2, max_batches=2, grace_seconds=0), 1)
+
+    def test_rotated_children_survive_their_parent(self):
+        parent = self._refresh(1, revoked_at=self.old)[0]
+        child = RefreshToken.objects.create(
+            user=self.user, token_hash="child", expires_at=self.future, rotated_from=parent
+        )
+        self.assertEqual(sweep_table("refresh_token", grace_seconds=0), 1)
+        child.refresh_from_db()
+        self.assertIsNone(child.rotated_from_id)
+
+    def test_task_sweeps_every_table(self):
+        self._refresh(1, expires_at=self.old)
+        ResetToken.objects.create(user=self.user, token_hash="used", expires_at=self.future, used_at=self.old)
+        ResetToken.objects.create(user=self.user, token_hash="open", expires_at=self.future)
+        PasswordResetCode.objects.create(user=self.user, code_hash="x", expires_at=self.old)
+        used = PasswordResetCode.objects.create(user=self.user, code_hash="y", expires_at=self.future, used=True)
+        PasswordResetCode.objects.filter(id=used.id).update(created_at=self.old)
+        LoginOTP.objects.create(user=self.user, code_hash="z", expires_at=self.future, consumed_at=self.old)
+        LoginOTP.objects.create(user=self.user, code_hash="w", expires_at=self.future)
+
+        with mock.patch("api.tasks.CELERY_AVAILABLE", False):
+            counts = sweep_auth_tokens()
+        self.assertEqual(
+            counts,
+            {"refresh_token": 1, "reset_token": 1, "password_reset_code": 2, "login_otp": 1},
+        )
+        self.assertEqual(ResetToken.objects.count(), 1)
+        self.assertEqual(LoginOTP.objects.count(), 1)
+
+    def test_purge_command(self):
+        self._refresh(4, expires_at=self.old)
+        out = StringIO()
+        call_command("purge_auth_tokens", "--table", "refresh_token", "--dry-run", stdout=out)
+        self.assertIn("refresh_token: 4 dead row(s)", out.getvalue())
+        self.assertEqual(RefreshToken.objects.count(), 4)
+
+        out = StringIO()
+        call_command("purge_auth_tokens", "--batch-size", "1", stdout=out)
+        self.assertIn("refresh_token: removed 4 row(s)", out.getvalue())
+        self.assertEqual(RefreshToken.objects.count(), 0)
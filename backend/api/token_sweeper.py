@@ -0,0 +1,146 @@
+"""Delete dead auth tokens and codes in bounded primary-key batches.
+
+``RefreshToken``, ``ResetToken``, ``PasswordResetCode`` and ``LoginOTP`` rows
+are never needed again once they expire or are revoked, used or consumed.
+Each table is swept independently: ids of dead rows are read in primary-key
+order after the last id seen (so every batch continues where the previous
+one stopped instead of rescanning), and each batch is deleted in its own
+short transaction. Rows stay for ``TOKEN_SWEEP_GRACE_SECONDS`` after they
+die so recent security events can still be inspected.
+
+The scheduled task fans out one sweep per table (Celery workers run them in
+parallel) and caps each at ``TOKEN_SWEEP_MAX_BATCHES``; the
+``purge_auth_tokens`` command runs uncapped for one-off large purges.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone as dj_tz
+
+from .models import LoginOTP, PasswordResetCode, RefreshToken, ResetToken
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# table name -> (model, dead-row filter for a cutoff time)
+SWEEPS: Dict[str, Tuple[type, Callable[[datetime], Q]]] = {
+    RefreshToken._meta.db_table: (
+        RefreshToken,
+        lambda cutoff: Q(expires_at__lt=cutoff) | Q(revoked_at__lt=cutoff),
+    ),
+    ResetToken._meta.db_table: (
+        ResetToken,
+        lambda cutoff: Q(expires_at__lt=cutoff) | Q(used_at__lt=cutoff) | Q(revoked_at__lt=cutoff),
+    ),
+    PasswordResetCode._meta.db_table: (
+        PasswordResetCode,
+        # Used codes carry no timestamp; they are swept once their creation passes the cutoff
+        lambda cutoff: Q(expires_at__lt=cutoff) | Q(used=True, created_at__lt=cutoff),
+    ),
+    LoginOTP._meta.db_table: (
+        LoginOTP,
+        lambda cutoff: Q(expires_at__lt=cutoff) | Q(consumed_at__lt=cutoff),
+    ),
+}
+
+TABLES = tuple(SWEEPS)
+
+
+def _cutoff(now: Optional[datetime], grace_seconds: Optional[int]) -> datetime:
+    if grace_seconds is None:
+        grace_seconds = int(getattr(settings, "TOKEN_SWEEP_GRACE_SECONDS", 24 * 60 * 60))
+    return (now or dj_tz.now()) - timedelta(seconds=max(0, int(grace_seconds)))
+
+
+def _sweep(table: str) -> Tuple[type, Callable[[datetime], Q]]:
+    try:
+        return SWEEPS[table]
+    except KeyError:
+        raise ValueError(f"Unknown token table: {table}") from None
+
+
+def count_dead(table: str, *, grace_seconds: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    model, dead = _sweep(table)
+    return model.objects.filter(dead(_cutoff(now, grace_seconds))).count()
+
+
+def sweep_table(
+    table: str,
+    *,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    grace_seconds: Optional[int] = None,
+    pause_seconds: float = 0.0,
+    now: Optional[datetime] = None,
+) -> int:
+    """Delete dead rows of one table; returns how many were removed.
+
+    ``max_batches`` of ``None`` uses ``TOKEN_SWEEP_MAX_BATCHES``; ``0`` sweeps
+    until no dead rows are left.
+    """
+    model, dead = _sweep(table)
+    condition = dead(_cutoff(now, grace_seconds))
+    size = max(1, int(batch_size or getattr(settings, "TOKEN_SWEEP_BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+    if max_batches is None:
+        max_batches = int(getattr(settings, "TOKEN_SWEEP_MAX_BATCHES", 100))
+    label = model._meta.label
+
+    removed = batches = 0
+    last_pk = None
+    while not max_batches or batches < max_batches:
+        qs = model.objects.filter(condition)
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        pks = list(qs.order_by("pk").values_list("pk", flat=True)[:size])
+        if not pks:
+            break
+        with transaction.atomic():
+            _, per_model = model.objects.filter(condition, pk__in=pks).delete()
+        removed += per_model.get(label, 0)
+        batches += 1
+        last_pk = pks[-1]
+        if len(pks) < size:
+            break
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    return removed
+
+
+def _sweep_in_thread(table: str, options) -> int:
+    try:
+        return sweep_table(table, **options)
+    finally:
+        # Worker threads get their own connection; don't leave it open
+        connection.close()
+
+
+def sweep_tables(tables: Optional[Iterable[str]] = None, *, parallel: bool = False, **options) -> Dict[str, int]:
+    """Sweep several tables (all by default), optionally one thread per table."""
+    tables = list(tables or TABLES)
+    for table in tables:
+        _sweep(table)
+    if parallel and len(tables) > 1:
+        with ThreadPoolExecutor(max_workers=len(tables), thread_name_prefix="token-sweep") as pool:
+            counts = list(pool.map(lambda t: _sweep_in_thread(t, options), tables))
+        return dict(zip(tables, counts))
+    return {table: sweep_table(table, **options) for table in tables}
+
+
+__all__ = [
+    "SWEEPS",
+    "TABLES",
+    "count_dead",
+    "sweep_table",
+    "sweep_tables",
+]
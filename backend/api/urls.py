@@ -4,7 +4,6 @@ from . import views_password_reset as pr_views
 from . import views_verify as verify_views
 from . import views_menu as menu_views
 from . import views_users as user_views
-from . import views_face as face_views
 from . import views_logs as logs_views
 from . import views_notifications as notif_views
 from . import views_payments as pay_views
@@ -14,8 +13,8 @@ from . import views_inventory as inv_views
 from . import views_orders as order_views
 from . import views_reports as rpt_views
 from . import views_cash as cash_views
-from . import views_diag as diag_views
 from . import views_catering as catering_views
+from .lazy_views import lazy_view
 
 urlpatterns = [
     path("health/", auth_views.health, name="health"),
@@ -68,10 +67,10 @@ urlpatterns = [
     path("users/roles", user_views.user_roles, name="user_roles"),
     path("users/roles/<str:value>", user_views.user_role_config, name="user_role_config"),
 
-    # Face registration/login
-    path("auth/face-register", face_views.face_register, name="face_register"),
-    path("auth/face-login", face_views.face_login, name="face_login"),
-    path("auth/face-unregister", face_views.face_unregister, name="face_unregister"),
+    # Face registration/login (views_face loads NumPy, so it is imported on first request)
+    path("auth/face-register", lazy_view("views_face", "face_register"), name="face_register"),
+    path("auth/face-login", lazy_view("views_face", "face_login"), name="face_login"),
+    path("auth/face-unregister", lazy_view("views_face", "face_unregister"), name="face_unregister"),
 
     # Activity logs
     path("logs", logs_views.logs, name="logs"),
@@ -131,10 +130,16 @@ urlpatterns = [
     path("inventory/stock", inv_views.inventory_stock, name="inventory_stock"),
     path("inventory/expiring", inv_views.inventory_expiring, name="inventory_expiring"),
     path("inventory/receipts", inv_views.inventory_receipts, name="inventory_receipts"),
+    path("inventory/receipts/batch", inv_views.inventory_receipts_batch, name="inventory_receipts_batch"),
     path("inventory/consume", inv_views.inventory_consume, name="inventory_consume"),
     path("inventory/transfer", inv_views.inventory_transfer, name="inventory_transfer"),
+    path("inventory/transfer/batch", inv_views.inventory_transfer_batch, name="inventory_transfer_batch"),
     path("inventory/adjust", inv_views.inventory_adjust, name="inventory_adjust"),
     path("inventory/ledger", inv_views.inventory_ledger, name="inventory_ledger"),
+    path("inventory/ledger/export", inv_views.inventory_ledger_export, name="inventory_ledger_export"),
+    path("inventory/reorder-suggestions", inv_views.inventory_reorder_suggestions, name="inventory_reorder_suggestions"),
+    path("inventory/reconciliation", inv_views.inventory_reconciliation, name="inventory_reconciliation"),
+    path("inventory/reorder-suggestions/apply", inv_views.inventory_reorder_suggestions_apply, name="inventory_reorder_suggestions_apply"),
 
     # Catering events
     path("catering/events", catering_views.catering_events, name="catering_events"),
@@ -157,6 +162,10 @@ urlpatterns = [
     path("reports/orders", rpt_views.reports_orders, name="reports_orders"),
     path("reports/staff-attendance", rpt_views.reports_staff_attendance, name="reports_staff_attendance"),
     path("reports/customer-history", rpt_views.reports_customer_history, name="reports_customer_history"),
+    path("reports/<str:report>/export", rpt_views.report_export, name="report_export"),
+    path("reports/jobs", rpt_views.report_jobs, name="report_jobs"),
+    path("reports/jobs/<uuid:job_id>", rpt_views.report_job_detail, name="report_job_detail"),
+    path("reports/jobs/<uuid:job_id>/result", rpt_views.report_job_result, name="report_job_result"),
 
     # Cash handling
     path("cash/open", cash_views.cash_open, name="cash_open"),
@@ -165,15 +174,16 @@ urlpatterns = [
     path("cash/session", cash_views.cash_session, name="cash_session"),
 
     # Diagnostics
-    path("diagnostics/ping", diag_views.diag_ping, name="diag_ping"),
-    path("diagnostics/cash-drawer", diag_views.diag_cash_drawer, name="diag_cash_drawer"),
-    path("diagnostics/receipt", diag_views.diag_receipt, name="diag_receipt"),
+    path("diagnostics/ping", lazy_view("views_diag", "diag_ping"), name="diag_ping"),
+    path("diagnostics/cash-drawer", lazy_view("views_diag", "diag_cash_drawer"), name="diag_cash_drawer"),
+    path("diagnostics/receipt", lazy_view("views_diag", "diag_receipt"), name="diag_receipt"),
 ]
 
-# Diagnostics
+# Diagnostics (imported on first request; the receipt view renders PDFs)
 urlpatterns += [
-    path("diagnostics/ping", diag_views.diag_ping, name="diag_ping"),
-    path("diagnostics/media", diag_views.diag_media, name="diag_media"),
-    path("diagnostics/receipt", diag_views.diag_receipt, name="diag_receipt"),
-    path("diagnostics/cash-drawer", diag_views.diag_cash_drawer, name="diag_cash_drawer"),
+    path("diagnostics/ping", lazy_view("views_diag", "diag_ping"), name="diag_ping"),
+    path("diagnostics/media", lazy_view("views_diag", "diag_media"), name="diag_media"),
+    path("diagnostics/receipt", lazy_view("views_diag", "diag_receipt"), name="diag_receipt"),
+    path("diagnostics/cash-drawer", lazy_view("views_diag", "diag_cash_drawer"), name="diag_cash_drawer"),
+    path("diagnostics/password-hashing", lazy_view("views_diag", "diag_password_hashing"), name="diag_password_hashing"),
 ]
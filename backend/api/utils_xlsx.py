@@ -0,0 +1,178 @@
+"""Write-only XLSX produced as a byte stream.
+
+The workbook is a zip written to a non-seekable sink, so each entry uses a
+data descriptor instead of a patched header and nothing is ever rewound.
+Rows are serialized straight into the deflate stream of the open sheet entry;
+memory is bounded by the compressor window plus one flush buffer, and the
+first bytes (the zip local header) are available before any row is read.
+
+Strings are written inline (no shared-strings table), numbers as numbers and
+dates/times as ISO text, which keeps the writer stateless. A sheet that
+reaches Excel's row limit continues on a new sheet.
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import re
+import zipfile
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+MAX_ROWS = 1_048_576
+FLUSH_BYTES = 64 * 1024
+
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    "{sheets}"
+    "</Types>"
+)
+_SHEET_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    "<sheets>{sheets}</sheets></workbook>"
+)
+_WORKBOOK_SHEET = '<sheet name="{name}" sheetId="{n}" r:id="rId{n}"/>'
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    "{rels}</Relationships>"
+)
+_WORKBOOK_REL = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+class _Sink:
+    """Write-only file object collecting zip output until the generator drains it."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        if data:
+            self.parts.append(bytes(data))
+            self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self.parts)
+        self.parts, self.size = [], 0
+        return out
+
+
+def _cell(value: Any) -> str:
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, (_dt.datetime, _dt.date, _dt.time)):
+        value = value.isoformat()
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(n: int, values: Sequence[Any]) -> str:
+    return f'<row r="{n}">' + "".join(_cell(v) for v in values) + "</row>"
+
+
+def _sheet_name(title: str, n: int) -> str:
+    base = re.sub(r"[\[\]:*?/\\]", " ", title or "Sheet").strip()[:25] or "Sheet"
+    return escape(base if n == 1 else f"{base} ({n})")
+
+
+_START = object()
+
+
+def _chain_first(rows: Iterable[Sequence[Any]]) -> Iterator[Any]:
+    # The first sheet is opened (and its header sent) before ``rows`` is consumed
+    yield _START
+    yield from rows
+
+
+def stream_xlsx(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    *,
+    title: str = "Sheet",
+    max_rows: int = MAX_ROWS,
+    flush_bytes: int = FLUSH_BYTES,
+) -> Iterator[bytes]:
+    """Yield an XLSX workbook holding ``columns`` as a header row followed by ``rows``."""
+    sink = _Sink()
+    zf = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+    header = _row(1, columns)
+    sheets = 0
+    entry: Optional[Any] = None
+    used = max_rows
+    for values in _chain_first(rows):
+        if values is _START or used >= max_rows:
+            if entry is not None:
+                entry.write(_SHEET_TAIL.encode("utf-8"))
+                entry.close()
+            sheets += 1
+            entry = zf.open(f"xl/worksheets/sheet{sheets}.xml", mode="w")
+            entry.write((_SHEET_HEAD + header).encode("utf-8"))
+            used = 1
+            yield sink.drain()
+            if values is _START:
+                continue
+        used += 1
+        entry.write(_row(used, values).encode("utf-8"))
+        if sink.size >= flush_bytes:
+            yield sink.drain()
+    entry.write(_SHEET_TAIL.encode("utf-8"))
+    entry.close()
+
+    numbers = range(1, sheets + 1)
+    zf.writestr("[Content_Types].xml", _CONTENT_TYPES.format(sheets="".join(_SHEET_TYPE.format(n=n) for n in numbers)))
+    zf.writestr("_rels/.rels", _ROOT_RELS)
+    zf.writestr(
+        "xl/workbook.xml",
+        _WORKBOOK.format(sheets="".join(_WORKBOOK_SHEET.format(name=_sheet_name(title, n), n=n) for n in numbers)),
+    )
+    zf.writestr(
+        "xl/_rels/workbook.xml.rels",
+        _WORKBOOK_RELS.format(rels="".join(_WORKBOOK_REL.format(n=n) for n in numbers)),
+    )
+    zf.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+__all__ = ["MAX_ROWS", "stream_xlsx"]
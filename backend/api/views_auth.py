@@ -10,10 +10,9 @@ from django.conf import settings
 from django.db.utils import OperationalError, ProgrammingError
 from django.db import connection
 from django.utils import timezone as dj_timezone
-from django.contrib.auth.hashers import check_password
-import jwt
 import secrets
 import requests as _requests
+from asgiref.sync import sync_to_async
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +23,9 @@ from .views_common import (
     _lockout_check_and_touch,
     _safe_user_from_db,
     _maybe_seed_from_memory,
+    _request_auth,
+    _request_db_actor,
+    _hash_busy_response,
     _issue_jwt,
     _issue_jwt_from_dict,
     _issue_refresh_token_db,
@@ -39,6 +41,12 @@ from .views_common import (
     _issue_verify_token_from_db,
     _issue_verify_token_from_dict,
 )
+from .password_hashing import (
+    HashPoolBusy,
+    check_password_async,
+    check_password_bounded,
+    make_password_bounded,
+)
 from .utils_audit import record_audit
 from .utils_login_otp import (
     create_login_otp,
@@ -117,26 +125,12 @@ def health_db(request):
         }, status=500)
 
 
-@rate_limit(limit=7, window_seconds=60, key_fn=_login_rate_key)
-@require_http_methods(["POST"]) 
-def auth_login(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
-    email = (data.get("email") or "").lower().strip()
-    password = data.get("password") or ""
-    remember_raw = data.get("remember")
-    remember = False
-    if isinstance(remember_raw, bool):
-        remember = remember_raw
-    elif isinstance(remember_raw, (int, str)):
-        remember = str(remember_raw).lower() in {"1", "true", "yes", "on"}
-    exp_seconds = getattr(settings, "JWT_REMEMBER_EXP_SECONDS", 30 * 24 * 60 * 60) if remember else getattr(settings, "JWT_EXP_SECONDS", 3600)
+def _login_lookup(request, email, password, ip):
+    """Lockout and input checks plus the user lookup for ``auth_login``.
 
+    Returns ``(response, db_user)``; a response ends the login early.
+    """
     # Lockout pre-check
-    from .views_common import _client_ip
-    ip = _client_ip(request)
     locked, retry_after = _is_locked(email, ip)
     if locked:
         try:
@@ -154,7 +148,7 @@ def auth_login(request):
         resp = JsonResponse({"success": False, "message": "Too many attempts. Try again later."})
         resp.status_code = 423
         resp["Retry-After"] = str(max(1, int(retry_after)))
-        return resp
+        return resp, None
 
     # Basic input presence check (avoid unnecessary DB hits)
     if not email or not password:
@@ -164,7 +158,7 @@ def auth_login(request):
             resp = JsonResponse({"success": False, "message": "Too many attempts. Try again later."})
             resp.status_code = 423
             resp["Retry-After"] = str(max(1, int(retry_after)))
-            return resp
+            return resp, None
         try:
             record_audit(
                 request,
@@ -176,17 +170,42 @@ def auth_login(request):
             )
         except Exception:
             pass
-        return JsonResponse({"success": False, "message": "Invalid credentials"}, status=401)
+        return JsonResponse({"success": False, "message": "Invalid credentials"}, status=401), None
 
     # Try DB first
-    user_exists = False
     try:
         from .models import AppUser
         _maybe_seed_from_memory()
-        db_user = AppUser.objects.filter(email=email).first()
-        if db_user:
-            user_exists = True
-        if db_user and db_user.password_hash and password and check_password(password, db_user.password_hash):
+        return None, AppUser.objects.filter(email=email).first()
+    except (OperationalError, ProgrammingError) as e:
+        logger.exception(f"Database error during login for email={email}: {e}")
+        # Fallback to in-memory (disabled when DISABLE_INMEM_FALLBACK is true)
+        if getattr(settings, "DISABLE_INMEM_FALLBACK", False):
+            return (
+                JsonResponse(
+                    {
+                        "success": False,
+                        "message": "Service temporarily unavailable. Please try again later.",
+                    },
+                    status=503,
+                ),
+                None,
+            )
+    except Exception as e:
+        logger.exception(f"Unexpected error during login for email={email}: {e}")
+    return None, None
+
+
+def _login_complete(request, email, password, remember, exp_seconds, ip, db_user, password_ok, new_hash):
+    """Everything after the password check: status gates, OTP, in-memory fallback, failures."""
+    user_exists = db_user is not None
+    try:
+        if db_user is not None and password_ok:
+            if new_hash:
+                # Upgrade to the current hasher parameters unless the password changed meanwhile
+                from .models import AppUser
+                AppUser.objects.filter(id=db_user.id, password_hash=db_user.password_hash).update(password_hash=new_hash)
+                db_user.password_hash = new_hash
             status_l = (db_user.status or "").lower()
             safe_user = _safe_user_from_db(db_user)
             # Block deactivated accounts
@@ -397,6 +416,49 @@ def auth_login(request):
     return JsonResponse({"success": False, "message": "Invalid credentials"}, status=401)
 
 
+@rate_limit(limit=7, window_seconds=60, key_fn=_login_rate_key)
+@require_http_methods(["POST"]) 
+async def auth_login(request):
+    """Password login.
+
+    Lookups and bookkeeping run through ``sync_to_async``; the password check
+    runs on the bounded hash pool, so a login burst queues there (429 once it
+    is full) instead of holding request workers. Hashes made with outdated
+    hasher parameters are upgraded on success.
+    """
+    try:
+        data = json.loads(request.body.decode("utf-8") or "{}")
+    except Exception:
+        data = {}
+    email = (data.get("email") or "").lower().strip()
+    password = data.get("password") or ""
+    remember_raw = data.get("remember")
+    remember = False
+    if isinstance(remember_raw, bool):
+        remember = remember_raw
+    elif isinstance(remember_raw, (int, str)):
+        remember = str(remember_raw).lower() in {"1", "true", "yes", "on"}
+    exp_seconds = getattr(settings, "JWT_REMEMBER_EXP_SECONDS", 30 * 24 * 60 * 60) if remember else getattr(settings, "JWT_EXP_SECONDS", 3600)
+
+    from .views_common import _client_ip
+    ip = _client_ip(request)
+
+    early, db_user = await sync_to_async(_login_lookup)(request, email, password, ip)
+    if early is not None:
+        return early
+
+    password_ok, new_hash = False, None
+    if db_user is not None and db_user.password_hash and password:
+        try:
+            password_ok, new_hash = await check_password_async(password, db_user.password_hash)
+        except HashPoolBusy as exc:
+            return _hash_busy_response(exc)
+
+    return await sync_to_async(_login_complete)(
+        request, email, password, remember, exp_seconds, ip, db_user, password_ok, new_hash
+    )
+
+
 @rate_limit(limit=10, window_seconds=60, key_fn=_login_rate_key)
 @require_http_methods(["POST"]) 
 
@@ -613,27 +675,19 @@ def auth_logout(request):
 
 @require_http_methods(["GET"]) 
 def auth_me(request):
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
+    state = _request_auth(request)
+    if state.error == "missing":
         return JsonResponse({"success": False, "message": "Missing token"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except jwt.ExpiredSignatureError:
+    if state.error == "expired":
         return JsonResponse({"success": False, "message": "Token expired"}, status=401)
-    except Exception:
+    if state.payload is None:
         return JsonResponse({"success": False, "message": "Invalid token"}, status=401)
 
+    payload = state.payload
     user_id = str(payload.get("sub") or "")
     email = (payload.get("email") or "").lower().strip()
     try:
-        from .models import AppUser
-        _maybe_seed_from_memory()
-        u = None
-        if user_id:
-            u = AppUser.objects.filter(id=user_id).first()
-        if not u and email:
-            u = AppUser.objects.filter(email=email).first()
+        u = _request_db_actor(request)
         if not u:
             raise OperationalError("not found")
         return JsonResponse({"success": True, "user": _safe_user_from_db(u)})
@@ -951,7 +1005,6 @@ def resend_verification(request):
     return resp
 
 from django.db import transaction
-from django.contrib.auth.hashers import make_password
 from .views_common import _issue_emailverify_token_from_db, _issue_emailverify_token_from_dict, _now_iso
 from .emails import email_user_email_verification
 
@@ -993,6 +1046,11 @@ def auth_register(request):
                 "message": "Email already registered. Please use a different email or try logging in."
             }, status=400)
 
+        try:
+            password_hash = make_password_bounded(password) if password else ""
+        except HashPoolBusy as exc:
+            return _hash_busy_response(exc)
+
         # Create new user
         try:
             with transaction.atomic():
@@ -1002,7 +1060,7 @@ def auth_register(request):
                     role=role,
                     status="pending",
                     permissions=[],
-                    password_hash=make_password(password) if password else "",
+                    password_hash=password_hash,
                     email_verified=False,
                     phone=phone,
                 )
@@ -1155,16 +1213,18 @@ def reset_password(request):
             u = AppUser.objects.filter(email=email).first()
             if not u:
                 return JsonResponse({"success": False, "message": "Invalid token"}, status=400)
+            # Hash before consuming the token so a busy pool leaves it usable
+            u.password_hash = make_password_bounded(new_password)
             if rid:
                 rt = ResetToken.objects.filter(id=rid).first()
                 if rt and rt.is_active:
                     rt.used_at = dj_timezone.now()
                     rt.save(update_fields=["used_at"])
-            from django.contrib.auth.hashers import make_password
-            u.password_hash = make_password(new_password)
             u.save(update_fields=["password_hash"])
             _revoke_all_refresh_tokens(u)
             return JsonResponse({"success": True, "message": "Password reset successful"})
+        except HashPoolBusy as exc:
+            return _hash_busy_response(exc)
         except (OperationalError, ProgrammingError):
             pass
 
@@ -1176,13 +1236,14 @@ def reset_password(request):
         if not rt or not rt.is_active:
             raise OperationalError("not found")
         u = rt.user
-        from django.contrib.auth.hashers import make_password
-        u.password_hash = make_password(new_password)
+        u.password_hash = make_password_bounded(new_password)
         u.save(update_fields=["password_hash"])
         rt.used_at = dj_timezone.now()
         rt.save(update_fields=["used_at"])
         _revoke_all_refresh_tokens(u)
         return JsonResponse({"success": True, "message": "Password reset successful"})
+    except HashPoolBusy as exc:
+        return _hash_busy_response(exc)
     except (OperationalError, ProgrammingError):
         pass
 
@@ -1231,14 +1292,15 @@ def reset_password_code(request):
                 break
         if not ok:
             return JsonResponse({"success": False, "message": "Invalid or expired code"}, status=400)
-        from django.contrib.auth.hashers import make_password
-        u.password_hash = make_password(new_password)
+        u.password_hash = make_password_bounded(new_password)
         u.save(update_fields=["password_hash"])
         ok.used_at = dj_timezone.now()
         ok.save(update_fields=["used_at"])
         from .views_common import _revoke_all_refresh_tokens
         _revoke_all_refresh_tokens(u)
         return JsonResponse({"success": True, "message": "Password reset successful"})
+    except HashPoolBusy as exc:
+        return _hash_busy_response(exc)
     except (OperationalError, ProgrammingError):
         return JsonResponse({"success": False, "message": "Invalid or expired code"}, status=400)
 
@@ -1351,13 +1413,8 @@ def refresh_token(request):
 
 @require_http_methods(["POST"]) 
 def change_password(request):
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    payload = _request_auth(request).payload
+    if payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
@@ -1372,19 +1429,12 @@ def change_password(request):
     email = (payload.get("email") or "").lower().strip()
     user_id = str(payload.get("sub") or "")
     try:
-        from .models import AppUser
-        _maybe_seed_from_memory()
-        u = None
-        if user_id:
-            u = AppUser.objects.filter(id=user_id).first()
-        if not u and email:
-            u = AppUser.objects.filter(email=email).first()
+        u = _request_db_actor(request)
         if not u:
             raise OperationalError("not found")
-        if not u.password_hash or not current or not check_password(current, u.password_hash):
+        if not u.password_hash or not current or not check_password_bounded(current, u.password_hash)[0]:
             return JsonResponse({"success": False, "message": "Invalid current password"}, status=400)
-        from django.contrib.auth.hashers import make_password
-        u.password_hash = make_password(new)
+        u.password_hash = make_password_bounded(new)
         u.save(update_fields=["password_hash"])
         try:
             record_audit(
@@ -1398,6 +1448,8 @@ def change_password(request):
         except Exception:
             pass
         return JsonResponse({"success": True})
+    except HashPoolBusy as exc:
+        return _hash_busy_response(exc)
     except (OperationalError, ProgrammingError):
         pass
 
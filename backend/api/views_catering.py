@@ -153,7 +153,7 @@ def catering_events(request):
         return err
 
     if request.method == "GET":
-        if not (_has_permission(actor, "catering.view") or _has_permission(actor, "all")):
+        if not _has_permission(actor, "catering.view"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
         search = (request.GET.get("search") or request.GET.get("q") or "").strip()
@@ -199,7 +199,7 @@ def catering_events(request):
         data = [_serialize_event(evt, include_items=include_items) for evt in events]
         return JsonResponse({"success": True, "data": data})
 
-    if not (_has_permission(actor, "catering.manage") or _has_permission(actor, "all")):
+    if not _has_permission(actor, "catering.manage"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
     try:
@@ -296,11 +296,11 @@ def catering_event_detail(request, event_id):
         return JsonResponse({"success": False, "message": "Event not found"}, status=404)
 
     if request.method == "GET":
-        if not (_has_permission(actor, "catering.view") or _has_permission(actor, "all")):
+        if not _has_permission(actor, "catering.view"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
         return JsonResponse({"success": True, "data": _serialize_event(event, include_items=True)})
 
-    if not (_has_permission(actor, "catering.manage") or _has_permission(actor, "all")):
+    if not _has_permission(actor, "catering.manage"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
     if request.method == "DELETE":
@@ -424,7 +424,7 @@ def catering_event_menu_items(request, event_id):
     if not actor:
         return err
 
-    if not (_has_permission(actor, "catering.manage") or _has_permission(actor, "all")):
+    if not _has_permission(actor, "catering.manage"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
     try:
@@ -515,7 +515,7 @@ def catering_event_payment(request, event_id):
     if not actor:
         return err
 
-    if not (_has_permission(actor, "catering.manage") or _has_permission(actor, "all")):
+    if not _has_permission(actor, "catering.manage"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
     try:
@@ -589,7 +589,8 @@ def catering_event_payment(request, event_id):
         # Record payment transaction (if PaymentTransaction model is being used)
         try:
             from .models import PaymentTransaction
-            PaymentTransaction.objects.create(
+            from .sales_rollups import record_payment
+            payment = PaymentTransaction.objects.create(
                 order_id=str(event.id),
                 amount=amount,
                 method=payment_method,
@@ -605,6 +606,7 @@ def catering_event_payment(request, event_id):
                     "source": "catering",
                 }
             )
+            record_payment(payment)
         except Exception:
             pass  # PaymentTransaction is optional
 
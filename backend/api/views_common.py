@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import uuid
@@ -14,14 +15,13 @@ import re
 import hashlib
 import secrets
 
+from .jwt_tokens import sign_token, verify_token
+from .permissions import compile_role_masks, has_all, has_any
+
 # -----------------------------
 # Rate limit and lockout helpers
 # -----------------------------
 
-_RATE_BUCKETS = {}
-FAILED_LOGIN_TRACK = {}
-
-
 def _client_ip(request):
     xff = request.META.get("HTTP_X_FORWARDED_FOR")
     if xff:
@@ -48,59 +48,61 @@ def _email_rate_key(request):
 
 
 def _lockout_check_and_touch(email: str, ip: str, success: bool):
-    now = int(time.time())
-    key = (email or "", ip or "")
-    rec = FAILED_LOGIN_TRACK.get(key)
-    window = 10 * 60
-    lock_seconds = 10 * 60
-    threshold = 5
-
-    if rec and rec.get("locked_until", 0) > now:
-        return True, int(rec["locked_until"] - now)
-
-    if success:
-        if rec:
-            FAILED_LOGIN_TRACK.pop(key, None)
-        return False, 0
+    from .rate_limits import login_lockout
 
-    if not rec or now - rec.get("first", now) > window:
-        FAILED_LOGIN_TRACK[key] = {"first": now, "fail": 1, "locked_until": 0}
+    try:
+        return login_lockout().touch(email, ip, success)
+    except Exception:
         return False, 0
-    rec["fail"] = int(rec.get("fail", 0)) + 1
-    if rec["fail"] >= threshold:
-        rec["locked_until"] = now + lock_seconds
-        return True, lock_seconds
-    return False, 0
 
 
 def _is_locked(email: str, ip: str):
-    now = int(time.time())
-    key = (email or "", ip or "")
-    rec = FAILED_LOGIN_TRACK.get(key)
-    if rec and rec.get("locked_until", 0) > now:
-        return True, int(rec["locked_until"] - now)
-    return False, 0
+    from .rate_limits import login_lockout
+
+    try:
+        return login_lockout().locked(email, ip)
+    except Exception:
+        return False, 0
+
+
+def _too_many_requests(retry_after, message="Too many requests, slow down."):
+    resp = JsonResponse({"success": False, "message": message})
+    resp.status_code = 429
+    resp["Retry-After"] = str(max(1, int(retry_after)))
+    return resp
+
+
+def _rate_limited(request, limit, window_seconds, key_fn):
+    """429 response when ``request`` is over its limit, else None."""
+    from .rate_limits import check_rate
+
+    key_base = key_fn(request) if key_fn else _client_ip(request)
+    bucket_key = f"{key_base}:{request.path}:{request.method}:{window_seconds}:{limit}"
+    allowed, retry_after = check_rate(bucket_key, limit, window_seconds)
+    return None if allowed else _too_many_requests(retry_after)
 
 
 def rate_limit(limit=10, window_seconds=60, key_fn=None):
+    """Sliding-window limit per client (or ``key_fn``) and route, shared through the
+    configured ``RATE_LIMIT_BACKEND`` store. Works on sync and async views."""
     def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def _async_wrapped(request, *args, **kwargs):
+                from asgiref.sync import sync_to_async
+
+                limited = await sync_to_async(_rate_limited)(request, limit, window_seconds, key_fn)
+                if limited is not None:
+                    return limited
+                return await view_func(request, *args, **kwargs)
+
+            return _async_wrapped
+
         @functools.wraps(view_func)
         def _wrapped(request, *args, **kwargs):
-            now = time.time()
-            key_base = key_fn(request) if key_fn else _client_ip(request)
-            bucket_key = f"{key_base}:{request.path}:{request.method}:{window_seconds}:{limit}"
-            bucket = _RATE_BUCKETS.get(bucket_key, [])
-            threshold = now - window_seconds
-            bucket = [t for t in bucket if t > threshold]
-            if len(bucket) >= limit:
-                oldest = min(bucket)
-                retry_after = max(1, int(window_seconds - (now - oldest)))
-                resp = JsonResponse({"success": False, "message": "Too many requests, slow down."})
-                resp.status_code = 429
-                resp["Retry-After"] = str(retry_after)
-                return resp
-            bucket.append(now)
-            _RATE_BUCKETS[bucket_key] = bucket
+            limited = _rate_limited(request, limit, window_seconds, key_fn)
+            if limited is not None:
+                return limited
             return view_func(request, *args, **kwargs)
 
         return _wrapped
@@ -108,6 +110,13 @@ def rate_limit(limit=10, window_seconds=60, key_fn=None):
     return decorator
 
 
+def _hash_busy_response(exc):
+    """429 for a full password hashing queue (``password_hashing.HashPoolBusy``)."""
+    return _too_many_requests(
+        getattr(exc, "retry_after", 1), "Too many sign-in requests right now. Please retry shortly."
+    )
+
+
 # -----------------------------
 # Small utils and in-memory stores
 # -----------------------------
@@ -135,6 +144,11 @@ def _paginate(list_data, page, limit):
 
 
 def _safe_user_from_db(db_user):
+    # Principals served from the auth cache defer most columns; load them together
+    deferred = db_user.get_deferred_fields() - {"password_hash"} if hasattr(db_user, "get_deferred_fields") else ()
+    if deferred:
+        db_user.refresh_from_db(fields=sorted(deferred))
+
     # Normalize role to the supported set; map legacy/unknown roles to 'staff'
     role = (getattr(db_user, "role", "") or "").lower()
     if role not in {"admin", "manager", "staff"}:
@@ -167,13 +181,14 @@ def _safe_user_from_db(db_user):
 
 
 def _maybe_seed_from_memory():
+    """Copy in-memory USERS into an empty AppUser table; True when it created rows."""
     try:
         from django.conf import settings as dj_settings
         # Do not auto-seed from in-memory fixtures when fallbacks are disabled (prod/staging)
         if getattr(dj_settings, "DISABLE_INMEM_FALLBACK", False):
-            return
+            return False
         from .models import AppUser
-        if AppUser.objects.count() == 0 and USERS:
+        if USERS and not AppUser.objects.exists():
             for u in USERS:
                 try:
                     from django.contrib.auth.hashers import make_password
@@ -191,8 +206,10 @@ def _maybe_seed_from_memory():
                     )
                 except Exception:
                     continue
+            return True
     except Exception:
         pass
+    return False
 
 
 # -----------------------------
@@ -291,6 +308,9 @@ DEFAULT_ROLE_PERMISSIONS = {
 }
 
 
+compile_role_masks(DEFAULT_ROLE_PERMISSIONS)
+
+
 def _effective_permissions_from_role(role: str):
     role_l = (role or "").lower()
     return set(DEFAULT_ROLE_PERMISSIONS.get(role_l, set()))
@@ -313,29 +333,51 @@ def _effective_permissions(user_or_dict):
 
 
 def _has_permission(user_or_dict, perm_code: str) -> bool:
-    perms = _effective_permissions(user_or_dict)
-    return "all" in perms or perm_code in perms
+    return _has_all_permissions(user_or_dict, perm_code)
 
 
-def _actor_from_token(token: str):
-    if not token:
-        return None
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+def _has_any_permission(user_or_dict, *perm_codes: str) -> bool:
+    """True when the user holds at least one of ``perm_codes`` (one mask check)."""
+    return has_any(user_or_dict, perm_codes)
+
+
+def _has_all_permissions(user_or_dict, *perm_codes: str) -> bool:
+    """True when the user holds every one of ``perm_codes`` (one mask check)."""
+    return has_all(user_or_dict, perm_codes)
+
+
+def _db_actor_for_claims(sub: str, email: str):
+    """AppUser matching the token subject, else its email, in one query."""
+    from django.db.models import Q
+    from .models import AppUser
+
+    cond = Q()
+    user_id = None
+    if sub:
+        try:
+            user_id = uuid.UUID(sub)
+            cond |= Q(id=user_id)
+        except ValueError:
+            pass
+    if email:
+        cond |= Q(email=email)
+    if not cond:
         return None
+    rows = list(AppUser.objects.filter(cond)[:2])
+    return next((u for u in rows if u.id == user_id), None) or next(iter(rows), None)
 
+
+def _actor_from_payload(payload: dict):
     email = (payload.get("email") or "").lower().strip()
     sub = str(payload.get("sub") or "")
 
     try:
-        from .models import AppUser
-        _maybe_seed_from_memory()
-        actor = None
-        if sub:
-            actor = AppUser.objects.filter(id=sub).first()
-        if not actor and email:
-            actor = AppUser.objects.filter(email=email).first()
+        from .principal_cache import cached_principal
+
+        actor = cached_principal(payload, lambda: _db_actor_for_claims(sub, email))
+        # Dev fixtures are copied into an empty table on first use
+        if not actor and _maybe_seed_from_memory():
+            actor = _db_actor_for_claims(sub, email)
         if actor:
             return actor
     except Exception:
@@ -351,17 +393,82 @@ def _actor_from_token(token: str):
             return actor
     return None
 
+
+def _actor_from_token(token: str):
+    if not token:
+        return None
+    try:
+        payload = verify_token(token)
+    except Exception:
+        return None
+    return _actor_from_payload(payload)
+
+
+class RequestAuth:
+    """Bearer token state for one request: decoded once, actor loaded on first use.
+
+    ``error`` is "" for a valid token, else "missing", "expired" or "invalid".
+    """
+
+    __slots__ = ("token", "payload", "error", "_actor", "_resolved")
+
+    def __init__(self, token: str, payload, error: str):
+        self.token = token
+        self.payload = payload
+        self.error = error
+        self._actor = None
+        self._resolved = False
+
+    @property
+    def actor(self):
+        if not self._resolved:
+            self._actor = _actor_from_payload(self.payload) if self.payload else None
+            self._resolved = True
+        return self._actor
+
+
+def _request_auth(request) -> RequestAuth:
+    """The request's ``RequestAuth``, built on first call and reused by middleware,
+    view helpers and the DRF authentication class."""
+    request = getattr(request, "_request", request)  # DRF Request wraps the HttpRequest
+    state = getattr(request, "_api_auth", None)
+    if state is not None:
+        return state
+    parts = (request.META.get("HTTP_AUTHORIZATION", "") or "").split()
+    token = parts[1] if len(parts) == 2 and parts[0].lower() == "bearer" else ""
+    payload, error = None, ""
+    if not token:
+        error = "missing"
+    else:
+        try:
+            payload = verify_token(token)
+        except jwt.ExpiredSignatureError:
+            error = "expired"
+        except Exception:
+            error = "invalid"
+    state = RequestAuth(token, payload, error)
+    request._api_auth = state
+    return state
+
+
+def _request_actor(request):
+    """AppUser (or USERS dict fallback) for the request's bearer token, or None."""
+    return _request_auth(request).actor
+
+
+def _request_db_actor(request):
+    """The request's actor when it is an AppUser row, else None."""
+    actor = _request_actor(request)
+    return actor if hasattr(actor, "_meta") else None
+
+
 def _actor_from_request(request):
     """Extract the authenticated actor from Authorization header.
 
     Returns (actor, error_response) where actor is either AppUser instance or a
     dict from USERS fallback. If not authorized/invalid, returns (None, JsonResponse).
     """
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return None, JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
-    actor = _actor_from_token(token)
+    actor = _request_actor(request)
     if actor:
         return actor, None
     return None, JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
@@ -382,7 +489,7 @@ def _issue_jwt(db_user, exp_seconds=None):
         "iat": now,
         "exp": exp,
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _issue_jwt_from_dict(user_dict, exp_seconds=None):
@@ -397,7 +504,7 @@ def _issue_jwt_from_dict(user_dict, exp_seconds=None):
         "iat": now,
         "exp": exp,
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _issue_jwt_from_payload(payload):
@@ -410,40 +517,40 @@ def _issue_jwt_from_payload(payload):
         "iat": now,
         "exp": exp,
     }
-    return jwt.encode(new_payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(new_payload)
 
 
 def _issue_verify_token_from_db(db_user):
     now = int(time.time())
     exp = now + 15 * 60
     payload = {"typ": "verify", "sub": str(db_user.id), "email": db_user.email, "iat": now, "exp": exp}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _issue_verify_token_from_dict(user_dict):
     now = int(time.time())
     exp = now + 15 * 60
     payload = {"typ": "verify", "sub": str(user_dict.get("id")), "email": user_dict.get("email"), "iat": now, "exp": exp}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _issue_emailverify_token_from_db(db_user):
     now = int(time.time())
     exp = now + 24 * 60 * 60
     payload = {"typ": "emailverify", "sub": str(db_user.id), "email": db_user.email, "iat": now, "exp": exp}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _issue_emailverify_token_from_dict(user_dict):
     now = int(time.time())
     exp = now + 24 * 60 * 60
     payload = {"typ": "emailverify", "sub": str(user_dict.get("id")), "email": user_dict.get("email"), "iat": now, "exp": exp}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _decode_emailverify_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = verify_token(token)
         if payload.get("typ") != "emailverify":
             return None
         return payload
@@ -455,19 +562,19 @@ def _issue_pwdreset_token_from_db(db_user):
     now = int(time.time())
     exp = now + 15 * 60
     payload = {"typ": "pwdreset", "sub": str(db_user.id), "email": db_user.email, "iat": now, "exp": exp}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _issue_pwdreset_token_from_dict(user_dict):
     now = int(time.time())
     exp = now + 15 * 60
     payload = {"typ": "pwdreset", "sub": str(user_dict.get("id")), "email": user_dict.get("email"), "iat": now, "exp": exp}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _decode_pwdreset_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = verify_token(token)
         if payload.get("typ") != "pwdreset":
             return None
         return payload
@@ -479,12 +586,12 @@ def _issue_pwdcommit_token_from_db(db_user, reset_token_id: str, ttl_seconds: in
     now = int(time.time())
     exp = now + int(ttl_seconds)
     payload = {"typ": "pwdcommit", "sub": str(db_user.id), "email": db_user.email, "rid": str(reset_token_id), "iat": now, "exp": exp}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return sign_token(payload)
 
 
 def _decode_pwdcommit_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = verify_token(token)
         if payload.get("typ") != "pwdcommit":
             return None
         return payload
@@ -494,7 +601,7 @@ def _decode_pwdcommit_token(token: str):
 
 def _decode_verify_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = verify_token(token)
         if payload.get("typ") != "verify":
             return None
         return payload
@@ -504,12 +611,7 @@ def _decode_verify_token(token: str):
 
 def _decode_verify_token_ignore_exp(token: str):
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
-            options={"verify_exp": False},
-        )
+        payload = verify_token(token, verify_exp=False)
         if payload.get("typ") != "verify":
             return None
         return payload
@@ -624,6 +726,11 @@ def _revoke_all_refresh_tokens(db_user):
         RefreshToken.objects.filter(user=db_user, revoked_at__isnull=True).update(revoked_at=dj_timezone.now())
     except Exception:
         pass
+    try:
+        from .principal_cache import invalidate_principal
+        invalidate_principal(db_user)
+    except Exception:
+        pass
     try:
         sub = str(getattr(db_user, "id", ""))
         email = (getattr(db_user, "email", "") or "").lower().strip()
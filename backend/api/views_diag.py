@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
-from .views_common import _actor_from_request
+from .views_common import _actor_from_request, _has_permission
 from django.utils import timezone as dj_tz
 from django.core.files.storage import default_storage
 
@@ -97,4 +97,16 @@ def diag_receipt(request):
     return resp
 
 
-__all__ = ["diag_ping", "diag_cash_drawer", "diag_receipt", "diag_media"]
+@require_http_methods(["GET"])  # /diagnostics/password-hashing
+def diag_password_hashing(request):
+    """Queue depth and counters of the password hashing pool (admins only)."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _has_permission(actor, "all"):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    from .password_hashing import get_hash_pool
+    return JsonResponse({"success": True, "pool": get_hash_pool().snapshot()})
+
+
+__all__ = ["diag_ping", "diag_cash_drawer", "diag_receipt", "diag_media", "diag_password_hashing"]
@@ -10,10 +10,11 @@ Note: First run will download ~100MB of model weights automatically.
 import io
 import json
 import numpy as np
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone as dj_timezone
 
 from .views_common import (
@@ -22,7 +23,11 @@ from .views_common import (
     _issue_jwt,
     _issue_refresh_token_db,
     _issue_verify_token_from_db,
+    _request_auth,
+    _request_db_actor,
 )
+from .face_embeddings import embedding_to_json, pack_embedding
+from .face_index import get_face_index
 from .utils_audit import record_audit
 
 
@@ -111,74 +116,6 @@ def _extract_face_and_embedding(
         return None, {"error": "processing_failed", "message": f"Image processing failed: {str(e)}"}
 
 
-def _cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
-    """Calculate cosine similarity between two vectors."""
-    try:
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-
-        return float(dot_product / (norm1 * norm2))
-    except Exception:
-        return 0.0
-
-
-def _cosine_distance(vec1: np.ndarray, vec2: np.ndarray) -> float:
-    """Calculate cosine distance (1 - cosine_similarity)."""
-    return 1.0 - _cosine_similarity(vec1, vec2)
-
-
-def _euclidean_distance(vec1: np.ndarray, vec2: np.ndarray) -> float:
-    """Calculate Euclidean distance between two vectors."""
-    try:
-        return float(np.linalg.norm(vec1 - vec2))
-    except Exception:
-        return float('inf')
-
-
-def _find_best_match(
-    query_embedding: np.ndarray,
-    candidates: List[Tuple[any, np.ndarray]],
-    distance_metric: str = "cosine",
-    threshold: float = 0.4
-) -> Tuple[Optional[any], float]:
-    """Find best matching face template from candidates.
-
-    Args:
-        query_embedding: Query face embedding
-        candidates: List of (template_object, embedding_array) tuples
-        distance_metric: "cosine" or "euclidean"
-        threshold: Maximum distance for a match
-
-    Returns:
-        Tuple of (best_match_template, distance) or (None, inf) if no match
-    """
-    if not candidates:
-        return None, float('inf')
-
-    best_match = None
-    best_distance = float('inf')
-
-    for template, stored_embedding in candidates:
-        if distance_metric == "cosine":
-            distance = _cosine_distance(query_embedding, stored_embedding)
-        else:  # euclidean
-            distance = _euclidean_distance(query_embedding, stored_embedding)
-
-        if distance < best_distance:
-            best_distance = distance
-            best_match = template
-
-    # Check if best match meets threshold
-    if best_distance > threshold:
-        return None, best_distance
-
-    return best_match, best_distance
-
-
 # ------------------
 # API Endpoints
 # ------------------
@@ -193,15 +130,7 @@ def face_register(request):
 
     Stores DeepFace embedding and optional reference image.
     """
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
-
-    import jwt
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
@@ -235,18 +164,20 @@ def face_register(request):
         return JsonResponse({"success": False, "message": error_msg}, status=400)
 
     try:
-        from .models import AppUser, FaceTemplate
-        user = AppUser.objects.filter(id=payload.get("sub")).first()
+        from .models import FaceTemplate
+        user = _request_db_actor(request)
         if not user:
             return JsonResponse({"success": False, "message": "User not found"}, status=404)
 
-        # Convert embedding to JSON string
-        embedding_json = json.dumps(embedding_vec.tolist())
+        # Embedding stored as float32 bytes, plus the legacy JSON text for older readers (see face_embeddings)
+        embedding_bytes = pack_embedding(embedding_vec)
+        embedding_json = embedding_to_json(embedding_vec)
 
         # Create or update face template
         tpl, created = FaceTemplate.objects.get_or_create(
             user=user,
             defaults={
+                "embedding_vector": embedding_bytes,
                 "embedding": embedding_json,
                 "model_name": model_name,
                 "distance_metric": "cosine",
@@ -255,6 +186,7 @@ def face_register(request):
 
         if not created:
             # Update existing template
+            tpl.embedding_vector = embedding_bytes
             tpl.embedding = embedding_json
             tpl.model_name = model_name
             tpl.distance_metric = "cosine"
@@ -267,6 +199,7 @@ def face_register(request):
             pass
 
         tpl.save()
+        transaction.on_commit(lambda: get_face_index().upsert(tpl))
 
         try:
             record_audit(
@@ -349,10 +282,10 @@ def face_login(request):
     try:
         from .models import FaceTemplate
 
-        # Retrieve all face templates (filter by model for better performance)
-        templates = list(FaceTemplate.objects.select_related("user").filter(model_name=model_name))
+        index = get_face_index()
+        indexed, skipped = index.size(model_name)
 
-        if not templates:
+        if not indexed and not skipped:
             try:
                 record_audit(
                     request,
@@ -365,25 +298,16 @@ def face_login(request):
                 pass
             return JsonResponse({"success": False, "message": "No registered faces found"}, status=404)
 
-        # Prepare candidates (template, embedding_array)
-        candidates = []
-        for tpl in templates:
-            try:
-                stored_embedding = np.array(json.loads(tpl.embedding))
-                candidates.append((tpl, stored_embedding))
-            except Exception:
-                continue  # Skip corrupted embeddings
-
-        if not candidates:
+        if not indexed:
             return JsonResponse({"success": False, "message": "No valid face templates found"}, status=404)
 
-        # Find best match
-        best_match, distance = _find_best_match(
-            embedding_vec,
-            candidates,
-            distance_metric="cosine",
-            threshold=THRESHOLD
-        )
+        # Closest enrolled face (and the runner-up, to record how clear the match was)
+        matches = index.match(model_name, embedding_vec, k=2)
+        distance = matches[0].distance if matches else float("inf")
+        best_match = None
+        if distance <= THRESHOLD:
+            best_match = FaceTemplate.objects.select_related("user").filter(pk=matches[0].template_id).first()
+        runner_up = f", runner-up: {matches[1].distance:.4f}" if len(matches) > 1 else ""
 
         if not best_match:
             try:
@@ -457,7 +381,7 @@ def face_login(request):
                 user=user,
                 type="login",
                 action="Login success",
-                details=f"Face login with {model_name} (distance: {distance:.4f}, confidence: {metadata.get('confidence', 0):.2f})",
+                details=f"Face login with {model_name} (distance: {distance:.4f}{runner_up}, confidence: {metadata.get('confidence', 0):.2f})",
                 severity="info",
             )
         except Exception:
@@ -496,20 +420,12 @@ def face_unregister(request):
     Requires Authorization: Bearer <jwt>.
     Accepts POST or DELETE for convenience.
     """
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
 
-    import jwt
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-
-    try:
-        from .models import AppUser, FaceTemplate
-        user = AppUser.objects.filter(id=payload.get("sub")).first()
+        from .models import FaceTemplate
+        user = _request_db_actor(request)
         if not user:
             return JsonResponse({"success": False, "message": "User not found"}, status=404)
 
@@ -525,7 +441,9 @@ def face_unregister(request):
         except Exception:
             pass
 
+        tpl_id = tpl.pk
         tpl.delete()
+        transaction.on_commit(lambda: get_face_index().discard(tpl_id))
 
         try:
             record_audit(
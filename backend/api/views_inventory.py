@@ -1,27 +1,33 @@
 """Inventory endpoints: items CRUD, stock adjustments, low stock, activities."""
 
+import csv
 import json
 import logging
 from datetime import datetime
 from uuid import UUID
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone as dj_timezone
 
 from .events import publish_event
-from .views_common import _actor_from_request, _has_permission, _paginate, rate_limit
+from .views_common import _actor_from_request, _has_any_permission, _has_permission, _paginate, rate_limit
 from .inventory_services import (
     get_current_stock,
     record_receipt,
     adjust_stock,
     get_low_stock as svc_get_low_stock,
-    get_expiring_batches,
+    get_expiring_stock_page,
     consume_for_order,
     transfer_stock,
     get_recent_activity,
+    ReceiptLine,
+    TransferLine,
+    record_receipts,
+    transfer_stock_batch,
 )
+from .report_cache import TAG_INVENTORY, invalidate_reports
 
 
 logger = logging.getLogger(__name__)
@@ -104,7 +110,7 @@ def inventory_items(request):
             return JsonResponse({"success": False, "message": "Unable to fetch inventory items"}, status=500)
 
     # POST: Manager/Admin required (or explicit inventory.menu.manage)
-    if not (_has_permission(actor, "inventory.menu.manage") or _has_permission(actor, "inventory.update") or getattr(actor, "role", "").lower() in {"admin", "manager"}):
+    if not (_has_any_permission(actor, "inventory.menu.manage", "inventory.update") or getattr(actor, "role", "").lower() in {"admin", "manager"}):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import InventoryItem, Location
@@ -140,6 +146,7 @@ def inventory_items(request):
                 record_receipt(item=item, qty=qty, location=loc, actor=actor if hasattr(actor, "id") else None, reference_type="opening_balance")
         except Exception:
             pass
+        invalidate_reports(TAG_INVENTORY)
         # Return with authoritative quantity from ledger
         stock_map = get_current_stock([str(item.id)], location_id=None, as_of=None)
         item_payload = _safe_item(item, float(stock_map.get(str(item.id), 0)))
@@ -172,6 +179,7 @@ def inventory_item_detail(request, iid):
             item_id = str(item.id)
             item_name = item.name
             item.delete()
+            invalidate_reports(TAG_INVENTORY)
             publish_event("inventory.deleted", {"itemId": item_id, "name": item_name}, roles={"admin", "manager", "staff"})
             return JsonResponse({"success": True, "message": "Deleted"})
         data = json.loads(request.body.decode("utf-8") or "{}")
@@ -214,9 +222,11 @@ def inventory_item_detail(request, iid):
                     pass
         if changed:
             item.save()
+            invalidate_reports(TAG_INVENTORY)
             try:
                 from .models import InventoryActivity
-                InventoryActivity.objects.create(
+                from .inventory_feed import record_item_update
+                activity = InventoryActivity.objects.create(
                     item=item,
                     action="update",
                     quantity_change=0,
@@ -227,6 +237,7 @@ def inventory_item_detail(request, iid):
                     actor=actor if hasattr(actor, "id") else None,
                     meta={"changed": changes},
                 )
+                record_item_update(activity)
             except Exception:
                 pass
         # Return item with authoritative quantity
@@ -403,25 +414,43 @@ def inventory_expiring(request):
     if not actor:
         return err
     try:
-        from .models import InventoryItem
         days = int(request.GET.get("days") or 7)
         ids_param = request.GET.get("ingredient_ids") or request.GET.get("item_ids") or ""
         ids = [s for s in [x.strip() for x in ids_param.split(",")] if s]
         location_id = request.GET.get("location_id") or None
-        batches = get_expiring_batches(days, item_ids=ids or None, location_id=location_id)
+        try:
+            limit = int(request.GET.get("limit", 100) or 100)
+        except Exception:
+            limit = 100
+        page = get_expiring_stock_page(
+            days,
+            item_ids=ids or None,
+            location_id=location_id,
+            cursor=request.GET.get("cursor") or None,
+            limit=limit,
+        )
         data = []
-        for b in batches:
+        for row in page.rows:
+            b = row.batch
             data.append({
                 "id": str(b.id),
                 "itemId": str(b.item_id),
-                "itemName": getattr(b.item, "name", ""),
+                "itemName": getattr(row.item, "name", ""),
                 "lotCode": b.lot_code,
                 "expiryDate": b.expiry_date.isoformat() if b.expiry_date else None,
                 "receivedAt": b.received_at.isoformat() if b.received_at else None,
                 "supplier": b.supplier,
                 "unitCost": float(b.unit_cost or 0),
+                "locationId": str(row.location_id),
+                "locationCode": getattr(row.location, "code", None),
+                "qty": float(row.qty),
             })
-        return JsonResponse({"success": True, "data": data})
+        pagination = {
+            "limit": max(1, min(500, limit)),
+            "nextCursor": page.next_cursor,
+            "hasMore": page.next_cursor is not None,
+        }
+        return JsonResponse({"success": True, "data": data, "pagination": pagination})
     except Exception:
         return JsonResponse({"success": True, "data": []})
 
@@ -460,6 +489,117 @@ def inventory_receipts(request):
         return JsonResponse({"success": False, "message": "Failed to record receipt"}, status=500)
 
 
+_MAX_DOCUMENT_LINES = 500
+
+
+def _location_by_code(code):
+    from .models import Location
+    code = (code or "MAIN").strip() or "MAIN"
+    return Location.objects.filter(code=code).first() or Location.objects.create(code=code, name=code.title())
+
+
+def _document_lines(payload):
+    """Validate ``lines`` and load all referenced items with one query.
+
+    Returns ``(lines, items_by_id, error_response)``.
+    """
+    from .models import InventoryItem
+    lines = payload.get("lines")
+    if not isinstance(lines, list) or not lines:
+        return None, None, JsonResponse({"success": False, "message": "lines is required"}, status=400)
+    if len(lines) > _MAX_DOCUMENT_LINES:
+        return None, None, JsonResponse({"success": False, "message": f"At most {_MAX_DOCUMENT_LINES} lines per document"}, status=400)
+    ids = set()
+    for ln in lines:
+        try:
+            ids.add(str(UUID(str((ln or {}).get("itemId") or (ln or {}).get("item_id")))))
+        except Exception:
+            return None, None, JsonResponse({"success": False, "message": "Each line needs a valid itemId"}, status=400)
+    items = {str(i.id): i for i in InventoryItem.objects.filter(id__in=ids)}
+    missing = sorted(ids - set(items))
+    if missing:
+        return None, None, JsonResponse({"success": False, "message": "Item not found", "missing": missing}, status=404)
+    return lines, items, None
+
+
+@require_http_methods(["POST"]) 
+@rate_limit(limit=30, window_seconds=60)
+def inventory_receipts_batch(request):
+    """Goods-receipt document: many item lines posted in one transaction."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not (_has_permission(actor, "inventory.update") or getattr(actor, "role", "").lower() in {"admin", "manager", "staff"}):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+        lines, items, bad = _document_lines(payload)
+        if bad:
+            return bad
+        loc = _location_by_code(payload.get("location") or payload.get("locationCode"))
+        receipt_lines = []
+        for ln in lines:
+            batch = ln.get("batch") or {}
+            receipt_lines.append(ReceiptLine(
+                item=items[str(UUID(str(ln.get("itemId") or ln.get("item_id"))))],
+                qty=ln.get("qty") or ln.get("quantity") or 0,
+                batch_payload=batch or None,
+            ))
+        doc_id = str(payload.get("goodsReceiptId") or payload.get("reference") or "")
+        mvs = record_receipts(
+            receipt_lines,
+            location=loc,
+            actor=actor if hasattr(actor, "id") else None,
+            reference_id=doc_id,
+            idempotency_key=request.headers.get("Idempotency-Key") or None,
+        )
+        publish_event("inventory.receipt_recorded", {"goodsReceiptId": doc_id, "lines": len(mvs), "location": loc.code, "movementIds": [str(m.id) for m in mvs]}, roles={"admin", "manager", "staff"})
+        return JsonResponse({"success": True, "data": {"count": len(mvs), "movementIds": [str(m.id) for m in mvs]}})
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+    except Exception:
+        return JsonResponse({"success": False, "message": "Failed to record receipt"}, status=500)
+
+
+@require_http_methods(["POST"]) 
+@rate_limit(limit=30, window_seconds=60)
+def inventory_transfer_batch(request):
+    """Transfer manifest: many item lines between two locations in one transaction."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not (_has_permission(actor, "inventory.update") or getattr(actor, "role", "").lower() in {"admin", "manager"}):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+        lines, items, bad = _document_lines(payload)
+        if bad:
+            return bad
+        from_loc = _location_by_code(payload.get("fromLocation") or payload.get("from"))
+        to_loc = _location_by_code(payload.get("toLocation") or payload.get("to"))
+        transfer_lines = [
+            TransferLine(
+                item=items[str(UUID(str(ln.get("itemId") or ln.get("item_id"))))],
+                qty=ln.get("qty") or ln.get("quantity") or 0,
+            )
+            for ln in lines
+        ]
+        mvs = transfer_stock_batch(
+            transfer_lines,
+            from_location=from_loc,
+            to_location=to_loc,
+            actor=actor if hasattr(actor, "id") else None,
+            reference_id=str(payload.get("manifestId") or payload.get("reference") or ""),
+            idempotency_key=request.headers.get("Idempotency-Key") or None,
+        )
+        publish_event("inventory.transfer_recorded", {"itemIds": sorted(items), "from": from_loc.code, "to": to_loc.code, "movementIds": [str(m.id) for m in mvs]}, roles={"admin", "manager", "staff"})
+        return JsonResponse({"success": True, "data": {"count": len(mvs)}})
+    except ValueError as ve:
+        return JsonResponse({"success": False, "message": str(ve)}, status=400)
+    except Exception:
+        return JsonResponse({"success": False, "message": "Failed to transfer"}, status=500)
+
+
 @require_http_methods(["POST"]) 
 @rate_limit(limit=60, window_seconds=60)
 def inventory_adjust(request):
@@ -488,6 +628,33 @@ def inventory_adjust(request):
         return JsonResponse({"success": False, "message": "Failed to adjust"}, status=500)
 
 
+def _ledger_row(m, balance=None):
+    return {
+        "id": str(m.id),
+        "itemId": str(m.item_id),
+        "locationId": str(m.location_id),
+        "batchId": str(m.batch_id) if m.batch_id else None,
+        "type": m.movement_type,
+        "qty": float(m.qty or 0),
+        "balance": float(balance) if balance is not None else None,
+        "effectiveAt": m.effective_at.isoformat() if m.effective_at else None,
+        "recordedAt": m.recorded_at.isoformat() if m.recorded_at else None,
+        "referenceType": m.reference_type,
+        "referenceId": m.reference_id,
+        "reason": m.reason,
+    }
+
+
+def _ledger_params(request):
+    item_id = request.GET.get("item_id") or request.GET.get("itemId") or None
+    date_from = request.GET.get("from") or None
+    date_to = request.GET.get("to") or None
+    location_id = request.GET.get("location_id") or None
+    df = datetime.fromisoformat(date_from) if date_from else None
+    dt = datetime.fromisoformat(date_to) if date_to else None
+    return item_id, df, dt, location_id
+
+
 @require_http_methods(["GET"]) 
 @rate_limit(limit=120, window_seconds=60)
 def inventory_ledger(request):
@@ -495,36 +662,88 @@ def inventory_ledger(request):
     if not actor:
         return err
     try:
-        from .inventory_services import get_stock_ledger
-        item_id = request.GET.get("item_id") or request.GET.get("itemId")
+        from .inventory_services import get_stock_ledger_page
+        item_id, df, dt, location_id = _ledger_params(request)
         if not item_id:
             return JsonResponse({"success": False, "message": "item_id required"}, status=400)
-        date_from = request.GET.get("from") or None
-        date_to = request.GET.get("to") or None
-        location_id = request.GET.get("location_id") or None
-        df = datetime.fromisoformat(date_from) if date_from else None
-        dt = datetime.fromisoformat(date_to) if date_to else None
-        moves = get_stock_ledger(item_id=item_id, date_from=df, date_to=dt, location_id=location_id)
-        data = []
-        for m in moves:
-            data.append({
-                "id": str(m.id),
-                "itemId": str(m.item_id),
-                "locationId": str(m.location_id),
-                "batchId": str(m.batch_id) if m.batch_id else None,
-                "type": m.movement_type,
-                "qty": float(m.qty or 0),
-                "effectiveAt": m.effective_at.isoformat() if m.effective_at else None,
-                "recordedAt": m.recorded_at.isoformat() if m.recorded_at else None,
-                "referenceType": m.reference_type,
-                "referenceId": m.reference_id,
-                "reason": m.reason,
-            })
-        return JsonResponse({"success": True, "data": data})
+        try:
+            limit = int(request.GET.get("limit", 1000) or 1000)
+        except Exception:
+            limit = 1000
+        limit = max(1, min(1000, limit))
+        page = get_stock_ledger_page(
+            item_id=item_id,
+            date_from=df,
+            date_to=dt,
+            location_id=location_id,
+            cursor=request.GET.get("cursor") or None,
+            limit=limit,
+        )
+        data = [_ledger_row(m, bal) for m, bal in page.rows]
+        pagination = {"limit": limit, "nextCursor": page.next_cursor, "hasMore": page.next_cursor is not None}
+        return JsonResponse({"success": True, "data": data, "pagination": pagination})
     except Exception:
         return JsonResponse({"success": True, "data": []})
 
 
+class _EchoBuffer:
+    """File-like object for csv.writer that returns each row instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+_LEDGER_CSV_COLUMNS = [
+    "id", "itemId", "locationId", "batchId", "type", "qty", "balance",
+    "effectiveAt", "recordedAt", "referenceType", "referenceId", "reason",
+]
+
+
+@require_http_methods(["GET"]) 
+@rate_limit(limit=10, window_seconds=60)
+def inventory_ledger_export(request):
+    """Stream the full ledger (optionally per item/location/range) as CSV or NDJSON.
+
+    Rows are read in keyset-ordered chunks and written as they are produced,
+    so memory stays constant and the first bytes go out immediately.
+    """
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _has_any_permission(actor, "inventory.view", "reports.inventory.view"):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        item_id, df, dt, location_id = _ledger_params(request)
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Invalid date range"}, status=400)
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in {"csv", "ndjson"}:
+        return JsonResponse({"success": False, "message": "format must be csv or ndjson"}, status=400)
+    from .inventory_services import iter_stock_ledger
+    from .utils_cursor import decode_cursor
+    after = decode_cursor(request.GET.get("cursor") or None, 3)
+    rows = iter_stock_ledger(item_id=item_id, date_from=df, date_to=dt, location_id=location_id, after=after)
+
+    if fmt == "ndjson":
+        def _ndjson():
+            for m, bal in rows:
+                yield json.dumps(_ledger_row(m, bal)) + "\n"
+        resp = StreamingHttpResponse(_ndjson(), content_type="application/x-ndjson")
+    else:
+        def _csv():
+            buf = _EchoBuffer()
+            writer = csv.writer(buf)
+            yield writer.writerow(_LEDGER_CSV_COLUMNS)
+            for m, bal in rows:
+                r = _ledger_row(m, bal)
+                yield writer.writerow([r[c] if r[c] is not None else "" for c in _LEDGER_CSV_COLUMNS])
+        resp = StreamingHttpResponse(_csv(), content_type="text/csv")
+    stamp = dj_timezone.now().strftime("%Y%m%d%H%M%S")
+    resp["Content-Disposition"] = f'attachment; filename="stock-ledger-{stamp}.{fmt}"'
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
 @require_http_methods(["GET"]) 
 @rate_limit(limit=120, window_seconds=60)
 def inventory_recent_activity(request):
@@ -562,65 +781,57 @@ def inventory_recent_activity(request):
                 since_dt = datetime.fromisoformat(since)
             except Exception:
                 since_dt = None
-        rows = get_recent_activity(item_id=item_id, location_id=location_id, types=types or None, since=since_dt, page=page, limit=limit)
-        data = []
-        for m in rows:
-            data.append({
-                "id": str(m.id),
-                "itemId": str(m.item_id),
-                "itemName": getattr(m.item, "name", ""),
-                "itemUnit": getattr(m.item, "unit", None),
-                "locationId": str(m.location_id),
-                "locationCode": getattr(m.location, "code", None),
-                "batchId": str(m.batch_id) if m.batch_id else None,
-                "batchLot": getattr(m.batch, "lot_code", None) if m.batch_id else None,
-                "batchExpiry": m.batch.expiry_date.isoformat() if getattr(m, "batch", None) and m.batch.expiry_date else None,
-                "type": m.movement_type,
-                "qty": float(m.qty or 0),
-                "effectiveAt": m.effective_at.isoformat() if m.effective_at else None,
-                "recordedAt": m.recorded_at.isoformat() if m.recorded_at else None,
-                "referenceType": m.reference_type,
-                "referenceId": m.reference_id,
-                "reason": m.reason,
-                "actorId": str(m.actor_id) if m.actor_id else None,
-                "actorName": (getattr(m.actor, "name", None) or getattr(m.actor, "email", None) or None),
-            })
-        # Include non-stock item updates from InventoryActivity
-        try:
-            from .models import InventoryActivity
-            ia_qs = InventoryActivity.objects.select_related("item").filter(action="update")
-            if item_id:
-                ia_qs = ia_qs.filter(item_id=item_id)
-            ia_qs = ia_qs.order_by("-created_at")[:limit]
-            for a in ia_qs:
-                data.append({
-                    "id": str(a.id),
-                    "itemId": str(a.item_id),
-                    "itemName": getattr(a.item, "name", ""),
-                    "type": "ITEM_UPDATE",
-                    "qty": None,
-                    "effectiveAt": None,
-                    "recordedAt": a.created_at.isoformat() if a.created_at else None,
-                    "referenceType": "",
-                    "referenceId": "",
-                    "reason": a.reason,
-                    "actorId": str(a.actor_id) if a.actor_id else None,
-                    "actorName": (getattr(a.actor, "name", None) or getattr(a, "performed_by", None) or None),
-                    "meta": getattr(a, "meta", {}) or {},
-                })
-        except Exception:
-            pass
-        # Sort combined by recordedAt desc
-        def _key(x):
-            return x.get("recordedAt") or x.get("effectiveAt") or ""
-        try:
-            data.sort(key=_key, reverse=True)
-        except Exception:
-            pass
-        return JsonResponse({"success": True, "data": data, "pagination": {"page": page, "limit": limit, "total": None}})
+        feed = get_recent_activity(
+            item_id=item_id,
+            location_id=location_id,
+            types=types or None,
+            since=since_dt,
+            page=page,
+            limit=limit,
+            cursor=request.GET.get("cursor") or None,
+        )
+        data = [_feed_row(e) for e in feed.rows]
+        pagination = {
+            "page": page,
+            "limit": limit,
+            "total": feed.total,
+            "totalPages": max(1, (feed.total + limit - 1) // limit),
+            "nextCursor": feed.next_cursor,
+            "hasMore": feed.next_cursor is not None,
+        }
+        return JsonResponse({"success": True, "data": data, "pagination": pagination})
     except Exception:
         # Fallback: no activity yet
-        return JsonResponse({"success": True, "data": [], "pagination": {"page": 1, "limit": 50, "total": None}})
+        return JsonResponse({"success": True, "data": [], "pagination": {"page": 1, "limit": 50, "total": 0}})
+
+
+def _feed_row(e):
+    row = {
+        "id": str(e.source_id),
+        "itemId": str(e.item_id),
+        "itemName": getattr(e.item, "name", ""),
+        "type": e.type,
+        "qty": float(e.qty) if e.qty is not None else None,
+        "effectiveAt": e.effective_at.isoformat() if e.effective_at else None,
+        "recordedAt": e.recorded_at.isoformat() if e.recorded_at else None,
+        "referenceType": e.reference_type,
+        "referenceId": e.reference_id,
+        "reason": e.reason,
+        "actorId": str(e.actor_id) if e.actor_id else None,
+        "actorName": (getattr(e.actor, "name", None) or e.actor_name or None),
+    }
+    if e.kind == e.KIND_ITEM_UPDATE:
+        row["meta"] = e.meta or {}
+        return row
+    row.update({
+        "itemUnit": getattr(e.item, "unit", None),
+        "locationId": str(e.location_id) if e.location_id else None,
+        "locationCode": getattr(e.location, "code", None),
+        "batchId": str(e.batch_id) if e.batch_id else None,
+        "batchLot": getattr(e.batch, "lot_code", None) if e.batch_id else None,
+        "batchExpiry": e.batch.expiry_date.isoformat() if e.batch_id and e.batch.expiry_date else None,
+    })
+    return row
 
 
 @require_http_methods(["POST"]) 
@@ -687,6 +898,125 @@ def inventory_transfer(request):
         return JsonResponse({"success": False, "message": "Failed to transfer"}, status=500)
 
 
+def _can_manage_reorder(actor) -> bool:
+    return _has_permission(actor, "inventory.restock.manage") or getattr(actor, "role", "").lower() in {"admin", "manager"}
+
+
+def _suggestion_row(s):
+    return {
+        "id": str(s.id),
+        "itemId": str(s.item_id),
+        "itemName": getattr(s.item, "name", ""),
+        "locationId": str(s.location_id),
+        "locationCode": getattr(s.location, "code", None),
+        "method": s.method,
+        "historyDays": s.history_days,
+        "avgDailyDemand": float(s.avg_daily_demand),
+        "demandStd": float(s.demand_std),
+        "leadTimeDays": s.lead_time_days,
+        "safetyStock": float(s.safety_stock),
+        "suggestedReorderPoint": float(s.suggested_reorder_point),
+        "suggestedReorderQty": float(s.suggested_reorder_qty),
+        "status": s.status,
+        "computedAt": s.computed_at.isoformat() if s.computed_at else None,
+        "appliedAt": s.applied_at.isoformat() if s.applied_at else None,
+    }
+
+
+@require_http_methods(["GET"]) 
+@rate_limit(limit=120, window_seconds=60)
+def inventory_reorder_suggestions(request):
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _can_manage_reorder(actor):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        from .models import ReorderSuggestion
+        qs = ReorderSuggestion.objects.select_related("item", "location").order_by("-computed_at", "id")
+        status = (request.GET.get("status") or ReorderSuggestion.STATUS_PENDING).strip().lower()
+        if status != "all":
+            qs = qs.filter(status=status)
+        item_id = request.GET.get("itemId") or request.GET.get("item_id")
+        if item_id:
+            qs = qs.filter(item_id=item_id)
+        location_id = request.GET.get("locationId") or request.GET.get("location_id")
+        if location_id:
+            qs = qs.filter(location_id=location_id)
+        try:
+            page = max(1, int(request.GET.get("page", 1) or 1))
+        except Exception:
+            page = 1
+        try:
+            limit = max(1, min(200, int(request.GET.get("limit", 50) or 50)))
+        except Exception:
+            limit = 50
+        total = qs.count()
+        rows = qs[(page - 1) * limit:page * limit]
+        pagination = {
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "totalPages": max(1, (total + limit - 1) // limit),
+        }
+        return JsonResponse({"success": True, "data": [_suggestion_row(s) for s in rows], "pagination": pagination})
+    except Exception:
+        return JsonResponse({"success": False, "message": "Failed to load reorder suggestions"}, status=500)
+
+
+@require_http_methods(["POST"]) 
+@rate_limit(limit=30, window_seconds=60)
+def inventory_reorder_suggestions_apply(request):
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _can_manage_reorder(actor):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        from .inventory_forecast import apply_reorder_suggestions
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+        ids = payload.get("ids") or []
+        if not isinstance(ids, list) or not ids:
+            return JsonResponse({"success": False, "message": "ids is required"}, status=400)
+        try:
+            ids = [str(UUID(str(i))) for i in ids]
+        except Exception:
+            return JsonResponse({"success": False, "message": "Invalid suggestion id"}, status=400)
+        applied = apply_reorder_suggestions(ids, actor=actor if hasattr(actor, "id") else None)
+        publish_event("inventory.reorder_applied", {"ids": ids, "applied": applied}, roles={"admin", "manager"})
+        return JsonResponse({"success": True, "data": {"applied": applied}})
+    except Exception:
+        return JsonResponse({"success": False, "message": "Failed to apply reorder suggestions"}, status=500)
+
+
+@require_http_methods(["GET", "POST"]) 
+@rate_limit(limit=30, window_seconds=60)
+def inventory_reconciliation(request):
+    """Instrumentation for cached-quantity drift; POST starts a new run."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if getattr(actor, "role", "").lower() not in {"admin", "manager"}:
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        from .inventory_reconcile import reconciliation_report
+        if request.method == "POST":
+            from .tasks import CELERY_AVAILABLE, reconcile_inventory_quantities
+            payload = json.loads(request.body.decode("utf-8") or "{}")
+            repair = bool(payload.get("repair"))
+            if CELERY_AVAILABLE:
+                reconcile_inventory_quantities.delay(repair=repair)
+                return JsonResponse({"success": True, "data": {"queued": True}}, status=202)
+            reconcile_inventory_quantities(repair=repair)
+        try:
+            limit = max(1, min(500, int(request.GET.get("limit", 50) or 50)))
+        except Exception:
+            limit = 50
+        return JsonResponse({"success": True, "data": reconciliation_report(limit=limit)})
+    except Exception:
+        return JsonResponse({"success": False, "message": "Failed to load reconciliation"}, status=500)
+
+
 __all__ = [
     "inventory_items",
     "inventory_item_detail",
@@ -697,9 +1027,15 @@ __all__ = [
     "inventory_stock",
     "inventory_expiring",
     "inventory_receipts",
+    "inventory_receipts_batch",
+    "inventory_transfer_batch",
     "inventory_adjust",
     "inventory_ledger",
+    "inventory_ledger_export",
     "inventory_consume",
     "inventory_transfer",
     "inventory_recent_activity",
+    "inventory_reorder_suggestions",
+    "inventory_reorder_suggestions_apply",
+    "inventory_reconciliation",
 ]
@@ -24,7 +24,7 @@ from django.utils import timezone as dj_tz
 from django.utils.crypto import get_random_string
 
 from .events import publish_event
-from .views_common import _actor_from_request, _has_permission, rate_limit
+from .views_common import _actor_from_request, _has_any_permission, _has_permission, rate_limit
 
 
 logger = logging.getLogger(__name__)
@@ -958,6 +958,9 @@ def orders(request):
                 created_items.append(item)
 
             recalc_order_counters(o, created_items)
+            from .sales_rollups import record_order_placed
+
+            record_order_placed(o, created_items)
 
         order_payload = _safe_order(o)
         record_order_event(
@@ -1393,10 +1396,7 @@ def order_item_state(request, oid, item_id):
     actor, err = _actor_from_request(request)
     if not actor:
         return err
-    if not (
-        _has_permission(actor, "order.queue.handle")
-        or _has_permission(actor, "order.status.update")
-    ):
+    if not _has_any_permission(actor, "order.queue.handle", "order.status.update"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import Order
@@ -1553,6 +1553,7 @@ def order_item_state(request, oid, item_id):
                 auto_transition = desired
 
         if auto_transition and canonical_status(order.status) != auto_transition:
+            rollup_from_status = order.status
             order.status = auto_transition
             update_order_fields = ["status", "updated_at"]
             if auto_transition == "staged" and not order.handoff_code:
@@ -1561,6 +1562,9 @@ def order_item_state(request, oid, item_id):
                 )
                 update_order_fields.append("handoff_code")
             order.save(update_fields=update_order_fields)
+            from .sales_rollups import record_order_status_change
+
+            record_order_status_change(order, rollup_from_status)
             record_order_event(
                 order,
                 event_type="order.status_auto",
@@ -1868,6 +1872,10 @@ def order_status(request, oid):
             o.save(update_fields=update_fields)
         else:
             o.save(update_fields=["updated_at"])
+        if status_changed:
+            from .sales_rollups import record_order_status_change
+
+            record_order_status_change(o, previous_status)
 
         # Optional: decrement inventory on completion using simple recipe from MenuItem.ingredients
         if canonical_status(o.status) == "completed":
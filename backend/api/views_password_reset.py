@@ -11,12 +11,12 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.db.utils import OperationalError, ProgrammingError
 from django.utils import timezone as dj_timezone
 
-from .views_common import rate_limit, _email_rate_key, _revoke_all_refresh_tokens
+from .views_common import rate_limit, _email_rate_key, _hash_busy_response, _revoke_all_refresh_tokens
+from .password_hashing import HashPoolBusy, make_password_bounded
 from .utils_password_reset import (
     create_password_reset_code,
     verify_password_reset_code,
@@ -125,10 +125,12 @@ def password_reset_confirm(request):
         u = AppUser.objects.filter(id=uid).first()
         if not u:
             return JsonResponse({"success": False, "message": "Invalid or expired token"}, status=400)
-        u.password_hash = make_password(new_password)
+        u.password_hash = make_password_bounded(new_password)
         u.save(update_fields=["password_hash"])
         _revoke_all_refresh_tokens(u)
         return JsonResponse({"success": True, "message": "Password reset successful"})
+    except HashPoolBusy as exc:
+        return _hash_busy_response(exc)
     except (OperationalError, ProgrammingError):
         return JsonResponse({"success": False, "message": "Server error"}, status=500)
 
@@ -44,20 +44,17 @@ def _derive_catering_order_number(order_id: str) -> str:
 
 
 def _lookup_order_number(order_id, order_numbers=None):
+    """Order number for a payment's ``order_id``; pass ``order_numbers`` from
+    ``order_numbers_for`` when serializing many payments."""
     if not order_id:
         return ""
     key = str(order_id)
     if order_numbers and key in order_numbers:
         return order_numbers[key] or ""
     try:
-        from .models import Order
+        from .payment_lookup import order_numbers_for
 
-        return (
-            Order.objects.filter(id=key)
-            .values_list("order_number", flat=True)
-            .first()
-            or ""
-        )
+        return order_numbers_for([key])[key]
     except Exception:
         return ""
 
@@ -218,6 +215,9 @@ def order_payment(request, order_id: str):
             processed_by=actor if hasattr(actor, "id") else None,
             meta=({"idempotencyKey": idempo} if idempo else {}),
         )
+        from .sales_rollups import record_payment
+
+        record_payment(p)
         # Update the order's payment method for consistency
         order_number = ""
         try:
@@ -334,20 +334,15 @@ def payments_list(request):
         total = qs.count()
         start_i = max(0, (page - 1) * max(1, limit))
         end_i = start_i + max(1, limit)
-        slice_items = list(qs[start_i:end_i])
+        slice_items = list(qs.select_related("processed_by")[start_i:end_i])
         order_numbers = {}
         if slice_items:
-            order_ids = {str(x.order_id) for x in slice_items if x.order_id}
-            if order_ids:
-                try:
-                    from .models import Order
+            try:
+                from .payment_lookup import order_numbers_for
 
-                    order_numbers = {
-                        str(o.id): o.order_number or ""
-                        for o in Order.objects.filter(id__in=order_ids)
-                    }
-                except Exception:
-                    order_numbers = {}
+                order_numbers = order_numbers_for(x.order_id for x in slice_items)
+            except Exception:
+                order_numbers = {}
         items = [_serialize_db(x, order_numbers) for x in slice_items]
         return JsonResponse(
             {
@@ -388,10 +383,14 @@ def payment_refund(request, pid: str):
             return JsonResponse({"success": False, "message": "Not found"}, status=404)
         if p.status == PaymentTransaction.STATUS_REFUNDED:
             return JsonResponse({"success": True, "data": _serialize_db(p)})
+        previous_status = p.status
         p.status = PaymentTransaction.STATUS_REFUNDED
         p.refunded_at = dj_timezone.now()
         p.refunded_by = getattr(actor, "email", "") or ""
         p.save(update_fields=["status", "refunded_at", "refunded_by", "updated_at"])
+        from .sales_rollups import record_payment_status_change
+
+        record_payment_status_change(p, previous_status)
         try:
             from .utils_audit import record_audit
             record_audit(
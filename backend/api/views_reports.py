@@ -6,14 +6,15 @@ Focuses on read-only aggregation using existing models. Keep responses simple an
 from __future__ import annotations
 
 from datetime import datetime, timedelta
+import json
 import logging
-from collections import defaultdict
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone as dj_tz
-from django.db.models import Sum, Count, Q
 
-from .views_common import _actor_from_request, _has_permission
+from .report_cache import TAG_INVENTORY, TAG_ORDERS, TAG_PAYMENTS, get_report_cache
+from .reports_timeseries import DAY, HOUR
+from .views_common import _actor_from_request, _has_permission, rate_limit
 
 
 logger = logging.getLogger(__name__)
@@ -44,307 +45,215 @@ def _parse_range(val: str | None):
         return now - timedelta(days=1), now
 
 
-@require_http_methods(["GET"])  # /reports/dashboard
-def reports_dashboard(request):
-    """Aggregate dashboard statistics: sales, orders, popular items, recent sales."""
-    actor, err = _actor_from_request(request)
-    if not actor:
-        return err
-    if not _has_permission(actor, "reports.dashboard.view"):
-        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+DASHBOARD_TAGS = (TAG_ORDERS, TAG_PAYMENTS)
+SALES_TAGS = (TAG_PAYMENTS,)
+INVENTORY_TAGS = (TAG_INVENTORY,)
+ORDERS_TAGS = (TAG_ORDERS,)
 
-    try:
-        from .models import Order, OrderItem, PaymentTransaction, MenuItem
 
-        r = request.GET.get("range", "today")
-        start, end = _parse_range(r)
+def _cached_report(endpoint: str, params: dict, tags, build) -> JsonResponse:
+    """``{"success": True, "data": build()}``, served from the report cache when it is enabled."""
+    cache = get_report_cache()
+    if cache is None:
+        data, state = build(), "off"
+    else:
+        data, hit = cache.get_or_compute(endpoint, params, tags, build)
+        state = "hit" if hit else "miss"
+    resp = JsonResponse({"success": True, "data": data})
+    resp["X-Report-Cache"] = state
+    return resp
 
-        # Calculate yesterday's date range for comparisons
-        yesterday_start = start - timedelta(days=1)
-        yesterday_end = yesterday_start.replace(hour=23, minute=59, second=59, microsecond=999999)
 
-        # Get start of month for monthly sales (in Manila timezone)
-        now = dj_tz.now()
-        local_now = dj_tz.localtime(now)
-        month_start_local = local_now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        month_start = dj_tz.make_aware(month_start_local.replace(tzinfo=None), dj_tz.get_current_timezone())
-
-        # Daily sales (today)
-        daily_payments = PaymentTransaction.objects.filter(
-            created_at__gte=start,
-            created_at__lte=end,
-            status=PaymentTransaction.STATUS_COMPLETED
+def warm_report_cache() -> int:
+    """Recompute the "today" dashboard and sales entries in a shared report cache.
+
+    Run on a short beat interval (below the cache TTL) so the entries managers
+    poll never expire; a per-process cache is skipped since warming it from a
+    worker would not help the web processes.
+    """
+    cache = get_report_cache()
+    if cache is None or not cache.shared:
+        return 0
+    cache.refresh("dashboard", {"range": "today"}, DASHBOARD_TAGS, lambda: _dashboard_data("today"))
+    cache.refresh("sales", {"range": "today"}, SALES_TAGS, lambda: _sales_data("today"))
+    return 2
+
+
+def _dashboard_data(r: str) -> dict:
+    """Dashboard statistics for a ``range`` value: sales, orders, popular items, recent sales."""
+    from .models import Order, PaymentTransaction
+    from .payment_lookup import latest_payments
+    from .sales_rollups import ITEMS, ORDERS, PAYMENTS, rollup_series, window_totals
+
+    start, end = _parse_range(r)
+
+    # Calculate yesterday's date range for comparisons
+    yesterday_start = start - timedelta(days=1)
+    yesterday_end = yesterday_start.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+    # Get start of month for monthly sales (in Manila timezone)
+    now = dj_tz.now()
+    local_now = dj_tz.localtime(now)
+    month_start_local = local_now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_start = dj_tz.make_aware(month_start_local.replace(tzinfo=None), dj_tz.get_current_timezone())
+
+    # Sales, counts, series, categories and popular items are read from the
+    # hourly/daily rollups (api.sales_rollups); only sub-hour range edges
+    # touch the order/payment tables.
+    invalid = {"status": [Order.STATUS_CANCELLED, Order.STATUS_VOIDED]}
+
+    # Sales totals for today / yesterday / this month / last month in one pass
+    last_month_start = (month_start - timedelta(days=1)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last_month_end = month_start - timedelta(microseconds=1)
+    totals = window_totals(
+        PAYMENTS,
+        {
+            "daily": (start, end),
+            "yesterday": (yesterday_start, yesterday_end),
+            "monthly": (month_start, end),
+            "last_month": (last_month_start, last_month_end),
+        },
+        where={"status": PaymentTransaction.STATUS_COMPLETED},
+    )
+    daily_sales = totals["daily"]["amount"]
+    daily_sales_yesterday = totals["yesterday"]["amount"]
+    monthly_sales = totals["monthly"]["amount"]
+    monthly_sales_last_month = totals["last_month"]["amount"]
+
+    # Calculate percentage change for daily sales
+    daily_sales_change = 0.0
+    if daily_sales_yesterday > 0:
+        daily_sales_change = ((daily_sales - daily_sales_yesterday) / daily_sales_yesterday) * 100
+
+    # Calculate percentage change for monthly sales
+    monthly_sales_change = 0.0
+    if monthly_sales_last_month > 0:
+        monthly_sales_change = ((monthly_sales - monthly_sales_last_month) / monthly_sales_last_month) * 100
+
+    # Order counts for the range and yesterday in one pass
+    counts = window_totals(ORDERS, {"current": (start, end), "yesterday": (yesterday_start, yesterday_end)}, exclude=invalid)
+    order_count = counts["current"]["orders"]
+    order_count_yesterday = counts["yesterday"]["orders"]
+
+    # Calculate percentage change for order count
+    order_count_change = 0.0
+    if order_count_yesterday > 0:
+        order_count_change = ((order_count - order_count_yesterday) / order_count_yesterday) * 100
+
+    # Sales by time - hourly for a single day, daily for multi-day ranges,
+    # bucketed by Order.created_at in Manila time.
+    if (end - start).total_seconds() / 3600 <= 24:
+        sales_by_time = rollup_series(ORDERS, "revenue", start=start, count=24, unit=HOUR, exclude=invalid)
+        sales_by_time_yesterday = rollup_series(
+            ORDERS, "revenue", start=yesterday_start, count=24, unit=HOUR, exclude=invalid
         )
-        daily_sales = daily_payments.aggregate(total=Sum("amount"))["total"] or 0
-
-        # Yesterday's sales for comparison
-        daily_sales_yesterday = PaymentTransaction.objects.filter(
-            created_at__gte=yesterday_start,
-            created_at__lte=yesterday_end,
-            status=PaymentTransaction.STATUS_COMPLETED
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        # Calculate percentage change for daily sales
-        daily_sales_change = 0.0
-        if daily_sales_yesterday > 0:
-            daily_sales_change = ((daily_sales - daily_sales_yesterday) / daily_sales_yesterday) * 100
-
-        # Monthly sales
-        monthly_payments = PaymentTransaction.objects.filter(
-            created_at__gte=month_start,
-            created_at__lte=end,
-            status=PaymentTransaction.STATUS_COMPLETED
+    else:
+        num_days = int((end - start).total_seconds() / 86400) + 1
+        sales_by_time = rollup_series(ORDERS, "revenue", start=start, count=num_days, unit=DAY, exclude=invalid)
+        # Previous period of the same length for comparison
+        sales_by_time_yesterday = rollup_series(
+            ORDERS, "revenue", start=start - timedelta(days=num_days), count=num_days, unit=DAY, exclude=invalid
         )
-        monthly_sales = monthly_payments.aggregate(total=Sum("amount"))["total"] or 0
-
-        # Last month's sales for comparison
-        last_month_start = (month_start - timedelta(days=1)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        last_month_end = month_start - timedelta(seconds=1)
-        monthly_sales_last_month = PaymentTransaction.objects.filter(
-            created_at__gte=last_month_start,
-            created_at__lte=last_month_end,
-            status=PaymentTransaction.STATUS_COMPLETED
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        # Calculate percentage change for monthly sales
-        monthly_sales_change = 0.0
-        if monthly_sales_last_month > 0:
-            monthly_sales_change = ((monthly_sales - monthly_sales_last_month) / monthly_sales_last_month) * 100
-
-        # Order count for today
-        orders_today = Order.objects.filter(
-            created_at__gte=start,
-            created_at__lte=end
-        ).exclude(status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED])
-        order_count = orders_today.count()
-
-        # Yesterday's order count for comparison
-        orders_yesterday = Order.objects.filter(
-            created_at__gte=yesterday_start,
-            created_at__lte=yesterday_end
-        ).exclude(status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED])
-        order_count_yesterday = orders_yesterday.count()
-
-        # Calculate percentage change for order count
-        order_count_change = 0.0
-        if order_count_yesterday > 0:
-            order_count_change = ((order_count - order_count_yesterday) / order_count_yesterday) * 100
-
-        # Sales by time - hourly for today, daily for multi-day ranges
-        # Use Order.created_at for accurate sale timing (when order was placed)
-        # Send ISO timestamps to frontend for timezone conversion
-        sales_by_time = []
-        sales_by_time_yesterday = []
-
-        # Determine if this is a single-day or multi-day range
-        time_diff = (end - start).total_seconds() / 3600  # hours
-
-        if time_diff <= 24:  # Single day - use hourly breakdown
-            for hour in range(0, 24):  # Every 1 hour
-                # Create timezone-aware boundaries for accurate comparison
-                hour_start = start.replace(hour=hour, minute=0, second=0, microsecond=0)
-                hour_end = hour_start + timedelta(hours=1)
-
-                # Aggregate by Order.total_amount for actual sale values
-                # Filter out cancelled/voided orders for accurate reporting
-                hour_total = Order.objects.filter(
-                    created_at__gte=hour_start,
-                    created_at__lt=hour_end
-                ).exclude(
-                    status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-                ).aggregate(total=Sum("total_amount"))["total"] or 0
-
-                # Send ISO timestamp for frontend timezone conversion
-                sales_by_time.append({
-                    "time": hour_start.isoformat(),  # ISO format with timezone info
-                    "amount": float(hour_total)
-                })
-
-            # Yesterday's sales for comparison (same hourly breakdown)
-            for hour in range(0, 24):  # Every 1 hour
-                hour_start = yesterday_start.replace(hour=hour, minute=0, second=0, microsecond=0)
-                hour_end = hour_start + timedelta(hours=1)
-
-                hour_total = Order.objects.filter(
-                    created_at__gte=hour_start,
-                    created_at__lt=hour_end
-                ).exclude(
-                    status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-                ).aggregate(total=Sum("total_amount"))["total"] or 0
-
-                sales_by_time_yesterday.append({
-                    "time": hour_start.isoformat(),
-                    "amount": float(hour_total)
-                })
-        else:  # Multi-day range - use daily breakdown
-            # Calculate number of days in range
-            num_days = int((end - start).total_seconds() / 86400) + 1
-
-            # Get daily sales for the selected range
-            for day_offset in range(num_days):
-                day_start = start + timedelta(days=day_offset)
-                # Ensure we're working with start of day in local timezone
-                local_day_start = dj_tz.localtime(day_start)
-                day_start_normalized = local_day_start.replace(hour=0, minute=0, second=0, microsecond=0)
-                day_start_aware = dj_tz.make_aware(day_start_normalized.replace(tzinfo=None), dj_tz.get_current_timezone())
-                day_end = day_start_aware + timedelta(days=1)
-
-                day_total = Order.objects.filter(
-                    created_at__gte=day_start_aware,
-                    created_at__lt=day_end
-                ).exclude(
-                    status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-                ).aggregate(total=Sum("total_amount"))["total"] or 0
-
-                sales_by_time.append({
-                    "time": day_start_aware.isoformat(),
-                    "amount": float(day_total)
-                })
-
-            # For comparison, get the previous period (same number of days before)
-            comparison_start = start - timedelta(days=num_days)
-            for day_offset in range(num_days):
-                day_start = comparison_start + timedelta(days=day_offset)
-                local_day_start = dj_tz.localtime(day_start)
-                day_start_normalized = local_day_start.replace(hour=0, minute=0, second=0, microsecond=0)
-                day_start_aware = dj_tz.make_aware(day_start_normalized.replace(tzinfo=None), dj_tz.get_current_timezone())
-                day_end = day_start_aware + timedelta(days=1)
-
-                day_total = Order.objects.filter(
-                    created_at__gte=day_start_aware,
-                    created_at__lt=day_end
-                ).exclude(
-                    status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-                ).aggregate(total=Sum("total_amount"))["total"] or 0
-
-                sales_by_time_yesterday.append({
-                    "time": day_start_aware.isoformat(),
-                    "amount": float(day_total)
-                })
-
-        # Sales by category (from menu items in orders)
-        # Include all valid order statuses except cancelled/voided
-        category_sales = defaultdict(float)
-        order_items = OrderItem.objects.filter(
-            order__created_at__gte=start,
-            order__created_at__lte=end
-        ).exclude(
-            order__status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-        ).select_related('menu_item')
-
-        for item in order_items:
-            # Only count items with non-empty categories
-            category = getattr(item, 'category', None)
-            if category and category.strip():
-                category_sales[category] += float(item.price * item.quantity)
 
-        # Convert to list format, filter out any zero amounts
-        sales_by_category = [
-            {"category": cat, "amount": amount}
-            for cat, amount in category_sales.items()
-            if amount > 0
-        ]
+    periods = {"current": (start, end), "yesterday": (yesterday_start, yesterday_end)}
 
-        # Yesterday's sales by category for comparison
-        category_sales_yesterday = defaultdict(float)
-        order_items_yesterday = OrderItem.objects.filter(
-            order__created_at__gte=yesterday_start,
-            order__created_at__lte=yesterday_end
-        ).exclude(
-            order__status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-        ).select_related('menu_item')
-
-        for item in order_items_yesterday:
-            category = getattr(item, 'category', None)
+    # Sales by category and popular items (top 5 by quantity) from one
+    # pass over the item rollups for both periods; lines without a
+    # category only count towards popular items
+    by_line = window_totals(ITEMS, periods, group_by=("category", "item"), exclude=invalid)
+    category_sales = {"current": {}, "yesterday": {}}
+    item_counts = {"current": {}, "yesterday": {}}
+    for period, rows in by_line.items():
+        for (category, name), row in rows.items():
             if category and category.strip():
-                category_sales_yesterday[category] += float(item.price * item.quantity)
-
-        sales_by_category_yesterday = [
-            {"category": cat, "amount": amount}
-            for cat, amount in category_sales_yesterday.items()
-            if amount > 0
+                category_sales[period][category] = category_sales[period].get(category, 0) + row["revenue"]
+            item_counts[period][name] = item_counts[period].get(name, 0) + row["quantity"]
+    sales_by_category, sales_by_category_yesterday = [
+        [{"category": cat, "amount": float(amount)} for cat, amount in category_sales[period].items() if amount > 0]
+        for period in ("current", "yesterday")
+    ]
+    popular_items, popular_items_yesterday = [
+        [
+            {"name": name, "count": count}
+            for name, count in sorted(item_counts[period].items(), key=lambda kv: (-kv[1], kv[0]))[:5]
         ]
+        for period in ("current", "yesterday")
+    ]
+
+    # Recent sales (last 10 completed orders)
+    recent_orders = list(Order.objects.filter(
+        created_at__gte=start,
+        created_at__lte=end
+    ).exclude(
+        status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
+    ).order_by('-created_at')[:10])
+    # Latest payment of each order, one query for all of them
+    payments = latest_payments(recent_orders)
+
+    recent_sales = []
+    for order in recent_orders:
+        payment = payments.get(str(order.id))
+        payment_method = payment.method if payment else order.payment_method or "cash"
+
+        recent_sales.append({
+            "id": order.order_number,
+            "total": float(order.total_amount),
+            "date": order.created_at.isoformat() if order.created_at else None,
+            "paymentMethod": payment_method
+        })
 
-        # Popular items (most ordered today)
-        # Include all valid orders except cancelled/voided
-        popular_items_data = OrderItem.objects.filter(
-            order__created_at__gte=start,
-            order__created_at__lte=end
-        ).exclude(
-            order__status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-        ).values('item_name').annotate(
-            count=Sum('quantity')
-        ).order_by('-count')[:5]
-
-        popular_items = [
-            {"name": item["item_name"], "count": item["count"]}
-            for item in popular_items_data
-        ]
+    return {
+        "dailySales": float(daily_sales),
+        "dailySalesYesterday": float(daily_sales_yesterday),
+        "dailySalesChange": float(daily_sales_change),
+        "monthlySales": float(monthly_sales),
+        "monthlySalesLastMonth": float(monthly_sales_last_month),
+        "monthlySalesChange": float(monthly_sales_change),
+        "orderCount": order_count,
+        "orderCountYesterday": order_count_yesterday,
+        "orderCountChange": float(order_count_change),
+        "salesByTime": sales_by_time,
+        "salesByTimeYesterday": sales_by_time_yesterday,
+        "salesByCategory": sales_by_category,
+        "salesByCategoryYesterday": sales_by_category_yesterday,
+        "popularItems": popular_items,
+        "popularItemsYesterday": popular_items_yesterday,
+        "recentSales": recent_sales,
+        "dateRangeStart": start.isoformat(),
+        "dateRangeEnd": end.isoformat(),
+    }
 
-        # Yesterday's popular items for comparison
-        popular_items_yesterday_data = OrderItem.objects.filter(
-            order__created_at__gte=yesterday_start,
-            order__created_at__lte=yesterday_end
-        ).exclude(
-            order__status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-        ).values('item_name').annotate(
-            count=Sum('quantity')
-        ).order_by('-count')[:5]
-
-        popular_items_yesterday = [
-            {"name": item["item_name"], "count": item["count"]}
-            for item in popular_items_yesterday_data
-        ]
 
-        # Recent sales (last 10 completed orders)
-        recent_orders = Order.objects.filter(
-            created_at__gte=start,
-            created_at__lte=end
-        ).exclude(
-            status__in=[Order.STATUS_CANCELLED, Order.STATUS_VOIDED]
-        ).order_by('-created_at')[:10]
-
-        recent_sales = []
-        for order in recent_orders:
-            # Get payment method from associated payment
-            payment = PaymentTransaction.objects.filter(order_id=order.order_number).first()
-            payment_method = payment.method if payment else order.payment_method or "cash"
-
-            recent_sales.append({
-                "id": order.order_number,
-                "total": float(order.total_amount),
-                "date": order.created_at.isoformat() if order.created_at else None,
-                "paymentMethod": payment_method
-            })
-
-        return JsonResponse({
-            "success": True,
-            "data": {
-                "dailySales": float(daily_sales),
-                "dailySalesYesterday": float(daily_sales_yesterday),
-                "dailySalesChange": float(daily_sales_change),
-                "monthlySales": float(monthly_sales),
-                "monthlySalesLastMonth": float(monthly_sales_last_month),
-                "monthlySalesChange": float(monthly_sales_change),
-                "orderCount": order_count,
-                "orderCountYesterday": order_count_yesterday,
-                "orderCountChange": float(order_count_change),
-                "salesByTime": sales_by_time,
-                "salesByTimeYesterday": sales_by_time_yesterday,
-                "salesByCategory": sales_by_category,
-                "salesByCategoryYesterday": sales_by_category_yesterday,
-                "popularItems": popular_items,
-                "popularItemsYesterday": popular_items_yesterday,
-                "recentSales": recent_sales,
-                "dateRangeStart": start.isoformat(),
-                "dateRangeEnd": end.isoformat(),
-            }
-        })
+@require_http_methods(["GET"])  # /reports/dashboard
+def reports_dashboard(request):
+    """Aggregate dashboard statistics: sales, orders, popular items, recent sales."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _has_permission(actor, "reports.dashboard.view"):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+
+    try:
+        r = request.GET.get("range", "today")
+        return _cached_report("dashboard", {"range": r}, DASHBOARD_TAGS, lambda: _dashboard_data(r))
     except Exception as e:
         logger.exception("Failed to generate dashboard stats")
         return JsonResponse({"success": False, "message": f"Unable to generate dashboard stats: {str(e)}"}, status=500)
 
 
+def _sales_data(r: str | None) -> dict:
+    from .sales_rollups import PAYMENTS, window_totals
+
+    start, end = _parse_range(r)
+    by_method = window_totals(PAYMENTS, {"range": (start, end)}, group_by="method")["range"]
+    total = sum((row["amount"] for row in by_method.values()), 0)
+    return {
+        "total": float(total or 0),
+        "byMethod": {method: float(row["amount"] or 0) for method, row in by_method.items()},
+        "range": {"from": start.isoformat(), "to": end.isoformat()},
+    }
+
+
 @require_http_methods(["GET"])  # /reports/sales
 def reports_sales(request):
     actor, err = _actor_from_request(request)
@@ -353,28 +262,30 @@ def reports_sales(request):
     if not _has_permission(actor, "reports.sales.view"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
-        from django.db.models import Sum
-        from .models import PaymentTransaction
         r = request.GET.get("range")
-        start, end = _parse_range(r)
-        qs = PaymentTransaction.objects.filter(created_at__gte=start, created_at__lte=end)
-        total = qs.aggregate(total=Sum("amount")).get("total") or 0
-        by_method = (
-            qs.values("method").annotate(total=Sum("amount")).order_by()
-        )
-        return JsonResponse({
-            "success": True,
-            "data": {
-                "total": float(total or 0),
-                "byMethod": {row["method"]: float(row["total"] or 0) for row in by_method},
-                "range": {"from": start.isoformat(), "to": end.isoformat()},
-            },
-        })
+        return _cached_report("sales", {"range": r}, SALES_TAGS, lambda: _sales_data(r))
     except Exception:
         logger.exception("Failed to generate sales report")
         return JsonResponse({"success": False, "message": "Unable to generate sales report"}, status=500)
 
 
+def _inventory_row(i) -> dict:
+    return {
+        "id": str(i.id),
+        "name": i.name,
+        "category": i.category,
+        "quantity": float(i.quantity or 0),
+        "unit": i.unit,
+        "minStock": float(i.min_stock or 0),
+    }
+
+
+def _inventory_data() -> list:
+    from .models import InventoryItem
+
+    return [_inventory_row(i) for i in InventoryItem.objects.all().order_by("name")]
+
+
 @require_http_methods(["GET"])  # /reports/inventory
 def reports_inventory(request):
     actor, err = _actor_from_request(request)
@@ -383,25 +294,20 @@ def reports_inventory(request):
     if not _has_permission(actor, "reports.inventory.view"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
-        from .models import InventoryItem
-        items = InventoryItem.objects.all().order_by("name")
-        data = [
-            {
-                "id": str(i.id),
-                "name": i.name,
-                "category": i.category,
-                "quantity": float(i.quantity or 0),
-                "unit": i.unit,
-                "minStock": float(i.min_stock or 0),
-            }
-            for i in items
-        ]
-        return JsonResponse({"success": True, "data": data})
+        return _cached_report("inventory", {}, INVENTORY_TAGS, _inventory_data)
     except Exception:
         logger.exception("Failed to generate inventory report")
         return JsonResponse({"success": False, "message": "Unable to generate inventory report"}, status=500)
 
 
+def _orders_data() -> dict:
+    from django.db.models import Count
+    from .models import Order
+
+    rows = Order.objects.values("status").annotate(count=Count("id"))
+    return {r["status"]: r["count"] for r in rows}
+
+
 @require_http_methods(["GET"])  # /reports/orders
 def reports_orders(request):
     actor, err = _actor_from_request(request)
@@ -410,15 +316,18 @@ def reports_orders(request):
     if not _has_permission(actor, "reports.orders.view"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
-        from django.db.models import Count
-        from .models import Order
-        rows = Order.objects.values("status").annotate(count=Count("id"))
-        return JsonResponse({"success": True, "data": {r["status"]: r["count"] for r in rows}})
+        return _cached_report("orders", {}, ORDERS_TAGS, _orders_data)
     except Exception:
         logger.exception("Failed to generate orders report")
         return JsonResponse({"success": False, "message": "Unable to generate orders report"}, status=500)
 
 
+def _attendance_counts(qs) -> dict:
+    from django.db.models import Count
+
+    return {r["status"]: r["count"] for r in qs.values("status").annotate(count=Count("id"))}
+
+
 @require_http_methods(["GET"])  # /reports/staff-attendance
 def reports_staff_attendance(request):
     actor, err = _actor_from_request(request)
@@ -427,15 +336,27 @@ def reports_staff_attendance(request):
     if not _has_permission(actor, "reports.staff.view"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
-        from django.db.models import Count
         from .models import AttendanceRecord
-        rows = AttendanceRecord.objects.values("status").annotate(count=Count("id"))
-        return JsonResponse({"success": True, "data": {r["status"]: r["count"] for r in rows}})
+        return JsonResponse({"success": True, "data": _attendance_counts(AttendanceRecord.objects.all())})
     except Exception:
         logger.exception("Failed to generate staff attendance report")
         return JsonResponse({"success": False, "message": "Unable to generate staff attendance report"}, status=500)
 
 
+def _customer_history_row(p) -> dict:
+    return {
+        "id": str(p.id),
+        "orderId": p.order_id,
+        "orderNumber": str(p.order_id) if p.order_id else "",
+        "amount": float(p.amount or 0),
+        "method": p.method,
+        "status": p.status,
+        "date": p.created_at.isoformat() if p.created_at else None,
+        "reference": p.reference or "",
+        "customer": p.customer or "",
+    }
+
+
 @require_http_methods(["GET"])  # /reports/customer-history?customer=
 def reports_customer_history(request):
     actor, err = _actor_from_request(request)
@@ -450,27 +371,128 @@ def reports_customer_history(request):
         if customer:
             qs = qs.filter(customer__icontains=customer)
         qs = qs.order_by("-created_at")[:500]
-        data = [
-            {
-                "id": str(p.id),
-                "orderId": p.order_id,
-                "orderNumber": str(p.order_id) if p.order_id else "",
-                "amount": float(p.amount or 0),
-                "method": p.method,
-                "status": p.status,
-                "date": p.created_at.isoformat() if p.created_at else None,
-                "reference": p.reference or "",
-                "customer": p.customer or "",
-            }
-            for p in qs
-        ]
-        return JsonResponse({"success": True, "data": data})
+        return JsonResponse({"success": True, "data": [_customer_history_row(p) for p in qs]})
     except Exception:
         logger.exception("Failed to generate customer history report")
         return JsonResponse({"success": False, "message": "Unable to generate customer history report"}, status=500)
 
 
+@require_http_methods(["GET"])  # /reports/<report>/export?format=csv|xlsx
+@rate_limit(limit=30, window_seconds=60)
+def report_export(request, report):
+    """Stream a report as CSV or XLSX without loading its rows into memory."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    from .report_exports import EXPORTS, FORMATS, export_response
+
+    spec = EXPORTS.get(report)
+    if spec is None:
+        return JsonResponse({"success": False, "message": "Unknown report"}, status=404)
+    if not _has_permission(actor, spec.permission):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in FORMATS:
+        return JsonResponse({"success": False, "message": "format must be csv or xlsx"}, status=400)
+    return export_response(report, request.GET, fmt)
+
+
+def _actor_id(actor) -> str:
+    if hasattr(actor, "id"):
+        return str(actor.id)
+    return str(actor.get("id") or "") if isinstance(actor, dict) else ""
+
+
+@require_http_methods(["POST"])  # /reports/jobs
+@rate_limit(limit=30, window_seconds=60)
+def report_jobs(request):
+    """Submit a report spec ``{"kind": ..., "params": {...}}`` for background computation.
+
+    Returns 202 with the job; an identical spec already in flight is returned
+    instead of starting another one (``deduplicated: true``).
+    """
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    from .report_jobs import KINDS, job_row, normalize_spec, submit_job
+
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+        kind, _, _ = normalize_spec(payload.get("kind"), payload.get("params"))
+    except ValueError as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
+    except Exception:
+        return JsonResponse({"success": False, "message": "Invalid JSON"}, status=400)
+    if not _has_permission(actor, KINDS[kind].permission):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        from .tasks import CELERY_AVAILABLE, run_report_job
+        dispatch = run_report_job.delay if CELERY_AVAILABLE else run_report_job
+        job, created = submit_job(kind, payload.get("params"), requested_by=_actor_id(actor), dispatch=dispatch)
+        return JsonResponse({"success": True, "data": {**job_row(job), "deduplicated": not created}}, status=202)
+    except Exception:
+        logger.exception("Failed to submit report job")
+        return JsonResponse({"success": False, "message": "Unable to submit report job"}, status=500)
+
+
+def _job_for(request, job_id):
+    """``(job, None)`` when the actor may read the job's report, else ``(None, error response)``."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return None, err
+    from .models import ReportJob
+    from .report_jobs import KINDS
+
+    job = ReportJob.objects.filter(id=job_id).first()
+    if job is None:
+        return None, JsonResponse({"success": False, "message": "Report job not found"}, status=404)
+    # Jobs are shared between identical specs, so access follows the report permission
+    if not _has_permission(actor, KINDS[job.kind].permission):
+        return None, JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    return job, None
+
+
+@require_http_methods(["GET"])  # /reports/jobs/<id>
+def report_job_detail(request, job_id):
+    job, err = _job_for(request, job_id)
+    if err:
+        return err
+    from .report_jobs import job_row
+
+    return JsonResponse({"success": True, "data": job_row(job)})
+
+
+@require_http_methods(["GET"])  # /reports/jobs/<id>/result
+def report_job_result(request, job_id):
+    """The stored result, sent still gzipped when the client accepts it."""
+    job, err = _job_for(request, job_id)
+    if err:
+        return err
+    from .models import ReportJob
+    from .report_jobs import read_result
+
+    if job.status in (ReportJob.STATUS_QUEUED, ReportJob.STATUS_RUNNING):
+        return JsonResponse({"success": False, "message": "Report job is not finished"}, status=409)
+    if job.status == ReportJob.STATUS_FAILED:
+        return JsonResponse({"success": False, "message": job.error or "Report job failed"}, status=409)
+    blob = read_result(job)
+    if blob is None:
+        return JsonResponse({"success": False, "message": "Report result has expired"}, status=410)
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        resp = HttpResponse(blob, content_type="application/json")
+        resp["Content-Encoding"] = "gzip"
+    else:
+        import gzip
+        resp = HttpResponse(gzip.decompress(blob), content_type="application/json")
+    resp["Vary"] = "Accept-Encoding"
+    return resp
+
+
 __all__ = [
+    "report_export",
+    "report_jobs",
+    "report_job_detail",
+    "report_job_result",
     "reports_dashboard",
     "reports_sales",
     "reports_inventory",
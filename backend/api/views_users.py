@@ -7,12 +7,13 @@ from django.views.decorators.http import require_http_methods
 from django.db.utils import OperationalError, ProgrammingError
 from django.db import transaction
 from django.conf import settings
-import jwt
 from django.contrib.auth.hashers import make_password
 
 from .views_common import (
     USERS,
     _actor_from_request,
+    _request_auth,
+    _request_db_actor,
     _has_permission,
     _paginate,
     _maybe_seed_from_memory,
@@ -20,6 +21,7 @@ from .views_common import (
     _now_iso,
     DEFAULT_ROLE_PERMISSIONS,
 )
+from .principal_cache import invalidate_principal
 
 
 ROLES = {
@@ -47,22 +49,10 @@ ROLES = {
 @require_http_methods(["GET", "POST"]) 
 def users(request):
     # For any access to the users collection, require Admin role
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    # Determine actor role (from DB if available; otherwise rely on token claims if present)
-    actor_role = None
-    try:
-        from .models import AppUser
-        current = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
-        actor_role = (current.role or "").lower() if current else None
-    except Exception:
-        actor_role = (tp.get("role") or "").lower()
+    current = _request_db_actor(request)
+    actor_role = (current.role or "").lower() if current else None
     if actor_role != "admin":
         return JsonResponse(
             {
@@ -231,15 +221,9 @@ def user_detail(request, user_id):
         from .models import AppUser
         _maybe_seed_from_memory()
         # Require admin for all operations in user management, including viewing details
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
+        if _request_auth(request).payload is None:
             return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
-            return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
+        actor = _request_db_actor(request)
         if not actor or (actor.role or "").lower() != "admin":
             return JsonResponse(
                 {
@@ -257,6 +241,7 @@ def user_detail(request, user_id):
         if request.method == "DELETE":
             # Admin only delete (already validated above)
             db_user.delete()
+            invalidate_principal(user_id)
             return JsonResponse({"success": True, "message": "Deleted"})
 
         try:
@@ -281,6 +266,7 @@ def user_detail(request, user_id):
                 changed = True
         if changed:
             db_user.save()
+            invalidate_principal(db_user)
         return JsonResponse({"success": True, "data": _safe_user_from_db(db_user)})
     except (OperationalError, ProgrammingError):
         pass
@@ -318,15 +304,9 @@ def user_status(request, user_id):
         from .models import AppUser
         _maybe_seed_from_memory()
         # Only admin can change status
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
-            return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
+        if _request_auth(request).payload is None:
             return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
+        actor = _request_db_actor(request)
         if not actor or (actor.role or "").lower() != "admin":
             return JsonResponse(
                 {
@@ -347,6 +327,7 @@ def user_status(request, user_id):
             return JsonResponse({"success": False, "message": "Invalid status"}, status=400)
         db_user.status = status
         db_user.save(update_fields=["status"])
+        invalidate_principal(db_user)
         return JsonResponse({"success": True, "data": _safe_user_from_db(db_user)})
     except (OperationalError, ProgrammingError):
         pass
@@ -378,15 +359,9 @@ def user_role(request, user_id):
         from .models import AppUser
         _maybe_seed_from_memory()
         # Admin only
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
-            return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
+        if _request_auth(request).payload is None:
             return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
+        actor = _request_db_actor(request)
         if not actor or (actor.role or "").lower() != "admin":
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
         db_user = AppUser.objects.filter(id=user_id).first()
@@ -406,6 +381,7 @@ def user_role(request, user_id):
             db_user.save(update_fields=["role", "permissions"])
         else:
             db_user.save(update_fields=["role"])
+        invalidate_principal(db_user)
         return JsonResponse({"success": True, "data": _safe_user_from_db(db_user)})
     except (OperationalError, ProgrammingError):
         pass
@@ -436,18 +412,11 @@ def user_role_config(request, value):
     except Exception:
         payload = {}
     # Admin only can change role configs
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    try:
-        token = auth.split(" ", 1)[1].strip()
-        tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        from .models import AppUser
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
-        if not actor or (actor.role or "").lower() != "admin":
-            return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-    except Exception:
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
+    actor = _request_db_actor(request)
+    if not actor or (actor.role or "").lower() != "admin":
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     role_value = (value or payload.get("value") or "").lower()
     if not role_value:
         return JsonResponse({"success": False, "message": "Missing role value"}, status=400)
@@ -3,10 +3,8 @@
 import json
 from django.http import JsonResponse, FileResponse
 from django.views.decorators.http import require_http_methods
-from django.conf import settings
 from django.db.utils import OperationalError, ProgrammingError
 from django.utils import timezone as dj_timezone
-import jwt
 
 from .views_common import (
     _decode_verify_token,
@@ -19,6 +17,8 @@ from .views_common import (
     _require_admin_or_manager,
     _actor_from_request,
     _has_permission,
+    _request_auth,
+    _request_db_actor,
 )
 from .emails import (
     notify_admins_verification_submitted,
@@ -26,6 +26,7 @@ from .emails import (
     email_user_approved,
     email_user_rejected,
 )
+from .principal_cache import invalidate_principal
 
 
 @require_http_methods(["GET"]) 
@@ -105,6 +106,7 @@ def verify_upload(request):
         if (u.status or "").lower() != "active":
             u.status = "pending"
             u.save(update_fields=["status"]) 
+            invalidate_principal(u)
         ar.save()
         try:
             email_user_verification_received(u)
@@ -154,18 +156,12 @@ def verify_resend_token(request):
 
 @require_http_methods(["GET"]) 
 def verify_requests(request):
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _request_db_actor(request)
         # Require manager/admin role and explicit permission
         if not reviewer or not _require_admin_or_manager(reviewer) or not _has_permission(reviewer, "verify.review"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
@@ -222,18 +218,12 @@ def verify_requests(request):
 
 @require_http_methods(["GET"]) 
 def verify_headshot(request, request_id):
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _request_db_actor(request)
         # Require manager/admin role and explicit permission
         if not reviewer or not _require_admin_or_manager(reviewer) or not _has_permission(reviewer, "verify.review"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
@@ -261,13 +251,7 @@ def verify_approve(request):
     except Exception:
         data = {}
 
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     request_id = (data.get("requestId") or "").strip()
@@ -279,8 +263,8 @@ def verify_approve(request):
         return JsonResponse({"success": False, "message": "Missing requestId"}, status=400)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _request_db_actor(request)
         if not reviewer or not _require_admin_or_manager(reviewer):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
         ar = AccessRequest.objects.filter(id=request_id).select_related("user").first()
@@ -305,6 +289,7 @@ def verify_approve(request):
                 u.save(update_fields=["role", "status"])
         except Exception:
             u.save(update_fields=["role", "status"])
+        invalidate_principal(u)
         try:
             email_user_approved(u)
         except Exception:
@@ -323,18 +308,12 @@ def verify_reject(request):
     request_id = (data.get("requestId") or "").strip()
     note = (data.get("note") or "").strip()
 
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if _request_auth(request).payload is None:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _request_db_actor(request)
         if not reviewer or not _require_admin_or_manager(reviewer):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
         ar = AccessRequest.objects.filter(id=request_id).select_related("user").first()
@@ -350,6 +329,7 @@ def verify_reject(request):
         if (u.status or "").lower() != "active":
             u.status = "pending"
             u.save(update_fields=["status"])
+            invalidate_principal(u)
         try:
             email_user_rejected(u, note)
         except Exception:
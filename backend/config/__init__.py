@@ -1,9 +1,17 @@
-# This will make sure the app is always imported when
-# Django starts so that shared_task will use this app.
-try:
-    from .celery import app as celery_app
-    __all__ = ('celery_app',)
-except ImportError:
-    # Celery not available, skip
-    celery_app = None
-    __all__ = ()
+# The Celery app is loaded on first use rather than when Django starts: web workers only need it
+# when they enqueue a task (api.tasks imports config.celery), and `celery -A config` loads it itself.
+
+
+def __getattr__(name):
+    if name == "celery_app":
+        try:
+            from .celery import app
+        except ImportError:
+            # Celery not available
+            app = None
+        globals()["celery_app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ("celery_app",)
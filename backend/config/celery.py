@@ -46,6 +46,30 @@ app.conf.beat_schedule = {
         'task': 'api.tasks.cleanup_old_notifications',
         'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
     },
+    'refresh-reorder-suggestions': {
+        'task': 'api.tasks.refresh_reorder_suggestions',
+        'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
+    },
+    'reconcile-inventory-quantities': {
+        'task': 'api.tasks.reconcile_inventory_quantities',
+        'schedule': crontab(hour=1, minute=30),  # Daily at 1:30 AM
+    },
+    'rebuild-recent-sales-rollups': {
+        'task': 'api.tasks.rebuild_recent_sales_rollups',
+        'schedule': crontab(hour=0, minute=15),  # Daily at 12:15 AM
+    },
+    'warm-report-cache': {
+        'task': 'api.tasks.warm_report_cache',
+        'schedule': 30.0,  # Every 30 seconds (below REPORT_CACHE_TTL_SECONDS)
+    },
+    'cleanup-report-jobs': {
+        'task': 'api.tasks.cleanup_report_jobs',
+        'schedule': crontab(minute=20),  # Hourly at :20
+    },
+    'sweep-auth-tokens': {
+        'task': 'api.tasks.sweep_auth_tokens',
+        'schedule': crontab(minute=40),  # Hourly at :40
+    },
 }
 
 
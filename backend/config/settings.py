@@ -138,6 +138,11 @@ JWT_EXP_SECONDS = _jwt["JWT_EXP_SECONDS"]
 JWT_REMEMBER_EXP_SECONDS = _jwt["JWT_REMEMBER_EXP_SECONDS"]
 JWT_REFRESH_EXP_SECONDS = _jwt["JWT_REFRESH_EXP_SECONDS"]
 JWT_REFRESH_REMEMBER_EXP_SECONDS = _jwt["JWT_REFRESH_REMEMBER_EXP_SECONDS"]
+JWT_PRIVATE_KEY_FILE = _jwt["JWT_PRIVATE_KEY_FILE"]
+JWT_PUBLIC_KEY_FILES = _jwt["JWT_PUBLIC_KEY_FILES"]
+JWT_SIGNING_KID = _jwt["JWT_SIGNING_KID"]
+JWT_ACCEPT_SHARED_SECRET = _jwt["JWT_ACCEPT_SHARED_SECRET"]
+JWT_CLAIMS_CACHE_SIZE = _jwt["JWT_CLAIMS_CACHE_SIZE"]
 
 # Google OAuth
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "").strip()
@@ -206,6 +211,56 @@ WEBPUSH_VAPID_SUBJECT = os.getenv("WEBPUSH_VAPID_SUBJECT", "mailto:josephforment
 if not DEBUG:
     assert WEBPUSH_VAPID_PUBLIC_KEY and WEBPUSH_VAPID_PRIVATE_KEY, "Missing VAPID keys"
 
+# Inventory alerts: identical low-stock/expiry alerts are not re-sent within this window
+INVENTORY_ALERT_COOLDOWN_SECONDS = int(os.getenv("INVENTORY_ALERT_COOLDOWN_SECONDS", str(6 * 60 * 60)))
+
+# Report response cache: "auto" (shared redis when a redis URL is set, otherwise per process),
+# "redis", "local" (per process; single-process deployments only, since invalidations reach
+# just the worker that made the write) or "off"
+REPORT_CACHE_BACKEND = os.getenv("REPORT_CACHE_BACKEND", "auto").strip().lower()
+REPORT_CACHE_REDIS_URL = os.getenv("REPORT_CACHE_REDIS_URL") or os.getenv("REDIS_URL", "")
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", "60"))
+
+# Rate limits and login lockouts: "auto" (redis when a redis URL is set, otherwise per process),
+# "redis", "cache" (a Django cache alias; only shared if that alias is, and no CACHES are
+# configured here) or "local" (per process: with several workers each applies the full limit)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "auto").strip().lower()
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL") or REPORT_CACHE_REDIS_URL
+RATE_LIMIT_CACHE_ALIAS = os.getenv("RATE_LIMIT_CACHE_ALIAS", "default")
+LOGIN_LOCKOUT_THRESHOLD = int(os.getenv("LOGIN_LOCKOUT_THRESHOLD", "5"))
+LOGIN_LOCKOUT_WINDOW_SECONDS = int(os.getenv("LOGIN_LOCKOUT_WINDOW_SECONDS", str(10 * 60)))
+LOGIN_LOCKOUT_SECONDS = int(os.getenv("LOGIN_LOCKOUT_SECONDS", str(10 * 60)))
+
+# Authenticated-principal cache: "auto" (shared redis when a redis URL is set, otherwise off),
+# "redis", "local" (per process; single-worker deployments only, since other processes keep
+# serving an invalidated principal for up to the TTL) or "off"
+PRINCIPAL_CACHE_BACKEND = os.getenv("PRINCIPAL_CACHE_BACKEND", "auto").strip().lower()
+PRINCIPAL_CACHE_REDIS_URL = (
+    os.getenv("PRINCIPAL_CACHE_REDIS_URL") or os.getenv("REPORT_CACHE_REDIS_URL") or os.getenv("REDIS_URL", "")
+)
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "5"))
+
+# Password hashing pool: at most WORKERS hashes run at once (0 = min(4, CPUs)) and up to
+# MAX_QUEUE more wait; beyond that sign-in and password changes answer 429 with Retry-After
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+# Expired/revoked auth tokens and codes: kept for GRACE seconds after they die, then deleted
+# hourly in BATCH_SIZE primary-key batches, at most MAX_BATCHES per table per run
+TOKEN_SWEEP_GRACE_SECONDS = int(os.getenv("TOKEN_SWEEP_GRACE_SECONDS", str(24 * 60 * 60)))
+TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", "1000"))
+TOKEN_SWEEP_MAX_BATCHES = int(os.getenv("TOKEN_SWEEP_MAX_BATCHES", "100"))
+
+# Import time allowed for django.setup() plus the URLconf in a fresh worker (`manage.py import_budget`).
+# Measured at about 580 ms (best of 3); the default leaves ~35% headroom for slower CI hosts.
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "800"))
+
+# Background report jobs: gzipped results are kept for the TTL, then removed by cleanup
+REPORT_JOB_ROOT = os.getenv("REPORT_JOB_ROOT") or os.path.join(PRIVATE_MEDIA_ROOT, "report_jobs")
+REPORT_JOB_RESULT_TTL_SECONDS = int(os.getenv("REPORT_JOB_RESULT_TTL_SECONDS", str(24 * 60 * 60)))
+REPORT_JOB_STALE_SECONDS = int(os.getenv("REPORT_JOB_STALE_SECONDS", str(60 * 60)))
+REPORT_JOB_CHUNK_DAYS = int(os.getenv("REPORT_JOB_CHUNK_DAYS", "7"))
+
 # API version
 API_VERSION = os.getenv("API_VERSION", "1")
 
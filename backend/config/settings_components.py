@@ -90,9 +90,19 @@ def get_jwt():
         )
     except Exception:
         JWT_REFRESH_REMEMBER_EXP_SECONDS = 30 * 24 * 60 * 60
+    try:
+        JWT_CLAIMS_CACHE_SIZE = int(os.getenv("DJANGO_JWT_CLAIMS_CACHE_SIZE", "2048"))
+    except Exception:
+        JWT_CLAIMS_CACHE_SIZE = 2048
     return {
         "JWT_SECRET": JWT_SECRET,
         "JWT_ALGORITHM": JWT_ALGORITHM,
+        # Asymmetric algorithms (RS*/PS*/ES*/EdDSA): PEM files, see api/jwt_tokens.py
+        "JWT_PRIVATE_KEY_FILE": os.getenv("DJANGO_JWT_PRIVATE_KEY_FILE", "").strip(),
+        "JWT_PUBLIC_KEY_FILES": os.getenv("DJANGO_JWT_PUBLIC_KEY_FILES", "").strip(),
+        "JWT_SIGNING_KID": os.getenv("DJANGO_JWT_KID", "").strip(),
+        "JWT_ACCEPT_SHARED_SECRET": os.getenv("DJANGO_JWT_ACCEPT_SHARED_SECRET", "0") in {"1", "true", "True", "yes", "on"},
+        "JWT_CLAIMS_CACHE_SIZE": JWT_CLAIMS_CACHE_SIZE,
         "JWT_EXP_SECONDS": JWT_EXP_SECONDS,
         "JWT_REMEMBER_EXP_SECONDS": JWT_REMEMBER_EXP_SECONDS,
         "JWT_REFRESH_EXP_SECONDS": JWT_REFRESH_EXP_SECONDS,